@@ -0,0 +1,55 @@
+"""add_leadgen_tasks
+
+Revision ID: b5e9d2a7c4f1
+Revises: f4c2e8a1b6d9
+Create Date: 2025-09-25 11:18:52.604137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9d2a7c4f1'
+down_revision: Union[str, None] = 'f4c2e8a1b6d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Shared state of leadgen background tasks, so any worker can answer status polls
+    # and a task whose worker stops heartbeating can be resumed elsewhere
+    op.create_table('leadgen_tasks',
+        sa.Column('task_id', sa.String(64), nullable=False),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='running'),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('current_company', sa.Text(), nullable=True),
+        sa.Column('leads_found', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('csv_file', sa.String(500), nullable=True),
+        sa.Column('params', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('checkpoint', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('result', postgresql.JSONB(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('owner', sa.String(255), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('salesbot_tenant_id', sa.String(255), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('task_id')
+    )
+    # Stale-task sweeps only look at running rows
+    op.create_index('ix_leadgen_tasks_running_heartbeat', 'leadgen_tasks', ['heartbeat_at'],
+                    postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leadgen_tasks_running_heartbeat', table_name='leadgen_tasks')
+    op.drop_table('leadgen_tasks')
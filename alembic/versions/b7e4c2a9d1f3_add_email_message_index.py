@@ -0,0 +1,77 @@
+"""add_email_message_index
+
+Revision ID: b7e4c2a9d1f3
+Revises: ef4fa7b86584
+Create Date: 2025-09-15 10:12:33.481207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c2a9d1f3'
+down_revision: Union[str, None] = 'ef4fa7b86584'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per account/folder IMAP sync cursor
+    op.create_table('email_sync_state',
+        sa.Column('tenant_id', postgresql.UUID(), nullable=False),
+        sa.Column('account_email', sa.String(255), nullable=False),
+        sa.Column('folder', sa.String(255), nullable=False),
+        sa.Column('uidvalidity', sa.BigInteger(), nullable=True),
+        sa.Column('highest_uid', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tenant_id', 'account_email', 'folder')
+    )
+
+    # Local index of message headers and snippets
+    op.create_table('email_messages',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(), nullable=False),
+        sa.Column('account_email', sa.String(255), nullable=False),
+        sa.Column('folder', sa.String(255), nullable=False),
+        sa.Column('uidvalidity', sa.BigInteger(), nullable=False),
+        sa.Column('uid', sa.BigInteger(), nullable=False),
+        sa.Column('message_id', sa.Text(), nullable=True),
+        sa.Column('in_reply_to', sa.Text(), nullable=True),
+        sa.Column('references_header', sa.Text(), nullable=True),
+        sa.Column('subject', sa.Text(), nullable=True),
+        sa.Column('from_addr', sa.Text(), nullable=True),
+        sa.Column('to_addr', sa.Text(), nullable=True),
+        sa.Column('cc_addr', sa.Text(), nullable=True),
+        sa.Column('participants', postgresql.ARRAY(sa.Text()), nullable=False, server_default='{}'),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('direction', sa.String(10), nullable=True),
+        sa.Column('snippet', sa.Text(), nullable=True),
+        sa.Column('body_text', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('tenant_id', 'account_email', 'folder', 'uidvalidity', 'uid',
+                            name='uq_email_messages_mailbox_uid')
+    )
+
+    op.create_index('ix_email_messages_tenant_folder_sent_at', 'email_messages',
+                    ['tenant_id', 'folder', sa.text('sent_at DESC')])
+    op.create_index('ix_email_messages_participants', 'email_messages', ['participants'],
+                    postgresql_using='gin')
+    op.create_index('ix_email_messages_message_id', 'email_messages', ['tenant_id', 'message_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_messages_message_id', table_name='email_messages')
+    op.drop_index('ix_email_messages_participants', table_name='email_messages')
+    op.drop_index('ix_email_messages_tenant_folder_sent_at', table_name='email_messages')
+    op.drop_table('email_messages')
+    op.drop_table('email_sync_state')
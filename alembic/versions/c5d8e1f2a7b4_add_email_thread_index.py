@@ -0,0 +1,78 @@
+"""add_email_thread_index
+
+Revision ID: c5d8e1f2a7b4
+Revises: b7e4c2a9d1f3
+Create Date: 2025-09-18 16:41:05.219934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8e1f2a7b4'
+down_revision: Union[str, None] = 'b7e4c2a9d1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One row per conversation with denormalised list-view stats
+    op.create_table('email_threads',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(), nullable=False),
+        sa.Column('normalized_subject', sa.Text(), nullable=True),
+        sa.Column('subject', sa.Text(), nullable=True),
+        sa.Column('participants', postgresql.ARRAY(sa.Text()), nullable=False, server_default='{}'),
+        sa.Column('accounts', postgresql.ARRAY(sa.Text()), nullable=False, server_default='{}'),
+        sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('first_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_message_id', sa.BigInteger(), nullable=True),
+        sa.Column('last_direction', sa.String(10), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_email_threads_tenant_last_at', 'email_threads',
+                    ['tenant_id', sa.text('last_at DESC')])
+    op.create_index('ix_email_threads_tenant_subject', 'email_threads',
+                    ['tenant_id', 'normalized_subject', sa.text('last_at DESC')])
+
+    # Message-ID -> thread, including ids only seen in References/In-Reply-To
+    op.create_table('email_thread_refs',
+        sa.Column('tenant_id', postgresql.UUID(), nullable=False),
+        sa.Column('message_id', sa.Text(), nullable=False),
+        sa.Column('thread_id', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['thread_id'], ['email_threads.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tenant_id', 'message_id')
+    )
+    op.create_index('ix_email_thread_refs_thread_id', 'email_thread_refs', ['thread_id'])
+
+    op.add_column('email_messages', sa.Column('thread_id', sa.BigInteger(), nullable=True))
+    op.add_column('email_messages', sa.Column('normalized_subject', sa.Text(), nullable=True))
+    op.create_foreign_key('fk_email_messages_thread_id', 'email_messages', 'email_threads',
+                          ['thread_id'], ['id'], ondelete='SET NULL')
+    op.create_index('ix_email_messages_thread', 'email_messages', ['tenant_id', 'thread_id', 'sent_at'])
+    # Messages still waiting for thread assignment (new rows and the backfill of existing ones)
+    op.create_index('ix_email_messages_unthreaded', 'email_messages', ['tenant_id', 'sent_at'],
+                    postgresql_where=sa.text('thread_id IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_messages_unthreaded', table_name='email_messages')
+    op.drop_index('ix_email_messages_thread', table_name='email_messages')
+    op.drop_constraint('fk_email_messages_thread_id', 'email_messages', type_='foreignkey')
+    op.drop_column('email_messages', 'normalized_subject')
+    op.drop_column('email_messages', 'thread_id')
+    op.drop_index('ix_email_thread_refs_thread_id', table_name='email_thread_refs')
+    op.drop_table('email_thread_refs')
+    op.drop_index('ix_email_threads_tenant_subject', table_name='email_threads')
+    op.drop_index('ix_email_threads_tenant_last_at', table_name='email_threads')
+    op.drop_table('email_threads')
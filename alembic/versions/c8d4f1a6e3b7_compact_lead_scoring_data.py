@@ -0,0 +1,55 @@
+"""compact_lead_scoring_data
+
+Revision ID: c8d4f1a6e3b7
+Revises: b5e9d2a7c4f1
+Create Date: 2025-10-02 11:18:52.604137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d4f1a6e3b7'
+down_revision: Union[str, None] = 'b5e9d2a7c4f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Replace the stored homepage snapshot (HTML, text, links, scripts) with the
+    # summary lead_scoring.compact_signals_data() writes; the raw page stays in
+    # leadgen_fetch_cache.
+    op.execute(sa.text("""
+        UPDATE leadgen_companies c
+        SET lead_scoring_data = (
+            (c.lead_scoring_data::jsonb - 'website_content')
+            || CASE WHEN w.content IS NULL OR w.content = '{}'::jsonb THEN '{}'::jsonb
+               ELSE jsonb_build_object('website_summary', jsonb_build_object(
+                   'title', COALESCE(w.content->'title', '""'::jsonb),
+                   'meta_description', COALESCE(w.content->'meta_description', '""'::jsonb),
+                   'links_count', CASE WHEN jsonb_typeof(w.content->'links') = 'array'
+                                       THEN jsonb_array_length(w.content->'links') ELSE 0 END,
+                   'scripts_count', CASE WHEN jsonb_typeof(w.content->'scripts') = 'array'
+                                         THEN jsonb_array_length(w.content->'scripts') ELSE 0 END,
+                   'json_ld_count', CASE WHEN jsonb_typeof(w.content->'json_ld') = 'array'
+                                         THEN jsonb_array_length(w.content->'json_ld') ELSE 0 END))
+               END
+        )::json
+        FROM (
+            SELECT id, lead_scoring_data::jsonb->'website_content' AS content
+            FROM leadgen_companies
+            WHERE jsonb_typeof(lead_scoring_data::jsonb) = 'object'
+              AND lead_scoring_data::jsonb ? 'website_content'
+        ) AS w
+        WHERE c.id = w.id
+    """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The dropped snapshots are not restored; the pages remain in leadgen_fetch_cache
+    pass
@@ -0,0 +1,50 @@
+"""add_leadgen_fetch_cache
+
+Revision ID: d3a9f6b2c8e1
+Revises: c5d8e1f2a7b4
+Create Date: 2025-09-19 10:12:44.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a9f6b2c8e1'
+down_revision: Union[str, None] = 'c5d8e1f2a7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Public web pages fetched by lead scoring; shared across tenants
+    op.create_table('leadgen_fetch_cache',
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('domain', sa.String(255), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=False),
+        sa.Column('headers', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('etag', sa.Text(), nullable=True),
+        sa.Column('last_modified', sa.Text(), nullable=True),
+        sa.Column('content', sa.LargeBinary(), nullable=True),  # zlib-compressed body
+        sa.Column('content_sha256', sa.String(64), nullable=True),
+        sa.Column('content_length', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('final_url', sa.Text(), nullable=True),
+        sa.Column('extracts', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('validated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('url')
+    )
+    op.create_index('ix_leadgen_fetch_cache_domain', 'leadgen_fetch_cache', ['domain'])
+    op.create_index('ix_leadgen_fetch_cache_expires_at', 'leadgen_fetch_cache', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leadgen_fetch_cache_expires_at', table_name='leadgen_fetch_cache')
+    op.drop_index('ix_leadgen_fetch_cache_domain', table_name='leadgen_fetch_cache')
+    op.drop_table('leadgen_fetch_cache')
@@ -0,0 +1,85 @@
+"""add_leadgen_company_keys
+
+Revision ID: e7c1a4d8b2f5
+Revises: d3a9f6b2c8e1
+Create Date: 2025-09-22 09:41:17.263504
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.company_keys import company_domain_key, company_name_key
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c1a4d8b2f5'
+down_revision: Union[str, None] = 'd3a9f6b2c8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('leadgen_companies', sa.Column('name_key', sa.String(255), nullable=True))
+    op.add_column('leadgen_companies', sa.Column('domain_key', sa.String(255), nullable=True))
+
+    # Backfill with the same normalisers the application uses. Existing
+    # duplicates are kept; only the oldest row of each tenant/key pair gets
+    # the key, so the unique indexes can be built without deleting data.
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("""
+        SELECT id, name, domain, COALESCE(salesbot_tenant_id, '') AS tenant
+        FROM leadgen_companies
+        ORDER BY id
+    """)).fetchall()
+    seen_names, seen_domains = set(), set()
+    updates = []
+    for row in rows:
+        name_key = company_name_key(row.name)
+        domain_key = company_domain_key(row.domain)
+        if name_key and (row.tenant, name_key) in seen_names:
+            name_key = None
+        if domain_key and (row.tenant, domain_key) in seen_domains:
+            domain_key = None
+        seen_names.add((row.tenant, name_key))
+        seen_domains.add((row.tenant, domain_key))
+        if name_key or domain_key:
+            updates.append((row.id, name_key, domain_key))
+
+    for start in range(0, len(updates), BACKFILL_CHUNK):
+        chunk = updates[start:start + BACKFILL_CHUNK]
+        conn.execute(sa.text("""
+            UPDATE leadgen_companies c
+            SET name_key = k.name_key, domain_key = k.domain_key
+            FROM unnest(CAST(:ids AS INTEGER[]), CAST(:name_keys AS TEXT[]), CAST(:domain_keys AS TEXT[]))
+                AS k(id, name_key, domain_key)
+            WHERE c.id = k.id
+        """), {
+            'ids': [u[0] for u in chunk],
+            'name_keys': [u[1] for u in chunk],
+            'domain_keys': [u[2] for u in chunk],
+        })
+
+    # COALESCE so companies without a tenant (FastAPI leadgen tool) share one namespace
+    op.execute("""
+        CREATE UNIQUE INDEX uq_leadgen_companies_tenant_name_key
+        ON leadgen_companies ((COALESCE(salesbot_tenant_id, '')), name_key)
+        WHERE name_key IS NOT NULL
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX uq_leadgen_companies_tenant_domain_key
+        ON leadgen_companies ((COALESCE(salesbot_tenant_id, '')), domain_key)
+        WHERE domain_key IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_leadgen_companies_tenant_domain_key', table_name='leadgen_companies')
+    op.drop_index('uq_leadgen_companies_tenant_name_key', table_name='leadgen_companies')
+    op.drop_column('leadgen_companies', 'domain_key')
+    op.drop_column('leadgen_companies', 'name_key')
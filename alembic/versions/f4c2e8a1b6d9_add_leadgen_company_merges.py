@@ -0,0 +1,46 @@
+"""add_leadgen_company_merges
+
+Revision ID: f4c2e8a1b6d9
+Revises: e7c1a4d8b2f5
+Create Date: 2025-09-23 14:05:39.817246
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c2e8a1b6d9'
+down_revision: Union[str, None] = 'e7c1a4d8b2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Provenance of entity-resolution merges: which row was folded into which, and what it held
+    op.create_table('leadgen_company_merges',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('survivor_id', sa.Integer(), nullable=False),
+        sa.Column('merged_id', sa.Integer(), nullable=False),
+        sa.Column('salesbot_tenant_id', sa.String(255), nullable=True),
+        sa.Column('match_score', sa.Float(), nullable=True),
+        sa.Column('match_reason', sa.String(50), nullable=True),
+        sa.Column('merged_snapshot', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('merged_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['survivor_id'], ['leadgen_companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['merged_id'], ['leadgen_companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_leadgen_company_merges_survivor_id', 'leadgen_company_merges', ['survivor_id'])
+    op.create_index('ix_leadgen_company_merges_merged_id', 'leadgen_company_merges', ['merged_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leadgen_company_merges_merged_id', table_name='leadgen_company_merges')
+    op.drop_index('ix_leadgen_company_merges_survivor_id', table_name='leadgen_company_merges')
+    op.drop_table('leadgen_company_merges')
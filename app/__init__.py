@@ -170,6 +170,10 @@ def create_app():
                                 })
                                 tenant_id = tenant_result.fetchone().id
                                 
+                                # Drop any cached miss for the new slug
+                                from app.tenant import invalidate_tenant_cache
+                                invalidate_tenant_cache(tenant_slug)
+                                
                                 # Create new user with their own tenant (mark as first login)
                                 result = conn.execute(text("""
                                     INSERT INTO users (email, name, google_id, tenant_id, is_first_login, created_at)
@@ -218,6 +222,10 @@ def create_app():
             app.logger.error(f'❌ Full traceback: {traceback.format_exc()}')
             return redirect(url_for('main.login_page'))
 
+    # Per-request SQL instrumentation (registered first so tenant lookups are counted)
+    from app.utils import query_stats
+    query_stats.init_app(app)
+
     # Tenant resolver
     from app.tenant import resolve_tenant_context
     @app.before_request
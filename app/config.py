@@ -11,6 +11,9 @@ class Config:
     # Pagination settings
     CONTACTS_PER_PAGE = 25
     
+    # Rows fetched per server-side cursor batch when streaming CSV exports
+    CONTACTS_EXPORT_BATCH_SIZE = int(os.environ.get('CONTACTS_EXPORT_BATCH_SIZE', 1000))
+    
     # Email settings
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -1,9 +1,27 @@
 """
 Shared database connection management for Railway PostgreSQL.
-This module provides a single, shared database engine to prevent connection limit issues.
+This module provides shared database engines to prevent connection limit issues.
+
+Engines are created lazily per named pool profile so that web requests,
+scheduler/background threads and analytics queries do not queue behind each
+other on one tiny pool. Each profile is sized through environment variables:
+
+    DB_POOL_<PROFILE>_SIZE          permanent connections
+    DB_POOL_<PROFILE>_MAX_OVERFLOW  extra connections allowed under load
+    DB_POOL_<PROFILE>_TIMEOUT       seconds to wait for a free connection
+    DB_POOL_<PROFILE>_RECYCLE       seconds before a connection is recycled
+
+Set DB_PGBOUNCER_TRANSACTION_MODE=true when DATABASE_URL points at PgBouncer
+in transaction pooling mode. The statement timeout is then applied per
+transaction with SET LOCAL instead of as a startup parameter, which PgBouncer
+rejects and which would leak between clients sharing a server connection.
 """
 import os
-from sqlalchemy import create_engine
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.pool import QueuePool
 import threading
@@ -11,65 +29,241 @@ import threading
 # SQLAlchemy Base class for ORM models (used by leadgen models)
 Base = declarative_base()
 
+DEFAULT_POOL_PROFILE = 'web'
+
+# Default sizing per profile (overridable through DB_POOL_<PROFILE>_* env vars)
+POOL_PROFILES = {
+    'web': {'pool_size': 2, 'max_overflow': 1, 'pool_timeout': 30, 'pool_recycle': 900},
+    'scheduler': {'pool_size': 1, 'max_overflow': 1, 'pool_timeout': 60, 'pool_recycle': 900},
+    'analytics': {'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 30, 'pool_recycle': 900},
+    # Deep research CLI: one connection per research worker (the CLI sizes it from --workers)
+    'research': {'pool_size': 8, 'max_overflow': 2, 'pool_timeout': 60, 'pool_recycle': 900},
+}
+
+STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+
+# Checkout waits longer than this are counted as slow in the pool metrics
+SLOW_CHECKOUT_MS = float(os.getenv('DB_POOL_SLOW_CHECKOUT_MS', '100'))
+
+_current_profile: ContextVar[str] = ContextVar('db_pool_profile', default=DEFAULT_POOL_PROFILE)
+
+
+def _pgbouncer_transaction_mode() -> bool:
+    return os.getenv('DB_PGBOUNCER_TRANSACTION_MODE', 'false').lower() in ('true', '1', 'on')
+
+
+def get_pool_settings(profile: str) -> dict:
+    """Return the effective pool settings for a profile, applying env overrides."""
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown database pool profile: {profile}")
+
+    settings = dict(POOL_PROFILES[profile])
+    prefix = f"DB_POOL_{profile.upper()}_"
+    env_keys = {
+        'pool_size': 'SIZE',
+        'max_overflow': 'MAX_OVERFLOW',
+        'pool_timeout': 'TIMEOUT',
+        'pool_recycle': 'RECYCLE',
+    }
+    for key, suffix in env_keys.items():
+        value = os.getenv(prefix + suffix)
+        if value:
+            settings[key] = int(value)
+    return settings
+
+
+class PoolMetrics:
+    """Thread-safe checkout wait and saturation counters for one pool."""
+
+    def __init__(self, profile: str):
+        self.profile = profile
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.peak_checked_out = 0
+
+    def record_checkout(self, wait_ms: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if wait_ms >= SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        """Return current counters combined with the live pool state."""
+        with self._lock:
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            return {
+                'profile': self.profile,
+                'pool_size': pool.size(),
+                'max_overflow': pool._max_overflow,
+                'capacity': capacity,
+                'checked_out': checked_out,
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+                'saturation': round(checked_out / capacity, 3) if capacity else None,
+                'peak_checked_out': self.peak_checked_out,
+                'peak_saturation': round(self.peak_checked_out / capacity, 3) if capacity else None,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'slow_checkouts': self.slow_checkouts,
+                'wait_avg_ms': round(self.wait_total_ms / self.checkouts, 2) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max_ms, 2),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long callers wait for a connection."""
+
+    _metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self._metrics:
+                self._metrics.record_timeout()
+            raise
+        if self._metrics:
+            self._metrics.record_checkout((time.perf_counter() - start) * 1000, self.checkedout())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics = self._metrics
+        return pool
+
+
 class DatabaseManager:
-    """Singleton database manager to share a single engine across all models."""
-    
+    """Singleton database manager sharing one engine per pool profile across all models."""
+
     _instance = None
     _lock = threading.Lock()
-    _engine = None
-    
+    _engines = None
+    _metrics = None
+
     def __new__(cls):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super(DatabaseManager, cls).__new__(cls)
+                    cls._instance._engines = {}
+                    cls._instance._metrics = {}
         return cls._instance
-    
-    def get_engine(self):
-        """Get the shared database engine, creating it if necessary."""
-        if self._engine is None:
+
+    def get_engine(self, profile: str = None):
+        """Get the shared database engine for a pool profile, creating it if necessary."""
+        profile = profile or _current_profile.get()
+        engine = self._engines.get(profile)
+        if engine is None:
             with self._lock:
-                if self._engine is None:
-                    self._create_engine()
-        return self._engine
-    
-    def _create_engine(self):
-        """Create the shared database engine with minimal connection usage."""
+                engine = self._engines.get(profile)
+                if engine is None:
+                    engine = self._create_engine(profile)
+        return engine
+
+    def _create_engine(self, profile: str):
+        """Create the shared database engine for a profile with bounded connection usage."""
         database_url = os.getenv("DATABASE_URL")
         if not database_url:
             raise ValueError("DATABASE_URL environment variable not set")
-        
-        # Use minimal connection pool settings for Railway
-        self._engine = create_engine(
+
+        settings = get_pool_settings(profile)
+        pgbouncer = _pgbouncer_transaction_mode()
+
+        connect_args = {}
+        if not pgbouncer:
+            # Startup parameters are not supported behind PgBouncer
+            connect_args["options"] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+
+        engine = create_engine(
             database_url,
-            poolclass=QueuePool,            # Standard connection pool
-            pool_size=1,                    # Only 1 permanent connection
-            max_overflow=1,                 # Only 1 overflow connection (max 2 total)
-            pool_pre_ping=True,             # Verify connections before use
-            pool_recycle=900,               # Recycle connections every 15 minutes
-            pool_timeout=30,                # 30 second timeout when getting connection
-            connect_args={
-                "options": "-c statement_timeout=30000"  # 30 second statement timeout
-            }
+            poolclass=InstrumentedQueuePool,        # QueuePool with checkout timing
+            pool_size=settings['pool_size'],
+            max_overflow=settings['max_overflow'],
+            pool_pre_ping=True,                     # Verify connections before use
+            pool_recycle=settings['pool_recycle'],
+            pool_timeout=settings['pool_timeout'],
+            connect_args=connect_args
         )
-        print(f"✅ Created shared database engine with minimal connection pool")
-    
+
+        metrics = PoolMetrics(profile)
+        engine.pool._metrics = metrics
+
+        from app.utils.query_stats import instrument_engine
+        instrument_engine(engine)
+
+        if pgbouncer:
+            @event.listens_for(engine, "begin")
+            def _set_local_statement_timeout(conn):
+                cursor = conn.connection.cursor()
+                try:
+                    cursor.execute(f"SET LOCAL statement_timeout = {STATEMENT_TIMEOUT_MS}")
+                finally:
+                    cursor.close()
+
+        self._engines[profile] = engine
+        self._metrics[profile] = metrics
+        print(f"✅ Created shared database engine for '{profile}' pool "
+              f"(size={settings['pool_size']}, overflow={settings['max_overflow']}, pgbouncer={pgbouncer})")
+        return engine
+
+    def get_pool_metrics(self) -> dict:
+        """Return checkout wait and saturation metrics for every created pool."""
+        return {
+            profile: self._metrics[profile].snapshot(engine.pool)
+            for profile, engine in list(self._engines.items())
+        }
+
     def close_engine(self):
-        """Close the shared engine and all connections."""
-        if self._engine:
+        """Close every shared engine and all connections."""
+        if self._engines:
             with self._lock:
-                if self._engine:
-                    self._engine.dispose()
-                    self._engine = None
-                    print("🔄 Closed shared database engine")
+                for profile, engine in list(self._engines.items()):
+                    engine.dispose()
+                    print(f"🔄 Closed shared database engine for '{profile}' pool")
+                self._engines.clear()
+                self._metrics.clear()
 
 # Global database manager instance
 db_manager = DatabaseManager()
 
-def get_shared_engine():
-    """Get the shared database engine."""
-    return db_manager.get_engine()
+def get_shared_engine(profile: str = None):
+    """Get the shared database engine.
+
+    Without an explicit profile, the profile active in the current context is
+    used (see use_pool_profile), which defaults to 'web'.
+    """
+    return db_manager.get_engine(profile)
+
+@contextmanager
+def use_pool_profile(profile: str):
+    """Route get_shared_engine() calls in this context to a named pool profile.
+
+    Usable as a context manager or as a decorator on job functions.
+    """
+    get_pool_settings(profile)  # Validate the profile name early
+    token = _current_profile.set(profile)
+    try:
+        yield
+    finally:
+        _current_profile.reset(token)
+
+def get_pool_metrics() -> dict:
+    """Get checkout wait and saturation metrics for all shared pools."""
+    return db_manager.get_pool_metrics()
 
 def close_shared_engine():
-    """Close the shared database engine."""
-    db_manager.close_engine()
\ No newline at end of file
+    """Close the shared database engines."""
+    db_manager.close_engine()
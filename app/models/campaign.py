@@ -582,9 +582,34 @@ class Campaign:
             current_app.logger.error(f"Unexpected error updating contact status: {e}")
             return False
 
+    @staticmethod
+    def _upsert_campaign_contacts(conn, source_sql: str, params: Dict) -> List[str]:
+        """Upsert campaign_contacts rows selected by `source_sql` in one statement.
+
+        `source_sql` must select a single `contact_email` column. Returns the
+        emails that were inserted or updated.
+        """
+        result = conn.execute(text(f"""
+            INSERT INTO campaign_contacts (tenant_id, campaign_id, contact_email, status)
+            SELECT :tenant_id, :campaign_id, src.contact_email, :status
+            FROM ({source_sql}) src
+            WHERE COALESCE(src.contact_email, '') <> ''
+            ON CONFLICT (tenant_id, campaign_id, contact_email)
+            DO UPDATE SET
+                status = EXCLUDED.status,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING contact_email
+        """), params)
+        return [row.contact_email for row in result]
+
     @classmethod
     def bulk_add_contacts_to_campaign(cls, campaign_id: int, contact_emails: List[str], status: str = 'active') -> Dict:
-        """Add multiple contacts to a campaign in bulk."""
+        """Add multiple contacts to a campaign in bulk.
+
+        All emails are sent as one array and upserted with a single
+        INSERT ... SELECT unnest(...) ON CONFLICT statement; blank emails are
+        reported as failed.
+        """
         engine = cls._get_db_engine()
         if not engine:
             current_app.logger.error("Failed to bulk add contacts: Database engine not available.")
@@ -594,34 +619,33 @@ class Campaign:
             current_app.logger.warning("Tenant not resolved in bulk_add_contacts_to_campaign")
             return {'success': 0, 'failed': 0, 'errors': ['Tenant not resolved']}
 
-        success_count = 0
-        failed_count = 0
-        errors = []
+        unique_emails = list(dict.fromkeys(email for email in contact_emails if email))
+        if not unique_emails:
+            return {'success': 0, 'failed': len(contact_emails), 'errors': ['No valid contact emails provided']}
 
         try:
             with engine.connect() as conn:
                 with conn.begin():
-                    for contact_email in contact_emails:
-                        try:
-                            insert_query = text("""
-                                INSERT INTO campaign_contacts (tenant_id, campaign_id, contact_email, status) 
-                                VALUES (:tenant_id, :campaign_id, :contact_email, :status)
-                                ON CONFLICT (tenant_id, campaign_id, contact_email) 
-                                DO UPDATE SET 
-                                    status = :status,
-                                    updated_at = CURRENT_TIMESTAMP
-                            """)
-                            conn.execute(insert_query, {
-                                'tenant_id': tenant_id,
-                                'campaign_id': campaign_id,
-                                'contact_email': contact_email,
-                                'status': status
-                            })
-                            success_count += 1
-                        except Exception as e:
-                            failed_count += 1
-                            errors.append(f"Contact {contact_email}: {str(e)}")
-            
+                    upserted = cls._upsert_campaign_contacts(
+                        conn,
+                        "SELECT DISTINCT unnest(CAST(:emails AS TEXT[])) AS contact_email",
+                        {
+                            'tenant_id': tenant_id,
+                            'campaign_id': campaign_id,
+                            'status': status,
+                            'emails': unique_emails
+                        }
+                    )
+
+            # Count per input entry so repeated emails match the old row-by-row totals
+            upserted_set = set(upserted)
+            success_count = sum(1 for email in contact_emails if email in upserted_set)
+            failed_count = len(contact_emails) - success_count
+            errors = [f"Contact {email}: not added" for email in unique_emails if email not in upserted_set]
+            blank_count = sum(1 for email in contact_emails if not email)
+            if blank_count:
+                errors.append(f"{blank_count} blank emails skipped")
+
             current_app.logger.info(f"Bulk add completed: {success_count} successful, {failed_count} failed")
             return {
                 'success': success_count,
@@ -635,6 +659,46 @@ class Campaign:
             current_app.logger.error(f"Unexpected error in bulk add: {e}")
             return {'success': 0, 'failed': len(contact_emails), 'errors': [str(e)]}
 
+    @classmethod
+    def copy_campaign_contacts(cls, source_campaign_id: int, target_campaign_id: int, status: str = 'active') -> Dict:
+        """Copy every contact of one campaign into another with a single server-side statement."""
+        engine = cls._get_db_engine()
+        if not engine:
+            current_app.logger.error("Failed to copy campaign contacts: Database engine not available.")
+            return {'success': 0, 'failed': 0, 'errors': []}
+        tenant_id = current_tenant_id()
+        if not tenant_id:
+            current_app.logger.warning("Tenant not resolved in copy_campaign_contacts")
+            return {'success': 0, 'failed': 0, 'errors': ['Tenant not resolved']}
+
+        try:
+            with engine.connect() as conn:
+                with conn.begin():
+                    upserted = cls._upsert_campaign_contacts(
+                        conn,
+                        """
+                        SELECT DISTINCT cc.contact_email
+                        FROM campaign_contacts cc
+                        JOIN contacts c ON c.email = cc.contact_email AND c.tenant_id = cc.tenant_id
+                        WHERE cc.campaign_id = :source_campaign_id AND cc.tenant_id = :tenant_id
+                        """,
+                        {
+                            'tenant_id': tenant_id,
+                            'campaign_id': target_campaign_id,
+                            'status': status,
+                            'source_campaign_id': source_campaign_id
+                        }
+                    )
+
+            current_app.logger.info(f"Copied {len(upserted)} contacts from campaign {source_campaign_id} to {target_campaign_id}")
+            return {'success': len(upserted), 'failed': 0, 'errors': []}
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Database error copying campaign contacts: {e}")
+            return {'success': 0, 'failed': 0, 'errors': [str(e)]}
+        except Exception as e:
+            current_app.logger.error(f"Unexpected error copying campaign contacts: {e}")
+            return {'success': 0, 'failed': 0, 'errors': [str(e)]}
+
     @classmethod
     def update_status(cls, campaign_id: int, status: str) -> bool:
         """Update campaign status."""
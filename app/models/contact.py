@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
 from flask import current_app
 from app.tenant import current_tenant_id
 from sqlalchemy import create_engine, text
@@ -9,6 +9,28 @@ import logging
 class Contact:
     """Contact model for managing lead data from PostgreSQL database."""
     
+    # Exportable columns mapped to their CSV header labels, in default export order
+    EXPORT_COLUMNS = {
+        'email': 'Email',
+        'first_name': 'First Name',
+        'last_name': 'Last Name',
+        'full_name': 'Full Name',
+        'company_name': 'Company',
+        'job_title': 'Job Title',
+        'location': 'Location',
+        'linkedin_profile': 'LinkedIn Profile',
+        'company_domain': 'Company Domain',
+        'phone': 'Phone',
+        'linkedin_message': 'LinkedIn Message',
+        'contacted': 'Contacted',
+        'created_at': 'Created At',
+        'updated_at': 'Updated At',
+    }
+    DEFAULT_EXPORT_COLUMNS = [
+        'email', 'first_name', 'last_name', 'full_name', 'company_name',
+        'job_title', 'location', 'linkedin_profile', 'company_domain'
+    ]
+
     def __init__(self, data: Dict):
         self.first_name = data.get('first_name', '') or data.get('First Name', '')
         self.last_name = data.get('last_name', '') or data.get('Last Name', '')
@@ -324,6 +346,67 @@ class Contact:
             
         return []
 
+    @staticmethod
+    def build_export_filter(filters: Dict) -> Tuple[str, Dict]:
+        """Build a SQL WHERE fragment and params from segment filters.
+
+        Supported filters mirror the campaign segment options: company,
+        job_title and location (case-insensitive substring), require_phone,
+        require_linkedin and exclude_contacted.
+        """
+        clauses = []
+        params = {}
+        for key, column in (('company', 'company_name'), ('job_title', 'job_title'), ('location', 'location')):
+            value = (filters.get(key) or '').strip()
+            if value:
+                clauses.append(f"{column} ILIKE :{key}")
+                params[key] = f"%{value}%"
+        if filters.get('require_phone'):
+            clauses.append("COALESCE(phone, '') <> ''")
+        if filters.get('require_linkedin'):
+            clauses.append("COALESCE(linkedin_profile, '') <> ''")
+        if filters.get('exclude_contacted'):
+            clauses.append("""NOT EXISTS (
+                SELECT 1 FROM email_history eh
+                WHERE eh.tenant_id = contacts.tenant_id
+                AND LOWER(TRIM(eh."to")) = LOWER(TRIM(contacts.email))
+            )""")
+        return (" AND " + " AND ".join(clauses)) if clauses else "", params
+
+    @classmethod
+    def iter_export_batches(cls, columns: List[str], filters: Dict = None,
+                            batch_size: int = 1000) -> Iterator[List[tuple]]:
+        """Yield contact rows for export in fixed-size batches.
+
+        Rows are read through a server-side (named) cursor, so memory stays
+        constant regardless of how many contacts the tenant has.
+        """
+        unknown = [c for c in columns if c not in cls.EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+
+        engine = cls._get_db_engine()
+        if not engine:
+            current_app.logger.error("Failed to get database engine in Contact.iter_export_batches")
+            return
+        tenant_id = current_tenant_id()
+        if not tenant_id:
+            current_app.logger.warning("Tenant not resolved in Contact.iter_export_batches; exporting nothing")
+            return
+
+        where_sql, params = cls.build_export_filter(filters or {})
+        params['tenant_id'] = tenant_id
+
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(text(f"""
+                SELECT {', '.join(columns)}
+                FROM contacts
+                WHERE tenant_id = :tenant_id{where_sql}
+                ORDER BY created_at DESC
+            """), params)
+            for partition in result.partitions(batch_size):
+                yield [tuple(row) for row in partition]
+
     def to_dict(self) -> Dict:
         """Convert contact to dictionary for JSON serialization."""
         return {
@@ -0,0 +1,279 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
+from flask import current_app
+from app.tenant import current_tenant_id
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+MESSAGE_COLUMNS = """
+    id, account_email, folder, uid, message_id, in_reply_to, references_header,
+    subject, from_addr, to_addr, cc_addr, sent_at, direction, snippet, body_text, thread_id
+"""
+
+class EmailMessage:
+    """Local index of IMAP message headers and snippets, kept current by the mailbox sync job.
+
+    Rows are keyed by (tenant, account, folder, UIDVALIDITY, UID) so a sync run
+    can be replayed safely, and email_sync_state stores the highest UID seen
+    per folder so each run only fetches new mail. body_text stays NULL until a
+    thread is opened and its full bodies are fetched on demand.
+    """
+
+    @classmethod
+    def _get_db_engine(cls):
+        """Get shared database engine."""
+        try:
+            from app.database import get_shared_engine
+            return get_shared_engine()
+        except Exception as e:
+            if hasattr(current_app, 'logger'):
+                current_app.logger.error(f"Error getting shared database engine: {e}")
+            else:
+                print(f"Error getting shared database engine: {e}")
+            return None
+
+    @staticmethod
+    def _row_to_email(row) -> Dict:
+        """Convert an index row to the email dict shape used by the inbox views."""
+        return {
+            'id': str(row.uid),
+            'index_id': row.id,
+            'account_email': row.account_email,
+            'message_id': row.message_id or '',
+            'in_reply_to': row.in_reply_to or '',
+            'references': row.references_header or '',
+            'subject': row.subject or '',
+            'from': row.from_addr or '',
+            'to': row.to_addr or '',
+            'cc': row.cc_addr or '',
+            'date': row.sent_at,
+            'body': row.body_text if row.body_text is not None else (row.snippet or ''),
+            'snippet': row.snippet or '',
+            'body_loaded': row.body_text is not None,
+            'direction': row.direction,
+            'folder': row.folder,
+            'thread_id': row.thread_id,
+        }
+
+    @classmethod
+    def get_sync_state(cls, account_email: str, folder: str, tenant_id: str = None) -> Optional[Dict]:
+        """Return the stored UIDVALIDITY and highest UID for one account folder."""
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id:
+            return None
+        try:
+            with engine.connect() as conn:
+                row = conn.execute(text("""
+                    SELECT uidvalidity, highest_uid, last_synced_at, last_error
+                    FROM email_sync_state
+                    WHERE tenant_id = :tenant_id AND account_email = :account_email AND folder = :folder
+                """), {'tenant_id': tenant_id, 'account_email': account_email, 'folder': folder}).fetchone()
+                return dict(row._mapping) if row else None
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error loading email sync state for {account_email}/{folder}: {e}")
+            return None
+
+    @classmethod
+    def store_messages(cls, account_email: str, folder: str, uidvalidity: int, messages: List[Dict],
+                       highest_uid: int, reset: bool = False, tenant_id: str = None) -> bool:
+        """Insert newly synced messages and advance the folder's sync cursor in one transaction.
+
+        With reset=True (UIDVALIDITY changed) the folder's previously indexed
+        messages are dropped first, since their UIDs no longer identify anything.
+        New messages are assigned to conversation threads in the same transaction.
+        """
+        from app.models.email_thread import EmailThread
+
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id:
+            return False
+
+        mailbox = {'tenant_id': tenant_id, 'account_email': account_email, 'folder': folder}
+        try:
+            with engine.connect() as conn:
+                with conn.begin():
+                    if reset:
+                        dropped = conn.execute(text("""
+                            DELETE FROM email_messages
+                            WHERE tenant_id = :tenant_id AND account_email = :account_email AND folder = :folder
+                            RETURNING thread_id
+                        """), mailbox).scalars().all()
+                        EmailThread.refresh_threads(conn, tenant_id, dropped)
+
+                    if messages:
+                        conn.execute(text("""
+                            INSERT INTO email_messages (
+                                tenant_id, account_email, folder, uidvalidity, uid, message_id,
+                                in_reply_to, references_header, subject, from_addr, to_addr, cc_addr,
+                                participants, sent_at, direction, snippet, body_text
+                            ) VALUES (
+                                :tenant_id, :account_email, :folder, :uidvalidity, :uid, :message_id,
+                                :in_reply_to, :references, :subject, :from_addr, :to_addr, :cc_addr,
+                                :participants, :sent_at, :direction, :snippet, :body_text
+                            )
+                            ON CONFLICT ON CONSTRAINT uq_email_messages_mailbox_uid DO NOTHING
+                        """), [
+                            {
+                                **mailbox,
+                                'uidvalidity': uidvalidity,
+                                'uid': m['uid'],
+                                'message_id': m.get('message_id') or None,
+                                'in_reply_to': m.get('in_reply_to') or None,
+                                'references': m.get('references') or None,
+                                'subject': m.get('subject'),
+                                'from_addr': m.get('from'),
+                                'to_addr': m.get('to'),
+                                'cc_addr': m.get('cc'),
+                                'participants': m.get('participants', []),
+                                'sent_at': m.get('date'),
+                                'direction': m.get('direction'),
+                                'snippet': m.get('snippet'),
+                                'body_text': m.get('body'),
+                            }
+                            for m in messages
+                        ])
+
+                    # Also picks up rows left unthreaded by earlier runs (e.g. the initial backfill)
+                    EmailThread.assign_pending(conn, tenant_id)
+
+                    # GREATEST keeps the cursor monotonic if a manual refresh races the job
+                    conn.execute(text("""
+                        INSERT INTO email_sync_state (
+                            tenant_id, account_email, folder, uidvalidity, highest_uid, last_synced_at, last_error
+                        ) VALUES (
+                            :tenant_id, :account_email, :folder, :uidvalidity, :highest_uid, CURRENT_TIMESTAMP, NULL
+                        )
+                        ON CONFLICT (tenant_id, account_email, folder) DO UPDATE SET
+                            highest_uid = CASE
+                                WHEN email_sync_state.uidvalidity IS DISTINCT FROM EXCLUDED.uidvalidity
+                                    THEN EXCLUDED.highest_uid
+                                ELSE GREATEST(email_sync_state.highest_uid, EXCLUDED.highest_uid)
+                            END,
+                            uidvalidity = EXCLUDED.uidvalidity,
+                            last_synced_at = EXCLUDED.last_synced_at,
+                            last_error = NULL
+                    """), {**mailbox, 'uidvalidity': uidvalidity, 'highest_uid': highest_uid})
+            return True
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error storing synced messages for {account_email}/{folder}: {e}")
+            return False
+
+    @classmethod
+    def record_sync_error(cls, account_email: str, folder: str, error: str, tenant_id: str = None) -> None:
+        """Remember the last sync failure for a folder without moving its cursor."""
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id:
+            return
+        try:
+            with engine.connect() as conn:
+                with conn.begin():
+                    conn.execute(text("""
+                        INSERT INTO email_sync_state (tenant_id, account_email, folder, last_error)
+                        VALUES (:tenant_id, :account_email, :folder, :error)
+                        ON CONFLICT (tenant_id, account_email, folder) DO UPDATE SET last_error = EXCLUDED.last_error
+                    """), {'tenant_id': tenant_id, 'account_email': account_email, 'folder': folder,
+                           'error': error[:1000]})
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error recording sync failure for {account_email}/{folder}: {e}")
+
+    @classmethod
+    def get_fetch_locations(cls, index_ids: List[int], tenant_id: str = None) -> List[Dict]:
+        """Return mailbox coordinates (account, folder, UIDVALIDITY, UID) and cached bodies for messages."""
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id or not index_ids:
+            return []
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text("""
+                    SELECT id, account_email, folder, uidvalidity, uid, body_text
+                    FROM email_messages
+                    WHERE tenant_id = :tenant_id AND id = ANY(CAST(:ids AS BIGINT[]))
+                """), {'tenant_id': tenant_id, 'ids': [int(i) for i in index_ids]})
+                return [dict(row._mapping) for row in result]
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error loading message locations: {e}")
+            return []
+
+    @classmethod
+    def save_bodies(cls, bodies: Dict[int, str], tenant_id: str = None) -> bool:
+        """Cache lazily fetched full bodies on their index rows."""
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id:
+            return False
+        if not bodies:
+            return True
+        try:
+            with engine.connect() as conn:
+                with conn.begin():
+                    conn.execute(text("""
+                        UPDATE email_messages AS m
+                        SET body_text = b.body_text
+                        FROM unnest(CAST(:ids AS BIGINT[]), CAST(:bodies AS TEXT[])) AS b(id, body_text)
+                        WHERE m.id = b.id AND m.tenant_id = :tenant_id
+                    """), {'tenant_id': tenant_id, 'ids': list(bodies.keys()), 'bodies': list(bodies.values())})
+            return True
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error caching message bodies: {e}")
+            return False
+
+    @classmethod
+    def get_recent_messages(cls, folders: List[str], limit_per_folder: int = 50,
+                            account_emails: List[str] = None, tenant_id: str = None) -> List[Dict]:
+        """Return the newest indexed messages of each folder, newest first."""
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id or not folders:
+            return []
+
+        account_filter = "AND m.account_email = ANY(CAST(:accounts AS TEXT[]))" if account_emails else ""
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text(f"""
+                    SELECT recent.*
+                    FROM unnest(CAST(:folders AS TEXT[])) AS f(folder)
+                    CROSS JOIN LATERAL (
+                        SELECT {MESSAGE_COLUMNS}
+                        FROM email_messages m
+                        WHERE m.tenant_id = :tenant_id AND m.folder = f.folder {account_filter}
+                        ORDER BY m.sent_at DESC NULLS LAST
+                        LIMIT :limit
+                    ) AS recent
+                    ORDER BY recent.sent_at DESC NULLS LAST
+                """), {'tenant_id': tenant_id, 'folders': list(folders), 'limit': limit_per_folder,
+                       'accounts': [a.lower() for a in account_emails or []]})
+                return [cls._row_to_email(row) for row in result]
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error loading indexed messages: {e}")
+            return []
+
+    @classmethod
+    def get_conversations_with_contact(cls, contact_email: str, days_back: int = 365,
+                                       limit: int = 150, tenant_id: str = None) -> List[Dict]:
+        """Return indexed messages sent to or received from a contact, newest first."""
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id or not contact_email:
+            return []
+
+        since = datetime.now(timezone.utc) - timedelta(days=days_back)
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text(f"""
+                    SELECT {MESSAGE_COLUMNS}
+                    FROM email_messages
+                    WHERE tenant_id = :tenant_id
+                      AND participants @> ARRAY[CAST(:contact_email AS TEXT)]
+                      AND sent_at >= :since
+                    ORDER BY sent_at DESC
+                    LIMIT :limit
+                """), {'tenant_id': tenant_id, 'contact_email': contact_email.strip().lower(),
+                       'since': since, 'limit': limit})
+                return [cls._row_to_email(row) for row in result]
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error loading indexed conversations with {contact_email}: {e}")
+            return []
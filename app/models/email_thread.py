@@ -0,0 +1,312 @@
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from flask import current_app
+from app.tenant import current_tenant_id
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+# Unthreaded messages processed per assignment pass
+THREAD_ASSIGN_BATCH = int(os.getenv('EMAIL_THREAD_ASSIGN_BATCH', '500'))
+# Header-less replies only join a same-subject thread that was active this recently
+SUBJECT_MATCH_WINDOW_DAYS = int(os.getenv('EMAIL_THREAD_SUBJECT_WINDOW_DAYS', '30'))
+
+_SUBJECT_PREFIX_RE = re.compile(r'^\s*(?:(?:re|fwd?|aw|sv|wg)(?:\[\d+\])?\s*:\s*)+', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+_MESSAGE_ID_RE = re.compile(r'<[^<>\s]+>')
+
+
+def normalize_subject(subject: Optional[str]) -> str:
+    """Strip reply/forward prefixes (Re:, Fwd:, AW:, SV:, Re[2]:) and fold case and whitespace."""
+    stripped = _SUBJECT_PREFIX_RE.sub('', subject or '')
+    return _WHITESPACE_RE.sub(' ', stripped).strip().lower()
+
+
+def parse_message_ids(header_value: Optional[str]) -> List[str]:
+    """Return the Message-IDs in a Message-ID/In-Reply-To/References header, in order."""
+    if not header_value:
+        return []
+    ids = _MESSAGE_ID_RE.findall(header_value)
+    if not ids and header_value.strip():
+        ids = [f"<{header_value.strip().strip('<>')}>"]
+    return ids
+
+
+class EmailThread:
+    """Persistent conversation index over email_messages (JWZ-style threading).
+
+    Each message is assigned a thread once, when it is indexed: its own
+    Message-ID and every id in In-Reply-To/References are looked up in
+    email_thread_refs, so replies join their parent's thread even if the
+    parent has not been synced yet (the referenced id acts as a placeholder
+    container). Messages that link two existing threads merge them. Messages
+    without usable headers fall back to a recent thread with the same
+    normalised subject and an overlapping correspondent. Thread lists are then
+    a simple indexed query on email_threads.
+    """
+
+    @classmethod
+    def _get_db_engine(cls):
+        """Get shared database engine."""
+        try:
+            from app.database import get_shared_engine
+            return get_shared_engine()
+        except Exception as e:
+            if hasattr(current_app, 'logger'):
+                current_app.logger.error(f"Error getting shared database engine: {e}")
+            else:
+                print(f"Error getting shared database engine: {e}")
+            return None
+
+    @classmethod
+    def assign_pending(cls, conn, tenant_id: str, limit: int = None) -> int:
+        """Thread up to `limit` unthreaded messages of a tenant, oldest first.
+
+        Runs inside the caller's transaction. A per-tenant advisory lock keeps
+        concurrent syncs (scheduled job, manual refresh, IDLE push) from
+        creating duplicate threads for related messages.
+        """
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:lock_key))"),
+                     {'lock_key': f"email_threads:{tenant_id}"})
+        rows = conn.execute(text("""
+            SELECT id, account_email, message_id, in_reply_to, references_header, subject, participants
+            FROM email_messages
+            WHERE tenant_id = :tenant_id AND thread_id IS NULL
+            ORDER BY sent_at NULLS FIRST, id
+            LIMIT :limit
+        """), {'tenant_id': tenant_id, 'limit': limit or THREAD_ASSIGN_BATCH}).fetchall()
+        if not rows:
+            return 0
+
+        messages = []
+        all_ids = set()
+        for row in rows:
+            own_ids = parse_message_ids(row.message_id)[:1]
+            parent_ids = [mid for mid in parse_message_ids(row.references_header) + parse_message_ids(row.in_reply_to)
+                          if mid not in own_ids]
+            keys = list(dict.fromkeys(own_ids + parent_ids))
+            all_ids.update(keys)
+            messages.append({
+                'id': row.id,
+                'keys': keys,
+                'normalized_subject': normalize_subject(row.subject),
+                'correspondents': set(row.participants or []) - {row.account_email},
+            })
+
+        ref_map = {}
+        if all_ids:
+            result = conn.execute(text("""
+                SELECT message_id, thread_id FROM email_thread_refs
+                WHERE tenant_id = :tenant_id AND message_id = ANY(CAST(:ids AS TEXT[]))
+            """), {'tenant_id': tenant_id, 'ids': list(all_ids)})
+            ref_map = {r.message_id: r.thread_id for r in result}
+
+        subject_map = {}
+        subjects = list({m['normalized_subject'] for m in messages if m['normalized_subject']})
+        if subjects:
+            result = conn.execute(text("""
+                SELECT id, normalized_subject, participants FROM email_threads
+                WHERE tenant_id = :tenant_id AND normalized_subject = ANY(CAST(:subjects AS TEXT[]))
+                  AND last_at >= :since
+                ORDER BY last_at DESC
+            """), {'tenant_id': tenant_id, 'subjects': subjects,
+                   'since': datetime.now(timezone.utc) - timedelta(days=SUBJECT_MATCH_WINDOW_DAYS)})
+            for r in result:
+                subject_map.setdefault(r.normalized_subject, []).append((r.id, set(r.participants or [])))
+
+        # Thread ids for new conversations; unused values just leave gaps in the sequence
+        new_ids = iter(conn.execute(text("""
+            SELECT nextval(pg_get_serial_sequence('email_threads', 'id')) FROM generate_series(1, :n)
+        """), {'n': len(messages)}).scalars().all())
+
+        # Union-find over thread ids so one message can merge several threads
+        merged_into = {}
+
+        def find(thread_id):
+            root = thread_id
+            while merged_into.get(root, root) != root:
+                root = merged_into[root]
+            while merged_into.get(thread_id, thread_id) != root:
+                merged_into[thread_id], thread_id = root, merged_into[thread_id]
+            return root
+
+        created = set()
+        assignments = {}
+        for message in messages:
+            found = {find(ref_map[key]) for key in message['keys'] if key in ref_map}
+            if not found and message['normalized_subject']:
+                for thread_id, correspondents in subject_map.get(message['normalized_subject'], []):
+                    if not correspondents or not message['correspondents'] or correspondents & message['correspondents']:
+                        found = {find(thread_id)}
+                        break
+
+            if found:
+                target = min(found)
+                for thread_id in found:
+                    if thread_id != target:
+                        merged_into[thread_id] = target
+            else:
+                target = next(new_ids)
+                created.add(target)
+
+            for key in message['keys']:
+                ref_map[key] = target
+            assignments[message['id']] = target
+            if message['normalized_subject']:
+                subject_map.setdefault(message['normalized_subject'], []).insert(
+                    0, (target, set(message['correspondents'])))
+
+        merges = {src: find(src) for src in list(merged_into) if find(src) != src}
+        assignments = {message_id: find(t) for message_id, t in assignments.items()}
+        batch_keys = {key for m in messages for key in m['keys']}
+        refs = {key: find(ref_map[key]) for key in batch_keys}
+
+        new_threads = sorted({t for t in assignments.values() if t in created})
+        if new_threads:
+            conn.execute(text("""
+                INSERT INTO email_threads (id, tenant_id)
+                SELECT unnest(CAST(:ids AS BIGINT[])), :tenant_id
+            """), {'ids': new_threads, 'tenant_id': tenant_id})
+
+        existing_merges = {src: dst for src, dst in merges.items() if src not in created}
+        if existing_merges:
+            params = {'tenant_id': tenant_id, 'src': list(existing_merges), 'dst': list(existing_merges.values())}
+            conn.execute(text("""
+                UPDATE email_messages m SET thread_id = x.dst
+                FROM unnest(CAST(:src AS BIGINT[]), CAST(:dst AS BIGINT[])) AS x(src, dst)
+                WHERE m.tenant_id = :tenant_id AND m.thread_id = x.src
+            """), params)
+            conn.execute(text("""
+                UPDATE email_thread_refs r SET thread_id = x.dst
+                FROM unnest(CAST(:src AS BIGINT[]), CAST(:dst AS BIGINT[])) AS x(src, dst)
+                WHERE r.tenant_id = :tenant_id AND r.thread_id = x.src
+            """), params)
+
+        conn.execute(text("""
+            UPDATE email_messages m SET thread_id = x.thread_id, normalized_subject = x.normalized_subject
+            FROM unnest(CAST(:ids AS BIGINT[]), CAST(:thread_ids AS BIGINT[]), CAST(:subjects AS TEXT[]))
+                AS x(id, thread_id, normalized_subject)
+            WHERE m.id = x.id
+        """), {
+            'ids': [m['id'] for m in messages],
+            'thread_ids': [assignments[m['id']] for m in messages],
+            'subjects': [m['normalized_subject'] or None for m in messages],
+        })
+
+        if refs:
+            conn.execute(text("""
+                INSERT INTO email_thread_refs (tenant_id, message_id, thread_id)
+                SELECT :tenant_id, x.message_id, x.thread_id
+                FROM unnest(CAST(:message_ids AS TEXT[]), CAST(:thread_ids AS BIGINT[])) AS x(message_id, thread_id)
+                ON CONFLICT (tenant_id, message_id) DO UPDATE SET thread_id = EXCLUDED.thread_id
+            """), {'tenant_id': tenant_id, 'message_ids': list(refs), 'thread_ids': list(refs.values())})
+
+        cls.refresh_threads(conn, tenant_id, set(assignments.values()) | set(existing_merges))
+        return len(messages)
+
+    @classmethod
+    def refresh_threads(cls, conn, tenant_id: str, thread_ids: Iterable[int]) -> None:
+        """Recompute list-view stats for threads and drop those left without messages."""
+        thread_ids = [t for t in set(thread_ids) if t is not None]
+        if not thread_ids:
+            return
+        params = {'tenant_id': tenant_id, 'ids': thread_ids}
+        conn.execute(text("""
+            WITH stats AS (
+                SELECT m.thread_id AS id,
+                       count(DISTINCT COALESCE(m.message_id, m.id::text)) AS message_count,
+                       min(m.sent_at) AS first_at,
+                       max(m.sent_at) AS last_at,
+                       (array_agg(m.id ORDER BY m.sent_at DESC NULLS LAST, m.id DESC))[1] AS last_message_id,
+                       (array_agg(m.direction ORDER BY m.sent_at DESC NULLS LAST, m.id DESC))[1] AS last_direction,
+                       (array_agg(m.subject ORDER BY m.sent_at NULLS LAST, m.id))[1] AS subject,
+                       (array_agg(m.normalized_subject ORDER BY m.sent_at NULLS LAST, m.id))[1] AS normalized_subject,
+                       array_agg(DISTINCT m.account_email) AS accounts
+                FROM email_messages m
+                WHERE m.tenant_id = :tenant_id AND m.thread_id = ANY(CAST(:ids AS BIGINT[]))
+                GROUP BY m.thread_id
+            )
+            UPDATE email_threads t SET
+                message_count = s.message_count,
+                first_at = s.first_at,
+                last_at = s.last_at,
+                last_message_id = s.last_message_id,
+                last_direction = s.last_direction,
+                subject = s.subject,
+                normalized_subject = s.normalized_subject,
+                accounts = s.accounts,
+                participants = ARRAY(
+                    SELECT DISTINCT p
+                    FROM email_messages m2 CROSS JOIN LATERAL unnest(m2.participants) AS p
+                    WHERE m2.tenant_id = :tenant_id AND m2.thread_id = s.id AND p <> m2.account_email
+                ),
+                updated_at = CURRENT_TIMESTAMP
+            FROM stats s
+            WHERE t.id = s.id
+        """), params)
+        conn.execute(text("""
+            DELETE FROM email_threads t
+            WHERE t.tenant_id = :tenant_id AND t.id = ANY(CAST(:ids AS BIGINT[]))
+              AND NOT EXISTS (SELECT 1 FROM email_messages m WHERE m.thread_id = t.id)
+        """), params)
+
+    @classmethod
+    def get_recent_threads(cls, limit_per_section: int = 50, account_emails: List[str] = None,
+                           tenant_id: str = None) -> Dict[str, List[List[Dict]]]:
+        """Return the newest threads split by who sent the latest message.
+
+        {'sent': [...], 'inbox': [...]}, each a list of threads (newest first),
+        each thread a list of email dicts ordered oldest to newest.
+        """
+        from app.models.email_message import EmailMessage, MESSAGE_COLUMNS
+
+        organized = {'sent': [], 'inbox': []}
+        engine = cls._get_db_engine()
+        tenant_id = tenant_id or current_tenant_id()
+        if not engine or not tenant_id:
+            return organized
+
+        account_filter = "AND accounts && CAST(:accounts AS TEXT[])" if account_emails else ""
+        params = {'tenant_id': tenant_id, 'limit': limit_per_section,
+                  'accounts': [a.lower() for a in account_emails or []]}
+        try:
+            with engine.connect() as conn:
+                thread_rows = conn.execute(text(f"""
+                    (SELECT id, 'sent' AS section, last_at FROM email_threads
+                     WHERE tenant_id = :tenant_id AND message_count > 0 AND last_direction = 'sent' {account_filter}
+                     ORDER BY last_at DESC LIMIT :limit)
+                    UNION ALL
+                    (SELECT id, 'inbox' AS section, last_at FROM email_threads
+                     WHERE tenant_id = :tenant_id AND message_count > 0
+                       AND last_direction IS DISTINCT FROM 'sent' {account_filter}
+                     ORDER BY last_at DESC LIMIT :limit)
+                """), params).fetchall()
+                if not thread_rows:
+                    return organized
+
+                message_rows = conn.execute(text(f"""
+                    SELECT {MESSAGE_COLUMNS}
+                    FROM email_messages
+                    WHERE tenant_id = :tenant_id AND thread_id = ANY(CAST(:thread_ids AS BIGINT[]))
+                    ORDER BY sent_at NULLS FIRST, id
+                """), {'tenant_id': tenant_id, 'thread_ids': [r.id for r in thread_rows]})
+
+                emails_by_thread = {}
+                seen = set()
+                for row in message_rows:
+                    # The same message can be indexed in several folders
+                    dedupe_key = (row.thread_id, row.message_id or row.id)
+                    if dedupe_key in seen:
+                        continue
+                    seen.add(dedupe_key)
+                    emails_by_thread.setdefault(row.thread_id, []).append(EmailMessage._row_to_email(row))
+
+            for row in sorted(thread_rows, key=lambda r: r.last_at or datetime.min.replace(tzinfo=timezone.utc),
+                              reverse=True):
+                if row.id in emails_by_thread:
+                    organized[row.section].append(emails_by_thread[row.id])
+            return organized
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error loading email threads: {e}")
+            return organized
@@ -1,13 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey, Index, event, inspect, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.utils.company_keys import company_domain_key, company_name_key
 from datetime import datetime
 from typing import List, Optional
 import json
 
 class LeadgenCompany(Base):
     __tablename__ = "leadgen_companies"
+    __table_args__ = (
+        Index('uq_leadgen_companies_tenant_name_key', text("COALESCE(salesbot_tenant_id, '')"), 'name_key',
+              unique=True, postgresql_where=text('name_key IS NOT NULL')),
+        Index('uq_leadgen_companies_tenant_domain_key', text("COALESCE(salesbot_tenant_id, '')"), 'domain_key',
+              unique=True, postgresql_where=text('domain_key IS NOT NULL')),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -42,7 +49,7 @@ class LeadgenCompany(Base):
     digital_presence_score = Column(Integer, default=0, nullable=False)
     growth_signals_score = Column(Integer, default=0, nullable=False)
     implementation_feasibility_score = Column(Integer, default=0, nullable=False)
-    lead_scoring_data = Column(JSON, nullable=True)  # Detailed signal data
+    lead_scoring_data = Column(JSON, nullable=True)  # Per-signal results (lead_scoring.compact_signals_data)
     lead_scored_at = Column(DateTime, nullable=True)
     
     # Tenant creation fields
@@ -52,13 +59,17 @@ class LeadgenCompany(Base):
     # Tenant association for multi-tenancy
     salesbot_tenant_id = Column(String(255), nullable=True, index=True)
     
+    # Normalised duplicate-check keys (app.utils.company_keys), unique per tenant
+    name_key = Column(String(255), nullable=True)
+    domain_key = Column(String(255), nullable=True)
+    
     # Relationships
     job_postings = relationship("LeadgenJobPosting", back_populates="company", cascade="all, delete-orphan")
     scraping_logs = relationship("LeadgenScrapingLog", back_populates="company", cascade="all, delete-orphan")
     
-    def to_dict(self):
-        """Convert company to dictionary"""
-        return {
+    def to_dict(self, include_details: bool = True):
+        """Convert company to dictionary (without lead_scoring_data unless include_details)"""
+        data = {
             'id': self.id,
             'name': self.name,
             'domain': self.domain,
@@ -84,12 +95,45 @@ class LeadgenCompany(Base):
             'digital_presence_score': self.digital_presence_score,
             'growth_signals_score': self.growth_signals_score,
             'implementation_feasibility_score': self.implementation_feasibility_score,
-            'lead_scoring_data': self.lead_scoring_data,
             'lead_scored_at': self.lead_scored_at.isoformat() if self.lead_scored_at else None,
             'tenant_id': self.tenant_id,
             'tenant_created_at': self.tenant_created_at.isoformat() if self.tenant_created_at else None,
             'salesbot_tenant_id': self.salesbot_tenant_id
         }
+        if include_details:
+            data['lead_scoring_data'] = self.lead_scoring_data
+        return data
+
+@event.listens_for(LeadgenCompany, 'before_insert')
+def _set_company_keys(mapper, connection, target):
+    """Derive the duplicate-check keys for a new company"""
+    target.name_key = company_name_key(target.name)
+    target.domain_key = company_domain_key(target.domain)
+
+def _free_key(connection, target, column: str, key: Optional[str]) -> Optional[str]:
+    """`key` unless another company of the tenant already holds it"""
+    if key is None:
+        return None
+    taken = connection.execute(text(f"""
+        SELECT 1 FROM leadgen_companies
+        WHERE COALESCE(salesbot_tenant_id, '') = :tenant AND {column} = :key AND id <> :id
+        LIMIT 1
+    """), {'tenant': target.salesbot_tenant_id or '', 'key': key, 'id': target.id}).first()
+    return None if taken else key
+
+@event.listens_for(LeadgenCompany, 'before_update')
+def _update_company_keys(mapper, connection, target):
+    """Re-derive a key only when its source column changed.
+
+    Legacy duplicates keep their NULL keys (migration e7c1a4d8b2f5), and a
+    name or domain already held by another company leaves the key NULL
+    instead of failing the write on the unique index.
+    """
+    state = inspect(target)
+    if state.attrs.name.history.has_changes():
+        target.name_key = _free_key(connection, target, 'name_key', company_name_key(target.name))
+    if state.attrs.domain.history.has_changes():
+        target.domain_key = _free_key(connection, target, 'domain_key', company_domain_key(target.domain))
 
 class LeadgenJobPosting(Base):
     __tablename__ = "leadgen_job_postings"
@@ -186,6 +230,39 @@ class LeadgenScrapingLog(Base):
             'salesbot_tenant_id': self.salesbot_tenant_id
         }
 
+class LeadgenTask(Base):
+    """Background task state shared by all leadgen workers (app.services.leadgen_task_registry)"""
+    __tablename__ = "leadgen_tasks"
+    __table_args__ = (
+        Index('ix_leadgen_tasks_running_heartbeat', 'heartbeat_at', postgresql_where=text("status = 'running'")),
+    )
+    
+    task_id = Column(String(64), primary_key=True)
+    kind = Column(String(50), nullable=False)  # 'scraping', 'crawling', 'enrichment', 'lead_scoring', ...
+    status = Column(String(20), nullable=False, default='running')  # 'running', 'completed', 'failed', 'stopped'
+    
+    progress = Column(Integer, default=0, nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+    current_company = Column(Text, nullable=True)
+    leads_found = Column(Integer, default=0, nullable=False)
+    csv_file = Column(String(500), nullable=True)
+    
+    # Arguments to restart the task and the work it has already finished
+    params = Column(JSON, nullable=False, default=dict)
+    checkpoint = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # Worker currently running the task and how often it has been started
+    owner = Column(String(255), nullable=True)
+    attempts = Column(Integer, default=1, nullable=False)
+    
+    salesbot_tenant_id = Column(String(255), nullable=True)
+    
+    started_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    heartbeat_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
 class LeadgenSeedingSession(Base):
     __tablename__ = "leadgen_seeding_sessions"
     
@@ -205,7 +205,17 @@ class TenantSettings:
         """Get email configurations for a tenant."""
         settings = self.get_tenant_settings(tenant_id)
         return settings.get('email_configs', [])
-    
+
+    def get_tenant_ids_with_email_configs(self) -> List[str]:
+        """List tenants that have any email accounts configured (used by background mailbox sync)."""
+        engine = get_shared_engine()
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT tenant_id FROM tenant_settings
+                WHERE email_configs_encrypted IS NOT NULL AND email_configs_encrypted <> ''
+            """))
+            return [str(row.tenant_id) for row in result]
+
     def get_api_key(self, service: str, tenant_id: str = None) -> str:
         """Get API key for a specific service (openai, anthropic, perplexity)."""
         settings = self.get_tenant_settings(tenant_id)
@@ -19,6 +19,8 @@ from app.models.campaign import Campaign
 from app.models.contact import Contact
 from app.models.campaign_email_job import CampaignEmailJob
 from app.services.email_service import EmailService
+from app.database import use_pool_profile
+from app.utils.query_stats import track_queries
 
 # Static event listeners to avoid serialization issues
 def job_executed_listener(event):
@@ -64,6 +66,8 @@ def job_error_listener(event):
         print(f"Job {event.job_id} failed: {event.exception}")
 
 # Static campaign execution function - starts individual email scheduling
+@use_pool_profile('scheduler')
+@track_queries('job:execute_campaign_job')
 def execute_campaign_job(campaign_id: int):
     """Thread-safe function to start a campaign by scheduling individual emails."""
     from flask import current_app
@@ -265,6 +269,8 @@ def execute_campaign_job(campaign_id: int):
             gc.collect()
 
 # Static function to execute a single email within a campaign
+@use_pool_profile('scheduler')
+@track_queries('job:execute_single_email_job')
 def execute_single_email_job(campaign_id: int, contact: Dict, settings: Dict):
     """Execute a single email within a campaign."""
     from flask import current_app
@@ -438,6 +444,8 @@ def _reschedule_for_next_day(campaign_id: int, contact: Dict, settings: Dict):
         current_app.logger.error(f"Error rescheduling for next day: {e}")
 
 # Background job to process pending email jobs
+@use_pool_profile('scheduler')
+@track_queries('job:process_pending_email_jobs')
 def process_pending_email_jobs():
     """Process pending email jobs from the database."""
     from flask import current_app
@@ -563,6 +571,8 @@ def _execute_email_job(job: CampaignEmailJob) -> bool:
         return False
 
 # Test mode execution function that bypasses all delays and restrictions
+@use_pool_profile('scheduler')
+@track_queries('job:execute_campaign_job_test_mode')
 def execute_campaign_job_test_mode(campaign_id: int):
     """Execute campaign immediately for testing - bypasses all time constraints."""
     from flask import current_app
@@ -852,6 +862,8 @@ def _is_business_hours(timezone_str: str, business_hours: Dict) -> bool:
         current_app.logger.error(f"Error checking business hours: {e}")
         return True  # Default to allowing emails
 
+@use_pool_profile('scheduler')
+@track_queries('job:cleanup_old_logs_job')
 def cleanup_old_logs_job():
     """Daily log cleanup background job - module level function for serialization."""
     from flask import current_app
@@ -965,7 +977,7 @@ class CampaignScheduler:
             
             # Use shared database engine for APScheduler job store
             from app.database import get_shared_engine
-            scheduler_engine = get_shared_engine()
+            scheduler_engine = get_shared_engine('scheduler')
             
             jobstores = {
                 'default': SQLAlchemyJobStore(engine=scheduler_engine, tablename='scheduler_jobs')
@@ -1009,7 +1021,7 @@ class CampaignScheduler:
             
             # Use shared database engine for APScheduler job store
             from app.database import get_shared_engine
-            scheduler_engine = get_shared_engine()
+            scheduler_engine = get_shared_engine('scheduler')
             
             jobstores = {
                 'default': SQLAlchemyJobStore(engine=scheduler_engine, tablename='scheduler_jobs')
@@ -1048,6 +1060,9 @@ class CampaignScheduler:
             # Check if job already exists to prevent duplicate registration
             existing_jobs = self.scheduler.get_jobs()
             existing_job_ids = [job.id for job in existing_jobs]
+
+            # Registered independently so deployments with persisted email jobs still pick it up
+            self._setup_mailbox_sync_job(existing_job_ids)
             
             if 'process_pending_emails' in existing_job_ids:
                 current_app.logger.info("Background email processor already exists, skipping registration")
@@ -1128,6 +1143,30 @@ class CampaignScheduler:
         except Exception as e:
             current_app.logger.error(f"Failed to setup background jobs: {e}")
     
+    def _setup_mailbox_sync_job(self, existing_job_ids: List[str]):
+        """Schedule the incremental IMAP sync that feeds the local message index."""
+        from app.services.email_sync_service import SYNC_ENABLED, SYNC_INTERVAL_SECONDS, sync_mailboxes_job
+
+        if not SYNC_ENABLED:
+            self._safe_remove_job('sync_mailboxes')
+            return
+        if 'sync_mailboxes' in existing_job_ids:
+            return
+
+        try:
+            self.scheduler.add_job(
+                func=sync_mailboxes_job,
+                trigger='interval',
+                seconds=SYNC_INTERVAL_SECONDS,
+                id='sync_mailboxes',
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            current_app.logger.info(f"Mailbox sync scheduled ({SYNC_INTERVAL_SECONDS}sec interval)")
+        except Exception as sync_error:
+            current_app.logger.warning(f"Failed to schedule mailbox sync job: {sync_error}")
+
     def _safe_remove_job(self, job_id: str) -> bool:
         """Safely remove a job if it exists."""
         try:
@@ -1330,17 +1369,13 @@ class CampaignScheduler:
                 return True
             
             # Extract email addresses from contact dictionaries
-            contact_emails = []
-            for contact in target_contacts:
-                email = contact.get('email')
-                if email:
-                    contact_emails.append(email)
+            contact_emails = [contact.get('email') for contact in target_contacts if contact.get('email')]
             
             if not contact_emails:
                 current_app.logger.warning(f"No valid email addresses found in contacts for campaign {campaign_id}")
                 return False
             
-            # Use Campaign model's bulk add method
+            # Use Campaign model's set-based bulk add (one statement for all contacts)
             result = Campaign.bulk_add_contacts_to_campaign(campaign_id, contact_emails, status='active')
             
             current_app.logger.info(f"Associated {result['success']} contacts with campaign {campaign_id}, {result['failed']} failed")
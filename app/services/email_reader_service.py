@@ -7,8 +7,75 @@ from email.header import decode_header
 from email.utils import parseaddr, parsedate_to_datetime
 import re
 import os
+from collections import deque
 from flask import current_app
 
+# Headers needed for thread lists; the MIME headers let a partial body be parsed for a snippet
+LIST_HEADER_FIELDS = ('FROM TO CC SUBJECT DATE MESSAGE-ID IN-REPLY-TO REFERENCES '
+                      'CONTENT-TYPE CONTENT-TRANSFER-ENCODING')
+# Bytes of the message text fetched for the snippet (full bodies are fetched on demand)
+SNIPPET_FETCH_BYTES = int(os.getenv('EMAIL_SNIPPET_FETCH_BYTES', '2048'))
+# UIDs per UID FETCH command
+FETCH_BATCH_SIZE = int(os.getenv('EMAIL_FETCH_BATCH_SIZE', '100'))
+SNIPPET_LENGTH = 200
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_FETCH_START_RE = re.compile(rb'^\d+ \(')
+_FETCH_UID_RE = re.compile(rb'UID (\d+)')
+_FETCH_SECTION_RE = re.compile(rb'BODY\[([^\]]*)\]')
+
+
+def make_snippet(body: str) -> str:
+    """Collapse whitespace and truncate a body to a list-view preview."""
+    return _WHITESPACE_RE.sub(' ', body or '').strip()[:SNIPPET_LENGTH]
+
+
+def compact_uid_set(uids) -> str:
+    """Render UIDs as an IMAP message set with ranges, e.g. [1, 2, 3, 7] -> '1:3,7'."""
+    ranges = []
+    for uid in sorted(set(int(u) for u in uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ','.join(str(start) if start == end else f'{start}:{end}' for start, end in ranges)
+
+
+def _split_fetch_response(data) -> Dict[int, Dict[str, bytes]]:
+    """Group an imaplib UID FETCH response into {uid: {section: literal}}.
+
+    Sections are 'header' (HEADER.FIELDS), 'text' (TEXT) and 'full' (BODY[]).
+    Untagged FETCH responses without a UID (unsolicited flag updates) are dropped.
+    """
+    messages = []
+    current = None
+    for item in data or []:
+        if item is None:
+            continue
+        prefix, literal = item if isinstance(item, tuple) else (item, None)
+        if _FETCH_START_RE.match(prefix):
+            current = {'meta': b'', 'sections': {}}
+            messages.append(current)
+        if current is None:
+            continue
+        current['meta'] += prefix
+        if literal is not None:
+            sections = _FETCH_SECTION_RE.findall(prefix.upper())
+            section = sections[-1] if sections else b''
+            if section.startswith(b'HEADER'):
+                current['sections']['header'] = literal
+            elif section == b'TEXT':
+                current['sections']['text'] = literal
+            else:
+                current['sections']['full'] = literal
+
+    result = {}
+    for message in messages:
+        uid_match = _FETCH_UID_RE.search(message['meta'])
+        if uid_match and message['sections']:
+            result[int(uid_match.group(1))] = message['sections']
+    return result
+
 class EmailReaderService:
     """Service for reading emails and extracting conversations with contacts."""
     
@@ -18,6 +85,7 @@ class EmailReaderService:
         self.email = None
         self.password = None
         self.connection = None
+        self.last_error = None
         
     def configure_imap(self, host: str, email: str, password: str, port: int = 993):
         """Configure IMAP connection settings."""
@@ -28,8 +96,10 @@ class EmailReaderService:
         
     def connect(self) -> bool:
         """Connect to email server via IMAP."""
+        self.last_error = None
         try:
             if not all([self.imap_host, self.email, self.password]):
+                self.last_error = "IMAP configuration incomplete"
                 current_app.logger.error("IMAP configuration incomplete")
                 return False
                 
@@ -40,6 +110,7 @@ class EmailReaderService:
             
         except imaplib.IMAP4.error as e:
             error_msg = str(e)
+            self.last_error = error_msg
             if b'IMAP' in error_msg.encode() and b'enable' in error_msg.encode():
                 current_app.logger.error(f"IMAP not enabled for {self.email}: {error_msg}")
                 current_app.logger.info("Please enable IMAP access in Zoho Mail Settings > Mail Accounts > IMAP Access")
@@ -47,6 +118,7 @@ class EmailReaderService:
                 current_app.logger.error(f"IMAP authentication failed for {self.email}: {error_msg}")
             return False
         except Exception as e:
+            self.last_error = str(e)
             current_app.logger.error(f"Failed to connect to email: {e}")
             return False
     
@@ -94,15 +166,13 @@ class EmailReaderService:
                         f'SINCE {since_str}'
                     ]
                     
-                    status, message_ids = self.connection.search(None, *search_criteria)
+                    status, message_ids = self.connection.uid('SEARCH', None, *search_criteria)
                     
                     if status == 'OK' and message_ids[0]:
-                        ids = message_ids[0].split()
+                        uids = [int(uid) for uid in message_ids[0].split()]
                         
-                        for msg_id in ids[-50:]:  # Limit to last 50 emails
-                            email_data = self._fetch_email_data(msg_id, folder)
-                            if email_data:
-                                conversations.append(email_data)
+                        # Limit to last 50 emails; headers and snippets only
+                        conversations.extend(self.fetch_headers_by_uid(uids[-50:], folder))
                                 
                 except Exception as e:
                     current_app.logger.warning(f"Error searching folder {folder}: {e}")
@@ -123,48 +193,95 @@ class EmailReaderService:
                 return None
                 
             email_message = email.message_from_bytes(msg_data[0][1])
-            
-            # Extract headers
-            subject = self._decode_header(email_message.get('Subject', ''))
-            from_addr = self._decode_header(email_message.get('From', ''))
-            to_addr = self._decode_header(email_message.get('To', ''))
-            cc_addr = self._decode_header(email_message.get('Cc', ''))
-            date_str = email_message.get('Date', '')
-            message_id = email_message.get('Message-ID', '')
-            in_reply_to = email_message.get('In-Reply-To', '')
-            references = email_message.get('References', '')
-            
-            # Parse date
-            try:
-                email_date = parsedate_to_datetime(date_str) if date_str else datetime.now()
-            except:
-                email_date = datetime.now()
-            
-            # Extract body
-            body = self._extract_email_body(email_message)
-            
-            # Determine direction
-            sender_email = parseaddr(from_addr)[1].lower()
-            direction = 'sent' if sender_email == self.email.lower() else 'received'
-            
-            return {
-                'id': msg_id.decode(),
-                'message_id': message_id,
-                'in_reply_to': in_reply_to,
-                'references': references,
-                'subject': subject,
-                'from': from_addr,
-                'to': to_addr,
-                'cc': cc_addr,
-                'date': email_date,
-                'body': body,
-                'direction': direction,
-                'folder': folder,
-            }
+            return self._parse_email_message(email_message, msg_id.decode(), folder)
             
         except Exception as e:
             current_app.logger.error(f"Error fetching email {msg_id}: {e}")
             return None
+
+    def fetch_headers_by_uid(self, uids: List[int], folder: str) -> List[Dict]:
+        """Fetch list-view data (headers plus a short snippet) for UIDs in the selected folder.
+
+        Uses one UID FETCH per FETCH_BATCH_SIZE UIDs over compact ranges and
+        BODY.PEEK so nothing is marked as read. The returned dicts carry a
+        'snippet' and no 'body'; fetch bodies with fetch_bodies_by_uid.
+        Raises imaplib.IMAP4.error if the server rejects a batch.
+        """
+        emails = []
+        uids = sorted(int(u) for u in uids)
+        for start in range(0, len(uids), FETCH_BATCH_SIZE):
+            batch = uids[start:start + FETCH_BATCH_SIZE]
+            status, data = self.connection.uid(
+                'FETCH', compact_uid_set(batch),
+                f'(UID BODY.PEEK[HEADER.FIELDS ({LIST_HEADER_FIELDS})] BODY.PEEK[TEXT]<0.{SNIPPET_FETCH_BYTES}>)'
+            )
+            if status != 'OK':
+                raise imaplib.IMAP4.error(f"UID FETCH failed in {folder}: {data}")
+
+            for uid, sections in sorted(_split_fetch_response(data).items()):
+                header_bytes = sections.get('header', b'').rstrip(b'\r\n')
+                email_message = email.message_from_bytes(header_bytes + b'\r\n\r\n' + sections.get('text', b''))
+                email_data = self._parse_email_message(email_message, str(uid), folder)
+                email_data['uid'] = uid
+                email_data['snippet'] = make_snippet(email_data['body'])
+                email_data['body'] = None
+                emails.append(email_data)
+        return emails
+
+    def fetch_bodies_by_uid(self, uids: List[int], folder: str) -> Dict[int, str]:
+        """Fetch and extract the full text body of each UID in the selected folder."""
+        bodies = {}
+        uids = sorted(int(u) for u in uids)
+        for start in range(0, len(uids), FETCH_BATCH_SIZE):
+            batch = uids[start:start + FETCH_BATCH_SIZE]
+            status, data = self.connection.uid('FETCH', compact_uid_set(batch), '(UID BODY.PEEK[])')
+            if status != 'OK':
+                raise imaplib.IMAP4.error(f"UID FETCH failed in {folder}: {data}")
+
+            for uid, sections in _split_fetch_response(data).items():
+                if 'full' in sections:
+                    bodies[uid] = self._extract_email_body(email.message_from_bytes(sections['full']))
+        return bodies
+
+    def _parse_email_message(self, email_message, msg_id: str, folder: str) -> Dict:
+        """Extract headers, body and direction from a parsed message."""
+        # Extract headers
+        subject = self._decode_header(email_message.get('Subject', ''))
+        from_addr = self._decode_header(email_message.get('From', ''))
+        to_addr = self._decode_header(email_message.get('To', ''))
+        cc_addr = self._decode_header(email_message.get('Cc', ''))
+        date_str = email_message.get('Date', '')
+        message_id = email_message.get('Message-ID', '')
+        in_reply_to = email_message.get('In-Reply-To', '')
+        references = email_message.get('References', '')
+        
+        # Parse date
+        try:
+            email_date = parsedate_to_datetime(date_str) if date_str else datetime.now()
+        except:
+            email_date = datetime.now()
+        
+        # Extract body
+        body = self._extract_email_body(email_message)
+        
+        # Determine direction
+        sender_email = parseaddr(from_addr)[1].lower()
+        direction = 'sent' if sender_email == self.email.lower() else 'received'
+        
+        return {
+            'id': msg_id,
+            'message_id': message_id,
+            'in_reply_to': in_reply_to,
+            'references': references,
+            'subject': subject,
+            'from': from_addr,
+            'to': to_addr,
+            'cc': cc_addr,
+            'date': email_date,
+            'body': body,
+            'direction': direction,
+            'folder': folder,
+        }
     
     def _decode_header(self, header_value: str) -> str:
         """Decode email header."""
@@ -223,7 +340,17 @@ class EmailReaderService:
         return body.strip()
     
     def group_emails_by_thread(self, emails: List[Dict]) -> Dict[str, List[Dict]]:
-        """Group emails by conversation thread."""
+        """Group emails by conversation thread.
+
+        Emails read from the local index already carry their persisted
+        thread_id; only emails fetched live from IMAP are grouped here.
+        """
+        if emails and all(e.get('thread_id') is not None for e in emails):
+            indexed_threads = {}
+            for e in sorted(emails, key=lambda x: (x.get('date') is not None, x.get('date') or datetime.min)):
+                indexed_threads.setdefault(str(e['thread_id']), []).append(e)
+            return indexed_threads
+
         emails_by_id = {e['message_id']: e for e in emails if e.get('message_id')}
         
         parent_child_map = {}
@@ -279,10 +406,10 @@ class EmailReaderService:
             if root_id in processed_emails: continue
             
             thread_emails = []
-            q = [root_id]
+            q = deque([root_id])
             
             while q:
-                msg_id = q.pop(0)
+                msg_id = q.popleft()
                 if msg_id in processed_emails or msg_id not in emails_by_id: continue
                 
                 processed_emails.add(msg_id)
@@ -300,7 +427,10 @@ class EmailReaderService:
     def get_conversation_summary(self, contact_email: str) -> Dict:
         """Get a summary of email conversation with a contact."""
         conversations = self.search_conversations_with_contact(contact_email)
-        
+        return self.build_conversation_summary(conversations)
+
+    def build_conversation_summary(self, conversations: List[Dict]) -> Dict:
+        """Summarise a newest-first list of emails exchanged with one contact."""
         if not conversations:
             return {
                 'total_emails': 0,
@@ -0,0 +1,247 @@
+"""
+Mailbox sync service.
+
+Incrementally copies message headers and snippets from each tenant's IMAP
+accounts into the local email_messages index. Every folder keeps a cursor in
+email_sync_state (UIDVALIDITY + highest UID seen) so a run only asks the
+server for UIDs above the cursor, and only headers plus a short text prefix
+are fetched, in batched UID FETCH commands. Full bodies are fetched lazily
+when a thread is opened (load_message_bodies). IMAP logins are reused
+through the session pool in imap_session_pool. The dashboard inbox and the
+conversation views read the index and never wait on IMAP.
+"""
+
+import os
+import imaplib
+from datetime import datetime, timezone
+from email.utils import getaddresses
+from typing import Dict, List
+
+from flask import current_app
+
+from app.database import use_pool_profile
+from app.models.email_message import EmailMessage
+from app.tenant import current_tenant_id
+from app.services.email_reader_service import FETCH_BATCH_SIZE
+from app.services.imap_session_pool import IDLE_ENABLED, idle_manager, imap_pool, imap_session, is_throttling_error
+from app.utils.query_stats import track_queries
+
+SYNC_FOLDERS = [f.strip() for f in os.getenv('EMAIL_SYNC_FOLDERS', 'INBOX,Sent').split(',') if f.strip()]
+SYNC_INTERVAL_SECONDS = int(os.getenv('EMAIL_SYNC_INTERVAL_SECONDS', '120'))
+SYNC_ENABLED = os.getenv('EMAIL_SYNC_ENABLED', 'true').lower() in ('true', '1', 'on')
+
+# First sync of a folder only backfills this many of the newest messages
+INITIAL_SYNC_MESSAGES = int(os.getenv('EMAIL_SYNC_INITIAL_MESSAGES', '200'))
+# Upper bound on messages fetched per folder per run; the rest follow next run
+SYNC_BATCH_LIMIT = int(os.getenv('EMAIL_SYNC_BATCH_LIMIT', '500'))
+
+
+def extract_participants(*header_values: str) -> List[str]:
+    """Return the unique lower-cased addresses found in From/To/Cc headers."""
+    addresses = []
+    for _, address in getaddresses([value for value in header_values if value]):
+        address = address.strip().lower()
+        if address and '@' in address and address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+class MailboxSyncService:
+    """Syncs one IMAP account of one tenant into the local message index."""
+
+    def __init__(self, tenant_id: str, account):
+        self.tenant_id = tenant_id
+        self.account = account
+        self.account_email = account.email.lower()
+        self.reader = None
+
+    def sync(self, folders: List[str] = None) -> Dict[str, int]:
+        """Sync the given folders; returns the number of new messages per folder."""
+        folders = folders or SYNC_FOLDERS
+        synced = {}
+        try:
+            with imap_session(self.tenant_id, self.account) as reader:
+                self.reader = reader
+                for folder in folders:
+                    try:
+                        synced[folder] = self._sync_folder(folder)
+                    except (imaplib.IMAP4.abort, OSError):
+                        raise
+                    except imaplib.IMAP4.error as e:
+                        # Throttling must reach the pool so it can back off this account
+                        if is_throttling_error(str(e)):
+                            raise
+                        current_app.logger.warning(f"Mailbox sync failed for {self.account_email}/{folder}: {e}")
+                        EmailMessage.record_sync_error(self.account_email, folder, str(e), tenant_id=self.tenant_id)
+                    except Exception as e:
+                        current_app.logger.warning(f"Mailbox sync failed for {self.account_email}/{folder}: {e}")
+                        EmailMessage.record_sync_error(self.account_email, folder, str(e), tenant_id=self.tenant_id)
+        except Exception as e:
+            current_app.logger.warning(f"Mailbox sync failed for {self.account_email}: {e}")
+            for folder in folders:
+                if folder not in synced:
+                    EmailMessage.record_sync_error(self.account_email, folder, str(e), tenant_id=self.tenant_id)
+        finally:
+            self.reader = None
+        return synced
+
+    def _sync_folder(self, folder: str) -> int:
+        connection = self.reader.connection
+        status, _ = connection.select(folder, readonly=True)
+        if status != 'OK':
+            raise RuntimeError(f"Cannot select folder {folder}")
+
+        uidvalidity = self._selected_uidvalidity()
+        state = EmailMessage.get_sync_state(self.account_email, folder, tenant_id=self.tenant_id)
+        reset = bool(state and state.get('uidvalidity') is not None and state['uidvalidity'] != uidvalidity)
+        highest_uid = state['highest_uid'] if state and not reset else 0
+        if reset:
+            current_app.logger.info(f"🔄 UIDVALIDITY changed for {self.account_email}/{folder}, re-indexing folder")
+
+        # "n:*" always matches the last message, even when its UID is below n
+        status, data = connection.uid('SEARCH', None, f'UID {highest_uid + 1}:*')
+        if status != 'OK':
+            raise RuntimeError(f"UID SEARCH failed for {folder}")
+        uids = sorted(uid for uid in (int(u) for u in data[0].split()) if uid > highest_uid)
+
+        if highest_uid == 0:
+            uids = uids[-INITIAL_SYNC_MESSAGES:]
+        uids = uids[:SYNC_BATCH_LIMIT]
+
+        indexed = 0
+        batches = [uids[i:i + FETCH_BATCH_SIZE] for i in range(0, len(uids), FETCH_BATCH_SIZE)] or [[]]
+        for batch in batches:
+            messages = [self._to_index_record(m) for m in self.reader.fetch_headers_by_uid(batch, folder)]
+            # UIDs missing from the response were expunged meanwhile, so the cursor can pass them
+            new_highest = batch[-1] if batch else highest_uid
+            if not EmailMessage.store_messages(self.account_email, folder, uidvalidity, messages, new_highest,
+                                               reset=reset, tenant_id=self.tenant_id):
+                raise RuntimeError(f"Could not store synced messages for {folder}")
+            reset = False
+            indexed += len(messages)
+
+        if indexed:
+            current_app.logger.info(f"📥 Indexed {indexed} new messages for {self.account_email}/{folder}")
+        return indexed
+
+    def _selected_uidvalidity(self) -> int:
+        _, data = self.reader.connection.response('UIDVALIDITY')
+        if not data or data[0] is None:
+            raise RuntimeError("Server did not report UIDVALIDITY")
+        return int(data[0])
+
+    @staticmethod
+    def _to_index_record(email_data: Dict) -> Dict:
+        sent_at = email_data.get('date')
+        if sent_at is None or sent_at.tzinfo is None:
+            sent_at = (sent_at or datetime.now()).astimezone(timezone.utc)
+        return {
+            **email_data,
+            'date': sent_at,
+            'participants': extract_participants(email_data.get('from'), email_data.get('to'),
+                                                 email_data.get('cc')),
+        }
+
+
+def sync_tenant_mailboxes(tenant_id: str, folders: List[str] = None) -> Dict[str, Dict[str, int]]:
+    """Sync every IMAP-enabled account of a tenant. Returns new message counts per account/folder."""
+    results = {}
+    for account in _imap_accounts(tenant_id):
+        results[account.email] = MailboxSyncService(tenant_id, account).sync(folders)
+    return results
+
+
+def _imap_accounts(tenant_id: str) -> List:
+    from app.utils.tenant_email_config import TenantEmailConfigManager
+
+    return [
+        account for account in TenantEmailConfigManager(tenant_id).get_accounts()
+        if all([account.imap_host, account.email, account.password])
+    ]
+
+
+def load_message_bodies(index_ids: List[int]) -> Dict[int, str]:
+    """Return full text bodies for indexed messages, fetching uncached ones from IMAP.
+
+    Messages are grouped per account and folder so each mailbox costs one
+    pooled session checkout and one batched UID FETCH; fetched bodies are
+    cached in the index.
+    """
+    from app.utils.tenant_email_config import TenantEmailConfigManager
+
+    rows = EmailMessage.get_fetch_locations(index_ids)
+    bodies = {row['id']: row['body_text'] for row in rows if row['body_text'] is not None}
+
+    pending = {}
+    for row in rows:
+        if row['body_text'] is None:
+            pending.setdefault((row['account_email'], row['folder']), []).append(row)
+    if not pending:
+        return bodies
+
+    tenant_id = current_tenant_id()
+    accounts = {acc.email.lower(): acc for acc in TenantEmailConfigManager().get_accounts() if acc.email}
+    for (account_email, folder), folder_rows in pending.items():
+        account = accounts.get(account_email)
+        if not account:
+            continue
+        try:
+            with imap_session(tenant_id, account) as reader:
+                status, _ = reader.connection.select(folder, readonly=True)
+                if status != 'OK':
+                    continue
+                # UIDs from an older UIDVALIDITY no longer address the same messages
+                _, data = reader.connection.response('UIDVALIDITY')
+                uidvalidity = int(data[0]) if data and data[0] is not None else None
+                by_uid = {row['uid']: row['id'] for row in folder_rows if row['uidvalidity'] == uidvalidity}
+                if not by_uid:
+                    continue
+                fetched = reader.fetch_bodies_by_uid(list(by_uid), folder)
+
+            loaded = {by_uid[uid]: body for uid, body in fetched.items() if uid in by_uid}
+            EmailMessage.save_bodies(loaded)
+            bodies.update(loaded)
+        except Exception as e:
+            current_app.logger.warning(f"Error loading message bodies for {account_email}/{folder}: {e}")
+    return bodies
+
+
+def _sync_new_inbox_mail(tenant_id: str, account):
+    """IDLE watcher callback: pull newly announced INBOX messages into the index."""
+    with use_pool_profile('scheduler'):
+        MailboxSyncService(tenant_id, account).sync(['INBOX'])
+
+
+@use_pool_profile('scheduler')
+@track_queries('job:sync_mailboxes_job')
+def sync_mailboxes_job():
+    """Background job: incrementally sync all tenants' mailboxes into the local index."""
+    from app import create_app
+    from app.models.tenant_settings import TenantSettings
+
+    app = create_app()
+    with app.app_context():
+        # Keep pooled sessions authenticated between runs
+        imap_pool.maintain()
+
+        try:
+            tenant_ids = TenantSettings().get_tenant_ids_with_email_configs()
+        except Exception as e:
+            current_app.logger.error(f"Mailbox sync could not list tenants: {e}")
+            return
+
+        if IDLE_ENABLED:
+            idle_manager.ensure_watchers(
+                app,
+                {tenant_id: _imap_accounts(tenant_id) for tenant_id in tenant_ids},
+                _sync_new_inbox_mail
+            )
+
+        for tenant_id in tenant_ids:
+            try:
+                results = sync_tenant_mailboxes(tenant_id)
+                total = sum(sum(folders.values()) for folders in results.values())
+                if total:
+                    current_app.logger.info(f"📬 Mailbox sync for tenant {tenant_id}: {total} new messages")
+            except Exception as e:
+                current_app.logger.error(f"Mailbox sync failed for tenant {tenant_id}: {e}")
@@ -0,0 +1,408 @@
+"""
+IMAP session pool.
+
+Keeps authenticated IMAP sessions per (tenant, account) so inbox syncs and
+lazy body fetches reuse a login instead of paying one per request. Idle
+sessions are checked with NOOP before reuse and closed after a maximum idle
+time. When a provider throttles (too many connections, rate limits) the
+account is put into exponential backoff and checkouts fail fast with
+ImapThrottledError until it expires.
+
+Optionally (IMAP_IDLE_ENABLED=true) one watcher thread per account holds an
+IDLE session on INBOX, or polls with NOOP where IDLE is not supported, and
+syncs new mail into the local message index as soon as the server reports it.
+"""
+
+import os
+import re
+import time
+import select
+import hashlib
+import imaplib
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from flask import current_app
+
+from app.services.email_reader_service import EmailReaderService
+
+MAX_SESSIONS_PER_ACCOUNT = int(os.getenv('IMAP_POOL_MAX_SESSIONS_PER_ACCOUNT', '2'))
+NOOP_AFTER_SECONDS = int(os.getenv('IMAP_POOL_NOOP_AFTER_SECONDS', '60'))
+MAX_IDLE_SECONDS = int(os.getenv('IMAP_POOL_MAX_IDLE_SECONDS', '900'))
+CHECKOUT_TIMEOUT_SECONDS = float(os.getenv('IMAP_POOL_CHECKOUT_TIMEOUT_SECONDS', '30'))
+BACKOFF_BASE_SECONDS = int(os.getenv('IMAP_THROTTLE_BACKOFF_SECONDS', '30'))
+BACKOFF_MAX_SECONDS = int(os.getenv('IMAP_THROTTLE_BACKOFF_MAX_SECONDS', '900'))
+
+IDLE_ENABLED = os.getenv('IMAP_IDLE_ENABLED', 'false').lower() in ('true', '1', 'on')
+# RFC 2177: re-issue IDLE before servers drop it at 30 minutes
+IDLE_RENEW_SECONDS = int(os.getenv('IMAP_IDLE_RENEW_SECONDS', '1500'))
+IDLE_POLL_SECONDS = int(os.getenv('IMAP_IDLE_POLL_SECONDS', '60'))
+
+# Response codes and texts Gmail, Outlook, Zoho and Yahoo use when throttling
+_THROTTLE_RE = re.compile(
+    r'\[(?:THROTTLED|UNAVAILABLE|LIMIT)\]|too many|try again later|rate limit|temporarily unavailable',
+    re.IGNORECASE
+)
+_EXISTS_RE = re.compile(rb'^\* \d+ EXISTS')
+
+
+class ImapSessionError(Exception):
+    """Raised when no IMAP session can be provided for an account."""
+
+
+class ImapThrottledError(ImapSessionError):
+    """Raised while an account is backing off after provider throttling."""
+
+
+def is_throttling_error(message: str) -> bool:
+    return bool(message and _THROTTLE_RE.search(message))
+
+
+def _account_key(tenant_id: str, account) -> Tuple[str, str]:
+    return (str(tenant_id), account.email.lower())
+
+
+def _account_fingerprint(account) -> str:
+    """Changes when the account's server or credentials change, invalidating pooled sessions."""
+    raw = f"{account.imap_host}|{account.imap_port}|{account.email}|{account.password}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _new_reader(account) -> EmailReaderService:
+    reader = EmailReaderService()
+    reader.configure_imap(
+        host=account.imap_host,
+        email=account.email,
+        password=account.password,
+        port=account.imap_port
+    )
+    return reader
+
+
+class _AccountSessions:
+    """Idle sessions, usage count and throttle state for one account."""
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.condition = threading.Condition()
+        self.idle: List[Tuple[EmailReaderService, float]] = []
+        self.in_use = 0
+        self.failures = 0
+        self.backoff_until = 0.0
+        self.logins = 0
+        self.reuses = 0
+        self.retired = False
+
+    def record_throttle(self) -> float:
+        self.failures += 1
+        delay = min(BACKOFF_BASE_SECONDS * (2 ** (self.failures - 1)), BACKOFF_MAX_SECONDS)
+        self.backoff_until = time.time() + delay
+        return delay
+
+    def record_success(self):
+        self.failures = 0
+        self.backoff_until = 0.0
+
+
+class ImapSessionPool:
+    """Process-wide pool of authenticated IMAP sessions, keyed by tenant and account."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._accounts: Dict[Tuple[str, str], _AccountSessions] = {}
+
+    def _sessions_for(self, tenant_id: str, account) -> _AccountSessions:
+        key = _account_key(tenant_id, account)
+        fingerprint = _account_fingerprint(account)
+        stale = []
+        with self._lock:
+            sessions = self._accounts.get(key)
+            if sessions is None or sessions.fingerprint != fingerprint:
+                if sessions is not None:
+                    with sessions.condition:
+                        stale = [reader for reader, _ in sessions.idle]
+                        sessions.idle = []
+                        sessions.retired = True
+                sessions = _AccountSessions(fingerprint)
+                self._accounts[key] = sessions
+        for reader in stale:
+            reader.disconnect()
+        return sessions
+
+    @contextmanager
+    def session(self, tenant_id: str, account):
+        """Check out an authenticated EmailReaderService for an account.
+
+        The session is returned to the pool afterwards unless the block raised
+        an IMAP protocol or socket error, in which case it is discarded.
+        """
+        sessions = self._sessions_for(tenant_id, account)
+        reader = self._checkout(sessions, account)
+        discard = False
+        try:
+            yield reader
+        except (imaplib.IMAP4.abort, OSError):
+            discard = True
+            raise
+        except imaplib.IMAP4.error as e:
+            discard = True
+            if is_throttling_error(str(e)):
+                with sessions.condition:
+                    delay = sessions.record_throttle()
+                current_app.logger.warning(f"⏳ IMAP throttled for {account.email}, backing off {delay}s")
+            raise
+        finally:
+            self._checkin(sessions, reader, discard)
+
+    def _checkout(self, sessions: _AccountSessions, account) -> EmailReaderService:
+        deadline = time.time() + CHECKOUT_TIMEOUT_SECONDS
+        with sessions.condition:
+            while True:
+                if sessions.backoff_until > time.time():
+                    remaining = int(sessions.backoff_until - time.time())
+                    raise ImapThrottledError(f"IMAP access for {account.email} is backing off for {remaining}s")
+                if sessions.idle:
+                    reader, last_used = sessions.idle.pop()
+                    sessions.in_use += 1
+                    break
+                if sessions.in_use < MAX_SESSIONS_PER_ACCOUNT:
+                    reader, last_used = None, None
+                    sessions.in_use += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise ImapSessionError(f"Timed out waiting for an IMAP session for {account.email}")
+                sessions.condition.wait(remaining)
+
+        try:
+            if reader is not None and self._is_usable(reader, last_used):
+                with sessions.condition:
+                    sessions.reuses += 1
+                return reader
+            if reader is not None:
+                reader.disconnect()
+            return self._login(sessions, account)
+        except Exception:
+            with sessions.condition:
+                sessions.in_use -= 1
+                sessions.condition.notify()
+            raise
+
+    @staticmethod
+    def _is_usable(reader: EmailReaderService, last_used: float) -> bool:
+        idle_for = time.time() - last_used
+        if idle_for > MAX_IDLE_SECONDS or reader.connection is None:
+            return False
+        if idle_for < NOOP_AFTER_SECONDS:
+            return True
+        try:
+            status, _ = reader.connection.noop()
+            return status == 'OK'
+        except Exception:
+            return False
+
+    def _login(self, sessions: _AccountSessions, account) -> EmailReaderService:
+        reader = _new_reader(account)
+        if reader.connect():
+            with sessions.condition:
+                sessions.record_success()
+                sessions.logins += 1
+            return reader
+
+        if is_throttling_error(reader.last_error):
+            with sessions.condition:
+                delay = sessions.record_throttle()
+            current_app.logger.warning(f"⏳ IMAP login throttled for {account.email}, backing off {delay}s")
+            raise ImapThrottledError(reader.last_error)
+        raise ImapSessionError(reader.last_error or f"Cannot connect to {account.email}")
+
+    def _checkin(self, sessions: _AccountSessions, reader: EmailReaderService, discard: bool):
+        with sessions.condition:
+            sessions.in_use -= 1
+            keep = (not discard and not sessions.retired and reader.connection is not None
+                    and len(sessions.idle) < MAX_SESSIONS_PER_ACCOUNT)
+            if keep:
+                sessions.idle.append((reader, time.time()))
+            sessions.condition.notify()
+        if not keep:
+            reader.disconnect()
+
+    def maintain(self):
+        """NOOP idle sessions so they stay authenticated; close ones idle too long or broken."""
+        with self._lock:
+            accounts = list(self._accounts.values())
+        for sessions in accounts:
+            with sessions.condition:
+                idle, sessions.idle = sessions.idle, []
+            kept = []
+            for reader, last_used in idle:
+                if time.time() - last_used > MAX_IDLE_SECONDS:
+                    reader.disconnect()
+                    continue
+                try:
+                    status, _ = reader.connection.noop()
+                except Exception:
+                    status = 'NO'
+                if status == 'OK':
+                    kept.append((reader, time.time()))
+                else:
+                    reader.disconnect()
+            with sessions.condition:
+                sessions.idle.extend(kept)
+                sessions.condition.notify_all()
+
+    def stats(self) -> Dict:
+        """Per-account session counts and throttle state for diagnostics."""
+        with self._lock:
+            items = list(self._accounts.items())
+        now = time.time()
+        return {
+            f"{tenant_id}:{email}": {
+                'idle': len(sessions.idle),
+                'in_use': sessions.in_use,
+                'logins': sessions.logins,
+                'reuses': sessions.reuses,
+                'throttle_failures': sessions.failures,
+                'backoff_seconds_remaining': max(0, int(sessions.backoff_until - now)),
+            }
+            for (tenant_id, email), sessions in items
+        }
+
+    def close_all(self):
+        with self._lock:
+            accounts, self._accounts = list(self._accounts.values()), {}
+        for sessions in accounts:
+            with sessions.condition:
+                idle, sessions.idle = sessions.idle, []
+            for reader, _ in idle:
+                reader.disconnect()
+
+
+# Global pool instance
+imap_pool = ImapSessionPool()
+
+
+def imap_session(tenant_id: str, account):
+    """Check out a pooled, authenticated IMAP session for an account (context manager)."""
+    return imap_pool.session(tenant_id, account)
+
+
+class ImapIdleWatcher(threading.Thread):
+    """Holds an IDLE (or NOOP-polling) session on INBOX and reports new mail."""
+
+    def __init__(self, app, tenant_id: str, account, on_new_mail: Callable):
+        super().__init__(name=f"imap-idle-{account.email}", daemon=True)
+        self.app = app
+        self.tenant_id = tenant_id
+        self.account = account
+        self.fingerprint = _account_fingerprint(account)
+        self.on_new_mail = on_new_mail
+        self._stop_event = threading.Event()
+        self._failures = 0
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        with self.app.app_context():
+            while not self._stop_event.is_set():
+                try:
+                    self._watch()
+                    self._failures = 0
+                except Exception as e:
+                    self._failures += 1
+                    delay = min(BACKOFF_BASE_SECONDS * (2 ** (self._failures - 1)), BACKOFF_MAX_SECONDS)
+                    current_app.logger.warning(f"IMAP IDLE watcher for {self.account.email} failed ({e}), retrying in {delay}s")
+                    self._stop_event.wait(delay)
+
+    def _watch(self):
+        reader = _new_reader(self.account)
+        if not reader.connect():
+            raise ImapSessionError(reader.last_error or "connect failed")
+        try:
+            connection = reader.connection
+            connection.select('INBOX', readonly=True)
+            supports_idle = 'IDLE' in connection.capabilities
+            current_app.logger.info(f"👂 Watching INBOX of {self.account.email} ({'IDLE' if supports_idle else 'NOOP polling'})")
+
+            while not self._stop_event.is_set():
+                if supports_idle:
+                    new_mail = self._idle(connection)
+                else:
+                    if self._stop_event.wait(IDLE_POLL_SECONDS):
+                        break
+                    connection.noop()
+                    _, exists = connection.response('EXISTS')
+                    new_mail = bool(exists and exists[0] is not None)
+                if new_mail:
+                    self.on_new_mail(self.tenant_id, self.account)
+        finally:
+            reader.disconnect()
+
+    def _idle(self, connection) -> bool:
+        """Run one IDLE cycle; returns True if the server announced new messages."""
+        tag = connection._new_tag()
+        connection.send(tag + b' IDLE\r\n')
+        if not connection.readline().startswith(b'+'):
+            raise ImapSessionError("Server refused IDLE")
+
+        new_mail = False
+        deadline = time.time() + IDLE_RENEW_SECONDS
+        sock = connection.sock
+        while not new_mail and not self._stop_event.is_set() and time.time() < deadline:
+            pending = getattr(sock, 'pending', lambda: 0)()
+            if not pending:
+                readable, _, _ = select.select([sock], [], [], 5)
+                if not readable:
+                    continue
+            line = connection.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed during IDLE")
+            if _EXISTS_RE.match(line):
+                new_mail = True
+
+        connection.send(b'DONE\r\n')
+        while True:
+            line = connection.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed while ending IDLE")
+            if line.startswith(tag):
+                break
+        return new_mail
+
+
+class ImapIdleManager:
+    """Starts and stops IDLE watchers so there is one per configured account."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watchers: Dict[Tuple[str, str], ImapIdleWatcher] = {}
+
+    def ensure_watchers(self, app, accounts_by_tenant: Dict[str, List], on_new_mail: Callable):
+        wanted = {}
+        for tenant_id, accounts in accounts_by_tenant.items():
+            for account in accounts:
+                wanted[_account_key(tenant_id, account)] = (tenant_id, account)
+
+        with self._lock:
+            for key, watcher in list(self._watchers.items()):
+                account = wanted.get(key, (None, None))[1]
+                if (not watcher.is_alive() or account is None
+                        or watcher.fingerprint != _account_fingerprint(account)):
+                    watcher.stop()
+                    del self._watchers[key]
+            for key, (tenant_id, account) in wanted.items():
+                if key not in self._watchers:
+                    watcher = ImapIdleWatcher(app, tenant_id, account, on_new_mail)
+                    self._watchers[key] = watcher
+                    watcher.start()
+
+    def stop_all(self):
+        with self._lock:
+            for watcher in self._watchers.values():
+                watcher.stop()
+            self._watchers.clear()
+
+
+idle_manager = ImapIdleManager()
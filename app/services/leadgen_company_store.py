@@ -0,0 +1,170 @@
+"""
+Bulk duplicate checks and inserts for leadgen_companies.
+
+Both helpers are driven by the per-tenant unique indexes on name_key and
+domain_key (app.utils.company_keys), so their cost scales with the batch
+being checked, not with the size of the table:
+
+- find_existing_companies(): one `= ANY(:keys)` lookup for a whole batch
+- insert_companies(): one existence check, one reactivation UPDATE and one
+  INSERT ... SELECT FROM jsonb_to_recordset(...) ON CONFLICT DO NOTHING
+
+The functions take an open SQLAlchemy session or connection and leave
+committing to the caller. Companies without a tenant (the FastAPI leadgen
+tool) are stored with a NULL salesbot_tenant_id and share one namespace.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+
+from app.utils.company_keys import company_domain_key, company_name_key
+
+logger = logging.getLogger(__name__)
+
+# Columns accepted by insert_companies(); everything else gets the model defaults
+INSERT_COLUMNS = ('name', 'domain', 'industry', 'employee_count', 'location', 'founded_year',
+                  'technology_stack', 'linkedin_url', 'source')
+
+
+@dataclass
+class ExistingCompanies:
+    """Rows of a batch lookup, indexed by key"""
+    by_name_key: Dict[str, Any] = field(default_factory=dict)
+    by_domain_key: Dict[str, Any] = field(default_factory=dict)
+
+    def match(self, name_key: Optional[str], domain_key: Optional[str]):
+        """Existing row for either key, domain first"""
+        return (domain_key and self.by_domain_key.get(domain_key)) or (name_key and self.by_name_key.get(name_key))
+
+    @property
+    def name_keys(self) -> Set[str]:
+        return set(self.by_name_key)
+
+    @property
+    def domain_keys(self) -> Set[str]:
+        return set(self.by_domain_key)
+
+
+@dataclass
+class InsertResult:
+    inserted: Dict[str, int] = field(default_factory=dict)  # name_key -> new id
+    existing: Dict[str, int] = field(default_factory=dict)  # name_key -> id of the row it duplicates
+    reactivated: int = 0
+    skipped: int = 0  # no usable name, duplicate within the batch, or lost an insert race
+
+
+def find_existing_companies(session, names: Iterable[Optional[str]] = (), domains: Iterable[Optional[str]] = (),
+                            tenant_id: Optional[str] = None) -> ExistingCompanies:
+    """Look up every company matching any of the given names or domains in one query"""
+    name_keys = sorted({key for key in map(company_name_key, names) if key})
+    domain_keys = sorted({key for key in map(company_domain_key, domains) if key})
+    found = ExistingCompanies()
+    if not name_keys and not domain_keys:
+        return found
+
+    rows = session.execute(text("""
+        SELECT id, name, domain, name_key, domain_key, is_active
+        FROM leadgen_companies
+        WHERE COALESCE(salesbot_tenant_id, '') = :tenant
+          AND (name_key = ANY(:name_keys) OR domain_key = ANY(:domain_keys))
+    """), {'tenant': tenant_id or '', 'name_keys': name_keys, 'domain_keys': domain_keys}).fetchall()
+
+    for row in rows:
+        if row.name_key:
+            found.by_name_key[row.name_key] = row
+        if row.domain_key:
+            found.by_domain_key[row.domain_key] = row
+    return found
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def insert_companies(session, companies: List[Dict[str, Any]], tenant_id: Optional[str] = None,
+                     reactivate: bool = True) -> InsertResult:
+    """Insert the companies that do not exist yet (matched on name_key or domain_key).
+
+    Existing matches are reported in `existing` and, with `reactivate`, set
+    active again. Within the batch the first company for a key wins.
+    """
+    result = InsertResult()
+    candidates: List[Dict[str, Any]] = []
+    batch_names: Set[str] = set()
+    batch_domains: Set[str] = set()
+    for company in companies:
+        name_key = company_name_key(company.get('name'))
+        domain_key = company_domain_key(company.get('domain'))
+        if not name_key or name_key in batch_names or (domain_key and domain_key in batch_domains):
+            result.skipped += 1
+            continue
+        batch_names.add(name_key)
+        if domain_key:
+            batch_domains.add(domain_key)
+        row = {column: company.get(column) for column in INSERT_COLUMNS}
+        row.update(
+            name_key=name_key,
+            domain_key=domain_key,
+            employee_count=_as_int(row['employee_count']),
+            founded_year=_as_int(row['founded_year']),
+            technology_stack=row['technology_stack'] or [],
+            source=row['source'] or 'unknown',
+        )
+        candidates.append(row)
+    if not candidates:
+        return result
+
+    existing = find_existing_companies(session, [c['name'] for c in candidates],
+                                       [c['domain'] for c in candidates], tenant_id)
+    new_rows = []
+    inactive_ids = []
+    for row in candidates:
+        match = existing.match(row['name_key'], row['domain_key'])
+        if match is None:
+            new_rows.append(row)
+            continue
+        result.existing[row['name_key']] = match.id
+        if not match.is_active:
+            inactive_ids.append(match.id)
+
+    if reactivate and inactive_ids:
+        result.reactivated = session.execute(text("""
+            UPDATE leadgen_companies
+            SET is_active = TRUE, updated_at = NOW()
+            WHERE id = ANY(:ids) AND NOT is_active
+        """), {'ids': sorted(set(inactive_ids))}).rowcount
+
+    if new_rows:
+        # ON CONFLICT covers rows another writer inserted since the lookup
+        inserted = session.execute(text("""
+            INSERT INTO leadgen_companies (
+                name, domain, industry, employee_count, location, founded_year, technology_stack,
+                linkedin_url, source, name_key, domain_key, salesbot_tenant_id, created_at, updated_at,
+                is_active, ats_scraped, support_roles_count, sales_roles_count, ai_roles_count,
+                lead_score, is_qualified_lead, support_intensity_score, digital_presence_score,
+                growth_signals_score, implementation_feasibility_score
+            )
+            SELECT r.name, r.domain, r.industry, r.employee_count, r.location, r.founded_year,
+                   r.technology_stack, r.linkedin_url, r.source, r.name_key, r.domain_key, :tenant_id,
+                   NOW(), NOW(), TRUE, FALSE, 0, 0, 0, 0, FALSE, 0, 0, 0, 0
+            FROM jsonb_to_recordset(CAST(:rows AS JSONB)) AS r(
+                name TEXT, domain TEXT, industry TEXT, employee_count INTEGER, location TEXT,
+                founded_year INTEGER, technology_stack JSON, linkedin_url TEXT, source TEXT,
+                name_key TEXT, domain_key TEXT
+            )
+            ON CONFLICT DO NOTHING
+            RETURNING id, name_key
+        """), {'rows': json.dumps(new_rows, default=str), 'tenant_id': tenant_id}).fetchall()
+        result.inserted = {row.name_key: row.id for row in inserted}
+        result.skipped += len(new_rows) - len(result.inserted)
+
+    logger.debug(f"Company upsert: {len(result.inserted)} inserted, {len(result.existing)} existing, "
+                 f"{result.reactivated} reactivated, {result.skipped} skipped")
+    return result
@@ -0,0 +1,364 @@
+"""
+Entity resolution for leadgen companies.
+
+Seeders, the crawler and imports each spell the same company differently
+("Acme Inc", "ACME, LLC", "acme.io"), so exact key matching leaves
+near-duplicates behind. Comparing every pair is O(n^2); instead each record
+gets a few blocking keys and fuzzy comparison only runs inside a block:
+
+- k:<key>    registrable domain label (acme.io, acme.com -> acme) and the
+             name key, in one namespace so a domain-less "ACME, LLC" meets acme.io
+- t:<token>  each distinctive name token
+- p:<code>   Soundex of the first distinctive token plus the next token's initial
+
+Blocks larger than LEADGEN_RESOLUTION_MAX_BLOCK_SIZE are skipped (generic
+tokens such as "global"). Matched pairs are unioned into clusters. Each
+cluster keeps one survivor that absorbs missing fields, job postings and
+scraping logs. The other rows are deactivated and recorded in
+leadgen_company_merges with a snapshot, so every merge stays traceable.
+
+Environment Variables:
+- LEADGEN_RESOLUTION_NAME_THRESHOLD: Name similarity needed without a shared domain (default: 0.92)
+- LEADGEN_RESOLUTION_MAX_BLOCK_SIZE: Largest block that is compared pairwise (default: 100)
+"""
+
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.utils.company_keys import company_domain_key, company_name_key, company_name_tokens, domain_root
+
+logger = logging.getLogger(__name__)
+
+NAME_THRESHOLD = float(os.getenv('LEADGEN_RESOLUTION_NAME_THRESHOLD', '0.92'))
+MAX_BLOCK_SIZE = max(2, int(os.getenv('LEADGEN_RESOLUTION_MAX_BLOCK_SIZE', '100')))
+# Names must still be this similar when the domain roots agree (acme.io vs acme.com)
+DOMAIN_ROOT_NAME_THRESHOLD = 0.6
+
+# Tokens too common to identify a company on their own
+_GENERIC_TOKENS = {
+    'the', 'and', 'of', 'a', 'tech', 'technology', 'technologies', 'software', 'solutions', 'systems',
+    'group', 'labs', 'lab', 'global', 'services', 'digital', 'international', 'holdings', 'partners',
+    'network', 'networks', 'cloud', 'data', 'ai', 'io', 'app', 'apps', 'hq', 'health', 'media', 'capital',
+    'ventures', 'consulting', 'studio', 'studios', 'america', 'usa', 'us',
+}
+
+# Fields a survivor takes from its duplicates when it has no value of its own
+FILL_FIELDS = ('domain', 'industry', 'employee_count', 'location', 'founded_year', 'linkedin_url')
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(
+    ('aehiouwy', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r')) for c in letters}
+
+
+def soundex(word: str) -> str:
+    """American Soundex code (letter + 3 digits); empty for words without letters"""
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, '')
+        if digit not in ('', '0') and digit != previous:
+            code += digit
+        if c not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+@dataclass
+class CompanyRecord:
+    """A company as seen by the resolver; `data` carries fields to merge"""
+    id: Any
+    name: str
+    domain: Optional[str] = None
+    source: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    rank: Tuple = ()  # higher wins the survivor slot
+    name_key: str = ''
+    domain_key: str = ''
+    root: str = ''
+    tokens: Tuple[str, ...] = ()
+
+    def __post_init__(self):
+        self.name_key = company_name_key(self.name) or ''
+        self.domain_key = company_domain_key(self.domain) or ''
+        self.root = domain_root(self.domain) if self.domain_key else ''
+        self.tokens = tuple(t for t in company_name_tokens(self.name) if t not in _GENERIC_TOKENS)
+
+
+@dataclass
+class Match:
+    survivor: CompanyRecord
+    duplicates: List[Tuple[CompanyRecord, float, str]]  # (record, score, reason)
+
+
+def blocking_keys(record: CompanyRecord) -> List[str]:
+    keys = [f"k:{key}" for key in {record.root, record.name_key} if key]
+    keys.extend(f"t:{token}" for token in record.tokens if len(token) >= 3)
+    if record.tokens:
+        phonetic = soundex(record.tokens[0])
+        if phonetic:
+            keys.append(f"p:{phonetic}{record.tokens[1][:1] if len(record.tokens) > 1 else ''}")
+    return keys
+
+
+def name_similarity(a: str, b: str, threshold: float = 0.0) -> float:
+    """SequenceMatcher ratio of two name keys; 0.0 as soon as it cannot reach `threshold`"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    # Cheap upper bounds first: lengths, then character multisets
+    if 2.0 * min(len(a), len(b)) / (len(a) + len(b)) < threshold:
+        return 0.0
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+def match_score(a: CompanyRecord, b: CompanyRecord) -> Tuple[float, Optional[str]]:
+    """(score, reason) for a candidate pair; reason is None when they are different companies"""
+    if a.domain_key and a.domain_key == b.domain_key:
+        return 1.0, 'domain'
+    if a.root and b.root:
+        # Different websites are different companies, whatever the names say
+        if a.root != b.root:
+            return 0.0, None
+        similarity = name_similarity(a.name_key, b.name_key, DOMAIN_ROOT_NAME_THRESHOLD)
+        if similarity >= DOMAIN_ROOT_NAME_THRESHOLD:
+            return 0.5 + similarity / 2, 'domain_root'
+        return 0.0, None
+    # At most one side has a website: "ACME, LLC" vs acme.io
+    root = a.root or b.root
+    if root and root == (b.name_key if a.root else a.name_key):
+        return 0.95, 'name_domain'
+    similarity = name_similarity(a.name_key, b.name_key, NAME_THRESHOLD)
+    if similarity >= NAME_THRESHOLD:
+        return similarity, 'name'
+    return 0.0, None
+
+
+def resolve_records(records: List[CompanyRecord]) -> List[Match]:
+    """Cluster duplicate records; returns only clusters with more than one record"""
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for index, record in enumerate(records):
+        for key in blocking_keys(record):
+            blocks[key].append(index)
+
+    roots = [record.root for record in records]
+    parent = list(range(len(records)))
+    # Domain roots per cluster: a domain-less record must not chain two websites together
+    cluster_roots: Dict[int, set] = {i: {r.root} for i, r in enumerate(records) if r.root}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best: Dict[int, Tuple[float, str]] = {}
+    compared = set()
+    oversized = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > MAX_BLOCK_SIZE:
+            oversized += 1
+            continue
+        for x in range(len(members)):
+            i = members[x]
+            for j in members[x + 1:]:
+                # Most pairs in a block are companies with different websites: reject them first
+                if roots[i] and roots[j] and roots[i] != roots[j]:
+                    continue
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j or (i, j) in compared:
+                    continue
+                compared.add((i, j))
+                score, reason = match_score(records[i], records[j])
+                if reason:
+                    roots_i, roots_j = cluster_roots.get(root_i), cluster_roots.get(root_j)
+                    if roots_i and roots_j and roots_i != roots_j:
+                        continue
+                    parent[root_j] = root_i
+                    if roots_j:
+                        cluster_roots[root_i] = roots_j
+                    for k in (i, j):
+                        if score > best.get(k, (0.0, ''))[0]:
+                            best[k] = (score, reason)
+    if oversized:
+        logger.debug(f"Skipped {oversized} blocks larger than {MAX_BLOCK_SIZE}")
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(records)):
+        clusters[find(index)].append(index)
+
+    matches = []
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: records[i].rank, reverse=True)
+        matches.append(Match(
+            survivor=records[members[0]],
+            duplicates=[(records[i], *best.get(i, (0.0, 'cluster'))) for i in members[1:]],
+        ))
+    return matches
+
+
+def _filled(value) -> bool:
+    return value not in (None, '', [])
+
+
+def dedupe_profiles(profiles: List[Any]) -> List[Any]:
+    """Collapse near-duplicate in-memory profiles (seeders) before they are stored.
+
+    Works on any objects with name/domain/source attributes. The survivor
+    takes missing fields from its duplicates and lists every source in
+    `source` (e.g. "apollo+yc_companies"); order is otherwise preserved.
+    """
+    records = []
+    for index, profile in enumerate(profiles):
+        filled = sum(1 for f in FILL_FIELDS if _filled(getattr(profile, f, None)))
+        records.append(CompanyRecord(id=index, name=getattr(profile, 'name', '') or '',
+                                     domain=getattr(profile, 'domain', None),
+                                     source=getattr(profile, 'source', None),
+                                     rank=(bool(getattr(profile, 'domain', None)), filled, -index)))
+    dropped = set()
+    for match in resolve_records(records):
+        survivor = profiles[match.survivor.id]
+        sources = [match.survivor.source]
+        for duplicate, _, _ in match.duplicates:
+            other = profiles[duplicate.id]
+            for f in FILL_FIELDS:
+                if hasattr(survivor, f) and not _filled(getattr(survivor, f)) and _filled(getattr(other, f, None)):
+                    setattr(survivor, f, getattr(other, f))
+            sources.append(duplicate.source)
+            dropped.add(duplicate.id)
+        if hasattr(survivor, 'source'):
+            survivor.source = '+'.join(dict.fromkeys(s for s in sources if s))[:100] or survivor.source
+    if dropped:
+        logger.info(f"Entity resolution merged {len(dropped)} near-duplicate profiles")
+    return [profile for index, profile in enumerate(profiles) if index not in dropped]
+
+
+def load_company_records(session, tenant_id: Optional[str] = None) -> List[CompanyRecord]:
+    """Active companies of one tenant (NULL tenant = FastAPI leadgen tool) as resolver records"""
+    rows = session.execute(text("""
+        SELECT id, name, domain, source, industry, employee_count, location, founded_year,
+               linkedin_url, ats_scraped, lead_scored_at
+        FROM leadgen_companies
+        WHERE is_active = TRUE AND COALESCE(salesbot_tenant_id, '') = :tenant
+    """), {'tenant': tenant_id or ''}).fetchall()
+    records = []
+    for row in rows:
+        data = {f: getattr(row, f) for f in FILL_FIELDS}
+        filled = sum(1 for value in data.values() if _filled(value))
+        # Prefer rows with a website, then scored/scraped ones, then the most complete, then the oldest
+        rank = (bool(row.domain), row.lead_scored_at is not None, bool(row.ats_scraped), filled, -row.id)
+        records.append(CompanyRecord(id=row.id, name=row.name or '', domain=row.domain,
+                                     source=row.source, data=data, rank=rank))
+    return records
+
+
+def merge_duplicates(session, matches: List[Match], tenant_id: Optional[str] = None) -> int:
+    """Fold each cluster into its survivor; returns the number of rows deactivated"""
+    merges = []
+    fills = []
+    for match in matches:
+        survivor = match.survivor
+        fill = {}
+        for f in FILL_FIELDS:
+            if not _filled(survivor.data.get(f)):
+                fill[f] = next((d.data[f] for d, _, _ in match.duplicates if _filled(d.data.get(f))), None)
+        if any(_filled(value) for value in fill.values()):
+            fills.append({'id': survivor.id, 'domain_key': company_domain_key(fill.get('domain')),
+                          **{f: fill.get(f) for f in FILL_FIELDS}})
+        for duplicate, score, reason in match.duplicates:
+            merges.append({
+                'survivor_id': survivor.id,
+                'merged_id': duplicate.id,
+                'score': round(score, 3),
+                'reason': reason,
+                'snapshot': {'name': duplicate.name, 'source': duplicate.source, **duplicate.data},
+            })
+    if not merges:
+        return 0
+
+    pairs = json.dumps([{'survivor_id': m['survivor_id'], 'merged_id': m['merged_id']} for m in merges])
+    session.execute(text("""
+        INSERT INTO leadgen_company_merges (survivor_id, merged_id, salesbot_tenant_id, match_score,
+                                            match_reason, merged_snapshot)
+        SELECT m.survivor_id, m.merged_id, :tenant_id, m.score, m.reason, m.snapshot
+        FROM jsonb_to_recordset(CAST(:merges AS JSONB))
+            AS m(survivor_id INTEGER, merged_id INTEGER, score DOUBLE PRECISION, reason TEXT, snapshot JSONB)
+    """), {'merges': json.dumps(merges, default=str), 'tenant_id': tenant_id})
+    for table in ('leadgen_job_postings', 'leadgen_scraping_logs'):
+        session.execute(text(f"""
+            UPDATE {table} t
+            SET company_id = m.survivor_id
+            FROM jsonb_to_recordset(CAST(:pairs AS JSONB)) AS m(survivor_id INTEGER, merged_id INTEGER)
+            WHERE t.company_id = m.merged_id
+        """), {'pairs': pairs})
+    # Release the duplicates' keys first so survivors can take over their domains
+    session.execute(text("""
+        UPDATE leadgen_companies
+        SET is_active = FALSE, name_key = NULL, domain_key = NULL, updated_at = NOW()
+        WHERE id = ANY(:ids)
+    """), {'ids': [m['merged_id'] for m in merges]})
+    if fills:
+        session.execute(text("""
+            UPDATE leadgen_companies c
+            SET domain = COALESCE(c.domain, f.domain),
+                domain_key = COALESCE(c.domain_key, f.domain_key),
+                industry = COALESCE(c.industry, f.industry),
+                employee_count = COALESCE(c.employee_count, f.employee_count),
+                location = COALESCE(c.location, f.location),
+                founded_year = COALESCE(c.founded_year, f.founded_year),
+                linkedin_url = COALESCE(c.linkedin_url, f.linkedin_url),
+                updated_at = NOW()
+            FROM jsonb_to_recordset(CAST(:fills AS JSONB)) AS f(
+                id INTEGER, domain TEXT, domain_key TEXT, industry TEXT, employee_count INTEGER,
+                location TEXT, founded_year INTEGER, linkedin_url TEXT
+            )
+            WHERE c.id = f.id
+        """), {'fills': json.dumps(fills, default=str)})
+    return len(merges)
+
+
+def resolve_leadgen_companies(session, tenant_id: Optional[str] = None, dry_run: bool = False,
+                              preview_limit: int = 20) -> Dict[str, Any]:
+    """Find and (unless dry_run) merge duplicate companies of one tenant"""
+    started = time.monotonic()
+    records = load_company_records(session, tenant_id)
+    loaded = time.monotonic()
+    matches = resolve_records(records)
+    resolved = time.monotonic()
+    merged = 0 if dry_run else merge_duplicates(session, matches, tenant_id)
+
+    stats = {
+        'companies': len(records),
+        'clusters': len(matches),
+        'duplicates': sum(len(m.duplicates) for m in matches),
+        'merged': merged,
+        'dry_run': dry_run,
+        'load_seconds': round(loaded - started, 2),
+        'resolve_seconds': round(resolved - loaded, 2),
+        'total_seconds': round(time.monotonic() - started, 2),
+        'preview': [{
+            'survivor': {'id': m.survivor.id, 'name': m.survivor.name, 'domain': m.survivor.domain},
+            'duplicates': [{'id': d.id, 'name': d.name, 'domain': d.domain, 'score': round(score, 3),
+                            'reason': reason} for d, score, reason in m.duplicates],
+        } for m in matches[:preview_limit]],
+    }
+    logger.info(f"Entity resolution over {stats['companies']} companies: {stats['clusters']} clusters, "
+                f"{stats['duplicates']} duplicates, {merged} merged in {stats['total_seconds']}s")
+    return stats
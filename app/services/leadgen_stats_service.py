@@ -0,0 +1,135 @@
+"""
+Leadgen dashboard statistics.
+
+The stats endpoints are polled by the UI. Instead of one COUNT per counter,
+the provider reads leadgen_companies once (COUNT(*) FILTER counters plus the
+source and industry breakdowns via GROUPING SETS) and leadgen_job_postings
+once. Results are cached per scope for a short TTL, and seeding, scraping,
+scoring and merge writes call invalidate_leadgen_stats() so the next poll
+sees them.
+
+Scopes: ALL_TENANTS (the default) reads every company (FastAPI leadgen
+tool); a tenant id, or None for untenanted rows, restricts the counts to
+that salesbot tenant (Flask leadgen routes).
+
+Environment Variables:
+- LEADGEN_STATS_CACHE_TTL_SECONDS: How long computed stats are served (default: 30)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_TTL_SECONDS = float(os.getenv('LEADGEN_STATS_CACHE_TTL_SECONDS', '30'))
+
+TOP_INDUSTRIES = 10
+
+# Scope that counts companies of every tenant
+ALL_TENANTS = '*'
+
+
+def _scope_clause(alias: str, tenant_id: Optional[str]) -> str:
+    if tenant_id == ALL_TENANTS:
+        return ""
+    if tenant_id is None:
+        return f"WHERE {alias}.salesbot_tenant_id IS NULL"
+    return f"WHERE {alias}.salesbot_tenant_id = :tenant_id"
+
+
+def compute_leadgen_stats(session, tenant_id: Optional[str] = ALL_TENANTS) -> Dict[str, Any]:
+    """Company and job counters in two table scans"""
+    params = {'tenant_id': tenant_id}
+    company_rows = session.execute(text(f"""
+        SELECT GROUPING(c.source) AS by_source, GROUPING(c.industry) AS by_industry,
+               c.source, c.industry,
+               COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE c.is_active) AS active,
+               COUNT(*) FILTER (WHERE c.ats_scraped) AS scraped,
+               COUNT(*) FILTER (WHERE c.is_qualified_lead) AS qualified_leads,
+               COUNT(*) FILTER (WHERE c.support_roles_count > 0) AS with_support_jobs
+        FROM leadgen_companies c
+        {_scope_clause('c', tenant_id)}
+        GROUP BY GROUPING SETS ((), (c.source), (c.industry))
+    """), params).fetchall()
+
+    job_row = session.execute(text(f"""
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE j.role_category = 'support') AS support,
+               COUNT(*) FILTER (WHERE j.role_category = 'sales') AS sales,
+               COUNT(*) FILTER (WHERE j.role_category = 'ai') AS ai
+        FROM leadgen_job_postings j
+        {'JOIN leadgen_companies c ON c.id = j.company_id' if tenant_id != ALL_TENANTS else ''}
+        {_scope_clause('c', tenant_id)}
+    """), params).fetchone()
+
+    companies = {'total': 0, 'active': 0, 'scraped': 0, 'qualified_leads': 0, 'with_support_jobs': 0}
+    sources = {}
+    industries = []
+    for row in company_rows:
+        # GROUPING() is 1 for the column that was rolled up in this row
+        if row.by_source and row.by_industry:
+            companies = {key: getattr(row, key) for key in companies}
+        elif not row.by_source:
+            sources[row.source] = row.total
+        elif row.industry is not None:
+            industries.append((row.industry, row.total))
+    industries.sort(key=lambda item: item[1], reverse=True)
+
+    return {
+        'companies': companies,
+        'jobs': {
+            'total': job_row.total,
+            'support': job_row.support,
+            'sales': job_row.sales,
+            'ai': job_row.ai
+        },
+        'sources': sources,
+        'top_industries': dict(industries[:TOP_INDUSTRIES]),
+    }
+
+
+class LeadgenStatsProvider:
+    """TTL cache of compute_leadgen_stats() per scope, dropped on invalidate()"""
+
+    def __init__(self, ttl_seconds: float = STATS_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Optional[str], tuple] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_factory: Callable, tenant_id: Optional[str] = ALL_TENANTS) -> Dict[str, Any]:
+        """Cached stats for a scope; `session_factory` is a context manager yielding a session"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        with session_factory() as session:
+            stats = compute_leadgen_stats(session, tenant_id)
+
+        with self._lock:
+            # A write that happened while we were counting makes this result stale
+            if generation == self._generation:
+                self._entries[tenant_id] = (time.monotonic() + self.ttl_seconds, stats)
+        return stats
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+leadgen_stats = LeadgenStatsProvider()
+
+
+def invalidate_leadgen_stats():
+    """Call after writes that change company or job counts"""
+    leadgen_stats.invalidate()
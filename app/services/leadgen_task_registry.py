@@ -0,0 +1,180 @@
+"""
+Durable registry of leadgen background tasks.
+
+Task state lives in the leadgen_tasks table instead of process memory, so a
+status poll can land on any worker and a restart does not lose running work:
+
+- create() records a task with the parameters needed to start it again
+- heartbeat() is called periodically by the owning worker with progress and
+  checkpoint snapshots of all its tasks (one UPDATE per worker and tick) and
+  reports tasks that were stopped elsewhere
+- finish() stores the final status; a stop requested through request_stop()
+  is never overwritten
+- claim_stale() hands running tasks whose owner stopped heartbeating to the
+  calling worker (FOR UPDATE SKIP LOCKED, so each is claimed once). Tasks of
+  kinds that cannot be resumed, or that used up their attempts, are failed.
+
+The registry is synchronous; async callers run it with asyncio.to_thread.
+
+Environment Variables:
+- LEADGEN_WORKER_ID: Name of this worker in the owner column (default: hostname:pid)
+- LEADGEN_TASK_HEARTBEAT_SECONDS: How often workers report their tasks (default: 10)
+- LEADGEN_TASK_STALE_SECONDS: Heartbeat age after which a task is resumed elsewhere (default: 60)
+- LEADGEN_TASK_MAX_ATTEMPTS: Starts of one task before it is failed instead of resumed (default: 3)
+"""
+
+import json
+import logging
+import os
+import socket
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = os.getenv('LEADGEN_WORKER_ID') or f"{socket.gethostname()}:{os.getpid()}"
+TASK_HEARTBEAT_SECONDS = float(os.getenv('LEADGEN_TASK_HEARTBEAT_SECONDS', '10'))
+TASK_STALE_SECONDS = float(os.getenv('LEADGEN_TASK_STALE_SECONDS', '60'))
+TASK_MAX_ATTEMPTS = int(os.getenv('LEADGEN_TASK_MAX_ATTEMPTS', '3'))
+
+TERMINAL_STATUSES = ('completed', 'failed', 'stopped')
+
+# Stale tasks claimed per sweep, so one worker does not take over everything at once
+CLAIM_LIMIT = 5
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def _json(value) -> Optional[str]:
+    return json.dumps(value, default=_json_default) if value is not None else None
+
+
+class LeadgenTaskRegistry:
+    """leadgen_tasks access for one worker; `session_factory` is a context manager yielding a session"""
+
+    def __init__(self, session_factory: Callable, worker_id: str = WORKER_ID,
+                 stale_seconds: float = TASK_STALE_SECONDS, max_attempts: int = TASK_MAX_ATTEMPTS):
+        self.session_factory = session_factory
+        self.worker_id = worker_id
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+
+    def create(self, task_id: str, kind: str, params: Optional[Dict[str, Any]] = None, total: int = 0,
+               current_company: Optional[str] = None, tenant_id: Optional[str] = None):
+        with self.session_factory() as session:
+            session.execute(text("""
+                INSERT INTO leadgen_tasks (task_id, kind, status, progress, total, current_company, leads_found,
+                                           params, checkpoint, owner, attempts, salesbot_tenant_id,
+                                           started_at, heartbeat_at)
+                VALUES (:task_id, :kind, 'running', 0, :total, :current_company, 0,
+                        CAST(:params AS JSONB), '{}', :owner, 1, :tenant_id, NOW(), NOW())
+            """), {'task_id': task_id, 'kind': kind, 'total': total or 0, 'current_company': current_company,
+                   'params': _json(params or {}), 'owner': self.worker_id, 'tenant_id': tenant_id})
+
+    def get(self, task_id: str):
+        with self.session_factory() as session:
+            return session.execute(text("SELECT * FROM leadgen_tasks WHERE task_id = :task_id"),
+                                   {'task_id': task_id}).fetchone()
+
+    def finish(self, task_id: str, status: str, progress: Optional[int] = None, leads_found: Optional[int] = None,
+               csv_file: Optional[str] = None, current_company: Optional[str] = None,
+               result: Any = None, error: Optional[str] = None):
+        """Store the outcome of a task this worker owns (a stop requested meanwhile wins over `status`)"""
+        with self.session_factory() as session:
+            session.execute(text("""
+                UPDATE leadgen_tasks
+                SET status = CASE WHEN status = 'stopped' THEN status ELSE :status END,
+                    progress = COALESCE(:progress, progress),
+                    leads_found = COALESCE(:leads_found, leads_found),
+                    csv_file = COALESCE(:csv_file, csv_file),
+                    current_company = COALESCE(:current_company, current_company),
+                    result = COALESCE(CAST(:result AS JSONB), result),
+                    error = :error,
+                    heartbeat_at = NOW(),
+                    completed_at = COALESCE(completed_at, NOW())
+                WHERE task_id = :task_id AND owner = :owner
+            """), {'task_id': task_id, 'owner': self.worker_id, 'status': status, 'progress': progress, 'leads_found': leads_found,
+                   'csv_file': csv_file, 'current_company': current_company, 'result': _json(result),
+                   'error': error})
+
+    def request_stop(self, task_id: str) -> bool:
+        """Mark a running task stopped; its owner notices on the next heartbeat"""
+        with self.session_factory() as session:
+            return session.execute(text("""
+                UPDATE leadgen_tasks
+                SET status = 'stopped', completed_at = NOW()
+                WHERE task_id = :task_id AND status = 'running'
+            """), {'task_id': task_id}).rowcount > 0
+
+    def heartbeat(self, snapshots: List[Dict[str, Any]]) -> Set[str]:
+        """Write progress/checkpoints of this worker's tasks; returns the ids no longer running"""
+        if not snapshots:
+            return set()
+        rows = [{
+            'task_id': snapshot['task_id'],
+            'progress': snapshot.get('progress'),
+            'total': snapshot.get('total'),
+            'current_company': snapshot.get('current_company'),
+            'leads_found': snapshot.get('leads_found'),
+            'checkpoint': snapshot.get('checkpoint'),
+        } for snapshot in snapshots]
+        with self.session_factory() as session:
+            updated = session.execute(text("""
+                UPDATE leadgen_tasks t
+                SET progress = COALESCE(s.progress, t.progress),
+                    total = COALESCE(s.total, t.total),
+                    current_company = COALESCE(s.current_company, t.current_company),
+                    leads_found = COALESCE(s.leads_found, t.leads_found),
+                    checkpoint = COALESCE(s.checkpoint, t.checkpoint),
+                    heartbeat_at = NOW()
+                FROM jsonb_to_recordset(CAST(:rows AS JSONB)) AS s(
+                    task_id TEXT, progress INTEGER, total INTEGER, current_company TEXT,
+                    leads_found INTEGER, checkpoint JSONB
+                )
+                WHERE t.task_id = s.task_id AND t.owner = :owner
+                RETURNING t.task_id, t.status
+            """), {'rows': _json(rows), 'owner': self.worker_id}).fetchall()
+        alive = {row.task_id for row in updated if row.status == 'running'}
+        # Tasks that were stopped, or claimed by another worker after a long stall
+        return {snapshot['task_id'] for snapshot in snapshots} - alive
+
+    def claim_stale(self, resumable_kinds: Iterable[str], limit: int = CLAIM_LIMIT) -> List[Any]:
+        """Take over running tasks whose owner stopped heartbeating; returns the claimed rows"""
+        params = {'stale': self.stale_seconds, 'kinds': list(resumable_kinds), 'max_attempts': self.max_attempts,
+                  'owner': self.worker_id, 'limit': limit}
+        with self.session_factory() as session:
+            failed = session.execute(text("""
+                UPDATE leadgen_tasks
+                SET status = 'failed', completed_at = NOW(),
+                    error = CASE WHEN kind = ANY(:kinds)
+                                 THEN 'Worker lost ' || attempts || ' times; giving up'
+                                 ELSE 'Worker lost; this kind of task cannot be resumed' END
+                WHERE status = 'running'
+                  AND heartbeat_at < NOW() - make_interval(secs => :stale)
+                  AND (attempts >= :max_attempts OR NOT kind = ANY(:kinds))
+                RETURNING task_id
+            """), params).fetchall()
+            claimed = session.execute(text("""
+                UPDATE leadgen_tasks t
+                SET owner = :owner, attempts = t.attempts + 1, heartbeat_at = NOW()
+                WHERE t.task_id IN (
+                    SELECT task_id FROM leadgen_tasks
+                    WHERE status = 'running'
+                      AND heartbeat_at < NOW() - make_interval(secs => :stale)
+                      AND kind = ANY(:kinds)
+                    ORDER BY heartbeat_at
+                    LIMIT :limit
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING t.*
+            """), params).fetchall()
+        if failed:
+            logger.warning(f"Failed {len(failed)} abandoned leadgen tasks: {[row.task_id for row in failed]}")
+        if claimed:
+            logger.info(f"Worker {self.worker_id} resuming leadgen tasks: {[row.task_id for row in claimed]}")
+        return claimed
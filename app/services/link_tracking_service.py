@@ -274,7 +274,7 @@ class LinkTrackingService:
     
     @staticmethod
     def record_click(tracking_id: str, user_agent: str = None, ip_address: str = None, 
-                    referer: str = None) -> bool:
+                    referer: str = None, tenant_id: Optional[str] = None) -> bool:
         """
         Record a click event for a tracked link.
         
@@ -283,12 +283,13 @@ class LinkTrackingService:
             user_agent: User agent string
             ip_address: IP address of the clicker
             referer: HTTP referer header
+            tenant_id: Tenant owning the link; defaults to the request's tenant
             
         Returns:
             True if click was recorded successfully, False otherwise
         """
         try:
-            tenant_id = current_tenant_id()
+            tenant_id = tenant_id or current_tenant_id()
             if not tenant_id:
                 logger.error("No tenant context available for click tracking")
                 return False
@@ -0,0 +1,285 @@
+"""
+Offline batch execution for chat-completion requests.
+
+Large backfills (lead scoring, enrichment, deep research) do not need
+interactive latency. run_batch() serialises request bodies to a JSONL file,
+submits it as one provider batch job, polls until the job finishes and
+returns each request's response body keyed by its custom_id. Callers own
+prompt building and result handling; this module only moves requests.
+
+Providers:
+- 'openai': the OpenAI Batch API (/v1/chat/completions, 24h window, lower cost
+  and separate rate limits from interactive traffic).
+- 'local': a file-based stand-in that completes jobs in-process with a
+  responder function. With the default responder every request gets a JSON
+  object built from its response_format schema (or an empty message), so the
+  full submit/poll/fan-out path can be exercised without network access.
+
+Environment Variables:
+- LLM_BATCH_PROVIDER: 'openai' (default) or 'local'
+- LLM_BATCH_DIR: Working directory for JSONL inputs and outputs (default: batch_jobs)
+- LLM_BATCH_POLL_SECONDS: Poll interval while a job runs (default: 30)
+- LLM_BATCH_COMPLETION_WINDOW: Provider completion window (default: 24h)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_PROVIDER = os.getenv('LLM_BATCH_PROVIDER', 'openai')
+BATCH_DIR = os.getenv('LLM_BATCH_DIR', 'batch_jobs')
+BATCH_POLL_SECONDS = float(os.getenv('LLM_BATCH_POLL_SECONDS', '30'))
+BATCH_COMPLETION_WINDOW = os.getenv('LLM_BATCH_COMPLETION_WINDOW', '24h')
+
+CHAT_COMPLETIONS_ENDPOINT = '/v1/chat/completions'
+
+# Terminal job states (OpenAI batch statuses; the local provider uses the same names)
+FINISHED_STATES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+class BatchJobError(Exception):
+    """Raised when a batch job ends without output."""
+
+
+def request_key(body: Dict[str, Any]) -> str:
+    """Stable id for a request body; identical requests share one batch line"""
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+
+
+def json_schema_format(name: str, schema: Dict[str, Any], strict: bool = False) -> Dict[str, Any]:
+    """response_format for a plain JSON schema (pydantic: model_cls.model_json_schema())"""
+    return {'type': 'json_schema', 'json_schema': {'name': name, 'schema': schema, 'strict': strict}}
+
+
+def message_content(result: Dict[str, Any]) -> Optional[str]:
+    """Assistant message text of one batch result, or None if the request failed"""
+    if not result or result.get('error'):
+        return None
+    try:
+        return result['body']['choices'][0]['message']['content']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def message_json(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Assistant message parsed as JSON (structured outputs), or None"""
+    content = message_content(result)
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return None
+
+
+class BatchProvider:
+    """Submit a JSONL file of requests and collect the results"""
+
+    name = 'base'
+
+    def submit(self, input_path: str, description: str = '') -> str:
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> Tuple[str, Dict[str, int]]:
+        """Return (state, request counts)"""
+        raise NotImplementedError
+
+    def results(self, job_id: str) -> Iterable[Dict[str, Any]]:
+        """Yield output lines: {'custom_id', 'response': {'status_code', 'body'}, 'error'}"""
+        raise NotImplementedError
+
+
+class OpenAIBatchProvider(BatchProvider):
+    name = 'openai'
+
+    def __init__(self, client=None, completion_window: str = BATCH_COMPLETION_WINDOW):
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, input_path: str, description: str = '') -> str:
+        with open(input_path, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_COMPLETIONS_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={'description': description[:500]} if description else None,
+        )
+        return batch.id
+
+    def status(self, job_id: str) -> Tuple[str, Dict[str, int]]:
+        batch = self.client.batches.retrieve(job_id)
+        counts = batch.request_counts
+        return batch.status, {
+            'total': getattr(counts, 'total', 0) or 0,
+            'completed': getattr(counts, 'completed', 0) or 0,
+            'failed': getattr(counts, 'failed', 0) or 0,
+        }
+
+    def results(self, job_id: str) -> Iterable[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(job_id)
+        # Successful lines land in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _schema_placeholder(schema: Dict[str, Any], definitions: Dict[str, Any]) -> Any:
+    """Smallest value that satisfies a JSON schema (used by the default local responder)"""
+    if '$ref' in schema:
+        return _schema_placeholder(definitions.get(schema['$ref'].split('/')[-1], {}), definitions)
+    if 'anyOf' in schema:
+        return _schema_placeholder(schema['anyOf'][0], definitions)
+    kind = schema.get('type')
+    if isinstance(kind, list):
+        kind = kind[0]
+    if kind == 'object' or 'properties' in schema:
+        return {name: _schema_placeholder(prop, definitions)
+                for name, prop in schema.get('properties', {}).items()}
+    return {'array': [], 'string': '', 'integer': 0, 'number': 0, 'boolean': False}.get(kind)
+
+
+def default_local_responder(body: Dict[str, Any]) -> str:
+    """Message content for a request: a placeholder object for JSON formats, else empty text"""
+    response_format = body.get('response_format') or {}
+    if response_format.get('type') == 'json_schema':
+        schema = response_format['json_schema']['schema']
+        return json.dumps(_schema_placeholder(schema, schema.get('$defs') or schema.get('definitions') or {}))
+    if response_format.get('type') == 'json_object':
+        return '{}'
+    return ''
+
+
+class LocalBatchProvider(BatchProvider):
+    """File-based stand-in: jobs complete in-process with `responder(body) -> message content`"""
+
+    name = 'local'
+
+    def __init__(self, directory: str = BATCH_DIR, responder: Optional[Callable[[Dict[str, Any]], str]] = None):
+        self.directory = directory
+        self.responder = responder or default_local_responder
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def submit(self, input_path: str, description: str = '') -> str:
+        job_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        total = failed = 0
+        with open(input_path, 'r', encoding='utf-8') as src, \
+                open(os.path.join(job_dir, 'output.jsonl'), 'w', encoding='utf-8') as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                total += 1
+                try:
+                    content = self.responder(request['body'])
+                    record = {
+                        'custom_id': request['custom_id'],
+                        'response': {'status_code': 200, 'body': {
+                            'id': f"local-{request['custom_id']}",
+                            'object': 'chat.completion',
+                            'model': request['body'].get('model'),
+                            'choices': [{'index': 0, 'finish_reason': 'stop',
+                                         'message': {'role': 'assistant', 'content': content}}],
+                        }},
+                        'error': None,
+                    }
+                except Exception as e:
+                    failed += 1
+                    record = {'custom_id': request['custom_id'], 'response': None,
+                              'error': {'code': 'local_responder_error', 'message': str(e)}}
+                out.write(json.dumps(record) + '\n')
+        with open(os.path.join(job_dir, 'status.json'), 'w', encoding='utf-8') as f:
+            json.dump({'status': 'completed', 'description': description,
+                       'counts': {'total': total, 'completed': total - failed, 'failed': failed}}, f)
+        return job_id
+
+    def status(self, job_id: str) -> Tuple[str, Dict[str, int]]:
+        with open(os.path.join(self._job_dir(job_id), 'status.json'), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state['status'], state['counts']
+
+    def results(self, job_id: str) -> Iterable[Dict[str, Any]]:
+        with open(os.path.join(self._job_dir(job_id), 'output.jsonl'), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def get_batch_provider(name: Optional[str] = None) -> BatchProvider:
+    name = (name or BATCH_PROVIDER).lower()
+    if name == 'local':
+        return LocalBatchProvider()
+    if name == 'openai':
+        return OpenAIBatchProvider()
+    raise ValueError(f"Unknown batch provider '{name}', expected 'openai' or 'local'")
+
+
+def run_batch(requests: Dict[str, Dict[str, Any]], provider: Optional[BatchProvider] = None,
+              description: str = '', poll_seconds: Optional[float] = None,
+              on_status: Optional[Callable[[str, Dict[str, int]], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """Run chat-completion request bodies keyed by custom_id as one batch job (blocking).
+
+    Returns {custom_id: {'body': response body} | {'error': message}}. Requests
+    missing from the output are reported as errors, so every id is present.
+    """
+    if not requests:
+        return {}
+    provider = provider or get_batch_provider()
+    poll_seconds = BATCH_POLL_SECONDS if poll_seconds is None else poll_seconds
+
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    input_path = os.path.join(BATCH_DIR, f"input_{uuid.uuid4().hex[:12]}.jsonl")
+    with open(input_path, 'w', encoding='utf-8') as f:
+        for custom_id, body in requests.items():
+            f.write(json.dumps({'custom_id': custom_id, 'method': 'POST',
+                                'url': CHAT_COMPLETIONS_ENDPOINT, 'body': body}) + '\n')
+
+    job_id = provider.submit(input_path, description)
+    logger.info(f"Submitted {len(requests)} requests as {provider.name} batch {job_id} ({description})")
+
+    while True:
+        state, counts = provider.status(job_id)
+        if on_status:
+            on_status(state, counts)
+        if state in FINISHED_STATES:
+            break
+        logger.info(f"Batch {job_id}: {state} ({counts.get('completed', 0)}/{counts.get('total', 0)} done)")
+        time.sleep(poll_seconds)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for line in provider.results(job_id):
+        custom_id = line.get('custom_id')
+        response = line.get('response') or {}
+        if line.get('error') or response.get('status_code', 200) >= 400:
+            error = line.get('error') or (response.get('body') or {}).get('error') or {}
+            results[custom_id] = {'error': error.get('message') if isinstance(error, dict) else str(error)}
+        else:
+            results[custom_id] = {'body': response.get('body')}
+
+    if state != 'completed' and not results:
+        raise BatchJobError(f"Batch {job_id} ended as {state} without output")
+    for custom_id in requests:
+        results.setdefault(custom_id, {'error': f"No result in batch {job_id} ({state})"})
+
+    logger.info(f"Batch {job_id} {state}: {sum(1 for r in results.values() if 'body' in r)}/{len(requests)} succeeded")
+    try:
+        os.remove(input_path)
+    except OSError:
+        pass
+    return results
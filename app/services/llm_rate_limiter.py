@@ -0,0 +1,178 @@
+"""
+Process-wide rate limiting for live LLM calls.
+
+Per-provider request and token budgets shared by every caller in the process
+(lead enrichment, deep research), so concurrent workers back off together. A
+call waits for a request slot, for its estimated tokens and for a concurrency
+slot; a 429 pauses the provider for the Retry-After the API sent and halves its
+concurrency, which then grows back while calls succeed. call_with_backoff()
+wraps a blocking API call in that budget and retries throttles and transient
+errors.
+
+Environment Variables (PROVIDER is the upper-cased provider name, e.g. OPENAI):
+- LLM_<PROVIDER>_RPM: Requests per minute (default: 500, 0 disables)
+- LLM_<PROVIDER>_TPM: Estimated tokens per minute (default: 0, disabled)
+- LLM_<PROVIDER>_CONCURRENCY: Calls in flight at most (default: 8)
+- LLM_MAX_RETRIES: Retries after rate limits or transient API errors (default: 4)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = max(0, int(os.getenv('LLM_MAX_RETRIES', '4')))
+
+# Errors worth retrying; anything else fails the call straight away
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+# Completion tokens assumed for a call when estimating its token cost
+EXPECTED_COMPLETION_TOKENS = 4000
+
+
+def retry_after_seconds(error: Exception, attempt: int) -> float:
+    """Delay the API asked for (retry-after-ms / retry-after), else exponential backoff"""
+    response = getattr(error, 'response', None)
+    headers = response.headers if response is not None else {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return min(2 ** attempt, 60)
+
+
+def estimate_tokens(params: Dict[str, Any]) -> int:
+    """Rough token cost of a chat completion: ~4 characters per prompt token plus the completion"""
+    prompt_chars = len(json.dumps(params.get('messages', []), ensure_ascii=False))
+    completion = params.get('max_tokens') or params.get('max_completion_tokens') or EXPECTED_COMPLETION_TOKENS
+    return prompt_chars // 4 + completion
+
+
+class ProviderRateLimiter:
+    """Thread-safe request/token budget and adaptive concurrency limit for one provider"""
+
+    def __init__(self, provider: str, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int):
+        self.provider = provider
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls, provider: str) -> 'ProviderRateLimiter':
+        prefix = f"LLM_{provider.upper()}"
+        return cls(
+            provider,
+            requests_per_minute=float(os.getenv(f'{prefix}_RPM', '500')),
+            tokens_per_minute=float(os.getenv(f'{prefix}_TPM', '0')),
+            max_concurrency=max(1, int(os.getenv(f'{prefix}_CONCURRENCY', '8'))),
+        )
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+            self._updated = now
+
+    def _wait_seconds(self, tokens: int) -> Optional[float]:
+        """0 when a call costing `tokens` may start now, None to wait for a free slot, else seconds to wait"""
+        now = time.monotonic()
+        if self._paused_until > now:
+            return self._paused_until - now
+        self._refill(now)
+        waits = []
+        if self.requests_per_minute > 0 and self._requests < 1:
+            waits.append((1 - self._requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute > 0:
+            # A single call larger than the whole budget only waits for a full bucket
+            needed = min(tokens, self.tokens_per_minute)
+            if self._tokens < needed:
+                waits.append((needed - self._tokens) * 60 / self.tokens_per_minute)
+        if waits:
+            return max(waits)
+        return 0.0 if self._in_flight < int(self.limit) else None
+
+    @contextmanager
+    def slot(self, tokens: int = 0):
+        """Hold one call's budget for the duration of the block"""
+        with self._cond:
+            while True:
+                wait = self._wait_seconds(tokens)
+                if wait == 0:
+                    break
+                self._cond.wait(timeout=wait)
+            self._in_flight += 1
+            if self.requests_per_minute > 0:
+                self._requests -= 1
+            if self.tokens_per_minute > 0:
+                self._tokens -= min(tokens, self.tokens_per_minute)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record_success(self):
+        with self._cond:
+            if self.limit < self.max_concurrency:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                self._cond.notify_all()
+
+    def record_throttle(self, retry_after: float):
+        with self._cond:
+            self.limit = max(1.0, self.limit / 2)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.warning(f"{self.provider} rate limited; concurrency limit now {int(self.limit)}, "
+                       f"pausing {retry_after:.1f}s")
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Process-wide limiter for a provider, configured from the environment on first use"""
+    with _limiters_lock:
+        limiter: Optional[ProviderRateLimiter] = _limiters.get(provider)
+        if limiter is None:
+            limiter = _limiters[provider] = ProviderRateLimiter.from_env(provider)
+        return limiter
+
+
+def call_with_backoff(limiter: ProviderRateLimiter, call: Callable[..., Any], **params) -> Any:
+    """Run call(**params) within the limiter's budget, retrying throttles and transient errors"""
+    tokens = estimate_tokens(params)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with limiter.slot(tokens):
+                response = call(**params)
+            limiter.record_success()
+            return response
+        except RETRYABLE_ERRORS as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = retry_after_seconds(e, attempt)
+            if isinstance(e, openai.RateLimitError):
+                # The limiter holds every caller back for the delay
+                limiter.record_throttle(delay)
+            else:
+                logger.warning(f"Transient {limiter.provider} error ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
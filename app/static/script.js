@@ -272,6 +272,10 @@ function initWebSocket() {
     
     websocket.onopen = function(event) {
         console.log('WebSocket connected');
+        // Re-subscribe after a reconnect
+        if (currentTaskId) {
+            websocket.send(JSON.stringify({ action: 'subscribe', task_id: currentTaskId }));
+        }
     };
     
     websocket.onmessage = function(event) {
@@ -290,6 +294,18 @@ function initWebSocket() {
     };
 }
 
+// Follow a task's updates; the server only sends messages of subscribed tasks
+function followTask(taskId) {
+    const socketOpen = websocket && websocket.readyState === WebSocket.OPEN;
+    if (socketOpen && currentTaskId && currentTaskId !== taskId) {
+        websocket.send(JSON.stringify({ action: 'unsubscribe', task_id: currentTaskId }));
+    }
+    currentTaskId = taskId;
+    if (socketOpen && taskId) {
+        websocket.send(JSON.stringify({ action: 'subscribe', task_id: taskId }));
+    }
+}
+
 // Handle WebSocket messages
 function handleWebSocketMessage(data) {
     if (data.task_id !== currentTaskId) return;
@@ -304,6 +320,14 @@ function handleWebSocketMessage(data) {
         case 'lead_scoring_phase':
             updateLeadScoringPhase(data);
             break;
+        case 'enrichment_progress':
+            // Coalesced: one event covers every company finished since the previous one
+            updateProgress(data.progress, data.total, `${data.successful} enriched`);
+            if (data.succeeded.length) {
+                addLog(`✅ Enriched ${data.succeeded.length} companies (IDs: ${data.succeeded.join(', ')})`, 'success');
+            }
+            data.failed.forEach(f => addLog(`❌ Failed to enrich company ${f.company_id}: ${f.error}`, 'error'));
+            break;
         case 'log':
             addLog(data.message);
             break;
@@ -1118,7 +1142,7 @@ async function startLeadScoring(companyId) {
         const resp = await fetch(`/api/companies/${companyId}/score`, { method: 'POST' });
         if (!resp.ok) throw new Error(`${resp.status} ${resp.statusText}`);
         const data = await resp.json();
-        currentTaskId = data.task_id;
+        followTask(data.task_id);
         showToast(`🧮 Lead scoring started for company ${companyId}`, 'success');
     } catch (e) {
         console.error('startLeadScoring error:', e);
@@ -1151,7 +1175,12 @@ function updateLeadScoringPhase({ company_id, phase, index, total }) {
         tech_team_size: 'Tech Team Size',
         ai_roles: 'AI Roles',
         existing_bots: 'Existing Bots',
-        chat_readiness: 'Chat Readiness'
+        chat_readiness: 'Chat Readiness',
+        // Consolidated scoring mode reports one phase per signal group
+        support_intensity: 'Support Intensity Signals',
+        digital_presence: 'Digital Presence Signals',
+        growth_signals: 'Growth Signals',
+        implementation_feasibility: 'Implementation Feasibility Signals'
     };
     const human = phasesMap[phase] || phase;
     status.innerHTML = `
@@ -1445,7 +1474,7 @@ async function scoreCompanyTwoStep(companyId) {
         if (!enrichResp.ok) throw new Error(`Enrich failed: ${enrichResp.status}`);
         const enrichData = await enrichResp.json();
         if (enrichData.task_id) {
-            currentTaskId = enrichData.task_id;
+            followTask(enrichData.task_id);
         }
         // Poll enrichment status until completion (up to ~2 min)
         if (enrichData.task_id) {
@@ -1492,7 +1521,7 @@ async function scoreCompanyTwoStep(companyId) {
         if (!scoreResp.ok) throw new Error(`Score failed: ${scoreResp.status}`);
         const scoreData = await scoreResp.json();
         if (scoreData.task_id) {
-            currentTaskId = scoreData.task_id;
+            followTask(scoreData.task_id);
         }
         showToast('🧮 Lead scoring started', 'success');
         // Optionally reload companies after a short delay to reflect domain updates
@@ -1525,7 +1554,7 @@ async function scoreUnscoredCompanies() {
         }
         const data = await resp.json();
         if (data.task_id) {
-            currentTaskId = data.task_id;
+            followTask(data.task_id);
         }
         showToast(`🧮 Scoring started for ${data.companies ? data.companies.length : data.count || ''} companies`, 'success');
     } catch (e) {
@@ -1763,7 +1792,7 @@ async function handleScrapingFormSubmit(e) {
         }
         
         const data = await response.json();
-        currentTaskId = data.task_id;
+        followTask(data.task_id);
         
         // Show success message
         showToast('🚀 Lead generation started successfully!', 'success');
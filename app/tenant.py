@@ -1,7 +1,21 @@
 from __future__ import annotations
 
+import os
+import threading
+import time
+from functools import wraps
+
 from flask import g, request, current_app, session
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+
+# Process-local slug -> tenant_id cache. Tenants are almost never renamed, so a
+# short TTL is enough to keep the before_request hook off the database.
+TENANT_CACHE_TTL_SECONDS = float(os.getenv('TENANT_CACHE_TTL_SECONDS', '300'))
+TENANT_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv('TENANT_NEGATIVE_CACHE_TTL_SECONDS', '30'))
+
+_slug_cache: Dict[str, Tuple[Optional[str], float]] = {}
+_slug_cache_lock = threading.Lock()
 
 
 def current_tenant_id() -> Optional[str]:
@@ -9,15 +23,73 @@ def current_tenant_id() -> Optional[str]:
     return getattr(g, 'tenant_id', None)
 
 
+def skip_tenant_resolution(f):
+    """Mark a public view (tracking pixels, click redirects) as not needing a tenant.
+
+    These endpoints carry their own globally unique identifiers, so resolving
+    a tenant for them only costs a database round trip per hit.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        return f(*args, **kwargs)
+    decorated_function._skip_tenant_resolution = True
+    return decorated_function
+
+
+def lookup_tenant_id_by_slug(slug: str) -> Optional[str]:
+    """Return the tenant id for a slug, using the process-local TTL cache.
+
+    Misses are cached for a shorter period so unknown slugs do not hit the
+    database on every request. Database errors are not cached.
+    """
+    now = time.monotonic()
+    with _slug_cache_lock:
+        cached = _slug_cache.get(slug)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    from app.database import get_shared_engine
+    from sqlalchemy import text
+    engine = get_shared_engine()
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT id FROM tenants WHERE slug = :slug LIMIT 1"),
+            {"slug": slug}
+        ).fetchone()
+
+    tenant_id = str(row[0]) if row and row[0] else None
+    ttl = TENANT_CACHE_TTL_SECONDS if tenant_id else TENANT_NEGATIVE_CACHE_TTL_SECONDS
+    with _slug_cache_lock:
+        _slug_cache[slug] = (tenant_id, now + ttl)
+    return tenant_id
+
+
+def invalidate_tenant_cache(slug: Optional[str] = None) -> None:
+    """Drop one slug (or every slug) from the tenant cache."""
+    with _slug_cache_lock:
+        if slug is None:
+            _slug_cache.clear()
+        else:
+            _slug_cache.pop(slug, None)
+
+
 def resolve_tenant_context() -> None:
     """Resolve tenant from header or query and set g.tenant_id and g.tenant_slug.
 
     Resolution order:
+    - Endpoints marked with @skip_tenant_resolution get no tenant
     - Header X-Tenant-ID (UUID)
+    - Logged-in user's session tenant
     - Header X-Tenant-Slug (string)
     - Query param ?tenant=<slug>
     - Default tenant ('default')
     """
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    if getattr(view, '_skip_tenant_resolution', False):
+        g.tenant_id = None
+        g.tenant_slug = None
+        return
+
     try:
         tenant_id_hdr = request.headers.get('X-Tenant-ID', '').strip()
         tenant_slug_hdr = request.headers.get('X-Tenant-Slug', '').strip()
@@ -39,27 +111,16 @@ def resolve_tenant_context() -> None:
         slug = tenant_slug_hdr or tenant_slug_qs or 'default'
 
         # Lookup tenant id by slug
-        from app.database import get_shared_engine
-        from sqlalchemy import text
-        engine = get_shared_engine()
-        with engine.connect() as conn:
-            result = conn.execute(
-                text("SELECT id FROM tenants WHERE slug = :slug LIMIT 1"),
-                {"slug": slug}
-            )
-            row = result.fetchone()
-            if row and row[0]:
-                g.tenant_id = str(row[0])
-                g.tenant_slug = slug
-                return
+        tenant_id = lookup_tenant_id_by_slug(slug)
+        if tenant_id:
+            g.tenant_id = tenant_id
+            g.tenant_slug = slug
+            return
 
         # Fallback: try to get default tenant
-        result = conn.execute(
-            text("SELECT id FROM tenants WHERE slug = 'default' LIMIT 1")
-        )
-        row = result.fetchone()
-        if row and row[0]:
-            g.tenant_id = str(row[0])
+        tenant_id = lookup_tenant_id_by_slug('default') if slug != 'default' else None
+        if tenant_id:
+            g.tenant_id = tenant_id
             g.tenant_slug = 'default'
             current_app.logger.info(f"Using fallback default tenant: {g.tenant_id}")
         else:
@@ -69,22 +130,14 @@ def resolve_tenant_context() -> None:
         # Do not block request on resolution error - try to get default tenant
         current_app.logger.warning(f"Tenant resolution failed: {e}")
         try:
-            from app.database import get_shared_engine
-            from sqlalchemy import text
-            engine = get_shared_engine()
-            with engine.connect() as conn:
-                result = conn.execute(text("SELECT id FROM tenants WHERE slug = 'default' LIMIT 1"))
-                row = result.fetchone()
-                if row and row[0]:
-                    g.tenant_id = str(row[0])
-                    g.tenant_slug = 'default'
-                    current_app.logger.info(f"Using fallback default tenant after error: {g.tenant_id}")
-                else:
-                    g.tenant_id = None
-                    g.tenant_slug = None
+            tenant_id = lookup_tenant_id_by_slug('default')
+            if tenant_id:
+                g.tenant_id = tenant_id
+                g.tenant_slug = 'default'
+                current_app.logger.info(f"Using fallback default tenant after error: {g.tenant_id}")
+            else:
+                g.tenant_id = None
+                g.tenant_slug = None
         except:
             g.tenant_id = None
             g.tenant_slug = None
-
-
-
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Company Keys Utility
+
+Normalised comparison keys for leadgen companies. name_key and domain_key are
+stored on leadgen_companies (unique per tenant), so duplicate checks are index
+lookups instead of scans; every writer must derive them with these functions.
+"""
+
+import re
+from typing import List, Optional
+from urllib.parse import urlparse
+
+_LEGAL_SUFFIXES = re.compile(r'\b(?:and\s+)?(?:inc|llc|ltd|limited|corp|corporation|co|company|gmbh|plc|ag|sa|bv)\b\.?')
+
+
+def normalize_company_name(name: Optional[str]) -> str:
+    """Comparison key for a company name: lower-case alphanumerics without legal suffixes"""
+    if not name:
+        return ""
+    name = _LEGAL_SUFFIXES.sub(' ', name.lower().replace('&', ' and '))
+    return re.sub(r'[^a-z0-9]+', '', name)
+
+
+def normalize_domain(domain: Optional[str]) -> str:
+    """Comparison key for a domain or URL: bare host without www"""
+    if not domain or not domain.strip():
+        return ""
+    domain = domain.strip().lower()
+    if '://' not in domain:
+        domain = 'http://' + domain
+    try:
+        host = urlparse(domain).hostname or ''
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith('www.') else host
+
+
+def company_name_key(name: Optional[str]) -> Optional[str]:
+    """Value for the name_key column (None when nothing comparable is left)"""
+    return normalize_company_name(name) or None
+
+
+def company_domain_key(domain: Optional[str]) -> Optional[str]:
+    """Value for the domain_key column (None when there is no usable host)"""
+    return normalize_domain(domain) or None
+
+
+def company_name_tokens(name: Optional[str]) -> List[str]:
+    """Words of a company name after the same cleanup as the name key"""
+    if not name:
+        return []
+    name = _LEGAL_SUFFIXES.sub(' ', name.lower().replace('&', ' and '))
+    return re.findall(r'[a-z0-9]+', name)
+
+
+# Second-level labels under country TLDs (acme.co.uk -> acme)
+_SECOND_LEVEL_LABELS = {'co', 'com', 'org', 'net', 'ac', 'gov', 'edu', 'ltd'}
+# Hosts whose subdomains belong to different companies
+_SHARED_HOSTS = {'github.io', 'herokuapp.com', 'netlify.app', 'vercel.app', 'webflow.io',
+                 'wixsite.com', 'squarespace.com', 'myshopify.com', 'linkedin.com', 'facebook.com'}
+
+
+def domain_root(domain: Optional[str]) -> str:
+    """Registrable label of a domain: acme.io, www.acme.com and acme.co.uk all give 'acme'"""
+    host = normalize_domain(domain)
+    labels = host.split('.') if host else []
+    if len(labels) < 2:
+        return host
+    if '.'.join(labels[-2:]) in _SHARED_HOSTS:
+        return labels[-3] if len(labels) >= 3 else ''
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_LABELS:
+        return labels[-3]
+    return labels[-2]
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Query Stats Utility
+
+Per-request and per-job SQL instrumentation. SQLAlchemy cursor events record
+the query count, total database time and slowest statements for whatever unit
+of work is active (a Flask request or a background job wrapped in
+track_queries). Identical statements repeated within one unit are flagged as
+likely N+1 loops.
+"""
+
+import os
+import re
+import time
+import heapq
+import logging
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SQL_INSTRUMENTATION_ENABLED = os.getenv('SQL_INSTRUMENTATION_ENABLED', 'true').lower() in ('true', '1', 'on')
+SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', '500'))
+SLOW_QUERY_LOG_ENABLED = os.getenv('SQL_SLOW_QUERY_LOG', 'true').lower() in ('true', '1', 'on')
+N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+STATS_HEADERS_ENABLED = os.getenv('SQL_STATS_HEADERS', 'true').lower() in ('true', '1', 'on')
+
+SLOWEST_KEPT = 5
+RECENT_UNITS_KEPT = 100
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_current_stats: ContextVar[Optional['QueryStats']] = ContextVar('query_stats', default=None)
+
+
+def _normalize_statement(statement: str) -> str:
+    """Collapse whitespace so the same text() query from different call sites matches."""
+    return _WHITESPACE_RE.sub(' ', statement).strip()
+
+
+class QueryStats:
+    """Query counters for one request or background job."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started_at = time.time()
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = Counter()
+        self._slowest = []  # min-heap of (ms, sequence, statement)
+
+    def record(self, statement: str, duration_ms: float):
+        normalized = _normalize_statement(statement)
+        self.count += 1
+        self.total_ms += duration_ms
+        self.statements[normalized] += 1
+
+        item = (duration_ms, self.count, normalized)
+        if len(self._slowest) < SLOWEST_KEPT:
+            heapq.heappush(self._slowest, item)
+        elif duration_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def slowest(self) -> List[Dict]:
+        return [
+            {'duration_ms': round(ms, 2), 'statement': statement[:500]}
+            for ms, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+    def repeated_statements(self, threshold: int = None) -> List[Dict]:
+        """Return statements executed at least `threshold` times (likely N+1 loops)."""
+        threshold = threshold or N_PLUS_ONE_THRESHOLD
+        return [
+            {'count': count, 'statement': statement[:500]}
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def summary(self) -> Dict:
+        return {
+            'label': self.label,
+            'started_at': self.started_at,
+            'query_count': self.count,
+            'db_time_ms': round(self.total_ms, 2),
+            'slowest': self.slowest(),
+            'repeated': self.repeated_statements(),
+        }
+
+
+class QueryStatsRegistry:
+    """Keeps recent unit summaries and process-wide N+1 hot spots for the debug endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=RECENT_UNITS_KEPT)
+        self._hot_spots = Counter()
+
+    def add(self, stats: QueryStats) -> Dict:
+        summary = stats.summary()
+        with self._lock:
+            self._recent.append(summary)
+            for item in summary['repeated']:
+                self._hot_spots[(stats.label, item['statement'])] += 1
+        return summary
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            recent = list(self._recent)
+            hot_spots = self._hot_spots.most_common(20)
+        return {
+            'recent': sorted(recent, key=lambda s: s['db_time_ms'], reverse=True),
+            'n_plus_one_hot_spots': [
+                {'label': label, 'statement': statement, 'occurrences': occurrences}
+                for (label, statement), occurrences in hot_spots
+            ],
+        }
+
+
+query_stats_registry = QueryStatsRegistry()
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Return the stats collector for the active request or job, if any."""
+    return _current_stats.get()
+
+
+def instrument_engine(engine):
+    """Attach timing hooks to an engine. Safe to call once per engine."""
+    if not SQL_INSTRUMENTATION_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get('query_start_time')
+        if not start_times:
+            return
+        duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, duration_ms)
+
+        if SLOW_QUERY_LOG_ENABLED and duration_ms >= SLOW_QUERY_MS:
+            label = stats.label if stats is not None else 'untracked'
+            logger.warning(f"🐢 Slow query ({duration_ms:.0f} ms) in {label}: {_normalize_statement(statement)[:500]}")
+
+
+def _finish(stats: QueryStats) -> Dict:
+    summary = query_stats_registry.add(stats)
+    if summary['repeated']:
+        for item in summary['repeated']:
+            logger.warning(f"🔁 Possible N+1 in {stats.label}: {item['count']}x {item['statement'][:200]}")
+    return summary
+
+
+@contextmanager
+def track_queries(label: str):
+    """Collect query stats for a background job. Usable as a decorator."""
+    if not SQL_INSTRUMENTATION_ENABLED:
+        yield None
+        return
+
+    stats = QueryStats(label)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        if stats.count:
+            summary = _finish(stats)
+            logger.info(f"📊 {label}: {summary['query_count']} queries, {summary['db_time_ms']} ms in database")
+
+
+def init_app(app):
+    """Register request hooks that collect and expose per-request query stats."""
+    if not SQL_INSTRUMENTATION_ENABLED:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_query_stats():
+        stats = QueryStats(f"{request.method} {request.url_rule.rule if request.url_rule else request.path}")
+        g._query_stats_token = _current_stats.set(stats)
+
+    @app.after_request
+    def _add_query_stats_headers(response):
+        stats = _current_stats.get()
+        if stats is not None and STATS_HEADERS_ENABLED:
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = f"{stats.total_ms:.1f}"
+        return response
+
+    @app.teardown_request
+    def _finish_query_stats(exc):
+        token = g.pop('_query_stats_token', None)
+        if token is None:
+            return
+        stats = _current_stats.get()
+        try:
+            _current_stats.reset(token)
+        except ValueError:
+            _current_stats.set(None)
+        if stats is not None and stats.count:
+            _finish(stats)
@@ -3,6 +3,9 @@ from datetime import datetime, timedelta
 from sqlalchemy import create_engine, text
 import os
 from functools import wraps
+from app.database import use_pool_profile, get_pool_metrics
+from app.utils.query_stats import query_stats_registry
+from app.services.imap_session_pool import imap_pool
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -31,6 +34,7 @@ def dashboard():
 
 @admin_bp.route('/api/stats')
 @admin_required
+@use_pool_profile('analytics')
 def get_stats():
     """Get usage statistics for admin dashboard."""
     try:
@@ -217,6 +221,7 @@ def get_stats():
 
 @admin_bp.route('/api/recent-activity')
 @admin_required
+@use_pool_profile('analytics')
 def get_recent_activity():
     """Get recent activity across the platform."""
     try:
@@ -272,6 +277,45 @@ def get_recent_activity():
         current_app.logger.error(f"Error fetching recent activity: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@admin_bp.route('/api/db-pool-stats')
+@admin_required
+def get_db_pool_stats():
+    """Get connection pool checkout wait and saturation metrics per pool profile."""
+    try:
+        return jsonify({
+            'success': True,
+            'pools': get_pool_metrics()
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error fetching database pool stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/imap-pool-stats')
+@admin_required
+def get_imap_pool_stats():
+    """Get pooled IMAP session counts, login reuse and throttle backoff per account."""
+    try:
+        return jsonify({
+            'success': True,
+            'accounts': imap_pool.stats()
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error fetching IMAP pool stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/query-stats')
+@admin_required
+def get_query_stats():
+    """Get recent per-request/per-job SQL stats and repeated-statement (N+1) hot spots."""
+    try:
+        return jsonify({
+            'success': True,
+            **query_stats_registry.snapshot()
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error fetching query stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @admin_bp.route('/feedback')
 @admin_required
 def feedback_dashboard():
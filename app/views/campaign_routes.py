@@ -8,6 +8,7 @@ from app.models.campaign import Campaign
 from app.models.contact import Contact
 from app.models.email_history import EmailHistory
 from app.services.campaign_scheduler import campaign_scheduler
+from app.database import use_pool_profile
 
 campaign_bp = Blueprint('campaign_api', __name__, url_prefix='/api')
 
@@ -398,6 +399,7 @@ def schedule_campaign_route(campaign_id):
         return jsonify({'error': 'Failed to schedule campaign'}), 500
 
 @campaign_bp.route('/campaigns/<int:campaign_id>/analytics', methods=['GET'])
+@use_pool_profile('analytics')
 def get_campaign_analytics(campaign_id):
     """Get analytics for a specific campaign. For manual campaigns, only use local redirect tracking."""
     try:
@@ -1110,10 +1112,8 @@ def duplicate_campaign(campaign_id):
             
             # Copy campaign contacts
             try:
-                original_contacts = Campaign.get_campaign_contacts(campaign_id)
-                if original_contacts:
-                    contact_emails = [contact['email'] for contact in original_contacts]
-                    result = Campaign.bulk_add_contacts_to_campaign(new_campaign_id, contact_emails, status='active')
+                result = Campaign.copy_campaign_contacts(campaign_id, new_campaign_id, status='active')
+                if result['success']:
                     current_app.logger.info(f"Copied {result['success']} contacts to duplicate campaign")
                 else:
                     current_app.logger.info("No contacts to copy from original campaign")
@@ -4,6 +4,7 @@ import subprocess
 import threading
 
 from app.models.company import Company
+from app.database import use_pool_profile
 
 company_bp = Blueprint('company_api', __name__, url_prefix='/api')
 
@@ -254,6 +255,7 @@ def llm_deep_research_company(company_id):
         # Get the current app instance to pass to the background thread
         app_instance = current_app._get_current_object()
         
+        @use_pool_profile('scheduler')
         def run_llm_deep_research():
             # Set up Flask application context for background thread
             with app_instance.app_context():
@@ -545,6 +547,7 @@ def llm_step_research_company(company_id):
         # Get the current app instance to pass to the background thread
         app_instance = current_app._get_current_object()
         
+        @use_pool_profile('scheduler')
         def run_llm_step_research():
             # Set up Flask application context for background thread
             with app_instance.app_context():
@@ -10,7 +10,7 @@ import io
 from app.models.contact import Contact
 from app.models.company import Company
 from app.models.email_history import EmailHistory
-from data_ingestion_system import ContactDataIngester
+from data_ingestion_system import ContactDataIngester, detect_csv_encoding
 from app.services.email_service import EmailService
 from app.services.email_template_service import EmailTemplateService
 from openai import OpenAI
@@ -437,37 +437,57 @@ def add_contact():
 
 @contact_bp.route('/contacts/export', methods=['GET'])
 def export_contacts():
-    """Export contacts to CSV."""
+    """Stream contacts as CSV.
+
+    Query params:
+    - columns: comma-separated list of Contact.EXPORT_COLUMNS keys
+    - company, job_title, location: case-insensitive substring filters
+    - require_phone, require_linkedin, exclude_contacted: 'true' to enable
+    """
     try:
-        from flask import Response
-        
-        contacts = Contact.load_all()
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Email', 'First Name', 'Last Name', 'Full Name', 'Company', 
-                        'Job Title', 'Location', 'LinkedIn Profile', 'Company Domain'])
-        
-        # Write contact data
-        for contact in contacts:
-            writer.writerow([
-                contact.email,
-                contact.first_name,
-                contact.last_name,
-                contact.full_name,
-                contact.company,
-                contact.job_title,
-                contact.location,
-                contact.linkedin_profile,
-                contact.company_domain
-            ])
+        from flask import Response, stream_with_context
+        
+        columns_param = request.args.get('columns', '').strip()
+        columns = [c.strip() for c in columns_param.split(',') if c.strip()] if columns_param else Contact.DEFAULT_EXPORT_COLUMNS
+        unknown = [c for c in columns if c not in Contact.EXPORT_COLUMNS]
+        if unknown:
+            return jsonify({'error': f"Unknown export columns: {', '.join(unknown)}"}), 400
+        
+        def _flag(name):
+            return request.args.get(name, 'false').lower() in ['true', '1', 'yes']
+        
+        filters = {
+            'company': request.args.get('company', ''),
+            'job_title': request.args.get('job_title', ''),
+            'location': request.args.get('location', ''),
+            'require_phone': _flag('require_phone'),
+            'require_linkedin': _flag('require_linkedin'),
+            'exclude_contacted': _flag('exclude_contacted'),
+        }
+        batch_size = current_app.config.get('CONTACTS_EXPORT_BATCH_SIZE', 1000)
         
-        output.seek(0)
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow([Contact.EXPORT_COLUMNS[c] for c in columns])
+            yield output.getvalue()
+            
+            exported = 0
+            try:
+                for batch in Contact.iter_export_batches(columns, filters, batch_size=batch_size):
+                    output.seek(0)
+                    output.truncate(0)
+                    writer.writerows(batch)
+                    exported += len(batch)
+                    yield output.getvalue()
+            except Exception as e:
+                # Headers are already sent; log and end the stream
+                current_app.logger.error(f"Error streaming contacts export after {exported} rows: {str(e)}")
+                return
+            current_app.logger.info(f"Exported {exported} contacts")
         
         return Response(
-            output.getvalue(),
+            stream_with_context(generate()),
             mimetype='text/csv',
             headers={"Content-disposition": "attachment; filename=contacts.csv"}
         )
@@ -549,55 +569,41 @@ def import_contacts():
             temp_file_path = temp_file.name
         
         try:
-            # Read CSV file with better encoding handling
+            # Only the header and a few rows are parsed here; the import itself streams the file
+            encoding = detect_csv_encoding(temp_file_path)
             try:
-                df = pd.read_csv(temp_file_path)
-            except UnicodeDecodeError:
-                # Try with different encoding
-                df = pd.read_csv(temp_file_path, encoding='latin-1')
+                preview_df = pd.read_csv(temp_file_path, nrows=3, encoding=encoding)
             except Exception as e:
                 raise Exception(f"Could not read CSV file. Please ensure it's a valid CSV format. Error: {str(e)}")
             
-            # Check if DataFrame is empty
-            if df.empty:
+            # Check for basic data quality issues
+            if len(preview_df.columns) == 0:
+                raise Exception("CSV file has no columns")
+            if preview_df.empty:
                 raise Exception("CSV file is empty or contains no valid data")
             
             # Log basic info about the file
-            current_app.logger.info(f"Processing CSV: {file.filename}, Shape: {df.shape}, Columns: {list(df.columns)}")
-            
-            # Check for basic data quality issues
-            if len(df.columns) == 0:
-                raise Exception("CSV file has no columns")
+            current_app.logger.info(f"Processing CSV: {file.filename}, Columns: {list(preview_df.columns)}")
             
             # Initialize data ingester with current user's tenant
             ingester = ContactDataIngester(tenant_id=g.tenant_id)
             ingester.connect_db()
             
-            # Get statistics before import
-            stats_before = ingester.get_statistics()
-            contacts_before = stats_before['total_contacts']
-            
-            # Process the CSV file
-            total_rows, successful_inserts, errors = ingester.process_csv_file(temp_file_path)
+            def log_progress(stage, progress):
+                current_app.logger.info(f"Contact import {file.filename} [{stage}]: {progress}")
             
-            # Get statistics after import
-            stats_after = ingester.get_statistics()
-            contacts_after = stats_after['total_contacts']
+            # Stream the CSV through the staging table and merge set-based
+            import_stats = ingester.bulk_import_csv_file(temp_file_path, progress_callback=log_progress)
+            total_rows = import_stats['total_rows']
+            successful_inserts = import_stats['successful_inserts']
+            errors = import_stats['errors']
+            new_contacts = import_stats['new_contacts']
+            duplicates = import_stats['updated_contacts']
+            contacts_after = ingester.get_statistics()['total_contacts']
+            contacts_before = contacts_after - new_contacts
             
-            # Calculate duplicates (rows that didn't increase total count)
-            new_contacts = contacts_after - contacts_before
-            duplicates = successful_inserts - new_contacts
-            
-            # Read CSV to get column preview
-            try:
-                df = pd.read_csv(temp_file_path)
-            except UnicodeDecodeError:
-                df = pd.read_csv(temp_file_path, encoding='latin-1')
-            except Exception as e:
-                raise Exception(f"Could not read CSV file for preview. Error: {str(e)}")
-            
-            columns = df.columns.tolist()
-            sample_data_raw = df.head(3).to_dict('records') if len(df) > 0 else []
+            columns = preview_df.columns.tolist()
+            sample_data_raw = preview_df.to_dict('records')
             sample_data = clean_data_for_json(sample_data_raw)
             
             # Clean up temporary file
@@ -612,7 +618,8 @@ def import_contacts():
                     'duplicates': duplicates,
                     'errors': errors,
                     'contacts_before': contacts_before,
-                    'contacts_after': contacts_after
+                    'contacts_after': contacts_after,
+                    'companies_created': import_stats['companies_created']
                 },
                 'file_info': {
                     'filename': file.filename,
@@ -4,9 +4,14 @@ import os
 import smtplib
 import ssl
 import json
+import imaplib
 
 from app.services.email_service import EmailService
+from app.models.email_message import EmailMessage
 from app.services.email_reader_service import email_reader, configure_email_reader, EmailReaderService
+from app.services.email_sync_service import SYNC_FOLDERS, load_message_bodies
+from app.services.imap_session_pool import imap_session, ImapSessionError, ImapThrottledError
+from app.tenant import current_tenant_id
 from app.utils.tenant_email_config import TenantEmailConfigManager, EmailAccount
 # Import available composers
 from email_composers.email_composer_deep_research import DeepResearchEmailComposer
@@ -400,43 +405,35 @@ def configure_email():
 def get_account_emails(account_name):
     """Get emails for a specific account."""
     try:
-        account = email_config.get_account_by_name(account_name)
+        account = next((acc for acc in TenantEmailConfigManager().get_accounts() if acc.name == account_name), None)
         if not account:
             return jsonify({
                 'success': False,
                 'message': f'Account "{account_name}" not found'
             }), 404
         
-        # Configure email reader for this specific account
-        account_reader = EmailReaderService()
-        account_reader.configure_imap(
-            host=account.imap_host,
-            email=account.email,
-            password=account.password,
-            port=account.imap_port
-        )
-        
-        if not account_reader.connect():
+        # Reuse a pooled, already authenticated session for this account
+        emails = []
+        try:
+            with imap_session(current_tenant_id(), account) as account_reader:
+                # Fetch headers and snippets from both INBOX and Sent folders
+                for folder in ['INBOX', 'Sent']:
+                    try:
+                        account_reader.connection.select(folder, readonly=True)
+                        status, message_ids = account_reader.connection.uid('SEARCH', None, 'ALL')
+                        if status == 'OK' and message_ids[0]:
+                            uids = [int(uid) for uid in message_ids[0].split()]
+                            # Limit to last 50 emails per folder for performance
+                            emails.extend(account_reader.fetch_headers_by_uid(uids[-50:], folder))
+                    except imaplib.IMAP4.abort:
+                        raise
+                    except Exception as e:
+                        current_app.logger.warning(f"Error fetching emails from {folder} for {account.email}: {e}")
+        except ImapSessionError as e:
             return jsonify({
                 'success': False,
-                'message': f'Failed to connect to {account.email}'
-            }), 500
-        
-        # Fetch emails from both INBOX and Sent folders
-        emails = []
-        for folder in ['INBOX', 'Sent']:
-            try:
-                account_reader.connection.select(folder)
-                status, message_ids = account_reader.connection.search(None, 'ALL')
-                if status == 'OK' and message_ids[0]:
-                    ids = message_ids[0].split()
-                    # Limit to last 50 emails per folder for performance
-                    for msg_id in ids[-50:]:
-                        email_data = account_reader._fetch_email_data(msg_id, folder)
-                        if email_data:
-                            emails.append(email_data)
-            except Exception as e:
-                current_app.logger.warning(f"Error fetching emails from {folder} for {account.email}: {e}")
+                'message': f'Failed to connect to {account.email}: {e}'
+            }), 503 if isinstance(e, ImapThrottledError) else 500
         
         # Sort emails by date, newest first
         emails.sort(key=lambda x: x.get('date', datetime.min), reverse=True)
@@ -446,8 +443,6 @@ def get_account_emails(account_name):
             if email.get('date') and hasattr(email['date'], 'isoformat'):
                 email['date'] = email['date'].isoformat()
         
-        account_reader.connection.close()
-        
         return jsonify({
             'success': True,
             'emails': emails,
@@ -477,17 +472,9 @@ def get_contact_conversations(contact_email):
         # Get query parameters
         days_back = request.args.get('days_back', 365, type=int)
         
-        # Configure email reader if not already done
-        if not email_reader.connection:
-            success = configure_email_reader()
-            if not success:
-                return jsonify({
-                    'error': 'Email reader not configured',
-                    'message': 'Please check email credentials'
-                }), 503
-        
-        # Get conversation summary
-        conversation_data = email_reader.get_conversation_summary(contact_email)
+        # Summarise from the local message index (kept current by the mailbox sync job)
+        conversations = EmailMessage.get_conversations_with_contact(contact_email, days_back)
+        conversation_data = email_reader.build_conversation_summary(conversations)
         
         return jsonify({
             'contact_email': contact_email,
@@ -516,16 +503,8 @@ def get_detailed_conversations(contact_email):
             
         days_back = request.args.get('days_back', 365, type=int)
         
-        # Configure email reader if needed
-        if not email_reader.connection:
-            success = configure_email_reader()
-            if not success:
-                return jsonify({
-                    'error': 'Email reader not configured'
-                }), 503
-        
-        # Get all conversations
-        conversations = email_reader.search_conversations_with_contact(contact_email, days_back)
+        # Get all conversations from the local message index
+        conversations = EmailMessage.get_conversations_with_contact(contact_email, days_back)
         
         # Group by threads
         threads = email_reader.group_emails_by_thread(conversations)
@@ -568,6 +547,26 @@ def get_detailed_conversations(contact_email):
             'message': str(e)
         }), 500
 
+@email_bp.route('/email/messages/bodies', methods=['GET'])
+def get_message_bodies():
+    """Get full bodies for indexed messages (fetched from IMAP on first open, then cached)."""
+    try:
+        ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip().isdigit()]
+        if not ids:
+            return jsonify({'success': False, 'error': 'No message ids provided'}), 400
+        if len(ids) > 100:
+            return jsonify({'success': False, 'error': 'Too many message ids (max 100)'}), 400
+
+        bodies = load_message_bodies(ids)
+        return jsonify({
+            'success': True,
+            'bodies': {str(index_id): body for index_id, body in bodies.items()}
+        })
+
+    except Exception as e:
+        current_app.logger.error(f"Error loading message bodies: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to load message bodies'}), 500
+
 @email_bp.route('/email/test-connection', methods=['POST'])
 def test_email_connection():
     """Test email connection."""
@@ -681,25 +680,10 @@ def send_test_email_route():
 
 @email_bp.route('/email/all', methods=['GET'])
 def get_all_emails():
-    """Get all inbox and sent emails for the configured account."""
+    """Get all inbox and sent emails for the tenant's accounts from the local message index."""
     try:
-        if not email_reader.connection:
-            configure_email_reader()
-        emails = []
-        for folder in ['INBOX', 'Sent']:
-            try:
-                email_reader.connection.select(folder)
-                status, message_ids = email_reader.connection.search(None, 'ALL')
-                if status == 'OK' and message_ids[0]:
-                    ids = message_ids[0].split()
-                    for msg_id in ids[-50:]:  # Limit to last 50 emails per folder
-                        email_data = email_reader._fetch_email_data(msg_id, folder)
-                        if email_data:
-                            emails.append(email_data)
-            except Exception as e:
-                current_app.logger.warning(f"Error fetching emails from {folder}: {e}")
-        # Sort emails by date, newest first
-        emails.sort(key=lambda x: x.get('date'), reverse=True)
+        # Newest 50 per folder, already sorted newest first
+        emails = EmailMessage.get_recent_messages(SYNC_FOLDERS, limit_per_folder=50)
         # Convert datetime to isoformat for JSON
         for email in emails:
             if email.get('date'):
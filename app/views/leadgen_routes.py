@@ -3,9 +3,14 @@ Leadgen routes for Flask application.
 Converts FastAPI endpoints to Flask routes.
 """
 from flask import Blueprint, request, jsonify, render_template, send_file
+from sqlalchemy.orm import defer
 from app.tenant import current_tenant_id
+from app.utils.company_keys import company_name_key
+from app.services.leadgen_entity_resolution import resolve_leadgen_companies
+from app.services.leadgen_stats_service import invalidate_leadgen_stats, leadgen_stats
+from app.services.leadgen_task_registry import LeadgenTaskRegistry
 from leadgen.database import get_db_session
-from app.models.leadgen_models import LeadgenCompany as Company, LeadgenJobPosting as JobPosting, LeadgenScrapingLog as ScrapingLog, LeadgenSeedingSession as SeedingSession
+from app.models.leadgen_models import LeadgenCompany as Company, LeadgenScrapingLog as ScrapingLog, LeadgenSeedingSession as SeedingSession
 from leadgen.ats_scraper import ATSScraper
 from leadgen.lead_scoring import LeadScoringEngine, score_company_by_id, save_lead_score_to_db
 from leadgen.openai_enricher import OpenAICompanyEnricher
@@ -17,8 +22,8 @@ from datetime import datetime
 leadgen_bp = Blueprint('leadgen', __name__, url_prefix='/leadgen')
 logger = logging.getLogger(__name__)
 
-# Background tasks storage (in production, use Redis or similar)
-scraping_tasks = {}
+# Task state shared by all workers (leadgen_tasks)
+task_registry = LeadgenTaskRegistry(get_db_session)
 
 @leadgen_bp.route('/')
 def index():
@@ -27,16 +32,19 @@ def index():
 
 @leadgen_bp.route('/api/companies', methods=['GET'])
 def get_companies():
-    """Get all companies with optional filtering"""
+    """Get all companies with optional filtering (lead_scoring_data only with include_details=true)"""
     try:
         tenant_id = current_tenant_id()
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
+        include_details = request.args.get('include_details') == 'true'
         
         with get_db_session() as session:
             query = session.query(Company).filter(
                 Company.salesbot_tenant_id == tenant_id
             )
+            if not include_details:
+                query = query.options(defer(Company.lead_scoring_data))
             
             # Add filters if provided
             if request.args.get('qualified_only') == 'true':
@@ -51,7 +59,7 @@ def get_companies():
             total = query.count()
             
             return jsonify({
-                'companies': [company.to_dict() for company in companies],
+                'companies': [company.to_dict(include_details) for company in companies],
                 'total': total,
                 'page': page,
                 'per_page': per_page,
@@ -103,15 +111,9 @@ def start_scraping():
         task_id = str(uuid.uuid4())
         
         # Store task metadata
-        scraping_tasks[task_id] = {
-            'status': 'started',
-            'progress': 0,
-            'total': len(companies),
-            'tenant_id': tenant_id,
-            'started_at': datetime.utcnow(),
-            'companies_processed': 0,
-            'results': []
-        }
+        task_registry.create(task_id, 'ats_scraping', {'companies': companies},
+                             total=len(companies), tenant_id=tenant_id)
+        processed = 0
         
         # TODO: In production, use background task queue (Celery, etc.)
         # For now, we'll process synchronously for small batches
@@ -122,9 +124,10 @@ def start_scraping():
             for i, company_name in enumerate(companies):
                 try:
                     with get_db_session() as session:
-                        # Find or create company
+                        # Find or create company (matched on the normalised name key)
+                        name_key = company_name_key(company_name)
                         company = session.query(Company).filter(
-                            Company.name == company_name,
+                            Company.name_key == name_key if name_key else Company.name == company_name,
                             Company.salesbot_tenant_id == tenant_id
                         ).first()
                         
@@ -138,8 +141,7 @@ def start_scraping():
                             session.flush()
                         
                         # Update task progress
-                        scraping_tasks[task_id]['progress'] = i + 1
-                        scraping_tasks[task_id]['companies_processed'] = i + 1
+                        processed = i + 1
                         
                         results.append({
                             'company_id': company.id,
@@ -155,12 +157,11 @@ def start_scraping():
                         'error': str(company_error)
                     })
             
-            scraping_tasks[task_id]['status'] = 'completed'
-            scraping_tasks[task_id]['results'] = results
+            task_registry.finish(task_id, 'completed', progress=processed, result=results)
+            invalidate_leadgen_stats()
             
         except Exception as scraping_error:
-            scraping_tasks[task_id]['status'] = 'failed'
-            scraping_tasks[task_id]['error'] = str(scraping_error)
+            task_registry.finish(task_id, 'failed', progress=processed, error=str(scraping_error))
         
         return jsonify({
             'task_id': task_id,
@@ -175,23 +176,22 @@ def start_scraping():
 @leadgen_bp.route('/api/status/<task_id>', methods=['GET'])
 def get_task_status(task_id):
     """Get scraping task status"""
-    if task_id not in scraping_tasks:
+    task = task_registry.get(task_id)
+    if task is None:
         return jsonify({'error': 'Task not found'}), 404
     
-    task = scraping_tasks[task_id]
-    
     # Check tenant access
-    if task.get('tenant_id') != current_tenant_id():
+    if task.salesbot_tenant_id != current_tenant_id():
         return jsonify({'error': 'Access denied'}), 403
     
     return jsonify({
         'task_id': task_id,
-        'status': task['status'],
-        'progress': task['progress'],
-        'total': task['total'],
-        'companies_processed': task['companies_processed'],
-        'results': task.get('results', []),
-        'error': task.get('error')
+        'status': task.status,
+        'progress': task.progress,
+        'total': task.total,
+        'companies_processed': task.progress,
+        'results': task.result or [],
+        'error': task.error
     })
 
 @leadgen_bp.route('/api/companies/<int:company_id>/enrich', methods=['POST'])
@@ -280,37 +280,34 @@ def score_company(company_id):
         logger.error(f"Error scoring company {company_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
+@leadgen_bp.route('/api/companies/resolve-duplicates', methods=['POST'])
+def resolve_duplicate_companies():
+    """Find near-duplicate companies for the current tenant and, unless dry_run, merge them"""
+    try:
+        tenant_id = current_tenant_id()
+        dry_run = request.args.get('dry_run', 'true').lower() != 'false'
+        with get_db_session() as session:
+            result = resolve_leadgen_companies(session, tenant_id=tenant_id, dry_run=dry_run)
+        if result['merged']:
+            invalidate_leadgen_stats()
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error resolving duplicate companies: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @leadgen_bp.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get leadgen statistics for the current tenant"""
     try:
         tenant_id = current_tenant_id()
+        stats = leadgen_stats.get(get_db_session, tenant_id)
         
-        with get_db_session() as session:
-            total_companies = session.query(Company).filter(
-                Company.salesbot_tenant_id == tenant_id
-            ).count()
-            
-            qualified_leads = session.query(Company).filter(
-                Company.salesbot_tenant_id == tenant_id,
-                Company.is_qualified_lead == True
-            ).count()
-            
-            companies_with_jobs = session.query(Company).filter(
-                Company.salesbot_tenant_id == tenant_id,
-                Company.support_roles_count > 0
-            ).count()
-            
-            total_jobs = session.query(JobPosting).join(Company).filter(
-                Company.salesbot_tenant_id == tenant_id
-            ).count()
-            
-            return jsonify({
-                'total_companies': total_companies,
-                'qualified_leads': qualified_leads,
-                'companies_with_jobs': companies_with_jobs,
-                'total_jobs': total_jobs
-            })
+        return jsonify({
+            'total_companies': stats['companies']['total'],
+            'qualified_leads': stats['companies']['qualified_leads'],
+            'companies_with_jobs': stats['companies']['with_support_jobs'],
+            'total_jobs': stats['jobs']['total']
+        })
             
     except Exception as e:
         logger.error(f"Error fetching stats: {e}")
@@ -2,19 +2,24 @@ from flask import Blueprint, render_template, request, current_app, Response, js
 import os
 import json
 import uuid
-from datetime import datetime
 from sqlalchemy import text
 
 from app.models.contact import Contact
 from app.models.email_history import EmailHistory
 from app.models.company import Company
+from app.models.email_thread import EmailThread
 from app.services.email_reader_service import email_reader, configure_email_reader
+from app.services.email_sync_service import sync_tenant_mailboxes
 from app.services.email_service import EmailService
 from app.utils.tenant_email_config import TenantEmailConfigManager
 from app.auth import login_required
+from app.tenant import skip_tenant_resolution, current_tenant_id
 
 bp = Blueprint('main', __name__)
 
+# Newest conversation threads shown in each dashboard inbox section
+INBOX_THREADS_PER_SECTION = 50
+
 @bp.route('/')
 @login_required
 def index():
@@ -136,80 +141,20 @@ def _configure_email_reader_from_accounts():
     return _configure_tenant_email_reader(email_reader)
 
 def get_inbox_threads():
-    """Helper function to fetch and organize inbox threads by Sent/Inbox sections."""
-    # Always create a new EmailReaderService instance for tenant isolation
-    from app.services.email_reader_service import EmailReaderService
-    tenant_email_reader = EmailReaderService()
-    
-    # Configure with tenant-specific accounts
-    if not _configure_tenant_email_reader(tenant_email_reader):
-        current_app.logger.error("Failed to configure email reader for tenant.")
-        return {'error': 'No email accounts configured for this tenant'}
-    
-    if not tenant_email_reader.connect():
-        current_app.logger.error("Failed to connect to email reader for tenant.")
-        return {'error': 'Cannot connect to email server (IMAP may not be enabled)'}
+    """Return the tenant's indexed conversation threads split into Sent/Inbox sections.
 
-    emails = []
-    for folder in ['INBOX', 'Sent']:
-        try:
-            # Check if connection is alive, otherwise reconnect
-            status, _ = tenant_email_reader.connection.noop()
-            if status != 'OK':
-                tenant_email_reader.connect()
-
-            tenant_email_reader.connection.select(folder, readonly=True)
-            status, message_ids = tenant_email_reader.connection.search(None, 'ALL')
-            if status == 'OK' and message_ids[0]:
-                ids = message_ids[0].split()
-                # Fetch recent emails, e.g., last 50
-                for msg_id in ids[-50:]:
-                    email_data = tenant_email_reader._fetch_email_data(msg_id, folder)
-                    if email_data:
-                        emails.append(email_data)
-        except Exception as e:
-            current_app.logger.warning(f"Error fetching emails from {folder}: {e}")
-            # Attempt to reconnect on error
-            tenant_email_reader.connect()
-
-    # Group emails into threads
-    threads = tenant_email_reader.group_emails_by_thread(emails)
-    
-    # Organize threads by Sent vs Inbox
-    organized_threads = _organize_threads_by_folder(threads)
-    return organized_threads
-
-def _organize_threads_by_folder(threads):
-    """Organize email threads into Sent and Inbox sections."""
+    Reads the persistent thread index maintained by the mailbox sync job, so the
+    dashboard never waits on IMAP and never re-groups messages per request.
+    """
     email_manager = TenantEmailConfigManager()
-    
-    # Get our email addresses to identify sent vs received
-    our_emails = {acc.email.lower() for acc in email_manager.get_accounts()}
-    
-    organized = {
-        'sent': [],      # Threads where we sent the latest message
-        'inbox': []      # Threads where we received the latest message
-    }
-    
-    for thread_emails in threads.values():
-        if not thread_emails:
-            continue
-            
-        latest_email = thread_emails[-1]
-        
-        # Determine if latest email is from us or them
-        latest_from_us = latest_email.get('from', '').lower() in our_emails
-        
-        if latest_from_us:
-            organized['sent'].append(thread_emails)
-        else:
-            organized['inbox'].append(thread_emails)
-    
-    # Sort each section by date (most recent first)
-    for section in organized:
-        organized[section].sort(key=lambda t: t[-1].get('date', datetime.min), reverse=True)
-    
-    return organized
+    account_emails = [acc.email for acc in email_manager.get_accounts() if acc.email and acc.imap_host]
+    if not account_emails:
+        current_app.logger.warning("No email accounts configured for tenant")
+        return {'error': 'No email accounts configured for this tenant'}
+
+    return EmailThread.get_recent_threads(
+        limit_per_section=INBOX_THREADS_PER_SECTION, account_emails=account_emails
+    )
 
 def _send_threaded_followup_email(recipient: str, subject: str, body: str, original_message_id: str = None) -> bool:
     """Send a threaded follow-up email that appears as a reply in email clients."""
@@ -326,8 +271,13 @@ def logout():
     return redirect(url_for('main.login_page'))
 
 @bp.route('/api/track/open/<tracking_id>.png')
+@skip_tenant_resolution
 def track_email_open(tracking_id):
-    """Handle email open tracking pixel requests."""
+    """Handle email open tracking pixel requests.
+
+    Pixels are fetched by mail clients without a session, so the row is
+    matched on its globally unique tracking_id rather than a resolved tenant.
+    """
     try:
         from app.database import get_shared_engine
         
@@ -340,9 +290,8 @@ def track_email_open(tracking_id):
                     SET opened_at = CURRENT_TIMESTAMP 
                     WHERE tracking_id = :tracking_id 
                     AND opened_at IS NULL
-                    AND tenant_id = :tenant_id
                     RETURNING company_id, recipient_email, campaign_id
-                """), {'tracking_id': tracking_id, 'tenant_id': g.tenant_id})
+                """), {'tracking_id': tracking_id})
                 
                 row = result.fetchone()
                 if row:
@@ -443,6 +392,12 @@ def send_followup():
 def refresh_emails():
     """Refresh and fetch the latest emails."""
     try:
+        # Pull anything newer than the sync cursor now instead of waiting for the next job run
+        try:
+            sync_tenant_mailboxes(current_tenant_id())
+        except Exception as e:
+            current_app.logger.warning(f"On-demand mailbox sync failed: {e}")
+
         # Get organized inbox threads by pipeline
         inbox_result = get_inbox_threads()
         
@@ -2,6 +2,7 @@ from flask import Blueprint, redirect, request, current_app, jsonify
 from app.models.report_click import ReportClick
 from app.services.link_tracking_service import LinkTrackingService
 from app.database import get_shared_engine
+from app.tenant import skip_tenant_resolution
 from sqlalchemy import text
 import logging
 
@@ -10,6 +11,7 @@ logger = logging.getLogger(__name__)
 tracking_bp = Blueprint('tracking', __name__, url_prefix='/track')
 
 @tracking_bp.route('/click/<tracking_id>')
+@skip_tenant_resolution
 def track_click(tracking_id):
     """Track link click and redirect to actual destination."""
     try:
@@ -43,7 +45,8 @@ def track_click(tracking_id):
                     tracking_id=tracking_id,
                     user_agent=user_agent,
                     ip_address=ip_address,
-                    referer=referer
+                    referer=referer,
+                    tenant_id=row.tenant_id
                 )
                 
                 # Also log in report_clicks for backward compatibility
@@ -8,11 +8,14 @@ Uses email as the primary key for deduplication.
 Uses PostgreSQL database with SQLAlchemy.
 """
 
+import io
 import os
+import codecs
+import numpy as np
 import pandas as pd
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import re
 from datetime import datetime
@@ -29,6 +32,45 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Rows per pandas chunk / COPY batch for bulk imports
+IMPORT_CHUNK_SIZE = int(os.getenv("CONTACT_IMPORT_CHUNK_SIZE", "10000"))
+
+# Standard contact fields and their column widths in the contacts table
+CONTACT_FIELD_LENGTHS = {
+    'first_name': 100,
+    'last_name': 100,
+    'full_name': 200,
+    'job_title': 200,
+    'company_name': 200,
+    'company_domain': 100,
+    'linkedin_profile': 500,
+    'location': 200,
+    'phone': 50,
+    'linkedin_message': None,
+}
+
+STAGING_COLUMNS = ['row_no', 'email'] + list(CONTACT_FIELD_LENGTHS) + ['all_data']
+
+# Host part of a URL or bare domain, used to match contacts to companies by domain
+HOST_SQL = "split_part(regexp_replace(LOWER({col}), '^https?://(www\\.)?', ''), '/', 1)"
+
+
+def detect_csv_encoding(file_path: str, block_size: int = 1 << 20) -> str:
+    """Return 'utf-8-sig' if the whole file decodes as UTF-8, else 'latin-1'.
+
+    Decodes incrementally so the file is never held in memory.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
 class ContactDataIngester:
     def __init__(self, contacts_dir: str = "contacts", tenant_id: str = None):
         self.contacts_dir = contacts_dir
@@ -148,71 +190,226 @@ class ContactDataIngester:
         logger.info(f"Processing file: {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
-            total_rows = len(df)
-            successful_inserts = 0
-            errors = 0
-            
-            # Identify email columns
-            email_columns = self.identify_email_columns(df.columns.tolist())
-            logger.info(f"Found email columns: {email_columns}")
-            
-            # Map columns to standard format
-            column_mapping = self.map_columns(df.columns.tolist())
-            logger.info(f"Column mapping: {column_mapping}")
-            
-            # Save column mapping for future reference
-            self.save_column_mapping(column_mapping, file_path)
-            
-            for index, row in df.iterrows():
-                try:
-                    # Extract primary email
-                    primary_email = self.extract_primary_email(row, email_columns)
-                    
-                    if not primary_email:
-                        logger.warning(f"No valid email found in row {index}")
-                        errors += 1
-                        continue
-                    
-                    # Extract mapped data
-                    contact_data = {}
-                    for std_col, csv_col in column_mapping.items():
-                        if csv_col in df.columns:
-                            value = row.get(csv_col, '')
-                            if pd.notna(value) and value:
-                                contact_data[std_col] = str(value).strip()
-                    
-                    # Store all original data as JSON
-                    all_data = {}
-                    for col in df.columns:
-                        val = row.get(col, '')
-                        if pd.notna(val) and val:
-                            all_data[col] = str(val).strip()
-                    
-                    # Insert or update contact
-                    self.upsert_contact(
-                        email=primary_email,
-                        contact_data=contact_data,
-                        all_data=all_data,
-                        source_file=os.path.basename(file_path)
-                    )
-                    
-                    successful_inserts += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing row {index}: {str(e)}")
-                    errors += 1
-                    continue
-            
-            # Save file metadata
-            self.save_file_metadata(file_path, total_rows, successful_inserts, errors, column_mapping)
-            
-            return total_rows, successful_inserts, errors
-            
+            stats = self.bulk_import_csv_file(file_path)
+            return stats['total_rows'], stats['successful_inserts'], stats['errors']
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {str(e)}")
             return 0, 0, 1
     
+    def normalize_chunk(self, chunk: pd.DataFrame, email_columns: List[str],
+                        column_mapping: Dict[str, str], row_offset: int = 0) -> pd.DataFrame:
+        """Turn a raw CSV chunk into staging rows using vectorised pandas operations.
+        
+        Rows without a valid email are dropped; the caller counts them as errors.
+        """
+        chunk = chunk.apply(lambda col: col.str.strip()).replace('', np.nan)
+        
+        # Primary email: first valid value across the email columns, in column order
+        primary_email = pd.Series(np.nan, index=chunk.index, dtype=object)
+        for col in email_columns:
+            candidate = chunk[col].str.replace(r'^[✅❌]\s*', '', regex=True).str.strip()
+            valid = candidate.str.contains('@', regex=False, na=False) & candidate.str.contains('.', regex=False, na=False)
+            primary_email = primary_email.fillna(candidate.where(valid))
+        primary_email = primary_email.str.lower().str.strip()
+        
+        keep = primary_email.notna().to_numpy()
+        valid_rows = chunk[keep]
+        
+        staged = pd.DataFrame(index=valid_rows.index)
+        staged['row_no'] = row_offset + np.flatnonzero(keep)
+        staged['email'] = primary_email[keep]
+        for field, max_length in CONTACT_FIELD_LENGTHS.items():
+            csv_col = column_mapping.get(field)
+            if csv_col in valid_rows.columns:
+                values = valid_rows[csv_col]
+                staged[field] = values.str.slice(0, max_length) if max_length else values
+            else:
+                staged[field] = np.nan
+        
+        # All original non-empty values; nulls are stripped again in SQL
+        if len(valid_rows):
+            staged['all_data'] = valid_rows.to_json(orient='records', lines=True, force_ascii=False).splitlines()
+        else:
+            staged['all_data'] = pd.Series(dtype=object)
+        return staged[STAGING_COLUMNS]
+    
+    def bulk_import_csv_file(self, file_path: str, chunksize: int = None,
+                             progress_callback: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """Import a CSV with chunked reads, COPY into a staging table and set-based merges.
+        
+        The file is streamed in `chunksize` rows, normalised with pandas and
+        COPYed into a temporary staging table. Companies and contacts are then
+        merged with a handful of INSERT ... SELECT / ON CONFLICT statements
+        instead of one round trip per row. When an email appears more than
+        once in the file, the last row wins. Over-long values are truncated
+        to the column width instead of failing the row.
+        
+        Returns a dict with total_rows, successful_inserts, errors,
+        new_contacts, updated_contacts and companies_created.
+        """
+        chunksize = chunksize or IMPORT_CHUNK_SIZE
+        source_file = os.path.basename(file_path)
+        stats = {
+            'total_rows': 0,
+            'successful_inserts': 0,
+            'errors': 0,
+            'new_contacts': 0,
+            'updated_contacts': 0,
+            'companies_created': 0,
+        }
+        
+        def report(stage: str):
+            logger.info(f"Import {source_file} [{stage}]: {stats}")
+            if progress_callback:
+                progress_callback(stage, dict(stats))
+        
+        encoding = detect_csv_encoding(file_path)
+        columns = pd.read_csv(file_path, nrows=0, encoding=encoding).columns.tolist()
+        
+        email_columns = self.identify_email_columns(columns)
+        logger.info(f"Found email columns: {email_columns}")
+        
+        column_mapping = self.map_columns(columns)
+        logger.info(f"Column mapping: {column_mapping}")
+        self.save_column_mapping(column_mapping, file_path)
+        
+        params = {"tenant_id": self.tenant_id, "source_file": source_file}
+        
+        with self.engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text("""
+                    CREATE TEMP TABLE contact_import_staging (
+                        row_no BIGINT, email TEXT, first_name TEXT, last_name TEXT, full_name TEXT,
+                        job_title TEXT, company_name TEXT, company_domain TEXT, linkedin_profile TEXT,
+                        location TEXT, phone TEXT, linkedin_message TEXT, all_data TEXT
+                    ) ON COMMIT DROP
+                """))
+                
+                # Stage: stream chunks straight into the temp table with COPY
+                cursor = conn.connection.cursor()
+                try:
+                    reader = pd.read_csv(file_path, chunksize=chunksize, dtype=str, encoding=encoding)
+                    for chunk in reader:
+                        staged = self.normalize_chunk(chunk, email_columns, column_mapping, row_offset=stats['total_rows'])
+                        stats['total_rows'] += len(chunk)
+                        stats['errors'] += len(chunk) - len(staged)
+                        
+                        if len(staged):
+                            buffer = io.StringIO()
+                            staged.to_csv(buffer, index=False, header=False)
+                            buffer.seek(0)
+                            cursor.copy_expert(
+                                f"COPY contact_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                                buffer
+                            )
+                            stats['successful_inserts'] += len(staged)
+                        report('staging')
+                finally:
+                    cursor.close()
+                
+                # One row per email (last occurrence wins)
+                conn.execute(text("""
+                    CREATE TEMP TABLE contact_import_rows ON COMMIT DROP AS
+                    SELECT DISTINCT ON (email) *, CAST(NULL AS INTEGER) AS company_id
+                    FROM contact_import_staging
+                    ORDER BY email, row_no DESC
+                """))
+                
+                # Link existing companies by name, then by website host
+                link_by_name = text("""
+                    UPDATE contact_import_rows r SET company_id = c.id
+                    FROM (
+                        SELECT DISTINCT ON (LOWER(company_name)) id, LOWER(company_name) AS name_key
+                        FROM companies WHERE tenant_id = :tenant_id
+                        ORDER BY LOWER(company_name), id
+                    ) c
+                    WHERE r.company_id IS NULL
+                    AND LOWER(COALESCE(r.company_name, r.company_domain)) = c.name_key
+                """)
+                conn.execute(link_by_name, params)
+                conn.execute(text(f"""
+                    UPDATE contact_import_rows r SET company_id = c.id
+                    FROM (
+                        SELECT DISTINCT ON (host) id, host FROM (
+                            SELECT id, {HOST_SQL.format(col='website_url')} AS host
+                            FROM companies
+                            WHERE tenant_id = :tenant_id AND COALESCE(website_url, '') <> ''
+                        ) h
+                        ORDER BY host, id
+                    ) c
+                    WHERE r.company_id IS NULL AND r.company_domain IS NOT NULL
+                    AND {HOST_SQL.format(col='r.company_domain')} = c.host
+                """), params)
+                
+                # Create the remaining companies in one statement, then link them
+                result = conn.execute(text("""
+                    INSERT INTO companies (
+                        company_name, website_url, company_research,
+                        research_status, created_at, updated_at, tenant_id
+                    )
+                    SELECT DISTINCT ON (LOWER(COALESCE(company_name, company_domain)))
+                        COALESCE(company_name, company_domain),
+                        CASE
+                            WHEN company_domain IS NULL THEN ''
+                            WHEN company_domain ~* '^https?://' THEN company_domain
+                            ELSE 'https://' || company_domain
+                        END,
+                        'Company automatically created during contact import from ' || :source_file || '. Research pending.',
+                        'pending', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, :tenant_id
+                    FROM contact_import_rows
+                    WHERE company_id IS NULL AND COALESCE(company_name, company_domain) IS NOT NULL
+                    ORDER BY LOWER(COALESCE(company_name, company_domain)), row_no DESC
+                    ON CONFLICT DO NOTHING
+                    RETURNING id
+                """), params)
+                stats['companies_created'] = len(result.fetchall())
+                conn.execute(link_by_name, params)
+                report('companies')
+                
+                # Merge contacts; non-empty incoming values win, source files and raw data accumulate
+                update_fields = ",\n".join(
+                    f"{field} = COALESCE(NULLIF(EXCLUDED.{field}, ''), contacts.{field})"
+                    for field in CONTACT_FIELD_LENGTHS
+                )
+                row = conn.execute(text(f"""
+                    WITH merged AS (
+                        INSERT INTO contacts (
+                            email, {', '.join(CONTACT_FIELD_LENGTHS)},
+                            company_id, source_files, all_data, tenant_id
+                        )
+                        SELECT
+                            email, {', '.join(f"COALESCE({field}, '')" for field in CONTACT_FIELD_LENGTHS)},
+                            company_id,
+                            jsonb_build_array(CAST(:source_file AS TEXT)),
+                            jsonb_strip_nulls(CAST(all_data AS JSONB)),
+                            :tenant_id
+                        FROM contact_import_rows
+                        ON CONFLICT (email, tenant_id) DO UPDATE SET
+                            {update_fields},
+                            company_id = COALESCE(EXCLUDED.company_id, contacts.company_id),
+                            source_files = CASE
+                                WHEN COALESCE(contacts.source_files, '[]'::jsonb) @> EXCLUDED.source_files
+                                THEN contacts.source_files
+                                ELSE COALESCE(contacts.source_files, '[]'::jsonb) || EXCLUDED.source_files
+                            END,
+                            all_data = COALESCE(contacts.all_data, '{{}}'::jsonb) || EXCLUDED.all_data,
+                            updated_at = CURRENT_TIMESTAMP
+                        RETURNING (xmax = 0) AS inserted
+                    )
+                    SELECT COUNT(*) FILTER (WHERE inserted) AS new_contacts,
+                           COUNT(*) FILTER (WHERE NOT inserted) AS updated_contacts
+                    FROM merged
+                """), params).fetchone()
+                stats['new_contacts'] = row.new_contacts
+                stats['updated_contacts'] = row.updated_contacts
+        
+        report('complete')
+        
+        # Save file metadata
+        self.save_file_metadata(file_path, stats['total_rows'], stats['successful_inserts'], stats['errors'], column_mapping)
+        
+        return stats
+    
     def upsert_contact(self, email: str, contact_data: Dict, all_data: Dict, source_file: str):
         """Insert new contact or update existing one, automatically creating and linking companies"""
         
@@ -6,15 +6,22 @@ Handles OpenAI API interactions for:
 - Company research using GPT models
 - Strategic analysis generation
 - AI-powered business insights
+
+Every OpenAI call goes through the process-wide 'openai' rate limiter
+(see app.services.llm_rate_limiter), so concurrent research workers share
+one budget with the rest of the process.
 """
 
 import os
 import gc
+import json
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from app.services.llm_rate_limiter import call_with_backoff, get_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 class AIResearchService:
@@ -24,15 +31,19 @@ class AIResearchService:
         load_dotenv()
         self.client = OpenAI(
             api_key=os.getenv("OPENAI_API_KEY"),
-            timeout=120.0  # 2 minute timeout for API calls
+            timeout=120.0,  # 2 minute timeout for API calls
+            max_retries=0  # Retries are handled in _chat so 429s reach the rate limiter
         )
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o")  # Changed default to gpt-4o
+        self.rate_limiter = get_rate_limiter('openai')
         logger.info(f"AIResearchService initialized with model: {self.model} (2-minute timeout)")
 
-    def research_company(self, company_name: str, company_domain: str = "") -> Optional[str]:
-        """Use OpenAI to research a company and return comprehensive research."""
-        logger.info(f"Researching company: {company_name}")
-        
+    def _chat(self, **params):
+        """Chat completion within the OpenAI rate limits, retrying throttles and transient errors."""
+        return call_with_backoff(self.rate_limiter, self.client.chat.completions.create, **params)
+
+    def research_request(self, company_name: str, company_domain: str = "") -> Dict[str, Any]:
+        """Chat-completion parameters for the company research call (live or batch)."""
         # Construct website URL from domain
         website_url = ""
         if company_domain:
@@ -101,14 +112,22 @@ Be specific with city, state/province, and country. Avoid vague terms like "base
 
 Follow the exact structure provided in your system prompt. Begin now."""
 
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        }
+
+    def research_company(self, company_name: str, company_domain: str = "") -> Optional[str]:
+        """Use OpenAI to research a company and return comprehensive research."""
+        logger.info(f"Researching company: {company_name}")
+        
         try:
             logger.info(f"Making OpenAI API call for {company_name} research...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            response = self._chat(
+                **self.research_request(company_name, company_domain),
                 timeout=120.0  # Explicit 2-minute timeout
             )
             
@@ -124,10 +143,8 @@ Follow the exact structure provided in your system prompt. Begin now."""
             # Force garbage collection to clean up OpenAI client resources
             gc.collect()
 
-    def generate_strategic_recommendations(self, company_name: str, research_content: str) -> Optional[str]:
-        """Generate executive-level strategic recommendations based on research using structured outputs."""
-        logger.info(f"Generating strategic recommendations for: {company_name} with structured outputs")
-        
+    def strategic_recommendations_request(self, company_name: str, research_content: str) -> Dict[str, Any]:
+        """Chat-completion parameters for the structured strategic recommendations call (live or batch)."""
         # Define JSON schema for structured output
         response_schema = {
             "type": "object",
@@ -244,36 +261,37 @@ Keep content professional, data-driven, and specific to AI agent applications. T
 
 Return a complete JSON response following the exact schema structure."""
 
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "strategic_recommendations",
+                    "schema": response_schema,
+                    "strict": True
+                }
+            }
+        }
+
+    def generate_strategic_recommendations(self, company_name: str, research_content: str) -> Optional[str]:
+        """Generate executive-level strategic recommendations based on research using structured outputs."""
+        logger.info(f"Generating strategic recommendations for: {company_name} with structured outputs")
+        
         try:
             logger.info(f"Calling OpenAI API for strategic recommendations using model: {self.model}")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "strategic_recommendations",
-                        "schema": response_schema,
-                        "strict": True
-                    }
-                },
+            response = self._chat(
+                **self.strategic_recommendations_request(company_name, research_content),
                 timeout=120.0  # Explicit 2-minute timeout
             )
             logger.info(f"OpenAI API response received, processing structured JSON")
             
-            # Parse the structured JSON response
-            import json
-            structured_data = json.loads(response.choices[0].message.content)
-            
+            result = self.parse_strategic_recommendations(response.choices[0].message.content)
             logger.info(f"Successfully generated structured strategic recommendations for {company_name}")
-            # Return both the structured data and its JSON string for database storage
-            return {
-                'structured_data': structured_data,
-                'json_string': json.dumps(structured_data)
-            }
+            return result
             
         except Exception as e:
             logger.error(f"❌ ERROR in generate_strategic_recommendations for {company_name}: {e}")
@@ -284,6 +302,26 @@ Return a complete JSON response following the exact schema structure."""
             # Force garbage collection to clean up OpenAI client resources
             gc.collect() 
 
+    @staticmethod
+    def parse_strategic_recommendations(content: str) -> Dict[str, Any]:
+        """Structured recommendations plus their JSON string for database storage."""
+        structured_data = json.loads(content)
+        return {
+            'structured_data': structured_data,
+            'json_string': json.dumps(structured_data)
+        }
+
+    @staticmethod
+    def parse_imperatives(content: str) -> Tuple[Optional[str], Optional[str]]:
+        """Split a STRATEGIC_IMPERATIVES / AGENT_RECOMMENDATIONS response into its two parts."""
+        content = (content or '').strip()
+        if "STRATEGIC_IMPERATIVES:" in content and "AGENT_RECOMMENDATIONS:" in content:
+            parts = content.split("AGENT_RECOMMENDATIONS:")
+            strategic_part = parts[0].replace("STRATEGIC_IMPERATIVES:", "").strip()
+            agent_part = parts[1].strip()
+            return strategic_part, agent_part
+        return None, None
+
     def _format_structured_recommendations(self, data: dict) -> str:
         """Convert structured JSON data to formatted HTML/markdown for the report."""
         html_parts = []
@@ -337,10 +375,8 @@ Return a complete JSON response following the exact schema structure."""
         
         return "\n".join(html_parts)
 
-    def generate_strategic_imperatives_and_agent_recommendations(self, company_name: str, research_content: str) -> tuple[Optional[str], Optional[str]]:
-        """Generate strategic imperatives and AI agent recommendations based on research."""
-        logger.info(f"Generating strategic imperatives and agent recommendations for: {company_name}")
-        
+    def imperatives_request(self, company_name: str, research_content: str) -> Dict[str, Any]:
+        """Chat-completion parameters for the strategic imperatives / agent recommendations call (live or batch)."""
         system_prompt = f"""You are a master business strategist specializing in AI transformation. Based on the company research provided, you will generate strategic imperatives and AI agent recommendations.
 
 Your response must be in this EXACT format:
@@ -366,34 +402,29 @@ Requirements:
 
 Identify the 2 most critical strategic priorities for this company and propose specific AI agent solutions that would address each priority."""
 
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        }
+
+    def generate_strategic_imperatives_and_agent_recommendations(self, company_name: str, research_content: str) -> tuple[Optional[str], Optional[str]]:
+        """Generate strategic imperatives and AI agent recommendations based on research."""
+        logger.info(f"Generating strategic imperatives and agent recommendations for: {company_name}")
+        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            response = self._chat(
+                **self.imperatives_request(company_name, research_content),
                 timeout=120.0  # Explicit 2-minute timeout
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Parse the response to extract strategic imperatives and agent recommendations
-            strategic_imperatives = None
-            agent_recommendations = None
-            
-            if "STRATEGIC_IMPERATIVES:" in content and "AGENT_RECOMMENDATIONS:" in content:
-                parts = content.split("AGENT_RECOMMENDATIONS:")
-                strategic_part = parts[0].replace("STRATEGIC_IMPERATIVES:", "").strip()
-                agent_part = parts[1].strip()
-                
-                strategic_imperatives = strategic_part
-                agent_recommendations = agent_part
-                
+            strategic_imperatives, agent_recommendations = self.parse_imperatives(response.choices[0].message.content)
+            if strategic_imperatives:
                 logger.info(f"Successfully generated strategic imperatives and agent recommendations for {company_name}")
             else:
                 logger.warning(f"Response format not as expected for {company_name}")
-                
             return strategic_imperatives, agent_recommendations
             
         except Exception as e:
@@ -437,7 +468,7 @@ Write a professional executive summary that captures this specific company's bac
 
         try:
             logger.info(f"Making OpenAI API call for {company_name} executive summary...")
-            response = self.client.chat.completions.create(
+            response = self._chat(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -546,7 +577,7 @@ Return a JSON response with:
 
         try:
             logger.info(f"Making OpenAI API call for {company_name} executive summary with structured outputs...")
-            response = self.client.chat.completions.create(
+            response = self._chat(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -14,6 +14,8 @@ from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 from deepresearch.llm_deep_research_service import LLMDeepResearchService
+from app.database import use_pool_profile
+from app.utils.query_stats import track_queries
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -118,6 +120,8 @@ class DeepResearchScheduler:
 # Global scheduler instance
 deep_research_scheduler = DeepResearchScheduler()
 
+@use_pool_profile('scheduler')
+@track_queries('job:poll_openai_background_jobs')
 def poll_openai_background_jobs():
     """Module-level function to poll OpenAI for research job completions."""
     try:
@@ -14,7 +14,7 @@ import argparse
 # Add the parent directory to sys.path to import app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from .company_researcher import CompanyResearcher
+from .company_researcher import CHECKPOINT_PATH, RESEARCH_WORKERS, CompanyResearcher
 
 # Configure logging
 logging.basicConfig(
@@ -32,7 +32,8 @@ def main():
     parser = argparse.ArgumentParser(description='Deep research agent for companies from contacts table')
     parser.add_argument('--max-companies', type=int, help='Maximum number of companies to process')
     parser.add_argument('--company-id', type=int, help='Research a specific company by ID')
-    parser.add_argument('--delay', type=int, default=2, help='Delay between API calls in seconds')
+    parser.add_argument('--workers', type=int, default=RESEARCH_WORKERS, help='Companies researched at once (API pace is set by LLM_OPENAI_* limits)')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH, help='Checkpoint file used to resume an interrupted run')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be processed without actually doing it')
     parser.add_argument('--no-reports', action='store_true', help='Skip generating strategic reports and markdown files')
     parser.add_argument('--show-reports', action='store_true', help='List all companies with reports in database')
@@ -40,11 +41,14 @@ def main():
     parser.add_argument('--force-refresh', action='store_true', help='Overwrite existing research (for single company or batch)')
     parser.add_argument('--research-missing', action='store_true', help='Research companies that exist but have no research data')
     parser.add_argument('--show-missing', action='store_true', help='List companies that exist but have no research')
+    parser.add_argument('--batch', action='store_true', help='Run batch research as offline batch jobs (LLM_BATCH_PROVIDER) instead of live calls')
     
     args = parser.parse_args()
     
     try:
-        researcher = CompanyResearcher()
+        # One pooled connection per research worker unless the pool is sized explicitly
+        os.environ.setdefault('DB_POOL_RESEARCH_SIZE', str(max(1, args.workers)))
+        researcher = CompanyResearcher(pool_profile='research')
         
         # Handle showing reports from database
         if args.show_reports:
@@ -149,13 +153,23 @@ def main():
             else:
                 logger.info("⏭️ Default mode: Will skip companies that already have research")
                 
-            researcher.process_companies(
-                max_companies=args.max_companies,
-                delay_seconds=args.delay,
-                generate_reports=generate_reports,
-                skip_existing=skip_existing,
-                force_refresh=force_refresh
-            )
+            if args.batch:
+                logger.info("📦 Batch mode: research and reports run as offline batch jobs")
+                researcher.process_companies_batch(
+                    max_companies=args.max_companies,
+                    generate_reports=generate_reports,
+                    skip_existing=skip_existing,
+                    force_refresh=force_refresh
+                )
+            else:
+                researcher.process_companies(
+                    max_companies=args.max_companies,
+                    generate_reports=generate_reports,
+                    skip_existing=skip_existing,
+                    force_refresh=force_refresh,
+                    max_workers=args.workers,
+                    checkpoint_path=args.checkpoint
+                )
             
     except KeyboardInterrupt:
         logger.info("Process interrupted by user")
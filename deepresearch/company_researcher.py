@@ -6,11 +6,25 @@ Main orchestrator for company research operations that coordinates:
 - Database operations via DatabaseService
 - AI research via AIResearchService  
 - Report generation via ReportGenerator
+
+process_companies researches companies on a thread pool. OpenAI calls are
+paced by the shared provider rate limiter (see app.services.llm_rate_limiter)
+rather than by sleeps, and progress is checkpointed to a JSON file so an
+interrupted run resumes where it stopped.
+
+Environment Variables:
+- DEEP_RESEARCH_WORKERS: Companies researched at once by process_companies (default: 8)
+- DEEP_RESEARCH_CHECKPOINT_PATH: Checkpoint file of process_companies (default: research_checkpoint.json)
 """
 
+import json
 import logging
-import time
-from typing import Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.services.llm_batch_service import BatchProvider, message_content, run_batch
 
 from .database_service import DatabaseService
 from .ai_research_service import AIResearchService
@@ -18,13 +32,18 @@ from .report_generator import ReportGenerator
 
 logger = logging.getLogger(__name__)
 
+RESEARCH_WORKERS = max(1, int(os.getenv('DEEP_RESEARCH_WORKERS', '8')))
+CHECKPOINT_PATH = os.getenv('DEEP_RESEARCH_CHECKPOINT_PATH', 'research_checkpoint.json')
+
 class CompanyResearcher:
     """Main orchestrator for company research operations."""
     
-    def __init__(self):
-        self.db_service = DatabaseService()
+    def __init__(self, pool_profile: Optional[str] = None):
+        self.db_service = DatabaseService(pool_profile)
         self.ai_service = AIResearchService()
         self.report_generator = ReportGenerator()
+        # Guards the existence set that parallel workers check and extend
+        self._existing_lock = threading.Lock()
         logger.info("CompanyResearcher initialized with all services")
 
     def research_single_company_by_id(self, company_id: int, generate_report: bool = True, force_refresh: bool = False) -> bool:
@@ -108,16 +127,13 @@ class CompanyResearcher:
             logger.error(f"❌ Failed to research: {company_name}")
             return False
 
-    def process_companies(self, max_companies: Optional[int] = None, delay_seconds: int = 2, generate_reports: bool = True, 
-                         skip_existing: bool = True, force_refresh: bool = False):
-        """Main processing function to research and save companies."""
-        logger.info("Starting company research process...")
-        
+    def _companies_to_research(self, max_companies: Optional[int], skip_existing: bool, force_refresh: bool) -> List[dict]:
+        """Companies from the contacts table that this run should research."""
         # Get unique companies from contacts
         contact_companies = self.db_service.get_unique_companies_from_contacts()
         if not contact_companies:
             logger.warning("No companies found in contacts table")
-            return
+            return []
         
         # Determine filtering strategy based on options
         if force_refresh:
@@ -145,109 +161,270 @@ class CompanyResearcher:
         if max_companies:
             companies_to_research = companies_to_research[:max_companies]
             logger.info(f"Limited to {max_companies} companies for this run")
+        return companies_to_research
+
+    def _website_url(self, company: dict) -> str:
+        if not company['company_domain']:
+            return ""
+        if company['company_domain'].startswith(('http://', 'https://')):
+            return company['company_domain']
+        return f"https://{company['company_domain']}"
+
+    @staticmethod
+    def _name_key(company: dict) -> str:
+        """Company name as stored in the existence set (see DatabaseService.get_existing_companies)"""
+        return company['company_name'].strip().lower()
+
+    def _save_company_research(self, company: dict, research: str, markdown_content: Optional[str],
+                               strategic_imperatives: Optional[str], agent_recommendations: Optional[str],
+                               existing_names: Set[str]) -> bool:
+        """Overwrite the company's record if it exists (per `existing_names`), else insert one."""
+        website_url = self._website_url(company)
+        name_key = self._name_key(company)
+        # Claim the name before inserting so a parallel worker updates instead of inserting twice
+        with self._existing_lock:
+            exists = name_key in existing_names
+            existing_names.add(name_key)
+        if exists:
+            return self.db_service.update_existing_company_by_name(
+                company['company_name'], website_url, research, markdown_content, strategic_imperatives, agent_recommendations
+            )
+        saved = self.db_service.save_company_research(
+            company['company_name'], website_url, research, markdown_content, strategic_imperatives, agent_recommendations
+        )
+        if not saved:
+            with self._existing_lock:
+                existing_names.discard(name_key)
+        return saved
+
+    def _research_and_save(self, company: dict, generate_reports: bool, existing_names: Set[str]) -> Tuple[bool, bool]:
+        """Research one company, build its report and save it. Returns (saved, report stored)."""
+        company_name = company['company_name']
+        research = self.ai_service.research_company(company_name, company['company_domain'])
+        if not research:
+            logger.error(f"❌ Failed to research: {company_name}")
+            return False, False
+        
+        strategic_analysis = None
+        markdown_content = None
+        strategic_imperatives = None
+        agent_recommendations = None
+        
+        if generate_reports:
+            logger.info(f"Generating strategic analysis for: {company_name}")
+            strategic_analysis = self.ai_service.generate_strategic_recommendations(company_name, research)
+            
+            # Generate strategic imperatives and agent recommendations
+            logger.info(f"Generating strategic imperatives and agent recommendations for: {company_name}")
+            strategic_imperatives, agent_recommendations = self.ai_service.generate_strategic_imperatives_and_agent_recommendations(company_name, research)
+            
+            if strategic_analysis:
+                # Generate markdown report content
+                markdown_content = self.report_generator.generate_markdown_report(company_name, research, strategic_analysis)
+            else:
+                logger.warning(f"⚠️ Failed to generate strategic analysis for: {company_name}")
+        
+        # Save to database (with or without markdown report)
+        if not self._save_company_research(company, research, markdown_content, strategic_imperatives,
+                                           agent_recommendations, existing_names):
+            logger.error(f"❌ Failed to save: {company_name}")
+            return False, False
+        
+        logger.info(f"✅ Successfully processed: {company_name}")
+        return True, bool(markdown_content)
+
+    def _load_checkpoint(self, checkpoint_path: Optional[str], run: dict) -> Set[str]:
+        """Companies (lower-cased names) a previous, interrupted run with the same settings finished."""
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return set()
+        try:
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+            return set()
+        if checkpoint.get('run') != run:
+            logger.info(f"Ignoring checkpoint {checkpoint_path} from a run with different settings")
+            return set()
+        done = set(checkpoint.get('done', []))
+        logger.info(f"📌 Resuming from checkpoint: {len(done)} companies already processed")
+        return done
+
+    def _save_checkpoint(self, checkpoint_path: Optional[str], run: dict, done: Set[str], failed: Dict[str, str]):
+        """Write the checkpoint atomically so an interrupted run never leaves a partial file."""
+        if not checkpoint_path:
+            return
+        tmp_path = f"{checkpoint_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'run': run, 'done': sorted(done), 'failed': failed}, f)
+            os.replace(tmp_path, checkpoint_path)
+        except OSError as e:
+            logger.warning(f"Could not write checkpoint {checkpoint_path}: {e}")
+
+    def process_companies(self, max_companies: Optional[int] = None, generate_reports: bool = True,
+                         skip_existing: bool = True, force_refresh: bool = False,
+                         max_workers: int = RESEARCH_WORKERS, checkpoint_path: Optional[str] = CHECKPOINT_PATH):
+        """Main processing function to research and save companies.
+
+        Companies are researched by a pool of `max_workers` threads; the pace
+        is set by the provider rate limiters the AI service calls go through.
+        Finished companies are recorded in `checkpoint_path`, so a rerun with
+        the same settings skips them; the file is removed once a run finishes
+        without failures.
+        """
+        logger.info("Starting company research process...")
+        
+        companies_to_research = self._companies_to_research(max_companies, skip_existing, force_refresh)
+        if not companies_to_research:
+            return
+        
+        run = {'skip_existing': skip_existing, 'force_refresh': force_refresh, 'generate_reports': generate_reports}
+        done = self._load_checkpoint(checkpoint_path, run)
+        # One task per company name: workers never research the same company twice
+        pending = []
+        seen = set(done)
+        for company in companies_to_research:
+            name_key = self._name_key(company)
+            if name_key not in seen:
+                seen.add(name_key)
+                pending.append(company)
+        # One existence lookup for the whole run instead of one per saved company
+        existing_names = self.db_service.get_existing_companies()
         
-        # Process each company
         successful_count = 0
         failed_count = 0
         reports_generated = 0
+        failed: Dict[str, str] = {}
         
-        for i, company in enumerate(companies_to_research, 1):
-            logger.info(f"Processing {i}/{len(companies_to_research)}: {company['company_name']}")
-            
-            # Construct website URL
-            website_url = ""
-            if company['company_domain']:
-                if not company['company_domain'].startswith(('http://', 'https://')):
-                    website_url = f"https://{company['company_domain']}"
-                else:
-                    website_url = company['company_domain']
-            
-            # Research the company
-            research = self.ai_service.research_company(
-                company['company_name'], 
-                company['company_domain']
-            )
-            
-            if research:
-                # Generate strategic recommendations first if requested
-                strategic_analysis = None
-                markdown_content = None
-                
-                strategic_imperatives = None
-                agent_recommendations = None
-                
-                if generate_reports:
-                    logger.info(f"Generating strategic analysis for: {company['company_name']}")
-                    strategic_analysis = self.ai_service.generate_strategic_recommendations(company['company_name'], research)
+        logger.info(f"Researching {len(pending)} companies with {max_workers} workers")
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self._research_and_save, company, generate_reports, existing_names): company
+                for company in pending
+            }
+            try:
+                for i, future in enumerate(as_completed(futures), 1):
+                    company = futures[future]
+                    name_key = self._name_key(company)
+                    try:
+                        saved, report_stored = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Error processing {company['company_name']}: {type(e).__name__}: {e}")
+                        saved, report_stored = False, False
                     
-                    # Generate strategic imperatives and agent recommendations
-                    logger.info(f"Generating strategic imperatives and agent recommendations for: {company['company_name']}")
-                    strategic_imperatives, agent_recommendations = self.ai_service.generate_strategic_imperatives_and_agent_recommendations(company['company_name'], research)
-                    
-                    if strategic_analysis:
-                        # Generate markdown report content
-                        markdown_content = self.report_generator.generate_markdown_report(company['company_name'], research, strategic_analysis)
+                    if saved:
+                        successful_count += 1
+                        reports_generated += report_stored
+                        done.add(name_key)
                     else:
-                        logger.warning(f"⚠️ Failed to generate strategic analysis for: {company['company_name']}")
-                
-                # Save to database (with or without markdown report)
-                save_success = False
-                if force_refresh and company['company_name'].lower() in self.db_service.get_existing_companies():
-                    # Company exists, we need to update it
-                    # First find the company ID
-                    all_existing = self.db_service.get_existing_companies()
-                    if company['company_name'].lower() in all_existing:
-                        # Get company by name to find ID (we'll need to add this method)
-                        save_success = self.db_service.update_existing_company_by_name(
-                            company['company_name'], website_url, research, markdown_content, strategic_imperatives, agent_recommendations
-                        )
-                else:
-                    # Normal insert for new company
-                    save_success = self.db_service.save_company_research(
-                        company['company_name'], website_url, research, markdown_content, strategic_imperatives, agent_recommendations
-                    )
-                
-                if save_success:
-                    successful_count += 1
-                    logger.info(f"✅ Successfully processed: {company['company_name']}")
-                    
-                    # Note: Markdown report is now only stored in database, not as disk file
-                    if generate_reports and strategic_analysis:
-                        reports_generated += 1
-                        logger.info(f"📊 Successfully stored markdown report in database for: {company['company_name']}")
-                        
-                        # Additional delay for report generation to avoid rate limiting
-                        if i < len(companies_to_research):
-                            logger.debug(f"Waiting additional {delay_seconds} seconds after report generation...")
-                            time.sleep(delay_seconds)
-                else:
-                    failed_count += 1
-                    logger.error(f"❌ Failed to save: {company['company_name']}")
-            else:
-                failed_count += 1
-                logger.error(f"❌ Failed to research: {company['company_name']}")
-            
-            # Add delay between API calls to avoid rate limiting
-            if i < len(companies_to_research):
-                logger.debug(f"Waiting {delay_seconds} seconds before next request...")
-                time.sleep(delay_seconds)
+                        failed_count += 1
+                        failed[name_key] = company['company_name']
+                    self._save_checkpoint(checkpoint_path, run, done, failed)
+                    logger.info(f"Progress {i}/{len(pending)}: {company['company_name']}")
+            except KeyboardInterrupt:
+                # Drop companies that have not started; running ones finish and stay unrecorded
+                executor.shutdown(wait=False, cancel_futures=True)
+                logger.info(f"Interrupted; rerun to resume from {checkpoint_path}")
+                raise
+        
+        if checkpoint_path and not failed and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
         
         # Final summary
+        processed = len(pending)
         summary = f"""
 Company Research Complete!
 ========================
-Total companies processed: {len(companies_to_research)}
+Total companies processed: {processed}
+Skipped (duplicate or done in an earlier run): {len(companies_to_research) - processed}
 Successfully researched: {successful_count}
 Failed: {failed_count}
-Success rate: {(successful_count/len(companies_to_research)*100):.1f}%"""
+Success rate: {(successful_count/processed*100) if processed else 100:.1f}%"""
         
         if generate_reports:
             summary += f"""
 Strategic reports stored in database: {reports_generated}
-Report success rate: {(reports_generated/successful_count*100):.1f}% (of successful research)"""
+Report success rate: {(reports_generated/successful_count*100) if successful_count else 0:.1f}% (of successful research)"""
         
         logger.info(summary)
 
+    def process_companies_batch(self, max_companies: Optional[int] = None, generate_reports: bool = True,
+                                skip_existing: bool = True, force_refresh: bool = False,
+                                provider: Optional[BatchProvider] = None):
+        """Research companies through offline batch jobs instead of one call at a time.
+
+        One job runs every company's research prompt; a second job runs the
+        strategic analysis and imperatives prompts built from that research.
+        Reports are then rendered and saved exactly as in process_companies.
+        """
+        logger.info("Starting batch company research process...")
+        
+        companies_to_research = self._companies_to_research(max_companies, skip_existing, force_refresh)
+        if not companies_to_research:
+            return
+        
+        research_results = run_batch(
+            {f"research-{i}": self.ai_service.research_request(company['company_name'], company['company_domain'])
+             for i, company in enumerate(companies_to_research)},
+            provider, f"deep research: {len(companies_to_research)} companies"
+        )
+        researched = []
+        for i, company in enumerate(companies_to_research):
+            research = (message_content(research_results[f"research-{i}"]) or '').strip()
+            if research:
+                researched.append((i, company, research))
+            else:
+                logger.error(f"❌ Failed to research: {company['company_name']} "
+                             f"({research_results[f'research-{i}'].get('error', 'empty response')})")
+        
+        report_results = {}
+        if generate_reports and researched:
+            report_requests = {}
+            for i, company, research in researched:
+                report_requests[f"strategy-{i}"] = self.ai_service.strategic_recommendations_request(company['company_name'], research)
+                report_requests[f"imperatives-{i}"] = self.ai_service.imperatives_request(company['company_name'], research)
+            report_results = run_batch(report_requests, provider, f"deep research reports: {len(researched)} companies")
+        
+        existing_names = self.db_service.get_existing_companies()
+        successful_count = 0
+        reports_generated = 0
+        for i, company, research in researched:
+            markdown_content = None
+            strategic_imperatives = None
+            agent_recommendations = None
+            if generate_reports:
+                strategic_analysis = None
+                content = message_content(report_results.get(f"strategy-{i}"))
+                if content:
+                    try:
+                        strategic_analysis = self.ai_service.parse_strategic_recommendations(content)
+                    except ValueError as e:
+                        logger.warning(f"⚠️ Invalid strategic analysis for {company['company_name']}: {e}")
+                strategic_imperatives, agent_recommendations = self.ai_service.parse_imperatives(
+                    message_content(report_results.get(f"imperatives-{i}"))
+                )
+                if strategic_analysis:
+                    markdown_content = self.report_generator.generate_markdown_report(company['company_name'], research, strategic_analysis)
+                    reports_generated += 1
+                else:
+                    logger.warning(f"⚠️ Failed to generate strategic analysis for: {company['company_name']}")
+            
+            if self._save_company_research(company, research, markdown_content, strategic_imperatives,
+                                           agent_recommendations, existing_names):
+                successful_count += 1
+                logger.info(f"✅ Successfully processed: {company['company_name']}")
+            else:
+                logger.error(f"❌ Failed to save: {company['company_name']}")
+        
+        logger.info(f"""
+Batch Company Research Complete!
+================================
+Total companies processed: {len(companies_to_research)}
+Successfully researched: {successful_count}
+Failed: {len(companies_to_research) - successful_count}
+Strategic reports stored in database: {reports_generated}""")
+
     def get_dry_run_preview(self, max_companies: Optional[int] = None, skip_existing: bool = True, force_refresh: bool = False) -> dict:
         """Get a preview of what would be processed in a dry run."""
         contact_companies = self.db_service.get_unique_companies_from_contacts()
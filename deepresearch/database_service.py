@@ -20,12 +20,12 @@ logger = logging.getLogger(__name__)
 class DatabaseService:
     """Handles all database operations for company research."""
     
-    def __init__(self):
+    def __init__(self, pool_profile: Optional[str] = None):
         load_dotenv()
-        # Use shared engine instead of creating a new one
+        # Use shared engine instead of creating a new one (pool_profile picks its pool, see app.database)
         try:
             from app.database import get_shared_engine
-            self.engine = get_shared_engine()
+            self.engine = get_shared_engine(pool_profile)
             # Using shared database engine
         except Exception as e:
             logger.error(f"Failed to get shared engine: {e}")
@@ -8,13 +8,16 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.websockets import WebSocketDisconnect
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, defer
+from typing import Dict, List, Optional
 import asyncio
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import uuid
+from dataclasses import asdict
 import logging
 import requests
 from dotenv import load_dotenv
@@ -27,7 +30,12 @@ from company_seeder import CompanySeeder, CompanyProfile
 from database import get_db_session, get_database_manager, health_check
 from models import Company, JobPosting, ScrapingLog, SeedingSession
 from openai_enricher import OpenAICompanyEnricher
-from lead_scoring import LeadScoringEngine, score_company_by_id, save_lead_score_to_db
+from lead_scoring import LeadScoringEngine, score_company_by_id, save_lead_score_to_db, SCORING_MODES
+from lead_scoring import score_companies_via_batch
+from app.services.leadgen_company_store import find_existing_companies, insert_companies
+from app.services.leadgen_entity_resolution import dedupe_profiles, resolve_leadgen_companies
+from app.services.leadgen_stats_service import invalidate_leadgen_stats, leadgen_stats
+from app.services.leadgen_task_registry import LeadgenTaskRegistry, TASK_HEARTBEAT_SECONDS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -38,10 +46,27 @@ app = FastAPI(title="Lead Generation Tool")
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Global state
+# Global state: status of the tasks this worker runs (all workers share leadgen_tasks)
 scraping_tasks = {}
+task_checkpoints: Dict[str, dict] = {}
+running_tasks: Dict[str, asyncio.Task] = {}
 active_connections: List[WebSocket] = []
 
+# Minimum gap between progress broadcasts of one batch task
+PROGRESS_BROADCAST_INTERVAL = float(os.getenv('LEADGEN_PROGRESS_INTERVAL_SECONDS', '0.5'))
+# Messages queued per WebSocket client before further ones are skipped for it
+WS_SEND_QUEUE_SIZE = int(os.getenv('LEADGEN_WS_SEND_QUEUE_SIZE', '256'))
+# A client whose send takes longer than this is disconnected
+WS_SEND_TIMEOUT = float(os.getenv('LEADGEN_WS_SEND_TIMEOUT_SECONDS', '5'))
+# Progress-style messages per task and type are coalesced to at most this many per second
+WS_PROGRESS_RATE = float(os.getenv('LEADGEN_WS_PROGRESS_RATE', '4'))
+# Message types where only the newest one matters
+COALESCED_MESSAGE_TYPES = {'progress', 'lead_scoring_phase'}
+# Message types that can end a task; they drop its coalescing state
+TERMINAL_MESSAGE_TYPES = {'completed', 'stopped', 'error', 'failed'}
+# An 'error' carrying one of these is about a single company while the task keeps running
+ITEM_ERROR_FIELDS = ('company_id', 'company')
+
 class ScrapingConfig(BaseModel):
     companies: List[str] = []
     max_companies: Optional[int] = 10
@@ -128,41 +153,370 @@ class ScrapingStatus(BaseModel):
     started_at: datetime
     completed_at: Optional[datetime] = None
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+class Subscriber:
+    """One WebSocket: its own send queue, sender task and followed tasks (None = every task)"""
+
+    def __init__(self, websocket: WebSocket, task_ids: Optional[List[str]] = None):
+        self.websocket = websocket
+        self.task_ids: Optional[set] = set(task_ids) if task_ids else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.skipped = 0
+        self.sender: Optional[asyncio.Task] = None
+
+    def wants(self, task_id: Optional[str]) -> bool:
+        return task_id is None or self.task_ids is None or task_id in self.task_ids
 
-    async def connect(self, websocket: WebSocket):
+class ConnectionManager:
+    """Task-scoped WebSocket fan-out.
+
+    broadcast() never waits on the network: each message is queued per
+    subscriber and every socket drains its own queue in a sender task, so a
+    slow viewer cannot hold up workers or other viewers. A full queue skips
+    messages for that socket; a send that times out drops the socket.
+    Latest-wins message types are coalesced per task to at most
+    WS_PROGRESS_RATE messages per second.
+    """
+
+    def __init__(self, progress_interval: float = 1.0 / WS_PROGRESS_RATE):
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+        self.progress_interval = progress_interval
+        self._pending: Dict[tuple, str] = {}  # (task_id, type) -> newest unsent message
+        self._last_sent: Dict[tuple, float] = {}
+        self._timers: Dict[tuple, asyncio.TimerHandle] = {}
+        self._next_sweep = 0.0
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.subscribers)
+
+    async def connect(self, websocket: WebSocket, task_ids: Optional[List[str]] = None):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        subscriber = Subscriber(websocket, task_ids)
+        subscriber.sender = asyncio.create_task(self._send_loop(subscriber))
+        self.subscribers[websocket] = subscriber
+
+    def subscribe(self, websocket: WebSocket, task_id: str):
+        subscriber = self.subscribers.get(websocket)
+        if subscriber:
+            if subscriber.task_ids is None:
+                subscriber.task_ids = set()
+            subscriber.task_ids.add(task_id)
+
+    def unsubscribe(self, websocket: WebSocket, task_id: str):
+        subscriber = self.subscribers.get(websocket)
+        if subscriber and subscriber.task_ids is not None:
+            subscriber.task_ids.discard(task_id)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber and subscriber.sender and subscriber.sender is not asyncio.current_task():
+            subscriber.sender.cancel()
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
+    async def _send_loop(self, subscriber: Subscriber):
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                await asyncio.wait_for(subscriber.websocket.send_text(message), WS_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Dropping WebSocket client: {e!r}")
+            self.disconnect(subscriber.websocket)
+            try:
+                await subscriber.websocket.close()
+            except Exception:
+                pass
+
+    def _enqueue(self, subscriber: Subscriber, message: str):
         try:
-            await websocket.send_text(message)
-        except:
-            # Remove broken connections
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
+            subscriber.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client: skip this message rather than block the task
+            subscriber.skipped += 1
+            if subscriber.skipped % 100 == 1:
+                logger.warning(f"WebSocket client is falling behind, {subscriber.skipped} messages skipped")
+
+    def _fan_out(self, task_id: Optional[str], message: str):
+        for subscriber in list(self.subscribers.values()):
+            if subscriber.wants(task_id):
+                self._enqueue(subscriber, message)
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        subscriber = self.subscribers.get(websocket)
+        if subscriber:
+            self._enqueue(subscriber, message)
 
     async def broadcast(self, message: str):
-        broken_connections = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                broken_connections.append(connection)
-        
-        # Remove broken connections
-        for connection in broken_connections:
-            if connection in self.active_connections:
-                self.active_connections.remove(connection)
+        """Deliver a JSON message to the sockets following its task_id (messages without one go to all)"""
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            payload = {}
+        task_id = payload.get('task_id') if isinstance(payload, dict) else None
+        kind = payload.get('type') if isinstance(payload, dict) else None
+
+        if task_id and kind in COALESCED_MESSAGE_TYPES:
+            self._coalesce((task_id, kind), message)
+            return
+        if task_id:
+            # Pending progress of this task goes out first so logs and completion stay in order
+            for key in [key for key in self._pending if key[0] == task_id]:
+                self._flush(key)
+            item_error = kind == 'error' and any(field in payload for field in ITEM_ERROR_FIELDS)
+            if kind in TERMINAL_MESSAGE_TYPES and not item_error:
+                for key in [key for key in self._last_sent if key[0] == task_id]:
+                    del self._last_sent[key]
+        self._fan_out(task_id, message)
+
+    def _sweep_last_sent(self, now: float):
+        """Forget send times older than the interval (tasks that went silent without a terminal message)"""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 60
+        for key in [key for key, sent in self._last_sent.items() if sent + self.progress_interval < now]:
+            del self._last_sent[key]
+
+    def _coalesce(self, key: tuple, message: str):
+        self._pending[key] = message
+        if key in self._timers:
+            return
+        now = time.monotonic()
+        self._sweep_last_sent(now)
+        wait = self._last_sent.get(key, 0.0) + self.progress_interval - now
+        if wait <= 0:
+            self._flush(key)
+        else:
+            self._timers[key] = asyncio.get_running_loop().call_later(wait, self._flush, key)
+
+    def _flush(self, key: tuple):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        message = self._pending.pop(key, None)
+        if message is not None:
+            self._last_sent[key] = time.monotonic()
+            self._fan_out(key[0], message)
 
 manager = ConnectionManager()
 
+class CoalescedProgress:
+    """Collects per-company outcomes of a batch task and broadcasts them at most once per interval"""
+
+    def __init__(self, task_id: str, total: int, event_type: str, interval: float = PROGRESS_BROADCAST_INTERVAL):
+        self.task_id = task_id
+        self.total = total
+        self.event_type = event_type
+        self.interval = interval
+        self.done = 0
+        self.successful = 0
+        self._succeeded: List[int] = []
+        self._failed: List[dict] = []
+        self._last_flush = 0.0
+        self._scheduled: Optional[asyncio.Task] = None
+
+    async def record(self, company_id: int, error: Optional[str] = None):
+        self.done += 1
+        if error:
+            self._failed.append({"company_id": company_id, "error": error})
+        else:
+            self.successful += 1
+            self._succeeded.append(company_id)
+
+        wait = self._last_flush + self.interval - time.monotonic()
+        if wait <= 0 or self.done == self.total:
+            await self.flush()
+        elif self._scheduled is None:
+            # Make sure a quiet stretch after this outcome still gets reported
+            self._scheduled = asyncio.create_task(self._flush_later(wait))
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        self._scheduled = None
+        await self.flush()
+
+    async def flush(self):
+        if not (self._succeeded or self._failed):
+            return
+        succeeded, failed = self._succeeded, self._failed
+        self._succeeded, self._failed = [], []
+        self._last_flush = time.monotonic()
+        await manager.broadcast(json.dumps({
+            "task_id": self.task_id,
+            "type": self.event_type,
+            "progress": self.done,
+            "total": self.total,
+            "successful": self.successful,
+            "succeeded": succeeded,
+            "failed": failed
+        }))
+
+    def cancel(self):
+        """Drop a scheduled flush, e.g. once the task was stopped and must not report any more"""
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+
+    async def close(self):
+        self.cancel()
+        await self.flush()
+
+# Durable task state: this worker's tasks are written to leadgen_tasks on every heartbeat,
+# status polls fall back to the table, and tasks of dead workers are resumed here
+task_registry = LeadgenTaskRegistry(get_db_session)
+_task_wrappers = set()
+_unfinished_writes = set()
+_heartbeat_loop: Optional[asyncio.Task] = None
+
+# kind -> coroutine factory (task_id, params, checkpoint); params are what _start_task stored
+TASK_RUNNERS = {
+    'seeding': lambda task_id, params, checkpoint: run_seeding_task(
+        task_id, SeedingConfig(**{'apollo_api_key': os.getenv('APOLLO_API_KEY'), **params['config']})),
+    'scraping': lambda task_id, params, checkpoint: run_scraping_task(
+        task_id, ScrapingConfig(**params['config']), params['companies'], checkpoint),
+    'enrichment': lambda task_id, params, checkpoint: run_enrichment_task(
+        task_id, params['company_ids'], params.get('max_concurrent', 3), checkpoint),
+    'batch_enrichment': lambda task_id, params, checkpoint: run_batch_enrichment_task(task_id, params['company_ids']),
+    'lead_scoring': lambda task_id, params, checkpoint: run_lead_scoring_task(
+        task_id, params['company_ids'], params.get('mode'), checkpoint, params.get('force', False)),
+    'batch_scoring': lambda task_id, params, checkpoint: run_batch_scoring_task(
+        task_id, params['company_ids'], params.get('mode'), params.get('force', False)),
+    'crawling': lambda task_id, params, checkpoint: run_crawling_task(task_id, CrawlingConfig(**params['config'])),
+}
+# Provider batch jobs are not tracked across restarts, so those tasks fail instead of resubmitting.
+# Seeding and crawling restart from the beginning; key-based inserts skip what was already saved.
+RESUMABLE_TASK_KINDS = ('seeding', 'scraping', 'enrichment', 'lead_scoring', 'crawling')
+
+def _status_from_row(row) -> ScrapingStatus:
+    return ScrapingStatus(
+        task_id=row.task_id,
+        status=row.status,
+        progress=row.progress,
+        total=row.total,
+        current_company=row.current_company,
+        leads_found=row.leads_found,
+        csv_file=row.csv_file,
+        started_at=row.started_at,
+        completed_at=row.completed_at
+    )
+
+async def _load_task(task_id: str) -> Optional[ScrapingStatus]:
+    """Status of a task run by this worker, or else as last recorded by its owner"""
+    if task_id in scraping_tasks:
+        return scraping_tasks[task_id]
+    row = await asyncio.to_thread(task_registry.get, task_id)
+    return _status_from_row(row) if row else None
+
+async def _start_task(background_tasks: BackgroundTasks, kind: str, status: ScrapingStatus, params: dict,
+                      stored_params: Optional[dict] = None):
+    """Register a task in leadgen_tasks and run it on this worker (stored_params: what a resume gets, if different)"""
+    await asyncio.to_thread(task_registry.create, status.task_id, kind,
+                            params if stored_params is None else stored_params,
+                            total=status.total, current_company=status.current_company)
+    scraping_tasks[status.task_id] = status
+    background_tasks.add_task(_run_task, status.task_id, kind, params)
+
+async def _run_task(task_id: str, kind: str, params: dict, checkpoint: Optional[dict] = None):
+    runner = asyncio.create_task(TASK_RUNNERS[kind](task_id, params, checkpoint or {}))
+    running_tasks[task_id] = runner
+    try:
+        await runner
+    except asyncio.CancelledError:
+        if scraping_tasks[task_id].status != "stopped":
+            # Worker shutting down: the row stays running and another worker resumes it
+            raise
+    except Exception as e:
+        logger.error(f"Task {task_id} crashed: {e}", exc_info=True)
+        scraping_tasks[task_id].status = "failed"
+        scraping_tasks[task_id].completed_at = datetime.now()
+    finally:
+        running_tasks.pop(task_id, None)
+    await _record_finished_task(task_id)
+
+async def _record_finished_task(task_id: str):
+    task = scraping_tasks[task_id]
+    try:
+        await asyncio.to_thread(
+            task_registry.finish, task_id, task.status if task.status != "running" else "failed",
+            progress=task.progress, leads_found=task.leads_found, csv_file=task.csv_file,
+            current_company=task.current_company
+        )
+    except Exception as e:
+        # Retried on the next heartbeat; until then the status is served from memory
+        logger.warning(f"Could not record the outcome of task {task_id}: {e}")
+        _unfinished_writes.add(task_id)
+        return
+    _unfinished_writes.discard(task_id)
+    task_checkpoints.pop(task_id, None)
+    scraping_tasks.pop(task_id, None)
+
+async def _stop_local_task(task_id: str, message: str):
+    task = scraping_tasks.get(task_id)
+    if not task or task.status != "running":
+        return False
+    task.status = "stopped"
+    task.completed_at = datetime.now()
+    runner = running_tasks.get(task_id)
+    if runner:
+        runner.cancel()
+    await manager.broadcast(json.dumps({
+        "task_id": task_id,
+        "type": "stopped",
+        "message": message
+    }))
+    return True
+
+def _checkpoint_snapshot(checkpoint: Optional[dict]) -> Optional[dict]:
+    # Copied here because runners keep adding to the sets while the heartbeat is written
+    if checkpoint is None:
+        return None
+    return {key: sorted(value) if isinstance(value, set) else list(value) if isinstance(value, list) else value
+            for key, value in checkpoint.items()}
+
+async def _heartbeat_once():
+    for task_id in list(_unfinished_writes):
+        await _record_finished_task(task_id)
+
+    snapshots = [{
+        'task_id': task_id,
+        'progress': scraping_tasks[task_id].progress,
+        'total': scraping_tasks[task_id].total,
+        'current_company': scraping_tasks[task_id].current_company,
+        'leads_found': scraping_tasks[task_id].leads_found,
+        'checkpoint': _checkpoint_snapshot(task_checkpoints.get(task_id)),
+    } for task_id in list(running_tasks) if task_id in scraping_tasks]
+    not_running = await asyncio.to_thread(task_registry.heartbeat, snapshots)
+    for task_id in not_running:
+        await _stop_local_task(task_id, "Task stopped")
+
+    for row in await asyncio.to_thread(task_registry.claim_stale, RESUMABLE_TASK_KINDS):
+        scraping_tasks[row.task_id] = _status_from_row(row)
+        await manager.broadcast(json.dumps({
+            "task_id": row.task_id,
+            "type": "status",
+            "message": f"Resuming task after its worker stopped (attempt {row.attempts})"
+        }))
+        wrapper = asyncio.create_task(_run_task(row.task_id, row.kind, row.params or {}, row.checkpoint or {}))
+        _task_wrappers.add(wrapper)
+        wrapper.add_done_callback(_task_wrappers.discard)
+
+async def _run_heartbeat_loop():
+    while True:
+        try:
+            await _heartbeat_once()
+        except Exception as e:
+            logger.warning(f"Task heartbeat failed: {e}")
+        await asyncio.sleep(TASK_HEARTBEAT_SECONDS)
+
+@app.on_event("startup")
+async def start_task_heartbeat():
+    global _heartbeat_loop
+    _heartbeat_loop = asyncio.create_task(_run_heartbeat_loop())
+
+@app.on_event("shutdown")
+async def stop_task_heartbeat():
+    if _heartbeat_loop:
+        _heartbeat_loop.cancel()
+
 @app.get("/", response_class=HTMLResponse)
 async def get_frontend():
     """Serve the main frontend page"""
@@ -187,7 +541,7 @@ async def seed_companies(config: SeedingConfig, background_tasks: BackgroundTask
     task_id = str(uuid.uuid4())
     
     # Initialize task status
-    scraping_tasks[task_id] = ScrapingStatus(
+    status = ScrapingStatus(
         task_id=task_id,
         status="running", 
         progress=0,
@@ -197,7 +551,9 @@ async def seed_companies(config: SeedingConfig, background_tasks: BackgroundTask
     )
     
     # Start seeding task
-    background_tasks.add_task(run_seeding_task, task_id, config)
+    # The Apollo key is not persisted; a resumed task falls back to APOLLO_API_KEY
+    await _start_task(background_tasks, 'seeding', status, {'config': config.dict()},
+                      stored_params={'config': config.dict(exclude={'apollo_api_key'})})
     
     return {"task_id": task_id, "status": "seeding_started"}
 
@@ -213,7 +569,7 @@ async def start_scraping(config: ScrapingConfig, background_tasks: BackgroundTas
         companies_to_scrape = await load_seeded_companies_from_db(config.max_companies)
     
     # Initialize task status
-    scraping_tasks[task_id] = ScrapingStatus(
+    status = ScrapingStatus(
         task_id=task_id,
         status="running",
         progress=0,
@@ -223,25 +579,26 @@ async def start_scraping(config: ScrapingConfig, background_tasks: BackgroundTas
     )
     
     # Start background task
-    background_tasks.add_task(run_scraping_task, task_id, config, companies_to_scrape)
+    await _start_task(background_tasks, 'scraping', status, {'config': config.dict(), 'companies': companies_to_scrape})
     
     return {"task_id": task_id, "status": "started"}
 
 @app.get("/api/status/{task_id}")
 async def get_task_status(task_id: str):
     """Get status of a scraping task"""
-    if task_id not in scraping_tasks:
+    task = await _load_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return scraping_tasks[task_id]
+    return task
 
 @app.get("/api/download/{task_id}")
 async def download_csv(task_id: str):
     """Download the CSV file for a completed task"""
-    if task_id not in scraping_tasks:
+    task = await _load_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = scraping_tasks[task_id]
     if task.status != "completed" or not task.csv_file:
         raise HTTPException(status_code=400, detail="Task not completed or no CSV file available")
     
@@ -255,14 +612,28 @@ async def download_csv(task_id: str):
     )
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates"""
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, task_id: Optional[str] = None):
+    """WebSocket endpoint for real-time updates.
+
+    Follow tasks with /ws?task_id=... or {"action": "subscribe", "task_id": ...}
+    ({"action": "unsubscribe", ...} to stop); a socket that never subscribes
+    receives every task's messages.
+    """
+    await manager.connect(websocket, [task_id] if task_id else None)
     try:
         while True:
-            # Keep connection alive and handle incoming messages
             data = await websocket.receive_text()
-            # Echo back for now (could handle commands later)
+            try:
+                command = json.loads(data)
+            except ValueError:
+                command = None
+            if isinstance(command, dict) and command.get('action') in ('subscribe', 'unsubscribe') and command.get('task_id'):
+                if command['action'] == 'subscribe':
+                    manager.subscribe(websocket, command['task_id'])
+                else:
+                    manager.unsubscribe(websocket, command['task_id'])
+                continue
+            # Echo back anything else (could handle more commands later)
             await manager.send_personal_message(f"Message received: {data}", websocket)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -286,14 +657,17 @@ async def get_companies(
     search_term: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
+    include_details: bool = False,
     db: Session = Depends(get_db_session)
 ):
-    """Get companies with filtering and pagination"""
+    """Get companies with filtering and pagination (lead_scoring_data only with include_details)"""
     try:
         # Log incoming parameters
         logger.info(f"get_companies called with: search_term='{search_term}', limit={limit}, offset={offset}")
         
         query = db.query(Company)
+        if not include_details:
+            query = query.options(defer(Company.lead_scoring_data))
         
         # Apply filters
         if industry:
@@ -351,7 +725,7 @@ async def get_companies(
                 logger.info(f"Search term '{search_term}' found in {len(matching_companies)} out of {len(companies)} returned companies")
         
         return {
-            "companies": [company.to_dict() for company in companies],
+            "companies": [company.to_dict(include_details) for company in companies],
             "total": total_count,
             "limit": limit,
             "offset": offset
@@ -381,10 +755,12 @@ async def get_company(company_id: int, db: Session = Depends(get_db_session)):
 async def create_company(company_data: CompanyCreate, db: Session = Depends(get_db_session)):
     """Create a new company"""
     try:
-        # Check if company with domain already exists
-        existing = db.query(Company).filter(Company.domain == company_data.domain).first()
-        if existing:
+        # Check if company with this domain (or normalised name) already exists
+        existing = find_existing_companies(db, [company_data.name], [company_data.domain])
+        if existing.domain_keys:
             raise HTTPException(status_code=400, detail="Company with this domain already exists")
+        if existing.name_keys:
+            raise HTTPException(status_code=400, detail="Company with this name already exists")
         
         # Create new company
         company = Company(
@@ -402,6 +778,7 @@ async def create_company(company_data: CompanyCreate, db: Session = Depends(get_
         db.add(company)
         db.commit()
         db.refresh(company)
+        invalidate_leadgen_stats()
         
         logger.info(f"Created company: {company.name} ({company.domain})")
         return company.to_dict()
@@ -432,6 +809,7 @@ async def update_company(
         
         db.commit()
         db.refresh(company)
+        invalidate_leadgen_stats()
         
         logger.info(f"Updated company: {company.name} ({company.domain})")
         return company.to_dict()
@@ -454,6 +832,7 @@ async def delete_company(company_id: int, db: Session = Depends(get_db_session))
         # Soft delete by marking as inactive
         company.is_active = False
         db.commit()
+        invalidate_leadgen_stats()
         
         logger.info(f"Soft deleted company: {company.name} ({company.domain})")
         return {"message": "Company marked as inactive", "company_id": company_id}
@@ -483,6 +862,7 @@ async def delete_companies_batch(payload: CompanyIdBatch, db: Session = Depends(
             db.delete(company)
             deleted += 1
         db.commit()
+        invalidate_leadgen_stats()
         return {"deleted_companies": deleted, "requested": len(payload.company_ids), "company_ids": payload.company_ids}
     except HTTPException:
         raise
@@ -491,6 +871,21 @@ async def delete_companies_batch(payload: CompanyIdBatch, db: Session = Depends(
         logger.error(f"Error deleting companies batch: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to delete companies: {str(e)}")
 
+@app.post("/api/companies/resolve-duplicates")
+async def resolve_duplicate_companies(dry_run: bool = True):
+    """Find near-duplicate companies (blocking + fuzzy matching) and, unless dry_run, merge them."""
+    def resolve():
+        with get_db_session() as db:
+            result = resolve_leadgen_companies(db, dry_run=dry_run)
+        if result['merged']:
+            invalidate_leadgen_stats()
+        return result
+    try:
+        return await asyncio.to_thread(resolve)
+    except Exception as e:
+        logger.error(f"Error resolving duplicate companies: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to resolve duplicates: {str(e)}")
+
 @app.get("/api/companies/{company_id}/jobs")
 async def get_company_jobs(company_id: int, db: Session = Depends(get_db_session)):
     """Get all job postings for a specific company"""
@@ -541,54 +936,10 @@ async def get_company_logs(company_id: int, db: Session = Depends(get_db_session
         raise HTTPException(status_code=500, detail=f"Failed to fetch logs: {str(e)}")
 
 @app.get("/api/stats")
-async def get_database_stats(db: Session = Depends(get_db_session)):
-    """Get database statistics and summary"""
+async def get_database_stats():
+    """Get database statistics and summary (two table scans, cached briefly)"""
     try:
-        from sqlalchemy import func
-        
-        # Company stats
-        total_companies = db.query(Company).count()
-        active_companies = db.query(Company).filter(Company.is_active == True).count()
-        scraped_companies = db.query(Company).filter(Company.ats_scraped == True).count()
-        qualified_leads = db.query(Company).filter(Company.is_qualified_lead == True).count()
-        
-        # Job posting stats
-        total_jobs = db.query(JobPosting).count()
-        support_jobs = db.query(JobPosting).filter(JobPosting.role_category == 'support').count()
-        sales_jobs = db.query(JobPosting).filter(JobPosting.role_category == 'sales').count()
-        ai_jobs = db.query(JobPosting).filter(JobPosting.role_category == 'ai').count()
-        
-        # Source breakdown
-        source_counts = db.query(
-            Company.source,
-            func.count(Company.id)
-        ).group_by(Company.source).all()
-        
-        # Industry breakdown (top 10)
-        industry_counts = db.query(
-            Company.industry,
-            func.count(Company.id)
-        ).filter(Company.industry.isnot(None)).group_by(
-            Company.industry
-        ).order_by(func.count(Company.id).desc()).limit(10).all()
-        
-        return {
-            "companies": {
-                "total": total_companies,
-                "active": active_companies,
-                "scraped": scraped_companies,
-                "qualified_leads": qualified_leads
-            },
-            "jobs": {
-                "total": total_jobs,
-                "support": support_jobs,
-                "sales": sales_jobs,
-                "ai": ai_jobs
-            },
-            "sources": {source: count for source, count in source_counts},
-            "top_industries": {industry: count for industry, count in industry_counts}
-        }
-        
+        return await asyncio.to_thread(leadgen_stats.get, get_db_session)
     except Exception as e:
         logger.error(f"Error fetching stats: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
@@ -608,7 +959,7 @@ async def enrich_single_company(company_id: int, background_tasks: BackgroundTas
         task_id = str(uuid.uuid4())
         
         # Initialize task status
-        scraping_tasks[task_id] = ScrapingStatus(
+        status = ScrapingStatus(
             task_id=task_id,
             status="running",
             progress=0,
@@ -619,7 +970,7 @@ async def enrich_single_company(company_id: int, background_tasks: BackgroundTas
         )
         
         # Start enrichment task
-        background_tasks.add_task(run_enrichment_task, task_id, [company_id])
+        await _start_task(background_tasks, 'enrichment', status, {'company_ids': [company_id]})
         
         return {
             "task_id": task_id,
@@ -656,7 +1007,7 @@ async def enrich_companies_batch(
         task_id = str(uuid.uuid4())
         
         # Initialize task status
-        scraping_tasks[task_id] = ScrapingStatus(
+        status = ScrapingStatus(
             task_id=task_id,
             status="running",
             progress=0,
@@ -666,12 +1017,10 @@ async def enrich_companies_batch(
         )
         
         # Start batch enrichment task
-        background_tasks.add_task(
-            run_enrichment_task, 
-            task_id, 
-            request.company_ids, 
-            request.max_concurrent
-        )
+        await _start_task(background_tasks, 'enrichment', status, {
+            'company_ids': request.company_ids,
+            'max_concurrent': request.max_concurrent
+        })
         
         return {
             "task_id": task_id,
@@ -689,9 +1038,10 @@ async def enrich_companies_batch(
 async def enrich_missing_domains(
     limit: Optional[int] = 10,
     background_tasks: BackgroundTasks = None,
+    batch: bool = False,
     db: Session = Depends(get_db_session)
 ):
-    """Enrich companies that don't have domains"""
+    """Enrich companies that don't have domains (batch=true: one offline batch job)"""
     try:
         # Find companies without domains
         companies = db.query(Company).filter(
@@ -711,7 +1061,7 @@ async def enrich_missing_domains(
         task_id = str(uuid.uuid4())
         
         # Initialize task status
-        scraping_tasks[task_id] = ScrapingStatus(
+        status = ScrapingStatus(
             task_id=task_id,
             status="running",
             progress=0,
@@ -721,7 +1071,11 @@ async def enrich_missing_domains(
         )
         
         # Start enrichment task
-        background_tasks.add_task(run_enrichment_task, task_id, company_ids, 2)  # Lower concurrency
+        if batch:
+            await _start_task(background_tasks, 'batch_enrichment', status, {'company_ids': company_ids})
+        else:
+            # Lower concurrency
+            await _start_task(background_tasks, 'enrichment', status, {'company_ids': company_ids, 'max_concurrent': 2})
         
         return {
             "task_id": task_id,
@@ -734,8 +1088,9 @@ async def enrich_missing_domains(
         logger.error(f"Error starting missing domains enrichment: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to start enrichment: {str(e)}")
 
-async def run_enrichment_task(task_id: str, company_ids: List[int], max_concurrent: int = 3):
-    """Background task to run company enrichment"""
+async def run_enrichment_task(task_id: str, company_ids: List[int], max_concurrent: int = 3,
+                              checkpoint: Optional[dict] = None):
+    """Background task to run company enrichment (checkpoint: progress of an earlier attempt)"""
     try:
         logger.info(f"Starting enrichment task {task_id} for companies: {company_ids}")
         
@@ -757,62 +1112,44 @@ async def run_enrichment_task(task_id: str, company_ids: List[int], max_concurre
         }))
         logger.info(f"Sent start broadcast for task {task_id}")
         
-        successful_enrichments = 0
+        # Blocking enrichments run on a pool owned by this task so they neither block the
+        # event loop nor tie up the default executor; the shared OpenAI rate limiter adapts
+        # the effective concurrency to 429s
+        workers = max(1, min(max_concurrent or 1, enricher.rate_limiter.max_concurrency))
+        progress = CoalescedProgress(task_id, len(company_ids), "enrichment_progress")
+        loop = asyncio.get_running_loop()
         
-        for i, company_id in enumerate(company_ids):
+        # Companies finished by an earlier attempt are not enriched again
+        done = set((checkpoint or {}).get('done', []))
+        progress.done = len(done)
+        progress.successful = (checkpoint or {}).get('successful', 0)
+        task_checkpoints[task_id] = {'done': done, 'successful': progress.successful}
+        
+        async def enrich_one(company_id: int):
             try:
-                logger.info(f"Task {task_id}: Processing company {i+1}/{len(company_ids)} (ID: {company_id})")
-                
-                # Update progress
-                task.progress = i
-                task.current_company = f"Company ID {company_id}"
-                
-                # Broadcast progress
-                await manager.broadcast(json.dumps({
-                    "task_id": task_id,
-                    "type": "progress",
-                    "progress": i,
-                    "total": len(company_ids),
-                    "current_company": f"Enriching company {company_id}"
-                }))
-                logger.info(f"Task {task_id}: Sent progress broadcast for company {company_id}")
-                
-                # Enrich company
-                logger.info(f"Task {task_id}: Starting enrichment for company {company_id}")
-                result = enricher.enrich_company_by_id(company_id)
-                logger.info(f"Task {task_id}: Enrichment result for company {company_id}: {result}")
-                
-                if 'error' not in result:
-                    successful_enrichments += 1
-                    await manager.broadcast(json.dumps({
-                        "task_id": task_id,
-                        "type": "enrichment_success",
-                        "message": f"Successfully enriched company {company_id}",
-                        "company_id": company_id
-                    }))
-                    logger.info(f"Task {task_id}: Successfully enriched company {company_id}")
-                else:
-                    error_msg = result.get('error', 'Unknown error')
-                    logger.error(f"Task {task_id}: Failed to enrich company {company_id}: {error_msg}")
-                    await manager.broadcast(json.dumps({
-                        "task_id": task_id,
-                        "type": "enrichment_error",
-                        "message": f"Failed to enrich company {company_id}: {error_msg}",
-                        "company_id": company_id
-                    }))
-                
-                # Rate limiting delay
-                logger.info(f"Task {task_id}: Rate limiting delay (2 seconds)")
-                await asyncio.sleep(2)
-                
+                result = await loop.run_in_executor(pool, enricher.enrich_company_by_id, company_id)
+                error = result.get('error')
+                if error:
+                    logger.error(f"Task {task_id}: Failed to enrich company {company_id}: {error}")
             except Exception as e:
                 logger.error(f"Task {task_id}: Exception enriching company {company_id}: {e}", exc_info=True)
-                await manager.broadcast(json.dumps({
-                    "task_id": task_id,
-                    "type": "enrichment_error",
-                    "message": f"Error enriching company {company_id}: {str(e)}",
-                    "company_id": company_id
-                }))
+                error = str(e)
+            await progress.record(company_id, error)
+            done.add(company_id)
+            task_checkpoints[task_id]['successful'] = progress.successful
+            task.progress = progress.done
+            task.leads_found = progress.successful
+        
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"enrich-{task_id[:8]}")
+        try:
+            await asyncio.gather(*(enrich_one(company_id) for company_id in company_ids if company_id not in done))
+        finally:
+            # A stopped task must not wait for (or start) the queued enrichments, nor report
+            # progress after its 'stopped' message
+            pool.shutdown(wait=False, cancel_futures=True)
+            progress.cancel()
+        await progress.close()
+        successful_enrichments = progress.successful
         
         # Update task completion
         logger.info(f"Task {task_id}: Completing task. Success: {successful_enrichments}/{len(company_ids)}")
@@ -847,6 +1184,41 @@ async def run_enrichment_task(task_id: str, company_ids: List[int], max_concurre
         await manager.broadcast(json.dumps(error_message))
         logger.error(f"Task {task_id}: Sent error broadcast: {error_message}")
 
+async def run_batch_enrichment_task(task_id: str, company_ids: List[int]):
+    """Background task enriching companies through one offline batch job"""
+    task = scraping_tasks[task_id]
+    try:
+        await manager.broadcast(json.dumps({
+            "task_id": task_id,
+            "type": "status",
+            "message": f"Submitting batch enrichment job for {len(company_ids)} companies..."
+        }))
+        enricher = OpenAICompanyEnricher()
+        # Polling the provider blocks for the lifetime of the job
+        results = await asyncio.to_thread(enricher.enrich_companies_via_batch, company_ids)
+        successful = sum(1 for result in results.values() if 'error' not in result)
+        
+        task.status = "completed"
+        task.progress = len(company_ids)
+        task.completed_at = datetime.now()
+        task.leads_found = successful
+        await manager.broadcast(json.dumps({
+            "task_id": task_id,
+            "type": "completed",
+            "message": f"Batch enrichment completed! Successfully enriched {successful}/{len(company_ids)} companies.",
+            "successful": successful,
+            "total": len(company_ids)
+        }))
+    except Exception as e:
+        logger.error(f"Task {task_id}: Batch enrichment failed: {e}", exc_info=True)
+        task.status = "failed"
+        task.completed_at = datetime.now()
+        await manager.broadcast(json.dumps({
+            "task_id": task_id,
+            "type": "error",
+            "message": f"Batch enrichment failed: {str(e)}"
+        }))
+
 # Tenant Creation API endpoints
 
 @app.post("/api/companies/{company_id}/create-tenant")
@@ -945,13 +1317,21 @@ async def update_config(config: ConfigUpdateRequest):
 
 # Lead Scoring API endpoints
 
+def _validate_scoring_mode(mode: Optional[str]):
+    """Reject unknown ?mode= values (per_signal | consolidated) before a task is started"""
+    if mode is not None and mode not in SCORING_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring mode '{mode}'. Use one of: {', '.join(SCORING_MODES)}")
+
 @app.post("/api/companies/{company_id}/score")
 async def score_single_company(
     company_id: int, 
     background_tasks: BackgroundTasks, 
+    mode: Optional[str] = None,
+    force: bool = False,
     db: Session = Depends(get_db_session)
 ):
-    """Score a single company using advanced lead scoring system"""
+    """Score a single company using advanced lead scoring system (force=true: rerun unchanged phases too)"""
+    _validate_scoring_mode(mode)
     try:
         # Check if company exists
         company = db.query(Company).filter(Company.id == company_id).first()
@@ -965,7 +1345,7 @@ async def score_single_company(
         task_id = str(uuid.uuid4())
         
         # Initialize task status
-        scraping_tasks[task_id] = ScrapingStatus(
+        status = ScrapingStatus(
             task_id=task_id,
             status="running",
             progress=0,
@@ -976,7 +1356,7 @@ async def score_single_company(
         )
         
         # Start lead scoring task
-        background_tasks.add_task(run_lead_scoring_task, task_id, [company_id])
+        await _start_task(background_tasks, 'lead_scoring', status, {'company_ids': [company_id], 'mode': mode, 'force': force})
         
         return {
             "task_id": task_id,
@@ -994,9 +1374,12 @@ async def score_single_company(
 async def score_companies_batch(
     company_ids: List[int],
     background_tasks: BackgroundTasks,
+    mode: Optional[str] = None,
+    force: bool = False,
     db: Session = Depends(get_db_session)
 ):
-    """Score multiple companies using advanced lead scoring"""
+    """Score multiple companies using advanced lead scoring (force=true: rerun unchanged phases too)"""
+    _validate_scoring_mode(mode)
     try:
         # Validate company IDs exist
         companies = db.query(Company).filter(Company.id.in_(company_ids)).all()
@@ -1013,7 +1396,7 @@ async def score_companies_batch(
         task_id = str(uuid.uuid4())
         
         # Initialize task status
-        scraping_tasks[task_id] = ScrapingStatus(
+        status = ScrapingStatus(
             task_id=task_id,
             status="running",
             progress=0,
@@ -1023,7 +1406,7 @@ async def score_companies_batch(
         )
         
         # Start batch lead scoring task
-        background_tasks.add_task(run_lead_scoring_task, task_id, company_ids)
+        await _start_task(background_tasks, 'lead_scoring', status, {'company_ids': company_ids, 'mode': mode, 'force': force})
         
         return {
             "task_id": task_id,
@@ -1041,9 +1424,12 @@ async def score_companies_batch(
 async def score_unscored_companies(
     limit: Optional[int] = 20,
     background_tasks: BackgroundTasks = None,
+    mode: Optional[str] = None,
+    batch: bool = False,
     db: Session = Depends(get_db_session)
 ):
-    """Score companies that haven't been scored yet"""
+    """Score companies that haven't been scored yet (batch=true: one offline batch job for the LLM calls)"""
+    _validate_scoring_mode(mode)
     try:
         # Find companies without lead scores
         companies = db.query(Company).filter(
@@ -1065,7 +1451,7 @@ async def score_unscored_companies(
         task_id = str(uuid.uuid4())
         
         # Initialize task status
-        scraping_tasks[task_id] = ScrapingStatus(
+        status = ScrapingStatus(
             task_id=task_id,
             status="running",
             progress=0,
@@ -1075,12 +1461,13 @@ async def score_unscored_companies(
         )
         
         # Start scoring task
-        background_tasks.add_task(run_lead_scoring_task, task_id, company_ids)
+        kind = 'batch_scoring' if batch else 'lead_scoring'
+        await _start_task(background_tasks, kind, status, {'company_ids': company_ids, 'mode': mode})
         
         return {
             "task_id": task_id,
             "status": "started",
-            "message": f"Lead scoring started for {len(company_ids)} unscored companies",
+            "message": f"Lead scoring {'batch job ' if batch else ''}started for {len(company_ids)} unscored companies",
             "companies": [{"id": c.id, "name": c.name} for c in companies]
         }
         
@@ -1088,15 +1475,73 @@ async def score_unscored_companies(
         logger.error(f"Error starting unscored companies scoring: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to start scoring: {str(e)}")
 
+@app.post("/api/companies/rescore")
+async def rescore_companies(
+    limit: Optional[int] = 100,
+    background_tasks: BackgroundTasks = None,
+    mode: Optional[str] = None,
+    batch: bool = False,
+    force: bool = False,
+    db: Session = Depends(get_db_session)
+):
+    """Rescore scored companies, least recently scored first (e.g. nightly).
+
+    Phases whose input is unchanged reuse their stored result, so only stale
+    phases cost LLM calls; force=true reruns every phase.
+    """
+    _validate_scoring_mode(mode)
+    try:
+        companies = db.query(Company).filter(
+            Company.lead_scored_at.isnot(None),
+            Company.is_active == True,
+            Company.domain.isnot(None),
+            Company.domain != ''
+        ).order_by(Company.lead_scored_at.asc()).limit(limit).all()
+        
+        if not companies:
+            return {
+                "message": "No scored companies found",
+                "count": 0
+            }
+        
+        company_ids = [c.id for c in companies]
+        task_id = str(uuid.uuid4())
+        status = ScrapingStatus(
+            task_id=task_id,
+            status="running",
+            progress=0,
+            total=len(company_ids),
+            leads_found=0,
+            started_at=datetime.now()
+        )
+        
+        kind = 'batch_scoring' if batch else 'lead_scoring'
+        await _start_task(background_tasks, kind, status, {'company_ids': company_ids, 'mode': mode, 'force': force})
+        
+        return {
+            "task_id": task_id,
+            "status": "started",
+            "message": f"{'Full' if force else 'Incremental'} rescoring started for {len(company_ids)} companies",
+            "count": len(company_ids)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error starting rescoring: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to start rescoring: {str(e)}")
+
 @app.get("/api/companies/top-leads")
 async def get_top_leads(
     limit: Optional[int] = 50,
     min_score: Optional[int] = 200,
+    include_details: bool = False,
     db: Session = Depends(get_db_session)
 ):
-    """Get top-scoring leads with filtering"""
+    """Get top-scoring leads with filtering (lead_scoring_data only with include_details)"""
     try:
-        query = db.query(Company).filter(
+        query = db.query(Company)
+        if not include_details:
+            query = query.options(defer(Company.lead_scoring_data))
+        query = query.filter(
             Company.is_active == True,
             Company.lead_scored_at.isnot(None)
         )
@@ -1107,7 +1552,7 @@ async def get_top_leads(
         companies = query.order_by(Company.lead_score.desc()).limit(limit).all()
         
         return {
-            "companies": [company.to_dict() for company in companies],
+            "companies": [company.to_dict(include_details) for company in companies],
             "total": len(companies),
             "filters_applied": {
                 "min_score": min_score,
@@ -1119,8 +1564,9 @@ async def get_top_leads(
         logger.error(f"Error fetching top leads: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch top leads: {str(e)}")
 
-async def run_lead_scoring_task(task_id: str, company_ids: List[int]):
-    """Background task to run lead scoring"""
+async def run_lead_scoring_task(task_id: str, company_ids: List[int], mode: Optional[str] = None,
+                                checkpoint: Optional[dict] = None, force: bool = False):
+    """Background task to run lead scoring (mode: per_signal | consolidated, default LEAD_SCORING_MODE)"""
     try:
         logger.info(f"Starting lead scoring task {task_id} for companies: {company_ids}")
         
@@ -1133,9 +1579,14 @@ async def run_lead_scoring_task(task_id: str, company_ids: List[int]):
             "message": f"Starting lead scoring for {len(company_ids)} companies..."
         }))
         
-        successful_scores = 0
+        # Companies handled by an earlier attempt are skipped
+        done = set((checkpoint or {}).get('done', []))
+        successful_scores = (checkpoint or {}).get('successful', 0)
+        task_checkpoints[task_id] = {'done': done, 'successful': successful_scores}
         
         for i, company_id in enumerate(company_ids):
+            if company_id in done:
+                continue
             try:
                 logger.info(f"Task {task_id}: Scoring company {i+1}/{len(company_ids)} (ID: {company_id})")
                 # Domain requirement check
@@ -1184,19 +1635,22 @@ async def run_lead_scoring_task(task_id: str, company_ids: List[int]):
                     except Exception as e:
                         logger.warning(f"Failed broadcasting phase {phase_key}: {e}")
 
-                score = await score_company_by_id(company_id, phase_callback)
+                score = await score_company_by_id(company_id, phase_callback, mode=mode, force=force)
                 
                 # Save to database
                 save_lead_score_to_db(score)
                 
                 successful_scores += 1
+                done.add(company_id)
+                task_checkpoints[task_id]['successful'] = successful_scores
                 
                 await manager.broadcast(json.dumps({
                     "task_id": task_id,
                     "type": "lead_found",
                     "message": f"Company {company_id} scored: {score.overall_score}/400",
                     "company_id": company_id,
-                    "score": score.overall_score
+                    "score": score.overall_score,
+                    "phases_reused": (score.run_stats or {}).get('phases_reused', 0)
                 }))
                 
                 logger.info(f"Task {task_id}: Successfully scored company {company_id} - {score.overall_score}/400")
@@ -1206,6 +1660,7 @@ async def run_lead_scoring_task(task_id: str, company_ids: List[int]):
                 
             except Exception as e:
                 logger.error(f"Task {task_id}: Exception scoring company {company_id}: {e}", exc_info=True)
+                done.add(company_id)
                 await manager.broadcast(json.dumps({
                     "task_id": task_id,
                     "type": "error",
@@ -1241,6 +1696,41 @@ async def run_lead_scoring_task(task_id: str, company_ids: List[int]):
             "message": f"Lead scoring failed: {str(e)}"
         }))
 
+async def run_batch_scoring_task(task_id: str, company_ids: List[int], mode: Optional[str] = None,
+                                 force: bool = False):
+    """Background task scoring companies with all LLM calls in one offline batch job"""
+    task = scraping_tasks[task_id]
+    try:
+        await manager.broadcast(json.dumps({
+            "task_id": task_id,
+            "type": "status",
+            "message": f"Collecting evidence and submitting a batch scoring job for {len(company_ids)} companies..."
+        }))
+        scores = await score_companies_via_batch(company_ids, mode=mode, force=force)
+        for score in scores:
+            save_lead_score_to_db(score)
+        
+        task.status = "completed"
+        task.progress = len(company_ids)
+        task.completed_at = datetime.now()
+        task.leads_found = len(scores)
+        await manager.broadcast(json.dumps({
+            "task_id": task_id,
+            "type": "completed",
+            "message": f"Batch lead scoring completed! Scored {len(scores)}/{len(company_ids)} companies.",
+            "successful": len(scores),
+            "total": len(company_ids)
+        }))
+    except Exception as e:
+        logger.error(f"Task {task_id}: Batch lead scoring failed: {e}", exc_info=True)
+        task.status = "failed"
+        task.completed_at = datetime.now()
+        await manager.broadcast(json.dumps({
+            "task_id": task_id,
+            "type": "error",
+            "message": f"Batch lead scoring failed: {str(e)}"
+        }))
+
 def load_seeded_companies(max_companies: int = None) -> List[str]:
     """Load seeded companies from CSV file"""
     companies = []
@@ -1356,12 +1846,8 @@ async def run_seeding_task(task_id: str, config: SeedingConfig):
                 "message": f"Added {len(yc_companies)} Y Combinator companies"
             }))
         
-        # Remove duplicates
-        unique_companies = {}
-        for company in all_companies:
-            if company.domain not in unique_companies:
-                unique_companies[company.domain] = company
-        all_companies = list(unique_companies.values())
+        # Remove duplicates (fuzzy entity resolution across sources)
+        all_companies = dedupe_profiles(all_companies)
         
         # Apply filters
         filtered_companies = seeder.filter_companies(
@@ -1371,31 +1857,22 @@ async def run_seeding_task(task_id: str, config: SeedingConfig):
             exclude_industries=['AI/ML', 'Machine Learning'] if config.exclude_ai_companies else []
         )
         
-        # Save to database
-        db = next(get_db_session())
+        # Save to database: one bulk existence check + INSERT ... ON CONFLICT
         try:
-            companies_saved = 0
-            for company_profile in filtered_companies:
-                # Check if company already exists
-                existing = db.query(Company).filter(Company.domain == company_profile.domain).first()
-                if not existing:
-                    # Create new company
-                    company = Company(
-                        name=company_profile.name,
-                        domain=company_profile.domain,
-                        industry=company_profile.industry,
-                        employee_count=company_profile.employee_count,
-                        location=company_profile.location,
-                        founded_year=company_profile.founded_year,
-                        technology_stack=company_profile.technology_stack or [],
-                        linkedin_url=company_profile.linkedin_url,
-                        source=company_profile.source,
-                        is_active=True
-                    )
-                    db.add(company)
-                    companies_saved += 1
-            
-            db.commit()
+            with get_db_session() as db:
+                result = insert_companies(db, [{
+                    'name': company_profile.name,
+                    'domain': company_profile.domain,
+                    'industry': company_profile.industry,
+                    'employee_count': company_profile.employee_count,
+                    'location': company_profile.location,
+                    'founded_year': company_profile.founded_year,
+                    'technology_stack': company_profile.technology_stack or [],
+                    'linkedin_url': company_profile.linkedin_url,
+                    'source': company_profile.source
+                } for company_profile in filtered_companies], reactivate=False)
+            companies_saved = len(result.inserted)
+            invalidate_leadgen_stats()
             
             # Update task completion
             task.status = "completed"
@@ -1412,11 +1889,8 @@ async def run_seeding_task(task_id: str, config: SeedingConfig):
             }))
             
         except Exception as db_error:
-            db.rollback()
             logger.error(f"Database error during seeding: {db_error}")
             raise db_error
-        finally:
-            db.close()
         
 
         
@@ -1432,11 +1906,17 @@ async def run_seeding_task(task_id: str, config: SeedingConfig):
             "message": f"Seeding failed: {str(e)}"
         }))
 
-async def run_scraping_task(task_id: str, config: ScrapingConfig, companies_to_scrape: List[str] = None):
-    """Background task to run the scraping process"""
+async def run_scraping_task(task_id: str, config: ScrapingConfig, companies_to_scrape: List[str] = None,
+                            checkpoint: Optional[dict] = None):
+    """Background task to run the scraping process (checkpoint: boards and leads of an earlier attempt)"""
+    scraper = ATSScraper()
+    pending = []
     try:
-        scraper = ATSScraper()
-        all_leads = []
+        # Boards scraped by an earlier attempt are not fetched again
+        done = set((checkpoint or {}).get('done', []))
+        all_leads = [CompanyLead(**lead) for lead in (checkpoint or {}).get('leads', [])]
+        saved_leads = [asdict(lead) for lead in all_leads]
+        task_checkpoints[task_id] = {'done': done, 'leads': saved_leads}
         
         # Update task status
         task = scraping_tasks[task_id]
@@ -1453,20 +1933,7 @@ async def run_scraping_task(task_id: str, config: ScrapingConfig, companies_to_s
             
         companies_to_scrape = companies_to_scrape[:config.max_companies] if config.max_companies else companies_to_scrape
         
-        for i, company in enumerate(companies_to_scrape):
-            # Update progress
-            task.progress = i
-            task.current_company = company
-            
-            # Broadcast progress update
-            await manager.broadcast(json.dumps({
-                "task_id": task_id,
-                "type": "progress",
-                "progress": i,
-                "total": len(companies_to_scrape),
-                "current_company": company
-            }))
-            
+        async def scrape_company(company: str):
             jobs = []
             
             # Try Greenhouse if enabled
@@ -1477,14 +1944,13 @@ async def run_scraping_task(task_id: str, config: ScrapingConfig, companies_to_s
                         "type": "log",
                         "message": f"Scraping Greenhouse for {company}..."
                     }))
-                    gh_jobs = scraper.scrape_greenhouse_board(company)
-                    jobs.extend(gh_jobs)
-                    await asyncio.sleep(1)  # Rate limiting
+                    jobs.extend(await scraper.scrape_greenhouse_board(company))
                 except Exception as e:
                     await manager.broadcast(json.dumps({
                         "task_id": task_id,
                         "type": "error",
-                        "message": f"Greenhouse error for {company}: {str(e)}"
+                        "message": f"Greenhouse error for {company}: {str(e)}",
+                        "company": company
                     }))
             
             # Try Lever if enabled
@@ -1495,21 +1961,41 @@ async def run_scraping_task(task_id: str, config: ScrapingConfig, companies_to_s
                         "type": "log",
                         "message": f"Scraping Lever for {company}..."
                     }))
-                    lever_jobs = scraper.scrape_lever_board(company)
-                    jobs.extend(lever_jobs)
-                    await asyncio.sleep(1)  # Rate limiting
+                    jobs.extend(await scraper.scrape_lever_board(company))
                 except Exception as e:
                     await manager.broadcast(json.dumps({
                         "task_id": task_id,
                         "type": "error",
-                        "message": f"Lever error for {company}: {str(e)}"
+                        "message": f"Lever error for {company}: {str(e)}",
+                        "company": company
                     }))
+            return company, jobs
+        
+        # All boards are fetched concurrently; the scraper's HTTP client paces requests per host
+        pending = [asyncio.create_task(scrape_company(company))
+                   for company in companies_to_scrape if company not in done]
+        for i, finished in enumerate(asyncio.as_completed(pending), start=len(done)):
+            company, jobs = await finished
+            
+            # Update progress
+            task.progress = i + 1
+            task.current_company = company
+            
+            # Broadcast progress update
+            await manager.broadcast(json.dumps({
+                "task_id": task_id,
+                "type": "progress",
+                "progress": i + 1,
+                "total": len(companies_to_scrape),
+                "current_company": company
+            }))
             
             # Analyze jobs if found
             if jobs:
                 lead = scraper.analyze_company_jobs(jobs)
                 if lead and lead.support_roles >= config.min_support_roles and lead.ai_roles <= config.max_ai_roles:
                     all_leads.append(lead)
+                    saved_leads.append(asdict(lead))
                     task.leads_found = len(all_leads)
                     
                     await manager.broadcast(json.dumps({
@@ -1518,6 +2004,7 @@ async def run_scraping_task(task_id: str, config: ScrapingConfig, companies_to_s
                         "message": f"Found qualified lead: {lead.company} ({lead.support_roles} support roles)",
                         "leads_found": len(all_leads)
                     }))
+            done.add(company)
         
         # Filter and sort leads
         qualified_leads = [lead for lead in all_leads 
@@ -1557,6 +2044,10 @@ async def run_scraping_task(task_id: str, config: ScrapingConfig, companies_to_s
             "type": "error",
             "message": f"Scraping failed: {str(e)}"
         }))
+    finally:
+        for board_task in pending:
+            board_task.cancel()
+        await scraper.aclose()
 
 # ==========================================
 # Lead Crawling Endpoints
@@ -1568,7 +2059,7 @@ async def start_crawling(config: CrawlingConfig, background_tasks: BackgroundTas
     task_id = str(uuid.uuid4())
     
     # Initialize task status
-    scraping_tasks[task_id] = ScrapingStatus(
+    status = ScrapingStatus(
         task_id=task_id,
         status="running",
         progress=0,
@@ -1578,36 +2069,34 @@ async def start_crawling(config: CrawlingConfig, background_tasks: BackgroundTas
     )
     
     # Start crawling task
-    background_tasks.add_task(run_crawling_task, task_id, config)
+    await _start_task(background_tasks, 'crawling', status, {'config': config.dict()})
     
     return {"task_id": task_id, "status": "crawling_started"}
 
 @app.post("/api/stop-crawling/{task_id}")
 async def stop_crawling(task_id: str):
-    """Stop a running crawling task"""
-    if task_id in scraping_tasks:
-        task = scraping_tasks[task_id]
-        if task.status == "running":
-            task.status = "stopped"
-            task.completed_at = datetime.now()
-            
-            await manager.broadcast(json.dumps({
-                "task_id": task_id,
-                "type": "stopped",
-                "message": "Crawling stopped by user"
-            }))
-            
-            return {"status": "stopped"}
+    """Stop a running crawling task (on whichever worker runs it)"""
+    if await _stop_local_task(task_id, "Crawling stopped by user"):
+        return {"status": "stopped"}
+    
+    # Running elsewhere: the owner cancels it on its next heartbeat
+    if await asyncio.to_thread(task_registry.request_stop, task_id):
+        await manager.broadcast(json.dumps({
+            "task_id": task_id,
+            "type": "stopped",
+            "message": "Crawling stopped by user"
+        }))
+        return {"status": "stopped"}
     
     raise HTTPException(status_code=404, detail="Task not found or not running")
 
 @app.get("/api/download-crawling/{task_id}")
 async def download_crawling_results(task_id: str):
     """Download crawling results as CSV"""
-    if task_id not in scraping_tasks:
+    task = await _load_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = scraping_tasks[task_id]
     if task.status != "completed":
         raise HTTPException(status_code=400, detail="Task not completed")
     
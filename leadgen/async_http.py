@@ -0,0 +1,212 @@
+"""
+Asyncio HTTP layer for leadgen scraping.
+
+AsyncHttpClient wraps one pooled httpx.AsyncClient and adds, per host:
+
+- a concurrency cap (requests in flight at once),
+- a token bucket (sustained requests/second plus a burst allowance) instead of
+  fixed sleeps between calls; a 429/503 with Retry-After drains the bucket so
+  every coroutine for that host backs off together,
+- a process-wide negative cache for URLs/keys that returned 404, so candidate
+  slugs that do not exist are not probed again until the entry expires.
+
+Environment Variables:
+- LEADGEN_HTTP_MAX_CONNECTIONS: Pooled connections across all hosts (default: 100)
+- LEADGEN_HTTP_HOST_CONCURRENCY: Requests in flight per host (default: 8)
+- LEADGEN_HTTP_HOST_RATE: Sustained requests per second per host (default: 10)
+- LEADGEN_HTTP_HOST_BURST: Token bucket size per host (default: 20)
+- LEADGEN_HTTP_TIMEOUT_SECONDS: Request timeout (default: 10)
+- LEADGEN_HTTP_MAX_RETRIES: Retries after 429/503 or transport errors (default: 2)
+- LEADGEN_NEGATIVE_CACHE_TTL_SECONDS: How long a 404 is remembered (default: 86400)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv('LEADGEN_HTTP_MAX_CONNECTIONS', '100'))
+HOST_CONCURRENCY = max(1, int(os.getenv('LEADGEN_HTTP_HOST_CONCURRENCY', '8')))
+HOST_RATE = float(os.getenv('LEADGEN_HTTP_HOST_RATE', '10'))
+HOST_BURST = max(1, int(os.getenv('LEADGEN_HTTP_HOST_BURST', '20')))
+TIMEOUT_SECONDS = float(os.getenv('LEADGEN_HTTP_TIMEOUT_SECONDS', '10'))
+MAX_RETRIES = max(0, int(os.getenv('LEADGEN_HTTP_MAX_RETRIES', '2')))
+NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv('LEADGEN_NEGATIVE_CACHE_TTL_SECONDS', str(24 * 3600)))
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+# Backoff when a throttling response carries no usable Retry-After
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+
+
+class TokenBucket:
+    """Asyncio token bucket: `rate` tokens/second, holding at most `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Empty the bucket and hold refills for `seconds` (server asked us to slow down)"""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = min(self._tokens, 0.0)
+        self._updated = max(self._updated, now + seconds)
+
+
+class NegativeCache:
+    """Thread-safe set of keys with an expiry, used to remember 404s"""
+
+    def __init__(self, ttl_seconds: int = NEGATIVE_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str):
+        with self._lock:
+            self._expires[key] = time.monotonic() + self.ttl_seconds
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            expires = self._expires.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._expires[key]
+                return False
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._expires)
+
+
+# Shared by every client in the process; 404s stay valid across scraping tasks
+negative_cache = NegativeCache()
+
+
+def _retry_after(response: httpx.Response) -> float:
+    value = response.headers.get('retry-after')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+
+class AsyncHttpClient:
+    """Pooled async HTTP client with per-host concurrency and rate limits.
+
+    Create and use it inside one event loop; close it with `aclose()` or
+    `async with`.
+    """
+
+    def __init__(self, host_concurrency: int = HOST_CONCURRENCY, host_rate: float = HOST_RATE,
+                 host_burst: int = HOST_BURST, timeout: float = TIMEOUT_SECONDS,
+                 max_retries: int = MAX_RETRIES, negative: Optional[NegativeCache] = None):
+        self.host_concurrency = host_concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.max_retries = max_retries
+        self.negative = negative if negative is not None else negative_cache
+        self._client = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_CONNECTIONS),
+        )
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self.stats = {'requests': 0, 'not_found': 0, 'negative_hits': 0, 'throttled': 0, 'errors': 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _host_limits(self, host: str):
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.host_concurrency)
+            self._host_buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return self._host_slots[host], self._host_buckets[host]
+
+    async def request(self, method: str, url: str, negative_key: Optional[str] = None,
+                      **kwargs) -> Optional[httpx.Response]:
+        """Send a request through the host limits.
+
+        Returns None without a request when `negative_key` (default: the URL)
+        is in the negative cache; a 404 response adds it. Transport errors are
+        raised after the retries are used up.
+        """
+        key = negative_key or f"{method} {url}"
+        if key in self.negative:
+            self.stats['negative_hits'] += 1
+            return None
+
+        slot, bucket = self._host_limits(urlparse(url).hostname or '')
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            try:
+                async with slot:
+                    self.stats['requests'] += 1
+                    response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self.stats['errors'] += 1
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                logger.debug(f"Retrying {url} after {e!r} (attempt {attempt})")
+                await asyncio.sleep(min(2 ** attempt, 10))
+                continue
+
+            if response.status_code in (429, 503) and attempt < self.max_retries:
+                attempt += 1
+                self.stats['throttled'] += 1
+                delay = _retry_after(response)
+                bucket.pause(delay)
+                logger.info(f"Throttled by {urlparse(url).hostname}, backing off {delay:.1f}s")
+                continue
+
+            if response.status_code == 404:
+                self.stats['not_found'] += 1
+                self.negative.add(key)
+            return response
+
+    async def get(self, url: str, **kwargs) -> Optional[httpx.Response]:
+        return await self.request('GET', url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> Optional[httpx.Response]:
+        return await self.request('HEAD', url, **kwargs)
@@ -6,16 +6,19 @@ Scrapes public ATS job boards to find companies (50-100 employees)
 hiring for customer support roles - indicating growth and support pain points.
 """
 
-import requests
+import asyncio
 import json
 import csv
-import time
 import re
 from urllib.parse import urlparse
 from dataclasses import dataclass
 from typing import List, Dict, Optional
 import logging
 
+import httpx
+
+from .async_http import AsyncHttpClient
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -43,12 +46,27 @@ class CompanyLead:
     estimated_size: str
 
 class ATSScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+    def __init__(self, http: Optional[AsyncHttpClient] = None):
+        # Created on first use so constructing a scraper outside an event loop stays cheap
+        self._http = http
         self.companies_found = []
+
+    @property
+    def http(self) -> AsyncHttpClient:
+        if self._http is None:
+            self._http = AsyncHttpClient()
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
         
     def is_support_role(self, title: str, department: str = "") -> bool:
         """Check if job title indicates customer support role"""
@@ -111,7 +129,7 @@ class ATSScraper:
         except:
             return url_or_domain.lower()
 
-    def scrape_greenhouse_board(self, company_slug: str) -> List[JobPosting]:
+    async def scrape_greenhouse_board(self, company_slug: str) -> List[JobPosting]:
         """Scrape Greenhouse public job board"""
         jobs = []
         
@@ -124,7 +142,10 @@ class ATSScraper:
             
             for url in urls:
                 try:
-                    response = self.session.get(url, timeout=10)
+                    # Known 404s are cached per URL, so a missing embed board still tries the API
+                    response = await self.http.get(url)
+                    if response is None:
+                        continue
                     if response.status_code == 200:
                         data = response.json()
                         
@@ -145,7 +166,7 @@ class ATSScraper:
                                 ))
                         break
                         
-                except (requests.exceptions.RequestException, json.JSONDecodeError, KeyError) as e:
+                except (httpx.HTTPError, json.JSONDecodeError, KeyError) as e:
                     logger.debug(f"Failed to scrape {url}: {e}")
                     continue
                     
@@ -154,15 +175,15 @@ class ATSScraper:
             
         return jobs
 
-    def scrape_lever_board(self, company_slug: str) -> List[JobPosting]:
+    async def scrape_lever_board(self, company_slug: str) -> List[JobPosting]:
         """Scrape Lever public job board"""
         jobs = []
         
         try:
             url = f"https://api.lever.co/v0/postings/{company_slug}?mode=json"
-            response = self.session.get(url, timeout=10)
+            response = await self.http.get(url, negative_key=f"lever:{company_slug}")
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 data = response.json()
                 
                 for job in data:
@@ -182,33 +203,37 @@ class ATSScraper:
             
         return jobs
 
-    def discover_greenhouse_companies(self, sample_companies: List[str]) -> List[str]:
-        """Discover Greenhouse companies by trying common company name variations"""
-        found_companies = []
+    async def _find_greenhouse_slug(self, company: str) -> Optional[str]:
+        """First slug variation of a company name that has a Greenhouse board"""
+        # Try various slug formats, most likely first
+        slugs = [
+            company.lower().replace(' ', '-'),
+            company.lower().replace(' ', ''),
+            company.lower().replace('inc', '').replace('llc', '').strip().replace(' ', '-'),
+            ''.join(company.lower().split())
+        ]
         
-        for company in sample_companies:
-            # Try various slug formats
-            slugs = [
-                company.lower().replace(' ', '-'),
-                company.lower().replace(' ', ''),
-                company.lower().replace('inc', '').replace('llc', '').strip().replace(' ', '-'),
-                ''.join(company.lower().split())
-            ]
-            
-            for slug in set(slugs):  # Remove duplicates
-                try:
-                    url = f"https://boards.greenhouse.io/{slug}"
-                    response = self.session.head(url, timeout=5)
-                    if response.status_code == 200:
-                        found_companies.append(slug)
-                        logger.info(f"Found Greenhouse board: {slug}")
-                        break
-                except:
-                    continue
-                    
-                time.sleep(0.5)  # Rate limiting
-                
-        return found_companies
+        for slug in dict.fromkeys(slugs):  # Remove duplicates, keep order
+            try:
+                url = f"https://boards.greenhouse.io/{slug}"
+                response = await self.http.head(url)
+                if response is not None and response.status_code == 200:
+                    logger.info(f"Found Greenhouse board: {slug}")
+                    return slug
+            except httpx.HTTPError as e:
+                logger.debug(f"Greenhouse probe failed for {slug}: {e}")
+                continue
+        return None
+
+    async def discover_greenhouse_companies(self, sample_companies: List[str]) -> List[str]:
+        """Discover Greenhouse companies by trying common company name variations.
+
+        Companies are probed concurrently; the HTTP client's per-host limits
+        do the pacing and known-missing slugs are skipped via the 404 cache.
+        """
+        slugs = await asyncio.gather(*(self._find_greenhouse_slug(c) for c in sample_companies))
+        # Several names can map to one slug; keep input order
+        return list(dict.fromkeys(slug for slug in slugs if slug))
 
     def analyze_company_jobs(self, jobs: List[JobPosting]) -> CompanyLead:
         """Analyze jobs for a company and create lead profile"""
@@ -279,9 +304,11 @@ class ATSScraper:
                 
         logger.info(f"Saved {len(leads)} company leads to {filename}")
 
-def main():
-    scraper = ATSScraper()
-    
+async def main():
+    async with ATSScraper() as scraper:
+        await _run(scraper)
+
+async def _run(scraper: ATSScraper):
     # Sample companies to test with - mix of known growing companies
     sample_companies = [
         "stripe", "notion", "figma", "canva", "airtable", "zapier", 
@@ -296,35 +323,32 @@ def main():
     
     # Discover and scrape Greenhouse companies
     logger.info("Discovering Greenhouse companies...")
-    greenhouse_companies = scraper.discover_greenhouse_companies(sample_companies)
+    greenhouse_companies = await scraper.discover_greenhouse_companies(sample_companies)
     
-    for company_slug in greenhouse_companies[:10]:  # Limit for testing
-        logger.info(f"Scraping Greenhouse jobs for: {company_slug}")
-        jobs = scraper.scrape_greenhouse_board(company_slug)
-        
+    greenhouse_slugs = greenhouse_companies[:10]  # Limit for testing
+    logger.info(f"Scraping Greenhouse jobs for: {', '.join(greenhouse_slugs)}")
+    board_jobs = await asyncio.gather(*(scraper.scrape_greenhouse_board(slug) for slug in greenhouse_slugs))
+    
+    for jobs in board_jobs:
         if jobs:
             lead = scraper.analyze_company_jobs(jobs)
             if lead and (lead.support_roles > 0 or lead.sales_roles > 0):
                 all_leads.append(lead)
                 logger.info(f"Added lead: {lead.company} ({lead.support_roles} support, {lead.sales_roles} sales roles)")
-        
-        time.sleep(1)  # Rate limiting
     
     # Try some Lever companies
     logger.info("Scraping Lever companies...")
     lever_companies = sample_companies[:5]  # Try subset with Lever
     
-    for company_slug in lever_companies:
-        logger.info(f"Scraping Lever jobs for: {company_slug}")
-        jobs = scraper.scrape_lever_board(company_slug)
-        
+    logger.info(f"Scraping Lever jobs for: {', '.join(lever_companies)}")
+    board_jobs = await asyncio.gather(*(scraper.scrape_lever_board(slug) for slug in lever_companies))
+    
+    for jobs in board_jobs:
         if jobs:
             lead = scraper.analyze_company_jobs(jobs)
             if lead and (lead.support_roles > 0 or lead.sales_roles > 0):
                 all_leads.append(lead)
                 logger.info(f"Added lead: {lead.company} ({lead.support_roles} support, {lead.sales_roles} sales roles)")
-        
-        time.sleep(1)  # Rate limiting
     
     # Filter and sort leads
     qualified_leads = [lead for lead in all_leads 
@@ -341,4 +365,4 @@ def main():
         logger.info(f"  {lead.company}: {lead.support_roles} support, {lead.sales_roles} sales roles")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -15,10 +15,16 @@ from datetime import datetime
 from company_seeder import CompanySeeder, CompanyProfile
 from database import get_database_manager
 from models import Company, SeedingSession
+from app.services.leadgen_company_store import insert_companies
+from app.services.leadgen_entity_resolution import dedupe_profiles
+from app.services.leadgen_stats_service import invalidate_leadgen_stats
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Companies per bulk existence check + insert
+STORE_CHUNK_SIZE = 500
+
 class DatabaseSeeder:
     """Database-aware company seeder that stores results in PostgreSQL"""
     
@@ -98,18 +104,14 @@ class DatabaseSeeder:
             elif apollo_api_key and 'APOLLO_API_KEY' in os.environ:
                 del os.environ['APOLLO_API_KEY']
             
-            # Remove duplicates based on domain
-            unique_companies = {}
-            for company in all_companies:
-                if company.domain and company.domain not in unique_companies:
-                    unique_companies[company.domain] = company
-            all_companies = list(unique_companies.values())
+            # Remove duplicates: fuzzy entity resolution across sources, then drop companies without a domain
+            unique_companies = [company for company in dedupe_profiles(all_companies) if company.domain]
             
-            logger.info(f"Total unique companies after deduplication: {len(all_companies)}")
+            logger.info(f"Total unique companies after deduplication: {len(unique_companies)}")
             
             # Apply filters
             filtered_companies = self.company_seeder.filter_companies(
-                all_companies,
+                unique_companies,
                 min_employees=min_employees,
                 max_employees=max_employees,
                 exclude_industries=['AI/ML', 'Machine Learning', 'Data Science'] if exclude_ai_companies else []
@@ -202,52 +204,43 @@ class DatabaseSeeder:
                 session.commit()
     
     def _store_companies_in_database(self, companies: List[CompanyProfile]) -> int:
-        """Store CompanyProfile objects in the database"""
+        """Store CompanyProfile objects in the database.
+
+        Each chunk is one bulk existence check on name/domain keys plus one
+        INSERT ... ON CONFLICT, so the cost follows the batch size rather than
+        the table size. Existing inactive companies are reactivated.
+        """
         stored_count = 0
+        reactivated_count = 0
         
         with self.db_manager.session_scope() as session:
-            for company_profile in companies:
+            for start in range(0, len(companies), STORE_CHUNK_SIZE):
+                chunk = companies[start:start + STORE_CHUNK_SIZE]
                 try:
-                    # Check if company already exists by domain
-                    existing = session.query(Company).filter(
-                        Company.domain == company_profile.domain
-                    ).first()
-                    
-                    if existing:
-                        # Update existing company if needed
-                        if not existing.is_active:
-                            existing.is_active = True
-                            existing.updated_at = datetime.now()
-                            logger.debug(f"Reactivated existing company: {company_profile.name}")
-                        continue
-                    
-                    # Create new company record
-                    db_company = Company(
-                        name=company_profile.name,
-                        domain=company_profile.domain,
-                        industry=company_profile.industry,
-                        employee_count=company_profile.employee_count,
-                        location=company_profile.location,
-                        founded_year=company_profile.founded_year,
-                        technology_stack=company_profile.technology_stack or [],
-                        linkedin_url=company_profile.linkedin_url,
-                        source=company_profile.source
-                    )
-                    
-                    session.add(db_company)
-                    stored_count += 1
-                    
-                    if stored_count % 100 == 0:
-                        logger.info(f"Stored {stored_count} companies so far...")
-                        session.commit()  # Periodic commit for large batches
-                
+                    result = insert_companies(session, [{
+                        'name': profile.name,
+                        'domain': profile.domain,
+                        'industry': profile.industry,
+                        'employee_count': profile.employee_count,
+                        'location': profile.location,
+                        'founded_year': profile.founded_year,
+                        'technology_stack': profile.technology_stack or [],
+                        'linkedin_url': profile.linkedin_url,
+                        'source': profile.source
+                    } for profile in chunk])
+                    session.commit()  # Commit per chunk for large batches
                 except Exception as e:
-                    logger.error(f"Failed to store company {company_profile.name}: {e}")
+                    session.rollback()
+                    logger.error(f"Failed to store companies {start}-{start + len(chunk)}: {e}")
                     continue
-            
-            # Final commit
-            session.commit()
+                
+                stored_count += len(result.inserted)
+                reactivated_count += result.reactivated
+                logger.info(f"Stored {stored_count} companies so far...")
         
+        invalidate_leadgen_stats()
+        if reactivated_count:
+            logger.info(f"Reactivated {reactivated_count} existing companies")
         logger.info(f"Successfully stored {stored_count} new companies in database")
         return stored_count
     
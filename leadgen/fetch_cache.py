@@ -0,0 +1,335 @@
+"""
+Shared website fetch cache for leadgen.
+
+Lead scoring fetches the same pages (homepage, help/FAQ pages, sitemap.xml,
+sitemap_index.xml, robots.txt) for a domain on every run. WebsiteFetchCache
+keeps one row per URL in leadgen_fetch_cache with the status, headers and a
+zlib-compressed body, plus parsed extracts (e.g. the homepage summary built
+from BeautifulSoup) so a fresh entry needs neither a request nor a re-parse.
+
+- Fresh entries (younger than the TTL) are served without touching the network.
+- Stale entries are revalidated with If-None-Match / If-Modified-Since; a 304
+  only extends the entry's lifetime and keeps its parsed extracts.
+- If revalidation fails with a network error the stale copy is served.
+- Every real request goes through per-domain politeness limits (concurrent
+  requests per domain and minimum spacing between request starts), shared by
+  all engines in the process.
+
+Environment Variables:
+- LEADGEN_FETCH_CACHE_ENABLED: Use the cache (default: true)
+- LEADGEN_FETCH_CACHE_TTL_SECONDS: Lifetime of successful responses (default: 604800, 7 days)
+- LEADGEN_FETCH_CACHE_ERROR_TTL_SECONDS: Lifetime of 4xx/5xx responses (default: 21600, 6 hours)
+- LEADGEN_FETCH_CACHE_MAX_BODY_BYTES: Bodies are truncated to this size before storing (default: 1048576)
+- LEADGEN_FETCH_DOMAIN_CONCURRENCY: Concurrent requests per domain (default: 2)
+- LEADGEN_FETCH_DOMAIN_INTERVAL_SECONDS: Minimum gap between requests to one domain (default: 1.0)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+FETCH_CACHE_ENABLED = os.getenv('LEADGEN_FETCH_CACHE_ENABLED', 'true').lower() in ('true', '1', 'on')
+FETCH_CACHE_TTL_SECONDS = int(os.getenv('LEADGEN_FETCH_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+FETCH_CACHE_ERROR_TTL_SECONDS = int(os.getenv('LEADGEN_FETCH_CACHE_ERROR_TTL_SECONDS', str(6 * 3600)))
+FETCH_CACHE_MAX_BODY_BYTES = int(os.getenv('LEADGEN_FETCH_CACHE_MAX_BODY_BYTES', str(1024 * 1024)))
+DOMAIN_CONCURRENCY = max(1, int(os.getenv('LEADGEN_FETCH_DOMAIN_CONCURRENCY', '2')))
+DOMAIN_INTERVAL_SECONDS = float(os.getenv('LEADGEN_FETCH_DOMAIN_INTERVAL_SECONDS', '1.0'))
+
+USER_AGENT = ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# Response headers worth keeping (revalidation validators and decoding hints)
+_STORED_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control', 'content-language')
+
+
+def domain_key(url: str) -> str:
+    """Host of a URL, lower-cased and without a leading www."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+@dataclass
+class CachedResponse:
+    """The subset of requests.Response used by the analyzers, backed by the cache"""
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    final_url: str
+    fetched_at: datetime
+    content_sha256: str
+    extracts: Dict[str, Any] = field(default_factory=dict)
+    from_cache: bool = False
+    revalidated: bool = False
+
+    @property
+    def text(self) -> str:
+        content_type = self.headers.get('content-type', '')
+        charset = 'utf-8'
+        for part in content_type.split(';'):
+            part = part.strip()
+            if part.lower().startswith('charset='):
+                charset = part.split('=', 1)[1].strip('"\' ') or charset
+        try:
+            return self.content.decode(charset, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+class DomainPoliteness:
+    """Per-domain request limits shared by every thread in the process"""
+
+    def __init__(self, max_concurrency: int = DOMAIN_CONCURRENCY, min_interval: float = DOMAIN_INTERVAL_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, domain: str):
+        with self._lock:
+            semaphore = self._slots.setdefault(domain, threading.BoundedSemaphore(self.max_concurrency))
+        semaphore.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(domain, 0.0))
+                self._next_start[domain] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            semaphore.release()
+
+
+class WebsiteFetchCache:
+    """URL-keyed HTTP GET cache with TTL, conditional revalidation and politeness limits"""
+
+    def __init__(self, session: Optional[requests.Session] = None, politeness: Optional[DomainPoliteness] = None,
+                 enabled: bool = FETCH_CACHE_ENABLED):
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', USER_AGENT)
+        self.politeness = politeness or DomainPoliteness()
+        self.enabled = enabled
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stale_served': 0}
+
+    def _get_db_engine(self):
+        try:
+            from app.database import get_shared_engine
+            return get_shared_engine()
+        except Exception as e:
+            logger.debug(f"Fetch cache database unavailable: {e}")
+            return None
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get(self, url: str, timeout: float = 10, allow_redirects: bool = True, **kwargs) -> CachedResponse:
+        """GET a URL through the cache. Network errors propagate unless a stale copy exists."""
+        entry = self._load(url) if self.enabled else None
+        now = datetime.now(timezone.utc)
+        if entry is not None and entry['expires_at'] > now:
+            self._count('hits')
+            return self._to_response(url, entry, from_cache=True)
+
+        request_headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            with self.politeness.slot(domain_key(url)):
+                response = self.session.get(url, headers=request_headers, timeout=timeout,
+                                            allow_redirects=allow_redirects, **kwargs)
+        except requests.RequestException:
+            if entry is not None:
+                logger.info(f"Serving stale cached copy of {url} after fetch error")
+                self._count('stale_served')
+                return self._to_response(url, entry, from_cache=True)
+            raise
+
+        if response.status_code == 304 and entry is not None:
+            self._count('revalidated')
+            expires_at = self._touch(url, response, entry['status_code'])
+            entry = {**entry, 'expires_at': expires_at or entry['expires_at']}
+            return self._to_response(url, entry, from_cache=True, revalidated=True)
+
+        self._count('misses')
+        return self._store(url, response)
+
+    def save_extract(self, response: CachedResponse, name: str, value: Any) -> None:
+        """Attach a parsed extract to the cached body it was computed from"""
+        response.extracts[name] = value
+        engine = self._get_db_engine() if self.enabled else None
+        if engine is None:
+            return
+        try:
+            with engine.begin() as conn:
+                # The body hash guard drops extracts computed from a body that was replaced meanwhile
+                conn.execute(text("""
+                    UPDATE leadgen_fetch_cache
+                    SET extracts = COALESCE(extracts, '{}'::jsonb) || jsonb_build_object(:name, CAST(:value AS JSONB))
+                    WHERE url = :url AND content_sha256 = :sha
+                """), {'url': response.url, 'sha': response.content_sha256, 'name': name,
+                       'value': json.dumps(value, default=str)})
+        except Exception as e:
+            logger.debug(f"Could not cache extract {name} for {response.url}: {e}")
+
+    def _load(self, url: str) -> Optional[Dict]:
+        engine = self._get_db_engine()
+        if engine is None:
+            return None
+        try:
+            with engine.connect() as conn:
+                row = conn.execute(text("""
+                    SELECT status_code, headers, etag, last_modified, content, content_sha256,
+                           final_url, extracts, fetched_at, expires_at
+                    FROM leadgen_fetch_cache WHERE url = :url
+                """), {'url': url}).fetchone()
+                return dict(row._mapping) if row else None
+        except Exception as e:
+            logger.debug(f"Fetch cache lookup failed for {url}: {e}")
+            return None
+
+    def _ttl_for(self, status_code: int) -> int:
+        return FETCH_CACHE_TTL_SECONDS if status_code < 400 else FETCH_CACHE_ERROR_TTL_SECONDS
+
+    def _store(self, url: str, response: requests.Response) -> CachedResponse:
+        content = response.content[:FETCH_CACHE_MAX_BODY_BYTES]
+        headers = {k: v for k, v in ((h, response.headers.get(h)) for h in _STORED_HEADERS) if v}
+        now = datetime.now(timezone.utc)
+        cached = CachedResponse(
+            url=url,
+            status_code=response.status_code,
+            headers=headers,
+            content=content,
+            final_url=response.url or url,
+            fetched_at=now,
+            content_sha256=hashlib.sha256(content).hexdigest(),
+        )
+        engine = self._get_db_engine() if self.enabled else None
+        if engine is None:
+            return cached
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO leadgen_fetch_cache (
+                        url, domain, status_code, headers, etag, last_modified, content, content_sha256,
+                        content_length, final_url, extracts, fetched_at, validated_at, expires_at
+                    ) VALUES (
+                        :url, :domain, :status_code, CAST(:headers AS JSONB), :etag, :last_modified, :content, :sha,
+                        :content_length, :final_url, '{}'::jsonb, :now, :now, :expires_at
+                    )
+                    ON CONFLICT (url) DO UPDATE SET
+                        status_code = EXCLUDED.status_code,
+                        headers = EXCLUDED.headers,
+                        etag = EXCLUDED.etag,
+                        last_modified = EXCLUDED.last_modified,
+                        content = EXCLUDED.content,
+                        content_length = EXCLUDED.content_length,
+                        final_url = EXCLUDED.final_url,
+                        fetched_at = EXCLUDED.fetched_at,
+                        validated_at = EXCLUDED.validated_at,
+                        expires_at = EXCLUDED.expires_at,
+                        -- Parsed extracts only stay valid for an identical body
+                        extracts = CASE WHEN leadgen_fetch_cache.content_sha256 = EXCLUDED.content_sha256
+                                        THEN leadgen_fetch_cache.extracts ELSE '{}'::jsonb END,
+                        content_sha256 = EXCLUDED.content_sha256
+                """), {
+                    'url': url,
+                    'domain': domain_key(url),
+                    'status_code': response.status_code,
+                    'headers': json.dumps(headers),
+                    'etag': headers.get('etag'),
+                    'last_modified': headers.get('last-modified'),
+                    'content': zlib.compress(content, 6),
+                    'sha': cached.content_sha256,
+                    'content_length': len(content),
+                    'final_url': cached.final_url,
+                    'now': now,
+                    'expires_at': now + timedelta(seconds=self._ttl_for(response.status_code)),
+                })
+        except Exception as e:
+            logger.debug(f"Could not cache response for {url}: {e}")
+        return cached
+
+    def _touch(self, url: str, response: requests.Response, status_code: int) -> Optional[datetime]:
+        """Extend a revalidated entry by the TTL of its stored status; a 304 may carry refreshed validators"""
+        engine = self._get_db_engine()
+        if engine is None:
+            return None
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self._ttl_for(status_code))
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    UPDATE leadgen_fetch_cache
+                    SET validated_at = :now, expires_at = :expires_at,
+                        etag = COALESCE(:etag, etag), last_modified = COALESCE(:last_modified, last_modified)
+                    WHERE url = :url
+                """), {'url': url, 'now': now, 'expires_at': expires_at,
+                       'etag': response.headers.get('etag'), 'last_modified': response.headers.get('last-modified')})
+            return expires_at
+        except Exception as e:
+            logger.debug(f"Could not refresh cache entry for {url}: {e}")
+            return None
+
+    @staticmethod
+    def _to_response(url: str, entry: Dict, from_cache: bool, revalidated: bool = False) -> CachedResponse:
+        headers = entry['headers'] or {}
+        if isinstance(headers, str):
+            headers = json.loads(headers)
+        extracts = entry['extracts'] or {}
+        if isinstance(extracts, str):
+            extracts = json.loads(extracts)
+        return CachedResponse(
+            url=url,
+            status_code=entry['status_code'],
+            headers=headers,
+            content=zlib.decompress(bytes(entry['content'])) if entry['content'] is not None else b'',
+            final_url=entry['final_url'] or url,
+            fetched_at=entry['fetched_at'],
+            content_sha256=entry['content_sha256'],
+            extracts=dict(extracts),
+            from_cache=from_cache,
+            revalidated=revalidated,
+        )
+
+
+_fetch_cache: Optional[WebsiteFetchCache] = None
+_fetch_cache_lock = threading.Lock()
+
+
+def get_fetch_cache() -> WebsiteFetchCache:
+    """Process-wide cache instance (shares politeness state across all engines)"""
+    global _fetch_cache
+    with _fetch_cache_lock:
+        if _fetch_cache is None:
+            _fetch_cache = WebsiteFetchCache()
+        return _fetch_cache
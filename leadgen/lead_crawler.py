@@ -4,25 +4,43 @@ Lead Crawler - Similar Company Discovery Engine
 
 This module discovers similar companies based on seed companies and industry.
 It uses various APIs and data sources to find companies with similar characteristics.
+
+Environment Variables:
+- LEAD_CRAWLER_DISCOVERY_CONCURRENCY: Similar-company queries in flight (default: 4)
+- LEAD_CRAWLER_ENRICH_CONCURRENCY: Enrichment workers (default: 4)
+- LEAD_CRAWLER_SCORE_CONCURRENCY: Lead scoring workers (default: 2)
+- LEAD_CRAWLER_MAX_FRONTIER: Most companies expanded per level after the seeds (default: 20)
 """
 
 import asyncio
 import logging
+import math
+import os
 import openai
 import json
 import re
 from typing import List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass
-from datetime import datetime
 from sqlalchemy.orm import Session
 
 from database import get_db_session
 from models import Company
 from openai_enricher import OpenAICompanyEnricher
 from lead_scoring import score_company_by_id, save_lead_score_to_db
+from app.utils.company_keys import normalize_company_name, normalize_domain
+from app.services.leadgen_company_store import find_existing_companies, insert_companies
+from app.services.leadgen_stats_service import invalidate_leadgen_stats
 
 logger = logging.getLogger(__name__)
 
+DISCOVERY_CONCURRENCY = max(1, int(os.getenv('LEAD_CRAWLER_DISCOVERY_CONCURRENCY', '4')))
+ENRICH_CONCURRENCY = max(1, int(os.getenv('LEAD_CRAWLER_ENRICH_CONCURRENCY', '4')))
+SCORE_CONCURRENCY = max(1, int(os.getenv('LEAD_CRAWLER_SCORE_CONCURRENCY', '2')))
+MAX_FRONTIER = max(1, int(os.getenv('LEAD_CRAWLER_MAX_FRONTIER', '20')))
+# The discovery prompt asks for 8-10 companies per seed
+COMPANIES_PER_DISCOVERY = 8
+
+
 @dataclass
 class CrawlingProgress:
     """Progress tracking for crawling operations"""
@@ -49,15 +67,32 @@ class DiscoveredCompany:
     source_company: Optional[str] = None
 
 class LeadCrawler:
-    """Lead crawler for discovering similar companies"""
+    """Lead crawler for discovering similar companies.
+
+    Discovery expands a frontier level by level, with every seed of a level
+    queried concurrently, until the company budget (max_companies) is used.
+    Candidates are deduplicated on normalised name and domain (against each
+    other, the seeds and, with skip_existing, the database via one indexed
+    lookup per discovery call) before any enrichment call is spent. Accepted companies stream through
+    enrichment -> save -> scoring queues, so the first companies are saved
+    and scored while discovery is still running.
+    """
     
     def __init__(self, openai_api_key: str, progress_callback=None):
         """Initialize the lead crawler"""
         self.openai_client = openai.OpenAI(api_key=openai_api_key)
-        self.enricher = OpenAICompanyEnricher(openai_api_key)
+        self.enricher = OpenAICompanyEnricher()
         self.progress_callback = progress_callback
         self.discovered_companies: List[DiscoveredCompany] = []
-        self.processed_companies: Set[str] = set()
+        self._seen_names: Set[str] = set()
+        self._seen_domains: Set[str] = set()
+        self._added_company_ids: List[int] = []
+        self._companies_added = 0
+        self._companies_enriched = 0
+        self._companies_scored = 0
+        self._discovery_calls = 0
+        self._max_companies = 0
+        self._skip_existing = True
         
     async def crawl_similar_companies(
         self,
@@ -74,11 +109,14 @@ class LeadCrawler:
         """
         Main crawling method to discover similar companies
         """
+        workers: List[asyncio.Task] = []
         try:
             await self._update_progress(task_id, "initializing", 0, "Initializing crawler...")
             
             # Parse company size range
             min_employees, max_employees = self._parse_company_size(company_size)
+            self._max_companies = max_companies
+            self._skip_existing = skip_existing
             
             # Clean and validate seed companies
             validated_seeds = await self._validate_seed_companies(seed_companies)
@@ -87,55 +125,29 @@ class LeadCrawler:
             if not validated_seeds:
                 raise ValueError("No valid seed companies provided")
             
-            # Discovery phase
-            await self._update_progress(task_id, "discovery", 10, "Starting company discovery...")
-            
-            for depth_level in range(1, crawl_depth + 1):
-                companies_to_process = validated_seeds if depth_level == 1 else [c.name for c in self.discovered_companies[-20:]]
-                
-                for i, seed_company in enumerate(companies_to_process):
-                    if len(self.discovered_companies) >= max_companies:
-                        break
-                        
-                    progress = 10 + (depth_level - 1) * 30 + (i / len(companies_to_process)) * 30
-                    await self._update_progress(
-                        task_id, 
-                        "discovery", 
-                        min(progress, 70), 
-                        f"Level {depth_level}: Discovering similar to {seed_company}..."
-                    )
-                    
-                    similar_companies = await self._discover_similar_companies(
-                        seed_company, industry, min_employees, max_employees
-                    )
-                    
-                    for company in similar_companies:
-                        if len(self.discovered_companies) >= max_companies:
-                            break
-                        if company.name.lower() not in self.processed_companies:
-                            self.discovered_companies.append(company)
-                            self.processed_companies.add(company.name.lower())
-            
-            # Filter existing companies if requested
-            if skip_existing:
-                await self._update_progress(task_id, "filtering", 75, "Filtering existing companies...")
-                await self._filter_existing_companies()
-            
-            # Enrichment phase
-            companies_enriched = 0
-            if enable_enrichment and self.discovered_companies:
-                await self._update_progress(task_id, "enrichment", 80, "Enriching company data...")
-                companies_enriched = await self._enrich_discovered_companies()
+            # Seeds are never re-discovered
+            for seed in validated_seeds:
+                self._seen_names.add(normalize_company_name(seed))
+            
+            # Streaming stages: discovery -> enrichment -> save -> scoring
+            enrich_queue: asyncio.Queue = asyncio.Queue()
+            save_queue: asyncio.Queue = asyncio.Queue()
+            score_queue: asyncio.Queue = asyncio.Queue()
+            workers += [asyncio.create_task(self._enrich_worker(task_id, enrich_queue, save_queue, enable_enrichment))
+                        for _ in range(ENRICH_CONCURRENCY)]
+            workers.append(asyncio.create_task(self._save_worker(task_id, save_queue, score_queue if enable_scoring else None)))
+            if enable_scoring:
+                workers += [asyncio.create_task(self._score_worker(task_id, score_queue))
+                            for _ in range(SCORE_CONCURRENCY)]
             
-            # Add companies to database
-            await self._update_progress(task_id, "saving", 90, "Saving companies to database...")
-            companies_added = await self._save_companies_to_database()
+            await self._update_progress(task_id, "discovery", 10, "Starting company discovery...")
+            await self._discover_frontier(task_id, validated_seeds, industry, min_employees, max_employees,
+                                          max_companies, crawl_depth, enrich_queue)
             
-            # Lead scoring phase
-            companies_scored = 0
-            if enable_scoring and companies_added > 0:
-                await self._update_progress(task_id, "scoring", 95, "Scoring companies for lead qualification...")
-                companies_scored = await self._score_added_companies()
+            # Each stage hands items on before marking them done, so joining in order drains the pipeline
+            await enrich_queue.join()
+            await save_queue.join()
+            await score_queue.join()
             
             # Final results
             results = {
@@ -143,9 +155,10 @@ class LeadCrawler:
                 "task_id": task_id,
                 "stats": {
                     "companies_discovered": len(self.discovered_companies),
-                    "companies_added": companies_added,
-                    "companies_enriched": companies_enriched,
-                    "companies_scored": companies_scored,
+                    "companies_added": self._companies_added,
+                    "companies_enriched": self._companies_enriched,
+                    "companies_scored": self._companies_scored,
+                    "discovery_calls": self._discovery_calls,
                 },
                 "preview": await self._generate_results_preview()
             }
@@ -157,6 +170,76 @@ class LeadCrawler:
             logger.error(f"Crawling error: {e}")
             await self._update_progress(task_id, "error", 0, f"Crawling failed: {str(e)}")
             raise
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    def _claim(self, company: DiscoveredCompany) -> bool:
+        """Accept a candidate unless its name or domain was already seen"""
+        name_key = normalize_company_name(company.name)
+        domain_key = normalize_domain(company.domain)
+        if not name_key or name_key in self._seen_names or (domain_key and domain_key in self._seen_domains):
+            return False
+        self._seen_names.add(name_key)
+        if domain_key:
+            self._seen_domains.add(domain_key)
+        return True
+    
+    async def _discover_frontier(self, task_id: str, seeds: List[str], industry: str, min_employees: int,
+                                 max_employees: int, max_companies: int, crawl_depth: int,
+                                 enrich_queue: asyncio.Queue):
+        """Expand the frontier level by level; every seed of a level is queried concurrently"""
+        semaphore = asyncio.Semaphore(DISCOVERY_CONCURRENCY)
+        frontier = list(seeds)
+        
+        for depth_level in range(1, crawl_depth + 1):
+            if not frontier or len(self.discovered_companies) >= max_companies:
+                break
+            level_new: List[DiscoveredCompany] = []
+            
+            async def expand(seed_company: str):
+                async with semaphore:
+                    # The budget may have filled while this seed was waiting
+                    if len(self.discovered_companies) >= max_companies:
+                        return
+                    similar_companies = await self._discover_similar_companies(
+                        seed_company, industry, min_employees, max_employees
+                    )
+                    self._discovery_calls += 1
+                if self._skip_existing and similar_companies:
+                    existing = await asyncio.to_thread(self._existing_keys, similar_companies)
+                    self._seen_names.update(existing.name_keys)
+                    self._seen_domains.update(existing.domain_keys)
+                accepted = 0
+                for company in similar_companies:
+                    if len(self.discovered_companies) >= max_companies:
+                        break
+                    if self._claim(company):
+                        self.discovered_companies.append(company)
+                        level_new.append(company)
+                        accepted += 1
+                        await enrich_queue.put(company)
+                await self._update_progress(
+                    task_id, "discovery", self._overall_progress(),
+                    f"Level {depth_level}: {accepted} new companies similar to {seed_company}"
+                )
+            
+            await asyncio.gather(*(expand(seed) for seed in frontier))
+            
+            # Expand the most similar new companies next, only as many as the remaining budget can use
+            remaining = max_companies - len(self.discovered_companies)
+            if remaining <= 0:
+                break
+            level_new.sort(key=lambda c: c.similarity_score or 0.0, reverse=True)
+            frontier_size = min(MAX_FRONTIER, math.ceil(remaining / COMPANIES_PER_DISCOVERY))
+            frontier = [c.name for c in level_new[:frontier_size]]
+    
+    def _overall_progress(self) -> float:
+        """10% setup, then the share of the budget that has made it through the pipeline"""
+        budget = max(self._max_companies, 1)
+        finished = self._companies_added + len(self.discovered_companies)
+        return min(95.0, 10 + 85 * finished / (2 * budget))
     
     def _parse_company_size(self, company_size: str) -> Tuple[int, int]:
         """Parse company size range string"""
@@ -256,153 +339,104 @@ class LeadCrawler:
             logger.error(f"Error discovering similar companies for {seed_company}: {e}")
             return []
     
-    async def _filter_existing_companies(self):
-        """Remove companies that already exist in the database"""
-        if not self.discovered_companies:
-            return
-            
-        db = next(get_db_session())
-        try:
-            existing_names = set()
-            existing_domains = set()
-            
-            # Get existing company names and domains
-            existing_companies = db.query(Company).filter(Company.is_active == True).all()
-            for company in existing_companies:
-                if company.name:
-                    existing_names.add(company.name.lower())
-                if company.domain:
-                    existing_domains.add(company.domain.lower())
-            
-            # Filter out existing companies
-            filtered_companies = []
-            for company in self.discovered_companies:
-                is_duplicate = (
-                    company.name.lower() in existing_names or
-                    (company.domain and company.domain.lower() in existing_domains)
-                )
-                
-                if not is_duplicate:
-                    filtered_companies.append(company)
-            
-            logger.info(f"Filtered {len(self.discovered_companies) - len(filtered_companies)} existing companies")
-            self.discovered_companies = filtered_companies
-            
-        finally:
-            db.close()
+    def _existing_keys(self, companies: List[DiscoveredCompany]):
+        """Keys of the candidates that are already in the database (one indexed lookup)"""
+        with get_db_session() as db:
+            return find_existing_companies(db, [c.name for c in companies], [c.domain for c in companies])
     
-    async def _enrich_discovered_companies(self) -> int:
-        """Enrich discovered companies with additional data"""
-        enriched_count = 0
-        
-        for company in self.discovered_companies:
-            if not company.domain:
-                try:
-                    # Try to enrich the company to get domain and other data
-                    enrichment_data = await asyncio.get_event_loop().run_in_executor(
-                        None,
-                        self.enricher.enrich_company_data,
-                        company.name
-                    )
-                    
-                    if enrichment_data:
-                        company.domain = enrichment_data.get('domain', company.domain)
-                        company.industry = enrichment_data.get('industry', company.industry)
-                        company.employee_count = enrichment_data.get('employee_count', company.employee_count)
-                        company.location = enrichment_data.get('location', company.location)
-                        company.description = enrichment_data.get('description', company.description)
-                        enriched_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error enriching {company.name}: {e}")
-                    continue
-                
-                # Rate limiting
-                await asyncio.sleep(0.5)
-        
-        return enriched_count
+    async def _enrich_worker(self, task_id: str, enrich_queue: asyncio.Queue, save_queue: asyncio.Queue,
+                             enable_enrichment: bool):
+        """Fill in missing domains (and other fields) before a company is saved"""
+        while True:
+            company = await enrich_queue.get()
+            try:
+                if enable_enrichment and not company.domain:
+                    await self._enrich_company(company)
+                await save_queue.put(company)
+            except Exception as e:
+                logger.error(f"Error enriching {company.name}: {e}")
+            finally:
+                enrich_queue.task_done()
     
-    async def _save_companies_to_database(self) -> int:
-        """Save discovered companies to the database"""
-        if not self.discovered_companies:
-            return 0
-            
-        db = next(get_db_session())
-        try:
-            added_count = 0
-            
-            for company_data in self.discovered_companies:
-                try:
-                    # Create new company record
-                    new_company = Company(
-                        name=company_data.name,
-                        domain=company_data.domain,
-                        industry=company_data.industry,
-                        employee_count=company_data.employee_count,
-                        location=company_data.location,
-                        source="lead_crawler",
-                        created_at=datetime.now(),
-                        updated_at=datetime.now()
-                    )
-                    
-                    db.add(new_company)
-                    db.commit()
-                    added_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error saving company {company_data.name}: {e}")
-                    db.rollback()
-                    continue
-            
-            return added_count
-            
-        finally:
-            db.close()
+    async def _enrich_company(self, company: DiscoveredCompany):
+        # Pacing comes from the enricher's shared OpenAI rate limiter
+        enrichment_data = await asyncio.to_thread(self.enricher.enrich_company_data, company.name)
+        if enrichment_data and 'error' not in enrichment_data:
+            company.domain = enrichment_data.get('domain') or company.domain
+            company.industry = enrichment_data.get('industry') or company.industry
+            company.employee_count = enrichment_data.get('employee_count') or company.employee_count
+            company.location = enrichment_data.get('headquarters') or company.location
+            company.description = enrichment_data.get('description') or company.description
+            self._companies_enriched += 1
     
-    async def _score_added_companies(self) -> int:
-        """Score recently added companies for lead qualification"""
-        db = next(get_db_session())
-        try:
-            # Get recently added companies from crawler that haven't been scored
-            recent_companies = db.query(Company).filter(
-                Company.source == "lead_crawler",
-                Company.lead_scored_at.is_(None),
-                Company.is_active == True
-            ).limit(50).all()
-            
-            scored_count = 0
-            
-            for company in recent_companies:
-                try:
-                    # Score the company
-                    score = await score_company_by_id(company.id)
-                    if score:
-                        save_lead_score_to_db(score)
-                        scored_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error scoring company {company.name}: {e}")
+    async def _save_worker(self, task_id: str, save_queue: asyncio.Queue, score_queue: Optional[asyncio.Queue]):
+        """Insert companies one by one as they arrive and hand them to scoring"""
+        while True:
+            company = await save_queue.get()
+            try:
+                company_id = await asyncio.to_thread(self._save_company, company)
+                if company_id is None:
+                    # Enrichment can reveal a domain that is already taken
+                    logger.info(f"Skipping {company.name}: already in the database")
                     continue
-                    
-                # Rate limiting
-                await asyncio.sleep(0.5)
-            
-            return scored_count
-            
-        finally:
-            db.close()
+                invalidate_leadgen_stats()
+                self._companies_added += 1
+                self._added_company_ids.append(company_id)
+                await self._update_progress(task_id, "saving", self._overall_progress(),
+                                            f"Added {company.name} ({company.domain or 'no domain'})")
+                if score_queue is not None and company.domain:
+                    await score_queue.put((company_id, company.name))
+            except Exception as e:
+                logger.error(f"Error saving company {company.name}: {e}")
+            finally:
+                save_queue.task_done()
+    
+    def _save_company(self, company_data: DiscoveredCompany) -> Optional[int]:
+        """Insert a company unless its name or domain exists; returns the new id"""
+        with get_db_session() as db:
+            result = insert_companies(db, [{
+                'name': company_data.name,
+                'domain': company_data.domain,
+                'industry': company_data.industry,
+                'employee_count': company_data.employee_count,
+                'location': company_data.location,
+                'source': "lead_crawler",
+            }], reactivate=False)
+            return next(iter(result.inserted.values()), None)
+    
+    async def _score_worker(self, task_id: str, score_queue: asyncio.Queue):
+        """Score saved companies while discovery and enrichment continue"""
+        while True:
+            company_id, company_name = await score_queue.get()
+            try:
+                score = await score_company_by_id(company_id)
+                if score:
+                    await asyncio.to_thread(save_lead_score_to_db, score)
+                    self._companies_scored += 1
+                    await self._update_progress(task_id, "scoring", self._overall_progress(),
+                                                f"Scored {company_name}: {score.overall_score}/400")
+            except Exception as e:
+                logger.error(f"Error scoring company {company_name}: {e}")
+            finally:
+                score_queue.task_done()
     
     async def _generate_results_preview(self) -> List[Dict]:
         """Generate a preview of discovered companies for the UI"""
-        db = next(get_db_session())
-        try:
-            # Get recently added companies from crawler
-            recent_companies = db.query(Company).filter(
-                Company.source == "lead_crawler"
-            ).order_by(Company.created_at.desc()).limit(10).all()
+        if not self._added_company_ids:
+            return []
+        return await asyncio.to_thread(self._load_preview, self._added_company_ids[:10])
+    
+    def _load_preview(self, company_ids: List[int]) -> List[Dict]:
+        with get_db_session() as db:
+            # Companies added by this run, first saved first
+            companies = db.query(Company).filter(Company.id.in_(company_ids)).all()
+            by_id = {company.id: company for company in companies}
             
             preview = []
-            for company in recent_companies:
+            for company_id in company_ids:
+                company = by_id.get(company_id)
+                if not company:
+                    continue
                 preview.append({
                     "name": company.name,
                     "domain": company.domain,
@@ -413,9 +447,6 @@ class LeadCrawler:
                 })
             
             return preview
-            
-        finally:
-            db.close()
     
     async def _update_progress(self, task_id: str, stage: str, progress: float, message: str):
         """Update crawling progress"""
@@ -426,8 +457,8 @@ class LeadCrawler:
                 progress=progress,
                 message=message,
                 companies_discovered=len(self.discovered_companies),
-                companies_added=getattr(self, '_companies_added', 0),
-                companies_enriched=getattr(self, '_companies_enriched', 0),
-                companies_scored=getattr(self, '_companies_scored', 0)
+                companies_added=self._companies_added,
+                companies_enriched=self._companies_enriched,
+                companies_scored=self._companies_scored
             )
             await self.progress_callback(progress_data)
\ No newline at end of file
@@ -8,38 +8,91 @@ Environment Variables:
 - OPENAI_MODEL: OpenAI model to use (default: gpt-4o-mini)
 - LEAD_SCORING_MAX_TOKENS: Maximum tokens for responses (default: 1500)
 - LEAD_SCORING_TEMPERATURE: Temperature for responses (default: 0.3)
+- LEAD_SCORING_PHASE_CONCURRENCY: Signal phases of one company analyzed at once (default: 6)
+- LEAD_SCORING_MAX_CONCURRENT_LLM_CALLS: OpenAI calls in flight across all companies (default: 12)
+- LEAD_SCORING_MODE: 'per_signal' (one LLM call per signal, default) or 'consolidated'
+  (one call per signal group with a composite schema; see benchmark_scoring_modes)
+- LEAD_SCORING_BATCH_COMPANY_CONCURRENCY: Companies prepared at once by score_companies_via_batch (default: 8)
+- LEAD_SCORING_PHASE_MAX_AGE_DAYS: Age after which a stored phase result is recomputed even if its
+  input is unchanged (default: 30)
+
+Rescoring is incremental: every LLM phase stores its result in
+lead_scoring_data['phase_cache'] with a hash of its input (the prompt with the
+website extract, sitemap, help pages, job counts or enrichment fields it
+embeds, plus model and response schema). A rescore reuses phases whose hash
+matches and reruns only the stale ones; force=True reruns everything.
+
+Raw fetch artifacts (homepage HTML, text, links and scripts) stay in the
+zlib-compressed fetch cache. save_lead_score_to_db stores compact_signals_data():
+the per-signal results, the phase cache and a small website summary.
 
 Note: max_tokens and temperature are only used for models that support them
 (GPT-4o, GPT-4, GPT-3.5 series). Other models will use OpenAI defaults.
 """
 
 import asyncio
+import contextvars
 import logging
+import math
 import re
 import os
+import weakref
 from typing import Dict, List, Optional, Tuple, Union, Callable, Awaitable, Type
 from typing import get_origin, get_args
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import openai
 import json
-import requests
 from urllib.parse import urljoin, urlparse
 import time
 from bs4 import BeautifulSoup
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
 
 from .database import get_db_session
 from app.models.leadgen_models import LeadgenCompany as Company
 from .openai_enricher import OpenAICompanyEnricher
+from .fetch_cache import CachedResponse, get_fetch_cache
+from app.services.llm_batch_service import BatchProvider, json_schema_format, message_json, request_key, run_batch
+from app.services.leadgen_stats_service import invalidate_leadgen_stats
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+PHASE_CONCURRENCY = max(1, int(os.getenv('LEAD_SCORING_PHASE_CONCURRENCY', '6')))
+MAX_CONCURRENT_LLM_CALLS = max(1, int(os.getenv('LEAD_SCORING_MAX_CONCURRENT_LLM_CALLS', '12')))
+
+# One LLM semaphore per event loop, shared by every engine scoring on that loop
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _global_llm_semaphore() -> asyncio.Semaphore:
+    """Return the process-wide cap on concurrent OpenAI calls for the running loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+    return semaphore
+
+SCORING_MODES = ('per_signal', 'consolidated')
+DEFAULT_SCORING_MODE = os.getenv('LEAD_SCORING_MODE', 'per_signal')
+
+# LLM usage of the scoring run in progress (shared by all its phase tasks)
+_llm_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar('lead_scoring_llm_usage', default=None)
+
+BATCH_COMPANY_CONCURRENCY = max(1, int(os.getenv('LEAD_SCORING_BATCH_COMPANY_CONCURRENCY', '8')))
+
+# Set while scoring through the batch backend (see score_companies_via_batch)
+_llm_batch: contextvars.ContextVar[Optional['BatchLLMCalls']] = contextvars.ContextVar('lead_scoring_llm_batch', default=None)
+
+PHASE_MAX_AGE_DAYS = float(os.getenv('LEAD_SCORING_PHASE_MAX_AGE_DAYS', '30'))
+
+# Stored phase results of the company being scored, and the phase a task is running
+_phase_cache: contextvars.ContextVar[Optional['PhaseCache']] = contextvars.ContextVar('lead_scoring_phase_cache', default=None)
+_current_phase: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('lead_scoring_phase', default=None)
+
 # Pydantic models for structured outputs
 
 class SignalAnalysis(BaseModel):
@@ -113,6 +166,72 @@ class ChatReadinessAnalysis(SignalAnalysis):
     readiness_indicators: List[str]
     implementation_ease: str
 
+# Composite models for consolidated scoring: one structured call per signal group
+
+class SupportIntensityGroupAnalysis(BaseModel):
+    support_infrastructure: SupportInfrastructureAnalysis
+    kb_depth: KBDepthAnalysis
+    post_purchase: PostPurchaseAnalysis
+    support_tooling: SupportToolingAnalysis
+    review_complaints: ReviewComplaintsAnalysis
+
+class DigitalPresenceGroupAnalysis(BaseModel):
+    sitemap_density: SitemapDensityAnalysis
+    faq_richness: FAQRichnessAnalysis
+    traffic_scale: TrafficScaleAnalysis
+    catalog_size: CatalogSizeAnalysis
+
+class GrowthSignalsGroupAnalysis(BaseModel):
+    hiring_velocity: HiringVelocityAnalysis
+    headcount_growth: HeadcountGrowthAnalysis
+    recent_funding: RecentFundingAnalysis
+
+class ImplementationFeasibilityGroupAnalysis(BaseModel):
+    tech_team_size: TechTeamSizeAnalysis
+    ai_roles: AIRolesAnalysis
+    existing_bots: ExistingBotsAnalysis
+    chat_readiness: ChatReadinessAnalysis
+
+# Signal key (signals_data / phase key) -> LeadScore field
+SIGNAL_SCORE_FIELDS: Dict[str, str] = {
+    'support_infrastructure': 'support_infrastructure_score',
+    'kb_depth': 'kb_depth_score',
+    'post_purchase': 'post_purchase_score',
+    'support_tooling': 'support_tooling_score',
+    'review_complaints': 'review_complaint_score',
+    'sitemap_density': 'sitemap_density_score',
+    'faq_richness': 'faq_richness_score',
+    'traffic_scale': 'traffic_scale_score',
+    'catalog_size': 'catalog_size_score',
+    'hiring_velocity': 'hiring_velocity_score',
+    'headcount_growth': 'headcount_growth_score',
+    'recent_funding': 'recent_funding_score',
+    'tech_team_size': 'small_tech_team_score',
+    'ai_roles': 'no_ai_roles_score',
+    'existing_bots': 'no_existing_bot_score',
+    'chat_readiness': 'chat_ready_score',
+}
+
+# Condensed versions of the per-signal rubrics, used in the consolidated prompts
+SIGNAL_RUBRICS: Dict[str, str] = {
+    'support_infrastructure': "0-20 no visible support; 21-40 basic FAQ/help page; 41-60 dedicated support section; 61-80 comprehensive help center or third-party KB (Zendesk, Intercom, Help Scout, Freshdesk, Gorgias...); 81-100 multiple channels with professional KB",
+    'kb_depth': "0-20 no KB or <10 FAQs; 21-40 basic FAQ (10-25 items); 41-60 structured help center (25-50 articles); 61-80 comprehensive KB (50+ articles, categories); 81-100 extensive searchable KB (100+ articles, regularly updated)",
+    'post_purchase': "0-20 service/digital product with minimal post-purchase needs; 21-40 some post-purchase pages; 41-60 multiple touchpoints (returns, warranty, shipping, booking changes); 61-80 complex fulfillment with tracking and returns; 81-100 high-touch post-purchase with multiple providers (AfterShip, Route, Narvar, Loop...)",
+    'support_tooling': "0-20 no detectable tooling; 21-40 contact forms/email; 41-60 traditional helpdesk or chat (LiveChat, Drift, Crisp, Tawk.to...); 61-80 professional platform (Zendesk, Intercom, Gorgias, Kustomer) without AI; 81-100 sophisticated stack but no AI/automation",
+    'review_complaints': "0-20 no significant review presence or support complaints; 21-40 few support issues; 41-60 moderate volume with occasional support complaints; 61-80 frequent support/response-time complaints; 81-100 significant complaint volume about slow/poor support (inferential)",
+    'sitemap_density': "0-20 <50 pages, no support sections; 21-40 50-200 pages, basic support; 41-60 200-500 pages, some support sections; 61-80 500+ pages, dedicated support areas; 81-100 1000+ pages, comprehensive support structure",
+    'faq_richness': "0-20 no FAQs; 21-40 basic FAQ <10 questions; 41-60 structured FAQs 10-25 questions; 61-80 rich FAQ with categories and search; 81-100 comprehensive interactive self-service",
+    'traffic_scale': "0-20 <10K visits/month; 21-40 10K-50K; 41-60 50K-200K; 61-80 200K-500K; 81-100 >500K with rapid growth",
+    'catalog_size': "0-20 no e-commerce/service only; 21-40 <50 products; 41-60 50-500 products; 61-80 500-5000 products; 81-100 >5000 products or complex B2B offerings",
+    'hiring_velocity': "0-20 no customer-facing roles; 21-40 1-2 support/sales roles; 41-60 3-5 roles; 61-80 6-10 roles; 81-100 >10 roles, aggressive scaling",
+    'headcount_growth': "0-20 stable/declining; 21-40 <20%/yr; 41-60 20-50%/yr; 61-80 50-100%/yr; 81-100 hypergrowth >100%/yr",
+    'recent_funding': "0-20 bootstrapped/mature, no funding signals; 21-40 growth signals without recent funding; 41-60 moderate funding or growth news; 61-80 significant recent funding; 81-100 major round or IPO/acquisition within 18 months",
+    'tech_team_size': "0-20 tech team >20% of company; 21-40 15-20%; 41-60 10-15%; 61-80 5-10%; 81-100 <5% or non-technical company (higher = better prospect)",
+    'ai_roles': "0-20 heavy AI focus/AI product company; 21-40 1-2 AI roles; 41-60 exploring AI; 61-80 minimal AI activity; 81-100 no AI roles or mentions (higher = better prospect)",
+    'existing_bots': "0-20 advanced AI bot (Ada, Forethought, Intercom Fin...); 21-40 basic AI/simple bot; 41-60 non-AI automation; 61-80 traditional chat, no AI; 81-100 no bots, traditional support only (higher = better prospect)",
+    'chat_readiness': "0-20 static site, difficult implementation; 21-40 limited JS; 41-60 moderate JS and third-party tools; 61-80 GTM or existing widgets; 81-100 GTM plus existing chat patterns",
+}
+
 @dataclass
 class LeadScore:
     """Container for all lead scoring signals and final score"""
@@ -154,6 +273,9 @@ class LeadScore:
     # Detailed signal data for analysis
     signals_data: Dict = None
     
+    # Mode, LLM usage and duration of the run that produced this score (not persisted)
+    run_stats: Dict = None
+    
     def calculate_totals(self):
         """Calculate category totals and overall score"""
         self.support_intensity_total = (
@@ -192,16 +314,86 @@ class LeadScore:
             (self.digital_presence_total * 0.1)
         )
 
+class PhaseCache:
+    """Phase results of the previous scoring run, keyed by phase and input hash.
+
+    lookup() returns the stored answer of a phase whose input hash is unchanged
+    (and younger than max_age_days); store() records this run's answers.
+    entries() is what gets persisted: this run's phases plus the untouched
+    entries of phases it did not run (e.g. the other scoring mode).
+    """
+
+    def __init__(self, previous: Optional[Dict] = None, force: bool = False,
+                 max_age_days: float = PHASE_MAX_AGE_DAYS):
+        self.previous = previous if isinstance(previous, dict) else {}
+        self.force = force
+        self.max_age = timedelta(days=max_age_days) if max_age_days > 0 else None
+        self.current: Dict[str, Dict] = {}
+        self.reused: List[str] = []
+
+    def lookup(self, phase: str, input_hash: str, response_model: Type[BaseModel]) -> Optional[BaseModel]:
+        entry = self.previous.get(phase)
+        if self.force or not entry or entry.get('input_hash') != input_hash:
+            return None
+        try:
+            if self.max_age and datetime.now() - datetime.fromisoformat(entry['computed_at']) > self.max_age:
+                return None
+            result = response_model.model_validate(entry['result'])
+        except (KeyError, TypeError, ValueError):
+            # ValidationError is a ValueError: the schema changed since the entry was stored
+            return None
+        self.current[phase] = entry
+        self.reused.append(phase)
+        return result
+
+    def store(self, phase: str, input_hash: str, result: BaseModel):
+        self.current[phase] = {'input_hash': input_hash, 'result': result.model_dump(),
+                               'computed_at': datetime.now().isoformat()}
+
+    def entries(self) -> Dict[str, Dict]:
+        return {**self.previous, **self.current}
+
 class LeadScoringEngine:
     """Advanced lead scoring engine using OpenAI for signal analysis"""
+
+    # (phase key, analyzer method, shared inputs it needs before it can start).
+    # Phases write disjoint LeadScore fields, so any phase whose inputs are
+    # ready runs concurrently with the others; progress is reported per phase
+    # start in this order's keys.
+    SCORING_PHASES: List[Tuple[str, str, Tuple[str, ...]]] = [
+        ("support_infrastructure", "_analyze_support_infrastructure", ("website_content",)),
+        ("kb_depth", "_analyze_kb_depth", ("website_content",)),
+        ("post_purchase", "_analyze_post_purchase_signals", ("website_content",)),
+        ("support_tooling", "_analyze_support_tooling", ("website_content",)),
+        ("review_complaints", "_analyze_review_complaints", ()),
+        ("sitemap_density", "_analyze_sitemap_density", ("website_content",)),
+        ("faq_richness", "_analyze_faq_richness", ("website_content",)),
+        ("traffic_scale", "_analyze_traffic_scale", ()),
+        ("catalog_size", "_analyze_catalog_size", ("website_content",)),
+        ("hiring_velocity", "_analyze_hiring_velocity", ()),
+        ("headcount_growth", "_analyze_headcount_growth", ()),
+        ("recent_funding", "_analyze_recent_funding", ()),
+        ("tech_team_size", "_analyze_tech_team_size", ()),
+        ("ai_roles", "_analyze_ai_roles", ()),
+        ("existing_bots", "_analyze_existing_bots", ("website_content",)),
+        ("chat_readiness", "_analyze_chat_readiness", ("website_content",)),
+    ]
+
+    # Consolidated mode: one composite structured call per signal group
+    CONSOLIDATED_PHASES: List[Tuple[str, str, Tuple[str, ...]]] = [
+        ("support_intensity", "_analyze_support_intensity_group", ("website_content",)),
+        ("digital_presence", "_analyze_digital_presence_group", ("website_content",)),
+        ("growth_signals", "_analyze_growth_signals_group", ()),
+        ("implementation_feasibility", "_analyze_implementation_feasibility_group", ("website_content",)),
+    ]
     
     def __init__(self):
         self.enricher = OpenAICompanyEnricher()
+        # Async client so phase LLM calls overlap instead of blocking the event loop
+        self.async_client = openai.AsyncOpenAI(api_key=self.enricher.openai_api_key)
         self.openai_model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        # Shared, persistent page cache with per-domain politeness limits
+        self.fetch_cache = get_fetch_cache()
         
         # Log configuration
         logger.info(f"LeadScoringEngine initialized with model: {self.openai_model}")
@@ -216,59 +408,90 @@ class LeadScoringEngine:
         """Get current configuration for debugging"""
         config = {
             "openai_model": self.openai_model,
-            "supports_custom_params": str(self.openai_model.startswith(("gpt-4o", "gpt-4", "gpt-3.5")))
+            "supports_custom_params": str(self.openai_model.startswith(("gpt-4o", "gpt-4", "gpt-3.5"))),
+            "phase_concurrency": str(PHASE_CONCURRENCY),
+            "max_concurrent_llm_calls": str(MAX_CONCURRENT_LLM_CALLS)
         }
         if self.openai_model.startswith(("gpt-4o", "gpt-4", "gpt-3.5")):
             config["max_tokens"] = os.getenv("LEAD_SCORING_MAX_TOKENS", "1500")
             config["temperature"] = os.getenv("LEAD_SCORING_TEMPERATURE", "0.3")
         return config
     
-    async def score_company(self, company_id: int, progress_callback: Optional[Callable[[str, int, int], Awaitable[None]]] = None) -> LeadScore:
-        """Main function to score a company across all signals"""
-        db = next(get_db_session())
-        try:
+    async def score_company(self, company_id: int, progress_callback: Optional[Callable[[str, int, int], Awaitable[None]]] = None,
+                            mode: Optional[str] = None, force: bool = False) -> LeadScore:
+        """Main function to score a company across all signals
+
+        mode selects 'per_signal' (one LLM call per signal) or 'consolidated'
+        (one call per signal group); defaults to LEAD_SCORING_MODE. Phases whose
+        input is unchanged since the last run reuse its result unless force is set.
+        """
+        mode = mode or DEFAULT_SCORING_MODE
+        if mode not in SCORING_MODES:
+            raise ValueError(f"Unknown lead scoring mode '{mode}', expected one of {SCORING_MODES}")
+        phases = self.CONSOLIDATED_PHASES if mode == 'consolidated' else self.SCORING_PHASES
+
+        # Read what scoring needs up front; no session is held while the phases run
+        with get_db_session() as db:
             company = db.query(Company).filter(Company.id == company_id).first()
             if not company:
                 raise ValueError(f"Company {company_id} not found")
-            
-            logger.info(f"Starting comprehensive lead scoring for {company.name} ({company.domain})")
-            
-            # Initialize lead score container
-            score = LeadScore(
-                company_id=company_id,
-                company_name=company.name,
-                domain=company.domain,
-                signals_data={}
-            )
-            
-            # Get base website content for analysis
-            website_content = await self._fetch_website_content(company.domain)
-            score.signals_data['website_content'] = website_content
-            
-            # Execute all phases with optional progress callback for UI updates
-            phases: List[Tuple[str, Callable[[LeadScore], Awaitable[None]]]] = [
-                ("support_infrastructure", self._analyze_support_infrastructure),
-                ("kb_depth", self._analyze_kb_depth),
-                ("post_purchase", self._analyze_post_purchase_signals),
-                ("support_tooling", self._analyze_support_tooling),
-                ("review_complaints", self._analyze_review_complaints),
-                ("sitemap_density", self._analyze_sitemap_density),
-                ("faq_richness", self._analyze_faq_richness),
-                ("traffic_scale", self._analyze_traffic_scale),
-                ("catalog_size", self._analyze_catalog_size),
-                ("hiring_velocity", self._analyze_hiring_velocity),
-                ("headcount_growth", self._analyze_headcount_growth),
-                ("recent_funding", self._analyze_recent_funding),
-                ("tech_team_size", self._analyze_tech_team_size),
-                ("ai_roles", self._analyze_ai_roles),
-                ("existing_bots", self._analyze_existing_bots),
-                ("chat_readiness", self._analyze_chat_readiness),
-            ]
-
-            total_phases = len(phases)
-            logger.info("Running lead scoring phases (%d phases)...", total_phases)
-            for index, (phase_key, phase_func) in enumerate(phases):
-                # Broadcast current phase if callback provided
+            company_name, company_domain = company.name, company.domain
+            previous_data = company.lead_scoring_data if isinstance(company.lead_scoring_data, dict) else {}
+        
+        logger.info(f"Starting comprehensive lead scoring for {company_name} ({company_domain})")
+        
+        # Initialize lead score container
+        score = LeadScore(
+            company_id=company_id,
+            company_name=company_name,
+            domain=company_domain,
+            signals_data={}
+        )
+        phase_cache = PhaseCache(previous_data.get('phase_cache'), force=force)
+        
+        # Run the phases as a dependency graph: the website fetch is the only
+        # shared input, and phases that don't need it start alongside it
+        logger.info("Running lead scoring phases (%s mode, %d phases, up to %d at once)...",
+                    mode, len(phases), PHASE_CONCURRENCY)
+        usage = {'llm_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        usage_token = _llm_usage.set(usage)
+        cache_token = _phase_cache.set(phase_cache)
+        started_at = time.monotonic()
+        try:
+            await self._run_phases(score, progress_callback, phases)
+        finally:
+            _phase_cache.reset(cache_token)
+            _llm_usage.reset(usage_token)
+        score.signals_data['phase_cache'] = phase_cache.entries()
+        score.run_stats = {'mode': mode, **usage, 'phases_reused': len(phase_cache.reused),
+                           'duration_seconds': round(time.monotonic() - started_at, 2)}
+        if phase_cache.reused:
+            logger.info(f"Reused {len(phase_cache.reused)} unchanged phases: {', '.join(phase_cache.reused)}")
+        
+        # Calculate final scores
+        score.calculate_totals()
+        
+        logger.info(f"Lead scoring complete for {company_name}. Overall score: {score.overall_score}/400")
+        return score
+    
+    async def _run_phases(self, score: LeadScore,
+                          progress_callback: Optional[Callable[[str, int, int], Awaitable[None]]] = None,
+                          phases: List[Tuple[str, str, Tuple[str, ...]]] = None):
+        """Execute phases (SCORING_PHASES by default) concurrently once their inputs are available"""
+        phases = phases or self.SCORING_PHASES
+        inputs = {'website_content': asyncio.create_task(self._load_website_content(score))}
+        semaphore = asyncio.Semaphore(PHASE_CONCURRENCY)
+        total_phases = len(phases)
+        started = 0
+
+        async def run_phase(phase_key: str, analyzer: str, needs: Tuple[str, ...]):
+            nonlocal started
+            if needs:
+                await asyncio.gather(*(inputs[name] for name in needs))
+            async with semaphore:
+                index = started
+                started += 1
+                # Broadcast phase start if callback provided
                 if progress_callback is not None:
                     try:
                         await progress_callback(phase_key, index, total_phases)
@@ -276,17 +499,35 @@ class LeadScoringEngine:
                         logger.warning(f"Progress callback failed for phase {phase_key}: {cb_err}")
 
                 logger.info(f"Executing phase {index+1}/{total_phases}: {phase_key}")
-                await phase_func(score)
-            
-            # Calculate final scores
-            score.calculate_totals()
-            
-            logger.info(f"Lead scoring complete for {company.name}. Overall score: {score.overall_score}/400")
-            return score
-            
+                _current_phase.set(phase_key)
+                await getattr(self, analyzer)(score)
+
+        try:
+            await asyncio.gather(*(run_phase(*phase) for phase in phases))
         finally:
-            db.close()
-    
+            for task in inputs.values():
+                task.cancel()
+
+    async def _load_website_content(self, score: LeadScore):
+        """Fetch the homepage once; most phases analyze this shared snapshot"""
+        score.signals_data['website_content'] = await self._fetch_website_content(score.domain)
+
+    async def _http_get(self, url: str, **kwargs) -> CachedResponse:
+        """Cached GET in a worker thread so page fetches don't stall concurrent phases"""
+        return await asyncio.to_thread(self.fetch_cache.get, url, **kwargs)
+
+    async def _save_extract(self, response: CachedResponse, name: str, value):
+        """Cache a parsed extract next to the page body it came from"""
+        await asyncio.to_thread(self.fetch_cache.save_extract, response, name, value)
+
+    async def _load_company_fields(self, company_id: int, *fields: str) -> Dict[str, object]:
+        """Read company columns in a worker thread (0 for columns the model lacks)"""
+        def load():
+            with get_db_session() as db:
+                company = db.query(Company).filter(Company.id == company_id).first()
+                return {field: getattr(company, field, 0) for field in fields}
+        return await asyncio.to_thread(load)
+
     async def _fetch_website_content(self, domain: str) -> Dict:
         """Fetch and analyze website content for signal detection"""
         if not domain:
@@ -294,8 +535,11 @@ class LeadScoringEngine:
         
         try:
             url = f"https://{domain}"
-            response = self.session.get(url, timeout=10, allow_redirects=True)
+            response = await self._http_get(url, timeout=10, allow_redirects=True)
             response.raise_for_status()
+            # Unchanged pages reuse the summary parsed on an earlier run
+            if 'website_content' in response.extracts:
+                return response.extracts['website_content']
             
             soup = BeautifulSoup(response.content, 'html.parser')
             # Extract JSON-LD blobs for schema.org analysis (FAQPage detection)
@@ -316,61 +560,283 @@ class LeadScoringEngine:
             except Exception:
                 pass
             
-            return {
+            website_content = {
                 'html': response.text[:50000],  # Limit to prevent token overflow
-                'title': soup.title.string if soup.title else '',
+                'title': str(soup.title.string or '') if soup.title else '',
                 'meta_description': soup.find('meta', attrs={'name': 'description'})['content'] if soup.find('meta', attrs={'name': 'description'}) else '',
                 'links': [a.get('href') for a in soup.find_all('a', href=True)][:100],
                 'text_content': soup.get_text()[:10000],
                 'scripts': [script.get('src') for script in soup.find_all('script', src=True)][:50],
                 'json_ld': json_ld_data
             }
+            await self._save_extract(response, 'website_content', website_content)
+            return website_content
         except Exception as e:
             logger.warning(f"Failed to fetch website content for {domain}: {e}")
             return {}
 
+    # SHARED EVIDENCE (used by both scoring modes)
+
+    def _detect_support_resources(self, score: LeadScore) -> Dict:
+        """Heuristic detection of help/FAQ resources on the homepage"""
+        website = score.signals_data.get('website_content', {})
+        html_sample = website.get('html', '')[:3000]
+        links = website.get('links', [])
+        json_ld = website.get('json_ld', [])
+        
+        # Heuristic detection of support/FAQ resources
+        support_keywords = ['help', 'support', 'faq', 'kb', 'docs', 'knowledge', 'patient-info', 'patient-info-faq', 'resources', 'portal']
+        support_links = []
+        for link in links:
+            low = (link or '').lower()
+            if any(kw in low for kw in support_keywords):
+                if low.startswith('/'):
+                    support_links.append(f"https://{score.domain}{link}")
+                elif low.startswith('http'):
+                    support_links.append(link)
+        html_has_faq = bool(re.search(r"\bfaq\b|frequently\s+asked\s+questions", html_sample, re.IGNORECASE))
+        jsonld_has_faq = False
+        try:
+            for blob in json_ld or []:
+                if isinstance(blob, dict):
+                    at = blob.get('@type')
+                    # @type may be a list or string
+                    if isinstance(at, str) and at.lower() == 'faqpage':
+                        jsonld_has_faq = True
+                        break
+                    if isinstance(at, list) and any(isinstance(x, str) and x.lower() == 'faqpage' for x in at):
+                        jsonld_has_faq = True
+                        break
+        except Exception:
+            pass
+        pre_detected_evidence = []
+        if support_links:
+            pre_detected_evidence.append(f"Detected potential support links: {support_links[:5]}")
+        if html_has_faq:
+            pre_detected_evidence.append("Detected 'FAQ' mentions in page HTML")
+        if jsonld_has_faq:
+            pre_detected_evidence.append("Detected schema.org FAQPage in JSON-LD")
+
+        return {
+            'html_sample': html_sample,
+            'support_links': support_links,
+            'html_has_faq': html_has_faq,
+            'jsonld_has_faq': jsonld_has_faq,
+            'pre_detected_evidence': pre_detected_evidence,
+        }
+
+    def _apply_support_infrastructure(self, score: LeadScore, result: SupportInfrastructureAnalysis, evidence: Dict):
+        """Record the support infrastructure result, raised to the heuristic minimums"""
+        html_has_faq = evidence['html_has_faq']
+        jsonld_has_faq = evidence['jsonld_has_faq']
+        support_links = evidence['support_links']
+        pre_detected_evidence = evidence['pre_detected_evidence']
+        # Apply heuristic minimums if we detected FAQ/support resources
+        adjusted_score = result.score
+        heuristic_notes = []
+        if html_has_faq or support_links:
+            adjusted_score = max(adjusted_score, 40)
+            heuristic_notes.append('Raised to at least 40 due to detected FAQ/support links')
+        if jsonld_has_faq:
+            adjusted_score = max(adjusted_score, 60)
+            heuristic_notes.append('Raised to at least 60 due to schema.org FAQPage')
+        
+        score.support_infrastructure_score = min(100, max(0, adjusted_score))
+        support_payload = result.model_dump()
+        if pre_detected_evidence:
+            support_payload['pre_detected_evidence'] = pre_detected_evidence
+        if heuristic_notes:
+            support_payload['heuristic_adjustments'] = heuristic_notes
+        score.signals_data['support_infrastructure'] = support_payload
+
+    async def _fetch_help_content(self, score: LeadScore) -> str:
+        """Text of up to 3 linked help/support pages"""
+        # Try to find and analyze help/support pages
+        help_urls = []
+        base_links = score.signals_data.get('website_content', {}).get('links', [])
+        
+        for link in base_links:
+            if any(keyword in link.lower() for keyword in ['help', 'support', 'faq', 'kb', 'docs']):
+                if link.startswith('/'):
+                    help_urls.append(f"https://{score.domain}{link}")
+                elif link.startswith('http'):
+                    help_urls.append(link)
+        
+        help_content = ""
+        for url in help_urls[:3]:  # Analyze up to 3 help pages
+            try:
+                response = await self._http_get(url, timeout=10)
+                if response.status_code == 200:
+                    help_text = response.extracts.get('help_text')
+                    if help_text is None:
+                        help_soup = BeautifulSoup(response.content, 'html.parser')
+                        help_text = help_soup.get_text()[:2000]  # Limit content
+                        await self._save_extract(response, 'help_text', help_text)
+                    help_content += help_text
+            except:
+                continue
+        return help_content
+
+    async def _fetch_sitemap_data(self, score: LeadScore) -> Dict[str, str]:
+        """Raw sitemap/robots.txt content keyed by URL"""
+        # Try to fetch sitemap
+        sitemap_urls = [
+            f"https://{score.domain}/sitemap.xml",
+            f"https://{score.domain}/sitemap_index.xml",
+            f"https://{score.domain}/robots.txt"
+        ]
+        
+        sitemap_data = {}
+        for url in sitemap_urls:
+            try:
+                response = await self._http_get(url, timeout=10)
+                if response.status_code == 200:
+                    sitemap_data[url] = response.text[:5000]  # Limit content
+            except:
+                continue
+        return sitemap_data
+
+    @staticmethod
+    def _parse_faq_page(resp: CachedResponse) -> Dict:
+        """FAQ heuristics for one fetched page (cached as the page's 'faq_page' extract)"""
+        jsonld_faq = False
+        faq_items = 0
+        features: List[str] = []
+        soup = BeautifulSoup(resp.content, 'html.parser')
+        # JSON-LD FAQPage
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                blob = json.loads(script.get_text() or '{}')
+                at = blob.get('@type')
+                if (isinstance(at, str) and at.lower() == 'faqpage') or \
+                   (isinstance(at, list) and any(isinstance(x, str) and x.lower() == 'faqpage' for x in at)):
+                    jsonld_faq = True
+                    if isinstance(blob.get('mainEntity'), list):
+                        faq_items += len(blob['mainEntity'])
+            except Exception:
+                pass
+        # Heuristic count of questions/answers in DOM
+        text = soup.get_text(" ")
+        q_matches = len(re.findall(r'\b(question|faq|q:)\b', text, re.IGNORECASE))
+        a_matches = len(re.findall(r'\b(answer|a:)\b', text, re.IGNORECASE))
+        faq_items += max(q_matches, a_matches) // 2
+        # Detect accordions/expanders
+        if soup.select('.accordion, .accordion-item, details, [aria-expanded]'):
+            features.append('Accordion/Expandable FAQ')
+        # Detect search bar in help context
+        if soup.find('input', attrs={'type': 'search'}) or re.search(r'help\s+search|faq\s+search', text, re.IGNORECASE):
+            features.append('Help Search')
+        # Detect self-service items
+        for phrase, label in [
+            ('live chat', 'Live Chat'), ('chat', 'Chat Widget'), ('patient portal', 'Patient Portal'),
+            ('schedule online', 'Online Scheduling'), ('upload rx', 'Upload RX'), ('portal login', 'Portal Login'),
+            ('knowledge base', 'Knowledge Base'), ('resources', 'Resources Section')
+        ]:
+            if re.search(phrase, text, re.IGNORECASE):
+                features.append(label)
+        return {'jsonld_faq': jsonld_faq, 'faq_items': faq_items, 'features': features}
+
+    async def _collect_faq_evidence(self, score: LeadScore) -> Dict:
+        """Fetch candidate FAQ pages and count FAQ items/self-service features heuristically"""
+        links = score.signals_data.get('website_content', {}).get('links', []) or []
+
+        # Build candidate FAQ/support URLs
+        candidate_slugs = [
+            '/faq', '/faqs', '/patient-info-faq', '/patient-info', '/help', '/support',
+            '/resources', '/knowledge-base', '/kb', '/customer-support'
+        ]
+        candidate_urls = []
+        for link in links[:100]:
+            low = (link or '').lower()
+            if any(kw in low for kw in ['faq', 'patient-info', 'help', 'support', 'knowledge', 'resource']):
+                if low.startswith('/'):
+                    candidate_urls.append(f"https://{score.domain}{link}")
+                elif low.startswith('http'):
+                    candidate_urls.append(link)
+        candidate_urls.extend([f"https://{score.domain}{slug}" for slug in candidate_slugs])
+        # Deduplicate
+        seen = set()
+        deduped = []
+        for u in candidate_urls:
+            if u not in seen:
+                seen.add(u)
+                deduped.append(u)
+        candidate_urls = deduped[:5]
+
+        # Fetch and analyze candidate FAQ pages
+        detected_features: List[str] = []
+        faq_items_count = 0
+        jsonld_faq_detected = False
+        fetched_pages: List[Tuple[str, str]] = []  # (url, text)
+        for url in candidate_urls:
+            try:
+                resp = await self._http_get(url, timeout=10)
+                if resp.status_code == 200:
+                    txt = resp.text[:20000]
+                    fetched_pages.append((url, txt))
+                    page = resp.extracts.get('faq_page')
+                    if page is None:
+                        page = self._parse_faq_page(resp)
+                        await self._save_extract(resp, 'faq_page', page)
+                    jsonld_faq_detected = jsonld_faq_detected or page['jsonld_faq']
+                    faq_items_count += page['faq_items']
+                    detected_features.extend(page['features'])
+            except Exception:
+                continue
+
+        # Heuristic score floors
+        heuristic_floor = 0
+        if faq_items_count >= 5:
+            heuristic_floor = max(heuristic_floor, 40)
+        if faq_items_count >= 10:
+            heuristic_floor = max(heuristic_floor, 60)
+        if faq_items_count >= 25:
+            heuristic_floor = max(heuristic_floor, 80)
+        if jsonld_faq_detected:
+            heuristic_floor = max(heuristic_floor, 60)
+
+        return {
+            'candidate_urls': candidate_urls,
+            'fetched_pages': fetched_pages,
+            'faq_items_count': faq_items_count,
+            'jsonld_faq_detected': jsonld_faq_detected,
+            'detected_features': detected_features,
+            'heuristic_floor': heuristic_floor,
+        }
+
+    def _apply_faq_richness(self, score: LeadScore, llm: FAQRichnessAnalysis, evidence: Dict):
+        """Merge heuristic FAQ detections with the model's answer"""
+        faq_items_count = evidence['faq_items_count']
+        detected_features = evidence['detected_features']
+        heuristic_floor = evidence['heuristic_floor']
+        candidate_urls = evidence['candidate_urls']
+        jsonld_faq_detected = evidence['jsonld_faq_detected']
+        # Merge heuristic detections with LLM output
+        merged_count = max(getattr(llm, 'faq_elements_count', 0) or 0, faq_items_count)
+        merged_features = sorted(list(set((getattr(llm, 'self_service_features', []) or []) + list(set(detected_features)))))
+        final_score = max(llm.score or 0, heuristic_floor)
+
+        score.faq_richness_score = min(100, max(0, final_score))
+        payload = {
+            'score': score.faq_richness_score,
+            'faq_elements_count': merged_count,
+            'self_service_features': merged_features,
+            'reasoning': getattr(llm, 'reasoning', '') or 'Heuristic and LLM-based analysis',
+            'detected_faq_urls': candidate_urls,
+            'jsonld_faq_detected': jsonld_faq_detected,
+            'heuristic_floor_applied': heuristic_floor,
+        }
+        score.signals_data['faq_richness'] = payload
+
     # SUPPORT INTENSITY SIGNAL ANALYZERS
     
     async def _analyze_support_infrastructure(self, score: LeadScore):
         """Analyze presence of support infrastructure (help centers, KB systems)"""
         try:
-            website = score.signals_data.get('website_content', {})
-            html_sample = website.get('html', '')[:3000]
-            links = website.get('links', [])
-            json_ld = website.get('json_ld', [])
-            
-            # Heuristic detection of support/FAQ resources
-            support_keywords = ['help', 'support', 'faq', 'kb', 'docs', 'knowledge', 'patient-info', 'patient-info-faq', 'resources', 'portal']
-            support_links = []
-            for link in links:
-                low = (link or '').lower()
-                if any(kw in low for kw in support_keywords):
-                    if low.startswith('/'):
-                        support_links.append(f"https://{score.domain}{link}")
-                    elif low.startswith('http'):
-                        support_links.append(link)
-            html_has_faq = bool(re.search(r"\bfaq\b|frequently\s+asked\s+questions", html_sample, re.IGNORECASE))
-            jsonld_has_faq = False
-            try:
-                for blob in json_ld or []:
-                    if isinstance(blob, dict):
-                        at = blob.get('@type')
-                        # @type may be a list or string
-                        if isinstance(at, str) and at.lower() == 'faqpage':
-                            jsonld_has_faq = True
-                            break
-                        if isinstance(at, list) and any(isinstance(x, str) and x.lower() == 'faqpage' for x in at):
-                            jsonld_has_faq = True
-                            break
-            except Exception:
-                pass
-            pre_detected_evidence = []
-            if support_links:
-                pre_detected_evidence.append(f"Detected potential support links: {support_links[:5]}")
-            if html_has_faq:
-                pre_detected_evidence.append("Detected 'FAQ' mentions in page HTML")
-            if jsonld_has_faq:
-                pre_detected_evidence.append("Detected schema.org FAQPage in JSON-LD")
+            evidence = self._detect_support_resources(score)
+            html_sample = evidence['html_sample']
+            support_links = evidence['support_links']
+            pre_detected_evidence = evidence['pre_detected_evidence']
             
             prompt = f"""
             Analyze this company's support infrastructure based on their website.
@@ -397,23 +863,7 @@ class LeadScoringEngine:
             """
             
             result = await self._call_openai_structured(prompt, SupportInfrastructureAnalysis)
-            # Apply heuristic minimums if we detected FAQ/support resources
-            adjusted_score = result.score
-            heuristic_notes = []
-            if html_has_faq or support_links:
-                adjusted_score = max(adjusted_score, 40)
-                heuristic_notes.append('Raised to at least 40 due to detected FAQ/support links')
-            if jsonld_has_faq:
-                adjusted_score = max(adjusted_score, 60)
-                heuristic_notes.append('Raised to at least 60 due to schema.org FAQPage')
-            
-            score.support_infrastructure_score = min(100, max(0, adjusted_score))
-            support_payload = result.model_dump()
-            if pre_detected_evidence:
-                support_payload['pre_detected_evidence'] = pre_detected_evidence
-            if heuristic_notes:
-                support_payload['heuristic_adjustments'] = heuristic_notes
-            score.signals_data['support_infrastructure'] = support_payload
+            self._apply_support_infrastructure(score, result, evidence)
             
             logger.info(f"Support infrastructure score: {score.support_infrastructure_score}/100")
             
@@ -424,26 +874,7 @@ class LeadScoringEngine:
     async def _analyze_kb_depth(self, score: LeadScore):
         """Analyze knowledge base depth and content richness"""
         try:
-            # Try to find and analyze help/support pages
-            help_urls = []
-            base_links = score.signals_data.get('website_content', {}).get('links', [])
-            
-            for link in base_links:
-                if any(keyword in link.lower() for keyword in ['help', 'support', 'faq', 'kb', 'docs']):
-                    if link.startswith('/'):
-                        help_urls.append(f"https://{score.domain}{link}")
-                    elif link.startswith('http'):
-                        help_urls.append(link)
-            
-            help_content = ""
-            for url in help_urls[:3]:  # Analyze up to 3 help pages
-                try:
-                    response = self.session.get(url, timeout=10)
-                    if response.status_code == 200:
-                        help_soup = BeautifulSoup(response.content, 'html.parser')
-                        help_content += help_soup.get_text()[:2000]  # Limit content
-                except:
-                    continue
+            help_content = await self._fetch_help_content(score)
             
             prompt = f"""
             Analyze the knowledge base depth for this company's support system.
@@ -609,21 +1040,7 @@ class LeadScoringEngine:
     async def _analyze_sitemap_density(self, score: LeadScore):
         """Analyze sitemap density and support page presence"""
         try:
-            # Try to fetch sitemap
-            sitemap_urls = [
-                f"https://{score.domain}/sitemap.xml",
-                f"https://{score.domain}/sitemap_index.xml",
-                f"https://{score.domain}/robots.txt"
-            ]
-            
-            sitemap_data = {}
-            for url in sitemap_urls:
-                try:
-                    response = self.session.get(url, timeout=10)
-                    if response.status_code == 200:
-                        sitemap_data[url] = response.text[:5000]  # Limit content
-                except:
-                    continue
+            sitemap_data = await self._fetch_sitemap_data(score)
             
             website_content = score.signals_data.get('website_content', {})
             links = website_content.get('links', [])
@@ -663,89 +1080,13 @@ class LeadScoringEngine:
     async def _analyze_faq_richness(self, score: LeadScore):
         """Analyze FAQ richness and self-service content"""
         try:
-            website_content = score.signals_data.get('website_content', {})
-            html_content = website_content.get('html', '')
-            links = website_content.get('links', []) or []
-
-            # Build candidate FAQ/support URLs
-            candidate_slugs = [
-                '/faq', '/faqs', '/patient-info-faq', '/patient-info', '/help', '/support',
-                '/resources', '/knowledge-base', '/kb', '/customer-support'
-            ]
-            candidate_urls = []
-            for link in links[:100]:
-                low = (link or '').lower()
-                if any(kw in low for kw in ['faq', 'patient-info', 'help', 'support', 'knowledge', 'resource']):
-                    if low.startswith('/'):
-                        candidate_urls.append(f"https://{score.domain}{link}")
-                    elif low.startswith('http'):
-                        candidate_urls.append(link)
-            candidate_urls.extend([f"https://{score.domain}{slug}" for slug in candidate_slugs])
-            # Deduplicate
-            seen = set()
-            deduped = []
-            for u in candidate_urls:
-                if u not in seen:
-                    seen.add(u)
-                    deduped.append(u)
-            candidate_urls = deduped[:5]
-
-            # Fetch and analyze candidate FAQ pages
-            detected_features: List[str] = []
-            faq_items_count = 0
-            jsonld_faq_detected = False
-            fetched_pages: List[Tuple[str, str]] = []  # (url, text)
-            for url in candidate_urls:
-                try:
-                    resp = self.session.get(url, timeout=10)
-                    if resp.status_code == 200:
-                        txt = resp.text[:20000]
-                        fetched_pages.append((url, txt))
-                        soup = BeautifulSoup(resp.content, 'html.parser')
-                        # JSON-LD FAQPage
-                        for script in soup.find_all('script', type='application/ld+json'):
-                            try:
-                                blob = json.loads(script.get_text() or '{}')
-                                at = blob.get('@type')
-                                if (isinstance(at, str) and at.lower() == 'faqpage') or \
-                                   (isinstance(at, list) and any(isinstance(x, str) and x.lower() == 'faqpage' for x in at)):
-                                    jsonld_faq_detected = True
-                                    if isinstance(blob.get('mainEntity'), list):
-                                        faq_items_count += len(blob['mainEntity'])
-                            except Exception:
-                                pass
-                        # Heuristic count of questions/answers in DOM
-                        text = soup.get_text(" ")
-                        q_matches = len(re.findall(r'\b(question|faq|q:)\b', text, re.IGNORECASE))
-                        a_matches = len(re.findall(r'\b(answer|a:)\b', text, re.IGNORECASE))
-                        faq_items_count += max(q_matches, a_matches) // 2
-                        # Detect accordions/expanders
-                        if soup.select('.accordion, .accordion-item, details, [aria-expanded]'):
-                            detected_features.append('Accordion/Expandable FAQ')
-                        # Detect search bar in help context
-                        if soup.find('input', attrs={'type': 'search'}) or re.search(r'help\s+search|faq\s+search', text, re.IGNORECASE):
-                            detected_features.append('Help Search')
-                        # Detect self-service items
-                        for phrase, label in [
-                            ('live chat', 'Live Chat'), ('chat', 'Chat Widget'), ('patient portal', 'Patient Portal'),
-                            ('schedule online', 'Online Scheduling'), ('upload rx', 'Upload RX'), ('portal login', 'Portal Login'),
-                            ('knowledge base', 'Knowledge Base'), ('resources', 'Resources Section')
-                        ]:
-                            if re.search(phrase, text, re.IGNORECASE):
-                                detected_features.append(label)
-                except Exception:
-                    continue
-
-            # Heuristic score floors
-            heuristic_floor = 0
-            if faq_items_count >= 5:
-                heuristic_floor = max(heuristic_floor, 40)
-            if faq_items_count >= 10:
-                heuristic_floor = max(heuristic_floor, 60)
-            if faq_items_count >= 25:
-                heuristic_floor = max(heuristic_floor, 80)
-            if jsonld_faq_detected:
-                heuristic_floor = max(heuristic_floor, 60)
+            evidence = await self._collect_faq_evidence(score)
+            html_content = score.signals_data.get('website_content', {}).get('html', '')
+            candidate_urls = evidence['candidate_urls']
+            fetched_pages = evidence['fetched_pages']
+            faq_items_count = evidence['faq_items_count']
+            jsonld_faq_detected = evidence['jsonld_faq_detected']
+            detected_features = evidence['detected_features']
 
             prompt = f"""
             Analyze FAQ and self-service content richness.
@@ -773,22 +1114,7 @@ class LeadScoringEngine:
 
             llm = await self._call_openai_structured(prompt, FAQRichnessAnalysis)
 
-            # Merge heuristic detections with LLM output
-            merged_count = max(getattr(llm, 'faq_elements_count', 0) or 0, faq_items_count)
-            merged_features = sorted(list(set((getattr(llm, 'self_service_features', []) or []) + list(set(detected_features)))))
-            final_score = max(llm.score or 0, heuristic_floor)
-
-            score.faq_richness_score = min(100, max(0, final_score))
-            payload = {
-                'score': score.faq_richness_score,
-                'faq_elements_count': merged_count,
-                'self_service_features': merged_features,
-                'reasoning': getattr(llm, 'reasoning', '') or 'Heuristic and LLM-based analysis',
-                'detected_faq_urls': candidate_urls,
-                'jsonld_faq_detected': jsonld_faq_detected,
-                'heuristic_floor_applied': heuristic_floor,
-            }
-            score.signals_data['faq_richness'] = payload
+            self._apply_faq_richness(score, llm, evidence)
             
             logger.info(f"FAQ richness score: {score.faq_richness_score}/100")
             
@@ -885,14 +1211,10 @@ class LeadScoringEngine:
         """Analyze hiring velocity in support and sales roles"""
         try:
             # Get company from database to check for job postings
-            db = next(get_db_session())
-            try:
-                company = db.query(Company).filter(Company.id == score.company_id).first()
-                current_support_roles = company.support_roles if hasattr(company, 'support_roles') else 0
-                current_sales_roles = company.sales_roles if hasattr(company, 'sales_roles') else 0
-                total_roles = company.total_roles if hasattr(company, 'total_roles') else 0
-            finally:
-                db.close()
+            company = await self._load_company_fields(score.company_id, 'support_roles', 'sales_roles', 'total_roles')
+            current_support_roles = company['support_roles']
+            current_sales_roles = company['sales_roles']
+            total_roles = company['total_roles']
             
             prompt = f"""
             Analyze hiring velocity and growth signals for customer-facing roles.
@@ -1016,14 +1338,10 @@ class LeadScoringEngine:
         """Analyze tech team size relative to overall company"""
         try:
             # Get current job postings from database
-            db = next(get_db_session())
-            try:
-                company = db.query(Company).filter(Company.id == score.company_id).first()
-                total_roles = company.total_roles if hasattr(company, 'total_roles') else 0
-                ai_roles = company.ai_roles if hasattr(company, 'ai_roles') else 0
-                employee_count = company.employee_count or 50
-            finally:
-                db.close()
+            company = await self._load_company_fields(score.company_id, 'total_roles', 'ai_roles', 'employee_count')
+            total_roles = company['total_roles']
+            ai_roles = company['ai_roles']
+            employee_count = company['employee_count'] or 50
             
             prompt = f"""
             Analyze tech team size and engineering ratio.
@@ -1068,12 +1386,8 @@ class LeadScoringEngine:
         """Analyze presence of AI/ML roles and capabilities"""
         try:
             # Get AI role count from database
-            db = next(get_db_session())
-            try:
-                company = db.query(Company).filter(Company.id == score.company_id).first()
-                ai_roles = company.ai_roles if hasattr(company, 'ai_roles') else 0
-            finally:
-                db.close()
+            company = await self._load_company_fields(score.company_id, 'ai_roles')
+            ai_roles = company['ai_roles']
             
             prompt = f"""
             Analyze AI/ML capabilities and internal AI development.
@@ -1202,6 +1516,130 @@ class LeadScoringEngine:
             logger.error(f"Error analyzing chat readiness: {e}")
             score.chat_ready_score = 0
 
+    # CONSOLIDATED SIGNAL GROUP ANALYZERS
+    #
+    # Each group sends the shared website evidence once and asks for all of
+    # its signals in a single composite structured output, instead of one
+    # prompt (with the same HTML sample) per signal.
+
+    def _group_prompt(self, score: LeadScore, title: str, context: str, signal_keys: List[str]) -> str:
+        rubrics = "\n".join(f"            - {key}: {SIGNAL_RUBRICS[key]}" for key in signal_keys)
+        return f"""
+            Analyze this company for AI chatbot sales opportunity signals ({title}).
+            Company: {score.company_name}
+            Domain: {score.domain}
+            {context}
+
+            Return one analysis per signal. Score each from 0-100 using these rubrics:
+{rubrics}
+
+            Fill every list field with the concrete evidence you relied on (empty if none),
+            and base inferential signals (reviews, traffic, growth, funding) on company type and typical patterns.
+            """
+
+    def _record_group(self, score: LeadScore, result: BaseModel, appliers: Dict[str, Callable] = None):
+        """Store each signal of a composite result the way the per-signal analyzers do"""
+        appliers = appliers or {}
+        for key in type(result).model_fields:
+            signal = getattr(result, key)
+            if key in appliers:
+                appliers[key](signal)
+            else:
+                setattr(score, SIGNAL_SCORE_FIELDS[key], min(100, max(0, signal.score)))
+                score.signals_data[key] = signal.model_dump()
+            logger.info(f"{key.replace('_', ' ').capitalize()} score: {getattr(score, SIGNAL_SCORE_FIELDS[key])}/100")
+
+    def _reset_group(self, score: LeadScore, model_cls: Type[BaseModel]):
+        for key in model_cls.model_fields:
+            setattr(score, SIGNAL_SCORE_FIELDS[key], 0)
+
+    async def _analyze_support_intensity_group(self, score: LeadScore):
+        """Support infrastructure, KB depth, post-purchase, tooling and complaints in one call"""
+        try:
+            website_content = score.signals_data.get('website_content', {})
+            evidence = self._detect_support_resources(score)
+            help_content = await self._fetch_help_content(score)
+
+            context = f"""Website content: {evidence['html_sample']}
+            Links found: {website_content.get('links', [])[:50]}
+            Scripts loaded: {website_content.get('scripts', [])}
+            Candidate support links found: {evidence['support_links']}
+            Pre-detected indicators: {evidence['pre_detected_evidence']}
+            Help content found: {help_content}"""
+            prompt = self._group_prompt(score, "support intensity", context, list(SupportIntensityGroupAnalysis.model_fields))
+
+            result = await self._call_openai_structured(prompt, SupportIntensityGroupAnalysis)
+            self._record_group(score, result, {
+                'support_infrastructure': lambda signal: self._apply_support_infrastructure(score, signal, evidence),
+            })
+
+        except Exception as e:
+            logger.error(f"Error analyzing support intensity group: {e}")
+            self._reset_group(score, SupportIntensityGroupAnalysis)
+
+    async def _analyze_digital_presence_group(self, score: LeadScore):
+        """Sitemap density, FAQ richness, traffic scale and catalog size in one call"""
+        try:
+            website_content = score.signals_data.get('website_content', {})
+            sitemap_data, faq_evidence = await asyncio.gather(
+                self._fetch_sitemap_data(score), self._collect_faq_evidence(score)
+            )
+
+            context = f"""Homepage HTML: {website_content.get('html', '')[:3000]}
+            Links found: {website_content.get('links', [])[:100]}
+            Sitemap data: {sitemap_data}
+            Candidate FAQ URLs: {faq_evidence['candidate_urls']}
+            Sample FAQ Page Snippets: {[p[1][:800] for p in faq_evidence['fetched_pages'][:2]]}
+            Pre-detected counts: faq_items_count={faq_evidence['faq_items_count']}, jsonld_faq_detected={faq_evidence['jsonld_faq_detected']}, self_service_features={list(set(faq_evidence['detected_features']))}"""
+            prompt = self._group_prompt(score, "digital presence", context, list(DigitalPresenceGroupAnalysis.model_fields))
+
+            result = await self._call_openai_structured(prompt, DigitalPresenceGroupAnalysis)
+            self._record_group(score, result, {
+                'faq_richness': lambda signal: self._apply_faq_richness(score, signal, faq_evidence),
+            })
+
+        except Exception as e:
+            logger.error(f"Error analyzing digital presence group: {e}")
+            self._reset_group(score, DigitalPresenceGroupAnalysis)
+
+    async def _analyze_growth_signals_group(self, score: LeadScore):
+        """Hiring velocity, headcount growth and recent funding in one call"""
+        try:
+            company = await self._load_company_fields(score.company_id, 'support_roles', 'sales_roles', 'total_roles')
+
+            context = f"""Current support roles: {company['support_roles']}
+            Current sales roles: {company['sales_roles']}
+            Total open roles: {company['total_roles']}"""
+            prompt = self._group_prompt(score, "growth and hiring", context, list(GrowthSignalsGroupAnalysis.model_fields))
+
+            result = await self._call_openai_structured(prompt, GrowthSignalsGroupAnalysis)
+            self._record_group(score, result)
+
+        except Exception as e:
+            logger.error(f"Error analyzing growth signals group: {e}")
+            self._reset_group(score, GrowthSignalsGroupAnalysis)
+
+    async def _analyze_implementation_feasibility_group(self, score: LeadScore):
+        """Tech team size, AI roles, existing bots and chat readiness in one call"""
+        try:
+            website_content = score.signals_data.get('website_content', {})
+            company = await self._load_company_fields(score.company_id, 'total_roles', 'ai_roles', 'employee_count')
+
+            context = f"""Employee count: {company['employee_count'] or 50}
+            Total open roles: {company['total_roles']}
+            AI-related roles: {company['ai_roles']}
+            Scripts: {website_content.get('scripts', [])}
+            HTML: {website_content.get('html', '')[:3000]}"""
+            prompt = self._group_prompt(score, "implementation feasibility", context,
+                                        list(ImplementationFeasibilityGroupAnalysis.model_fields))
+
+            result = await self._call_openai_structured(prompt, ImplementationFeasibilityGroupAnalysis)
+            self._record_group(score, result)
+
+        except Exception as e:
+            logger.error(f"Error analyzing implementation feasibility group: {e}")
+            self._reset_group(score, ImplementationFeasibilityGroupAnalysis)
+
     async def _call_openai_structured(self, prompt: str, response_model: Type[BaseModel]) -> BaseModel:
         """Make OpenAI API call with structured outputs"""
         try:
@@ -1226,10 +1664,38 @@ class LeadScoringEngine:
             else:
                 logger.info(f"Using model {self.openai_model} with OpenAI defaults (no custom max_tokens/temperature)")
             
-            response = self.enricher.client.beta.chat.completions.parse(**api_params)
+            # Unchanged input: reuse the phase's stored answer
+            phase, cache = _current_phase.get(), _phase_cache.get()
+            input_hash = None
+            if phase is not None and cache is not None:
+                input_hash = request_key({**api_params, 'response_format': json_schema_format(
+                    response_model.__name__, response_model.model_json_schema())})
+                reused = cache.lookup(phase, input_hash, response_model)
+                if reused is not None:
+                    return reused
+            
+            batch = _llm_batch.get()
+            if batch is not None:
+                answer, valid = batch.handle(api_params, response_model, self)
+                if answer is not None:
+                    if input_hash is not None and valid:
+                        cache.store(phase, input_hash, answer)
+                    return answer
+            
+            usage = _llm_usage.get()
+            if usage is not None:
+                usage['llm_calls'] += 1
+            # Global cap shared by all companies being scored on this loop
+            async with _global_llm_semaphore():
+                response = await self.async_client.beta.chat.completions.parse(**api_params)
+            if usage is not None and getattr(response, 'usage', None):
+                usage['prompt_tokens'] += response.usage.prompt_tokens or 0
+                usage['completion_tokens'] += response.usage.completion_tokens or 0
             
             parsed = response.choices[0].message.parsed
             if parsed:
+                if input_hash is not None:
+                    cache.store(phase, input_hash, parsed)
                 return parsed
             # Fallback if parsed not available
             logger.warning("Structured parse returned no parsed payload; using default response")
@@ -1244,8 +1710,8 @@ class LeadScoringEngine:
         """Build a safe default instance for any response model with required fields."""
         defaults: Dict[str, object] = {}
         for field_name, field in model_cls.model_fields.items():
-            # Prefer explicit defaults if provided
-            if field.default is not None:
+            # Prefer explicit defaults if provided (required fields report PydanticUndefined)
+            if not field.is_required():
                 defaults[field_name] = field.default
                 continue
             # Common fields
@@ -1255,6 +1721,10 @@ class LeadScoringEngine:
             if field_name == 'reasoning':
                 defaults[field_name] = "Analysis failed due to API error"
                 continue
+            # Composite (consolidated mode) models nest one model per signal
+            if isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel):
+                defaults[field_name] = self._build_default_response(field.annotation)
+                continue
             # Type-based defaults
             annotation = field.annotation
             origin = get_origin(annotation)
@@ -1281,19 +1751,20 @@ class LeadScoringEngine:
 
 # Convenience functions for easy usage
 
-async def score_company_by_id(company_id: int, progress_callback: Optional[Callable[[str, int, int], Awaitable[None]]] = None) -> LeadScore:
-    """Score a single company by ID"""
+async def score_company_by_id(company_id: int, progress_callback: Optional[Callable[[str, int, int], Awaitable[None]]] = None,
+                              mode: Optional[str] = None, force: bool = False) -> LeadScore:
+    """Score a single company by ID (force: rerun phases whose input is unchanged)"""
     engine = LeadScoringEngine()
-    return await engine.score_company(company_id, progress_callback)
+    return await engine.score_company(company_id, progress_callback, mode=mode, force=force)
 
-async def score_multiple_companies(company_ids: List[int]) -> List[LeadScore]:
+async def score_multiple_companies(company_ids: List[int], mode: Optional[str] = None, force: bool = False) -> List[LeadScore]:
     """Score multiple companies in batch"""
     engine = LeadScoringEngine()
     results = []
     
     for company_id in company_ids:
         try:
-            score = await engine.score_company(company_id)
+            score = await engine.score_company(company_id, mode=mode, force=force)
             results.append(score)
             # Rate limiting between companies
             await asyncio.sleep(1)
@@ -1303,29 +1774,251 @@ async def score_multiple_companies(company_ids: List[int]) -> List[LeadScore]:
     
     return results
 
+# Batch backend
+
+class BatchLLMCalls:
+    """Routes _call_openai_structured through one batch job.
+
+    While recording, every structured call is captured as a request body and
+    answered with the default (zero) response. While replaying, calls are
+    answered from the batch results; a prompt that was not recorded (its
+    evidence changed between passes) returns None and is sent live.
+    handle() also says whether the answer is a real result, so placeholders
+    and failed lines never reach the phase cache.
+    """
+
+    def __init__(self):
+        self.requests: Dict[str, Dict] = {}
+        self.results: Dict[str, Dict] = {}
+        self.replaying = False
+        self.live_fallbacks = 0
+
+    def handle(self, api_params: Dict, response_model: Type[BaseModel],
+               engine: 'LeadScoringEngine') -> Tuple[Optional[BaseModel], bool]:
+        """(answer, valid): valid is False for the recording placeholder and for failed lines"""
+        body = {**api_params, 'response_format': json_schema_format(response_model.__name__,
+                                                                    response_model.model_json_schema())}
+        key = request_key(body)
+        if not self.replaying:
+            self.requests[key] = body
+            return engine._build_default_response(response_model), False
+
+        result = self.results.get(key)
+        if result is None:
+            self.live_fallbacks += 1
+            return None, False
+        data = message_json(result)
+        if data is None:
+            logger.warning(f"Batch result for {response_model.__name__} unusable: {result.get('error')}")
+            return engine._build_default_response(response_model), False
+        try:
+            return response_model.model_validate(data), True
+        except ValidationError as e:
+            logger.warning(f"Batch result for {response_model.__name__} failed validation: {e}")
+            return engine._build_default_response(response_model), False
+
+async def score_companies_via_batch(company_ids: List[int], mode: Optional[str] = None,
+                                    provider: Optional[BatchProvider] = None,
+                                    poll_seconds: Optional[float] = None, force: bool = False) -> List[LeadScore]:
+    """Score companies with all LLM calls submitted as one offline batch job.
+
+    Runs in two passes. The first gathers evidence for every company (pages go
+    into the fetch cache) and records the structured prompts; those are
+    submitted as one batch and polled to completion. The second pass rebuilds
+    the same prompts from cached pages and answers them from the batch output.
+    Phases with unchanged input reuse their stored result in both passes and
+    are not submitted. Returns the scores without saving them.
+    """
+    engine = LeadScoringEngine()
+    calls = BatchLLMCalls()
+    semaphore = asyncio.Semaphore(BATCH_COMPANY_CONCURRENCY)
+
+    async def score_all() -> List[LeadScore]:
+        async def score_one(company_id: int) -> Optional[LeadScore]:
+            async with semaphore:
+                try:
+                    return await engine.score_company(company_id, mode=mode, force=force)
+                except Exception as e:
+                    logger.error(f"Failed to score company {company_id}: {e}")
+                    return None
+        scored = await asyncio.gather(*(score_one(company_id) for company_id in company_ids))
+        return [score for score in scored if score is not None]
+
+    token = _llm_batch.set(calls)
+    try:
+        await score_all()
+        logger.info(f"Recorded {len(calls.requests)} scoring prompts for {len(company_ids)} companies")
+        calls.results = await asyncio.to_thread(
+            run_batch, calls.requests, provider,
+            f"lead scoring: {len(company_ids)} companies ({mode or DEFAULT_SCORING_MODE})", poll_seconds
+        )
+        calls.replaying = True
+        scores = await score_all()
+    finally:
+        _llm_batch.reset(token)
+
+    if calls.live_fallbacks:
+        logger.warning(f"{calls.live_fallbacks} scoring prompts changed between passes and were sent live")
+    for score in scores:
+        if score.run_stats is not None:
+            score.run_stats['backend'] = 'batch'
+    return scores
+
+# Scoring mode benchmark
+
+CATEGORY_TOTALS = {
+    'support_intensity': 'support_intensity_total',
+    'digital_presence': 'digital_presence_total',
+    'growth_signals': 'growth_signals_total',
+    'implementation_feasibility': 'implementation_feasibility_total',
+}
+
+def _rank(values: List[float]) -> List[float]:
+    """Average ranks (ties share the mean rank)"""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+def _spearman(xs: List[float], ys: List[float]) -> Optional[float]:
+    """Spearman rank correlation, None when undefined (fewer than 3 points or no variance)"""
+    if len(xs) < 3:
+        return None
+    rx, ry = _rank(xs), _rank(ys)
+    mx, my = sum(rx) / len(rx), sum(ry) / len(ry)
+    cov = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    var = math.sqrt(sum((a - mx) ** 2 for a in rx) * sum((b - my) ** 2 for b in ry))
+    return round(cov / var, 3) if var else None
+
+def build_benchmark_report(pairs: List[Tuple[LeadScore, LeadScore]],
+                           modes: Tuple[str, str] = SCORING_MODES) -> Dict:
+    """Compare cost, latency and scores of (baseline, candidate) runs of the same companies"""
+    baseline_mode, candidate_mode = modes
+    report = {'modes': list(modes), 'companies': len(pairs), 'per_mode': {}, 'signals': {},
+              'categories': {}, 'overall': {}, 'details': []}
+    if not pairs:
+        return report
+
+    def average(values):
+        return round(sum(values) / len(values), 2)
+
+    for position, mode in enumerate(modes):
+        stats = [pair[position].run_stats or {} for pair in pairs]
+        report['per_mode'][mode] = {
+            key: average([s.get(key, 0) for s in stats])
+            for key in ('duration_seconds', 'llm_calls', 'prompt_tokens', 'completion_tokens')
+        }
+
+    for signal, field in SIGNAL_SCORE_FIELDS.items():
+        diffs = [abs(getattr(b, field) - getattr(c, field)) for b, c in pairs]
+        report['signals'][signal] = {
+            'mean_abs_diff': average(diffs),
+            'within_10_pct': round(100 * sum(d <= 10 for d in diffs) / len(diffs), 1),
+        }
+
+    for category, field in CATEGORY_TOTALS.items():
+        report['categories'][category] = {'mean_abs_diff': average([abs(getattr(b, field) - getattr(c, field)) for b, c in pairs])}
+
+    overall_diffs = [abs(b.overall_score - c.overall_score) for b, c in pairs]
+    report['overall'] = {
+        'mean_abs_diff': average(overall_diffs),
+        'max_abs_diff': max(overall_diffs),
+        'rank_correlation': _spearman([b.overall_score for b, _ in pairs], [c.overall_score for _, c in pairs]),
+    }
+    report['details'] = [
+        {'company_id': b.company_id, 'company_name': b.company_name,
+         baseline_mode: b.overall_score, candidate_mode: c.overall_score}
+        for b, c in pairs
+    ]
+    return report
+
+async def benchmark_scoring_modes(company_ids: List[int], modes: Tuple[str, str] = SCORING_MODES) -> Dict:
+    """Score each company in both modes (nothing is saved) and report cost, latency and agreement
+
+    Stored phase results are bypassed so both modes are measured on live calls.
+    """
+    engine = LeadScoringEngine()
+    pairs = []
+    for company_id in company_ids:
+        try:
+            baseline = await engine.score_company(company_id, mode=modes[0], force=True)
+            candidate = await engine.score_company(company_id, mode=modes[1], force=True)
+            pairs.append((baseline, candidate))
+        except Exception as e:
+            logger.error(f"Benchmark failed for company {company_id}: {e}")
+    return build_benchmark_report(pairs, modes)
+
+def format_benchmark_report(report: Dict) -> str:
+    """Render a benchmark report as a plain-text side-by-side table"""
+    baseline_mode, candidate_mode = report['modes']
+    lines = [f"Scoring mode benchmark: {baseline_mode} vs {candidate_mode} ({report['companies']} companies)", ""]
+    if not report['companies']:
+        return "\n".join(lines + ["No companies were scored."])
+
+    lines.append(f"{'Per company (avg)':<22}{baseline_mode:>14}{candidate_mode:>14}")
+    for key, label in (('duration_seconds', 'Wall time (s)'), ('llm_calls', 'LLM calls'),
+                       ('prompt_tokens', 'Prompt tokens'), ('completion_tokens', 'Completion tokens')):
+        lines.append(f"{label:<22}{report['per_mode'][baseline_mode][key]:>14}{report['per_mode'][candidate_mode][key]:>14}")
+
+    lines += ["", f"{'Signal':<26}{'Mean |diff|':>12}{'Within 10':>12}"]
+    for signal, stats in report['signals'].items():
+        lines.append(f"{signal:<26}{stats['mean_abs_diff']:>12}{str(stats['within_10_pct']) + '%':>12}")
+
+    lines += ["", f"{'Category total':<26}{'Mean |diff|':>12}"]
+    for category, stats in report['categories'].items():
+        lines.append(f"{category:<26}{stats['mean_abs_diff']:>12}")
+
+    overall = report['overall']
+    rank_correlation = overall['rank_correlation'] if overall['rank_correlation'] is not None else 'n/a'
+    lines += ["", f"Overall score: mean |diff| {overall['mean_abs_diff']}, max |diff| {overall['max_abs_diff']}, "
+                  f"rank correlation {rank_correlation}", ""]
+    for detail in report['details']:
+        lines.append(f"  {detail['company_name'][:30]:<32}{detail[baseline_mode]:>5}{detail[candidate_mode]:>5}")
+    return "\n".join(lines)
+
+def compact_signals_data(signals_data: Dict) -> Dict:
+    """signals_data as stored in lead_scoring_data: website_content reduced to a summary"""
+    compact = {key: value for key, value in signals_data.items() if key != 'website_content'}
+    website = signals_data.get('website_content')
+    if website:
+        compact['website_summary'] = {
+            'title': website.get('title', ''),
+            'meta_description': website.get('meta_description', ''),
+            'links_count': len(website.get('links') or []),
+            'scripts_count': len(website.get('scripts') or []),
+            'json_ld_count': len(website.get('json_ld') or []),
+        }
+    return compact
+
 def save_lead_score_to_db(score: LeadScore):
     """Save lead score results to database"""
-    db = next(get_db_session())
     try:
-        company = db.query(Company).filter(Company.id == score.company_id).first()
-        if company:
+        with get_db_session() as db:
+            company = db.query(Company).filter(Company.id == score.company_id).first()
+            if not company:
+                return
             # Update company with lead scoring results
             company.lead_score = score.overall_score
             company.support_intensity_score = score.support_intensity_total
             company.growth_signals_score = score.growth_signals_total
             company.implementation_feasibility_score = score.implementation_feasibility_total
             company.digital_presence_score = score.digital_presence_total
-            company.lead_scoring_data = score.signals_data
+            company.lead_scoring_data = compact_signals_data(score.signals_data)
             company.lead_scored_at = datetime.now()
-            
-            db.commit()
-            logger.info(f"Saved lead score for {company.name}: {score.overall_score}/400")
+            company_name = company.name
+        # The session commits on leaving the block
+        invalidate_leadgen_stats()
+        logger.info(f"Saved lead score for {company_name}: {score.overall_score}/400")
         
     except Exception as e:
-        db.rollback()
         logger.error(f"Error saving lead score to database: {e}")
-    finally:
-        db.close()
 
 if __name__ == "__main__":
     # Example usage
@@ -4,19 +4,29 @@ OpenAI-powered Company Data Enrichment
 
 Uses OpenAI's web search capabilities to find and enrich company information
 including domains, industry details, and basic company information.
+
+OpenAI calls go through the process-wide 'openai' rate limiter (see
+app.services.llm_rate_limiter), so concurrent enrichment batches and research
+workers back off together; its LLM_OPENAI_* settings bound them.
+
+Environment Variables:
+- OPENAI_API_KEY: Your OpenAI API key
+- OPENAI_MODEL: OpenAI model to use (default: gpt-4o-mini)
 """
 
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-import asyncio
 
 from openai import OpenAI
 from pydantic import BaseModel
 from typing import Optional, List
 from .database import get_database_manager
+from app.services.llm_batch_service import BatchProvider, json_schema_format, message_json, run_batch
+from app.services.llm_rate_limiter import call_with_backoff, get_rate_limiter
 from app.models.leadgen_models import LeadgenCompany as Company
 from dotenv import load_dotenv
 
@@ -50,7 +60,9 @@ class OpenAICompanyEnricher:
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self.client = OpenAI(api_key=self.openai_api_key)
+        # Retries are handled here so 429s reach the shared rate limiter
+        self.client = OpenAI(api_key=self.openai_api_key, max_retries=0)
+        self.rate_limiter = get_rate_limiter('openai')
         self.db_manager = get_database_manager()
     
     def enrich_company_data(self, company_name: str, existing_info: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -65,29 +77,12 @@ class OpenAICompanyEnricher:
             Dict containing enriched company information
         """
         try:
-            # Create search query
-            search_query = f"company information for {company_name}"
-            if existing_info and existing_info.get('location'):
-                search_query += f" located in {existing_info['location']}"
-            
-            # Create enrichment prompt
-            enrichment_prompt = self._create_enrichment_prompt(company_name, existing_info)
-            
+            search_query = self._search_query(company_name, existing_info)
             logger.info(f"Enriching company data for: {company_name}")
             
             # Call OpenAI API with structured outputs
-            response = self.client.beta.chat.completions.parse(
-                model=self.openai_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a company research assistant. Search the web for accurate, up-to-date company information. Always provide factual data and set fields to null when information is not available or uncertain."
-                    },
-                    {
-                        "role": "user", 
-                        "content": enrichment_prompt
-                    }
-                ],
+            response = self._parse_with_backoff(
+                **self._enrichment_request(company_name, existing_info),
                 response_format=CompanyEnrichmentData
                 # Note: structured outputs only support default temperature (1.0)
             )
@@ -116,6 +111,32 @@ class OpenAICompanyEnricher:
                 'enrichment_source': 'openai_web_search_failed'
             }
     
+    def _search_query(self, company_name: str, existing_info: Dict[str, Any] = None) -> str:
+        search_query = f"company information for {company_name}"
+        if existing_info and existing_info.get('location'):
+            search_query += f" located in {existing_info['location']}"
+        return search_query
+    
+    def _enrichment_request(self, company_name: str, existing_info: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Model and messages of an enrichment call (shared by the live and batch paths)"""
+        return {
+            "model": self.openai_model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a company research assistant. Search the web for accurate, up-to-date company information. Always provide factual data and set fields to null when information is not available or uncertain."
+                },
+                {
+                    "role": "user", 
+                    "content": self._create_enrichment_prompt(company_name, existing_info)
+                }
+            ]
+        }
+    
+    def _parse_with_backoff(self, **kwargs):
+        """Structured-output call through the shared rate limiter, retrying throttles and transient errors"""
+        return call_with_backoff(self.rate_limiter, self.client.beta.chat.completions.parse, **kwargs)
+
     def _create_enrichment_prompt(self, company_name: str, existing_info: Dict[str, Any] = None) -> str:
         """Create a detailed prompt for company enrichment"""
         
@@ -207,8 +228,7 @@ Only provide information you are confident about. Return ONLY the JSON object, n
                     logger.error(error_msg)
                     raise ValueError(error_msg)
                 
-                logger.info(f"Found company: {company.name} (ID: {company_id})")
-                
+                company_name = company.name
                 # Prepare existing info
                 existing_info = {
                     'industry': company.industry,
@@ -217,23 +237,23 @@ Only provide information you are confident about. Return ONLY the JSON object, n
                     'domain': company.domain,
                     'founded_year': company.founded_year
                 }
-                logger.info(f"Existing info for {company.name}: {existing_info}")
-                
-                # Get enriched data
-                logger.info(f"Calling enrich_company_data for {company.name}")
-                enriched_data = self.enrich_company_data(company.name, existing_info)
-                logger.info(f"Enrichment result for {company.name}: {enriched_data}")
-                
-                # Update company with enriched data if successful
-                if 'error' not in enriched_data:
-                    logger.info(f"Updating company {company.name} with enriched data")
-                    self._update_company_with_enriched_data(company, enriched_data)
-                    session.commit()
-                    logger.info(f"Successfully updated company {company.name} with enriched data")
-                else:
-                    logger.error(f"Enrichment failed for {company.name}: {enriched_data.get('error')}")
-                
-                return enriched_data
+            
+            # The web search call can take a while; don't hold a pooled connection across it
+            logger.info(f"Existing info for {company_name}: {existing_info}")
+            enriched_data = self.enrich_company_data(company_name, existing_info)
+            
+            # Update company with enriched data if successful
+            if 'error' not in enriched_data:
+                with self.db_manager.session_scope() as session:
+                    company = session.query(Company).filter(Company.id == company_id).first()
+                    if company:
+                        self._update_company_with_enriched_data(company, enriched_data)
+                        session.commit()
+                        logger.info(f"Successfully updated company {company_name} with enriched data")
+            else:
+                logger.error(f"Enrichment failed for {company_name}: {enriched_data.get('error')}")
+            
+            return enriched_data
                 
         except Exception as e:
             logger.error(f"Exception in enrich_company_by_id for company {company_id}: {e}", exc_info=True)
@@ -295,32 +315,72 @@ Only provide information you are confident about. Return ONLY the JSON object, n
             company.technology_stack.append(f"enriched:{json.dumps(enrichment_metadata)}")
     
     def enrich_companies_batch(self, company_ids: List[int], max_concurrent: int = 3) -> Dict[int, Dict[str, Any]]:
-        """Enrich multiple companies in batch with rate limiting"""
+        """Enrich multiple companies in batch; pacing comes from the shared rate limiter"""
         
         results = {}
+        workers = max(1, min(max_concurrent, self.rate_limiter.max_concurrency))
         
-        async def enrich_single(company_id: int):
-            try:
-                result = self.enrich_company_by_id(company_id)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='enrich') as pool:
+            for company_id, result in zip(company_ids, pool.map(self.enrich_company_by_id, company_ids)):
                 results[company_id] = result
-                # Add delay to respect rate limits
-                await asyncio.sleep(2)  # 2 second delay between requests
-            except Exception as e:
-                results[company_id] = {'error': str(e)}
         
-        async def run_batch():
-            semaphore = asyncio.Semaphore(max_concurrent)
-            
-            async def limited_enrich(company_id):
-                async with semaphore:
-                    await enrich_single(company_id)
-            
-            tasks = [limited_enrich(company_id) for company_id in company_ids]
-            await asyncio.gather(*tasks)
+        return results
+
+    def enrich_companies_via_batch(self, company_ids: List[int], provider: Optional[BatchProvider] = None,
+                                   poll_seconds: Optional[float] = None) -> Dict[int, Dict[str, Any]]:
+        """Enrich companies with one offline batch job instead of interactive calls (blocking until done)"""
+        
+        companies = {}
+        with self.db_manager.session_scope() as session:
+            for company in session.query(Company).filter(Company.id.in_(company_ids)).all():
+                companies[company.id] = (company.name, {
+                    'industry': company.industry,
+                    'employee_count': company.employee_count,
+                    'location': company.location,
+                    'domain': company.domain,
+                    'founded_year': company.founded_year
+                })
+        
+        response_format = json_schema_format('company_enrichment', CompanyEnrichmentData.model_json_schema())
+        requests = {
+            f"company-{company_id}": {**self._enrichment_request(name, existing_info), "response_format": response_format}
+            for company_id, (name, existing_info) in companies.items()
+        }
+        batch_results = run_batch(requests, provider, f"company enrichment: {len(requests)} companies", poll_seconds)
         
-        # Run the batch enrichment
-        asyncio.run(run_batch())
+        results = {}
+        for company_id in company_ids:
+            if company_id not in companies:
+                results[company_id] = {'error': f"Company with ID {company_id} not found"}
+                continue
+            name, existing_info = companies[company_id]
+            result = batch_results[f"company-{company_id}"]
+            data = message_json(result)
+            try:
+                enriched_data = CompanyEnrichmentData.model_validate(data).model_dump() if data is not None else None
+            except ValueError as e:
+                enriched_data = None
+                result = {'error': f"Invalid enrichment payload: {e}"}
+            if enriched_data is None:
+                results[company_id] = {
+                    'error': result.get('error') or "Failed to parse structured response",
+                    'enrichment_date': datetime.now().isoformat(),
+                    'enrichment_source': 'openai_batch_failed'
+                }
+                continue
+            
+            enriched_data['enrichment_date'] = datetime.now().isoformat()
+            enriched_data['enrichment_source'] = 'openai_batch'
+            enriched_data['original_query'] = self._search_query(name, existing_info)
+            with self.db_manager.session_scope() as session:
+                company = session.query(Company).filter(Company.id == company_id).first()
+                if company:
+                    self._update_company_with_enriched_data(company, enriched_data)
+                    session.commit()
+            results[company_id] = enriched_data
         
+        successful = sum(1 for r in results.values() if 'error' not in r)
+        logger.info(f"Batch enrichment applied to {successful}/{len(company_ids)} companies")
         return results
 
 def main():
@@ -332,6 +392,7 @@ def main():
     parser.add_argument('--company-name', type=str, help='Enrich company by name (direct search)')
     parser.add_argument('--batch', type=str, help='Comma-separated company IDs to enrich in batch')
     parser.add_argument('--sample', action='store_true', help='Enrich first 5 companies without domains')
+    parser.add_argument('--use-batch-api', action='store_true', help='Run --batch through one offline batch job (LLM_BATCH_PROVIDER)')
     
     args = parser.parse_args()
     
@@ -350,7 +411,10 @@ def main():
     elif args.batch:
         # Batch enrichment
         company_ids = [int(id.strip()) for id in args.batch.split(',')]
-        results = enricher.enrich_companies_batch(company_ids)
+        if args.use_batch_api:
+            results = enricher.enrich_companies_via_batch(company_ids)
+        else:
+            results = enricher.enrich_companies_batch(company_ids)
         print(json.dumps(results, indent=2))
     
     elif args.sample:
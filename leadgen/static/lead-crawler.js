@@ -96,7 +96,7 @@ async function startCrawling(e) {
 
 function connectCrawlerWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/ws`;
+    const wsUrl = `${protocol}//${window.location.host}/ws?task_id=${encodeURIComponent(crawlerTaskId)}`;
     
     crawlerSocket = new WebSocket(wsUrl);
     
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from database import get_db_session
 from models import Company
 from lead_scoring import score_company_by_id, save_lead_score_to_db, score_multiple_companies
+from lead_scoring import benchmark_scoring_modes, format_benchmark_report
 
 async def test_single_company(company_id: int):
     """Test scoring a single company"""
@@ -113,6 +114,14 @@ async def test_multiple_companies(company_ids: list):
     print(f"\n✅ All {len(results)} scores saved to database")
     return results
 
+async def test_benchmark_modes(company_ids: list):
+    """Compare per-signal and consolidated scoring on the same companies (nothing is saved)"""
+    print(f"⚖️  Benchmarking scoring modes on {len(company_ids)} companies")
+    report = await benchmark_scoring_modes(company_ids)
+    print()
+    print(format_benchmark_report(report))
+    return report
+
 def list_companies():
     """List available companies for testing"""
     db = next(get_db_session())
@@ -140,6 +149,7 @@ async def main():
         print("  python test_lead_scoring.py score <company_id>      # Score single company")
         print("  python test_lead_scoring.py batch <id1,id2,id3...>  # Score multiple companies")
         print("  python test_lead_scoring.py auto 5                  # Score first 5 unscored companies")
+        print("  python test_lead_scoring.py benchmark <id1,id2...>  # Compare per_signal vs consolidated mode")
         return
     
     command = sys.argv[1].lower()
@@ -196,8 +206,20 @@ async def main():
         finally:
             db.close()
             
+    elif command == "benchmark":
+        if len(sys.argv) < 3:
+            print("❌ Please provide comma-separated company IDs")
+            return
+        
+        try:
+            company_ids = [int(x.strip()) for x in sys.argv[2].split(',')]
+        except ValueError:
+            print("❌ Invalid company IDs")
+            return
+        await test_benchmark_modes(company_ids)
+            
     else:
-        print("❌ Unknown command. Use 'list', 'score', 'batch', or 'auto'")
+        print("❌ Unknown command. Use 'list', 'score', 'batch', 'auto', or 'benchmark'")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
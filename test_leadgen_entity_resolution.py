@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for leadgen entity resolution.
+
+Covers the pure resolver logic that decides which rows get merged:
+Soundex, blocking keys, the match rules and their union-find clustering,
+the block size limit, and dedupe_profiles() as used by the seeders. No
+database access is needed.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from app.services import leadgen_entity_resolution
+from app.services.leadgen_entity_resolution import (CompanyRecord, blocking_keys, dedupe_profiles, match_score,
+                                                    resolve_records, soundex)
+
+
+@dataclass
+class SeedProfile:
+    name: str
+    domain: Optional[str] = None
+    source: Optional[str] = None
+    industry: Optional[str] = None
+    employee_count: Optional[int] = None
+    location: Optional[str] = None
+
+
+def _records(*companies):
+    """Resolver records from (name, domain) pairs; earlier records rank higher"""
+    return [CompanyRecord(id=index, name=name, domain=domain, rank=(-index,))
+            for index, (name, domain) in enumerate(companies)]
+
+
+def _clusters(matches):
+    return sorted(sorted([m.survivor.id] + [d.id for d, _, _ in m.duplicates]) for m in matches)
+
+
+def test_soundex():
+    assert soundex('Robert') == soundex('Rupert') == 'R163'
+    assert soundex('Tymczak') == 'T522'
+    assert soundex('Ashcraft') == 'A261'
+    assert soundex('42') == ''
+
+
+def test_blocking_keys_share_name_and_domain_namespace():
+    """A domain-less name and a website of the same company land in the same k: block"""
+    name_only, website = _records(('ACME, LLC', None), ('Acme', 'https://www.acme.io'))
+    assert 'k:acme' in blocking_keys(name_only)
+    assert 'k:acme' in blocking_keys(website)
+
+
+def test_acme_variants_merge():
+    records = _records(('Acme Inc', 'acme.io'), ('ACME, LLC', None), ('Acme', 'https://acme.io/about'))
+    matches = resolve_records(records)
+
+    assert _clusters(matches) == [[0, 1, 2]]
+    assert matches[0].survivor.id == 0
+    reasons = {d.id: reason for d, _, reason in matches[0].duplicates}
+    assert reasons[2] == 'domain'
+    assert reasons[1] in ('name', 'name_domain')
+
+
+def test_different_domain_roots_never_match():
+    a, b = _records(('Acme', 'acme.io'), ('Acme', 'acmecorp.com'))
+    assert match_score(a, b) == (0.0, None)
+
+
+def test_domainless_record_does_not_chain_domain_roots():
+    """'Acme' without a website matches both sites, but only one of them may join its cluster"""
+    records = _records(('Acme', 'acme.io'), ('Acme', None), ('Acme', 'acmecorp.com'))
+    clusters = _clusters(resolve_records(records))
+
+    assert len(clusters) == 1
+    assert not {0, 2} <= set(clusters[0])
+
+
+def test_unrelated_companies_stay_apart():
+    records = _records(('Acme Robotics', None), ('Apex Robotics', None), ('Globex', 'globex.com'))
+    assert resolve_records(records) == []
+
+
+def test_oversized_blocks_are_skipped():
+    records = _records(('Acme Inc', None), ('ACME, LLC', None), ('Acme', None))
+    assert _clusters(resolve_records(records)) == [[0, 1, 2]]
+
+    previous = leadgen_entity_resolution.MAX_BLOCK_SIZE
+    leadgen_entity_resolution.MAX_BLOCK_SIZE = 2
+    try:
+        # Every block the three share now has three members, so no pair is compared
+        assert resolve_records(records) == []
+    finally:
+        leadgen_entity_resolution.MAX_BLOCK_SIZE = previous
+
+
+def test_dedupe_profiles_fills_fields_and_joins_sources():
+    profiles = [
+        SeedProfile('ACME, LLC', source='apollo', industry='Manufacturing'),
+        SeedProfile('Globex', domain='globex.com', source='apollo'),
+        SeedProfile('Acme Inc', domain='acme.io', source='yc_companies', location='Berlin'),
+        SeedProfile('Acme', domain='acme.io', source='apollo', employee_count=120),
+    ]
+    deduped = dedupe_profiles(profiles)
+
+    # The profile with a website and the most fields survives; order is otherwise kept
+    assert [p.name for p in deduped] == ['Globex', 'Acme Inc']
+    acme = deduped[1]
+    assert acme.domain == 'acme.io'
+    assert (acme.industry, acme.location, acme.employee_count) == ('Manufacturing', 'Berlin', 120)
+    assert acme.source == 'yc_companies+apollo'
+
+
+def test_dedupe_profiles_without_duplicates_is_unchanged():
+    profiles = [SeedProfile('Acme', domain='acme.io'), SeedProfile('Globex', domain='globex.com')]
+    assert dedupe_profiles(profiles) == profiles
+
+
+if __name__ == "__main__":
+    test_soundex()
+    test_blocking_keys_share_name_and_domain_namespace()
+    test_acme_variants_merge()
+    test_different_domain_roots_never_match()
+    test_domainless_record_does_not_chain_domain_roots()
+    test_unrelated_companies_stay_apart()
+    test_oversized_blocks_are_skipped()
+    test_dedupe_profiles_fills_fields_and_joins_sources()
+    test_dedupe_profiles_without_duplicates_is_unchanged()
+    print("✅ All entity resolution tests passed")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Tests for offline batch execution against the local file-based provider.
+
+Covers run_batch() end to end (success lines, per-line errors, unparseable
+JSON) and the two-pass record/replay that score_companies_via_batch builds on,
+including which batch answers are allowed into the lead scoring phase cache.
+No network or database access is needed.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+
+# leadgen.database creates its engine at import time; no connection is opened
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from pydantic import BaseModel
+
+from app.services import llm_batch_service
+from app.services.llm_batch_service import (LocalBatchProvider, json_schema_format, message_content,
+                                            message_json, run_batch)
+
+
+class SignalAnswer(BaseModel):
+    score: int
+    reasoning: str
+
+
+def _request(prompt: str, response_model=SignalAnswer) -> dict:
+    return {
+        'model': 'gpt-4o-mini',
+        'messages': [{'role': 'user', 'content': prompt}],
+        'response_format': json_schema_format(response_model.__name__, response_model.model_json_schema()),
+    }
+
+
+def _prompt_responder(body: dict) -> str:
+    """Answers by prompt: 'boom' fails the line, 'garbled' returns non-JSON, anything else scores 80"""
+    prompt = body['messages'][-1]['content']
+    if 'boom' in prompt:
+        raise RuntimeError('model overloaded')
+    if 'garbled' in prompt:
+        return '{"score": 80, "reasoning": '
+    return json.dumps({'score': 80, 'reasoning': f'answer to {prompt}'})
+
+
+class _BatchDir:
+    """Points run_batch and the local provider at a throwaway directory"""
+
+    def __enter__(self) -> str:
+        self.directory = tempfile.mkdtemp(prefix='llm_batch_test_')
+        self._previous = llm_batch_service.BATCH_DIR
+        llm_batch_service.BATCH_DIR = self.directory
+        return self.directory
+
+    def __exit__(self, *exc):
+        llm_batch_service.BATCH_DIR = self._previous
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def test_local_batch_success():
+    """Every request comes back under its custom_id; the default responder fills the schema"""
+    with _BatchDir() as directory:
+        statuses = []
+        results = run_batch({'a': _request('first'), 'b': _request('second')}, LocalBatchProvider(directory),
+                            'test', poll_seconds=0, on_status=lambda state, counts: statuses.append((state, counts)))
+
+        assert set(results) == {'a', 'b'}
+        assert message_json(results['a']) == {'score': 0, 'reasoning': ''}
+        assert statuses[-1] == ('completed', {'total': 2, 'completed': 2, 'failed': 0})
+        # The input file is cleaned up once results are collected
+        assert not [name for name in os.listdir(directory) if name.startswith('input_')]
+
+
+def test_local_batch_line_errors_and_invalid_json():
+    """A failing line is reported as an error; unparseable content is text but not JSON"""
+    with _BatchDir() as directory:
+        results = run_batch({'ok': _request('good'), 'failed': _request('boom'), 'bad': _request('garbled')},
+                            LocalBatchProvider(directory, _prompt_responder), 'test', poll_seconds=0)
+
+        assert message_json(results['ok']) == {'score': 80, 'reasoning': 'answer to good'}
+        assert results['failed'] == {'error': 'model overloaded'}
+        assert message_content(results['failed']) is None
+        assert message_content(results['bad']) == '{"score": 80, "reasoning": '
+        assert message_json(results['bad']) is None
+
+
+def test_empty_batch_submits_nothing():
+    assert run_batch({}, LocalBatchProvider(tempfile.gettempdir())) == {}
+
+
+def _scoring_engine():
+    from leadgen.lead_scoring import LeadScoringEngine
+    # Only the model name is needed while calls are answered by the batch
+    engine = LeadScoringEngine.__new__(LeadScoringEngine)
+    engine.openai_model = 'gpt-4o-mini'
+    return engine
+
+
+async def _score_prompts(engine, calls, cache, prompts):
+    """One scoring pass: each prompt is its own phase, as in score_company"""
+    from leadgen import lead_scoring
+    lead_scoring._llm_batch.set(calls)
+    lead_scoring._phase_cache.set(cache)
+    answers = {}
+    for prompt in prompts:
+        lead_scoring._current_phase.set(prompt)
+        answers[prompt] = await engine._call_openai_structured(prompt, SignalAnswer)
+    return answers
+
+
+def test_batch_llm_calls_record_and_replay():
+    """Pass one records prompts with placeholders; pass two answers them from the batch output"""
+    from leadgen.lead_scoring import BatchLLMCalls, PhaseCache
+
+    engine = _scoring_engine()
+    calls = BatchLLMCalls()
+    prompts = ['good', 'boom', 'garbled']
+
+    recorded = asyncio.run(_score_prompts(engine, calls, PhaseCache(), prompts))
+    assert len(calls.requests) == len(prompts)
+    assert all(answer.score == 0 for answer in recorded.values())
+
+    with _BatchDir() as directory:
+        calls.results = run_batch(calls.requests, LocalBatchProvider(directory, _prompt_responder),
+                                  'test', poll_seconds=0)
+    calls.replaying = True
+
+    answer, valid = calls.handle(*_handle_args(engine, 'good'))
+    assert valid and answer.score == 80
+    for prompt in ('boom', 'garbled'):
+        answer, valid = calls.handle(*_handle_args(engine, prompt))
+        assert not valid and answer.score == 0
+    # A prompt that changed between passes is left to a live call
+    assert calls.handle(*_handle_args(engine, 'changed evidence')) == (None, False)
+    assert calls.live_fallbacks == 1
+
+
+def _handle_args(engine, prompt: str):
+    """Arguments _call_openai_structured passes to BatchLLMCalls.handle for a prompt"""
+    api_params = {
+        'model': engine.openai_model,
+        'messages': [
+            {'role': 'system', 'content': 'You are an expert at analyzing companies for AI chatbot sales opportunities.'},
+            {'role': 'user', 'content': prompt}
+        ],
+        'response_format': SignalAnswer,
+        'max_tokens': int(os.getenv('LEAD_SCORING_MAX_TOKENS', '1500')),
+        'temperature': float(os.getenv('LEAD_SCORING_TEMPERATURE', '0.3')),
+    }
+    return api_params, SignalAnswer, engine
+
+
+def test_batch_replay_only_caches_valid_answers():
+    """Failed or unparseable batch lines must not be stored as phase results"""
+    from leadgen.lead_scoring import BatchLLMCalls, PhaseCache
+
+    engine = _scoring_engine()
+    calls = BatchLLMCalls()
+    prompts = ['good', 'boom', 'garbled']
+
+    record_cache = PhaseCache()
+    asyncio.run(_score_prompts(engine, calls, record_cache, prompts))
+    assert record_cache.entries() == {}
+
+    with _BatchDir() as directory:
+        calls.results = run_batch(calls.requests, LocalBatchProvider(directory, _prompt_responder),
+                                  'test', poll_seconds=0)
+    calls.replaying = True
+
+    replay_cache = PhaseCache()
+    answers = asyncio.run(_score_prompts(engine, calls, replay_cache, prompts))
+    assert answers['good'].score == 80
+    assert answers['boom'].score == 0 and answers['garbled'].score == 0
+    entries = replay_cache.entries()
+    assert set(entries) == {'good'}
+
+    # The next run reuses the stored phase and sends only the failed ones again
+    next_calls = BatchLLMCalls()
+    next_cache = PhaseCache(entries)
+    asyncio.run(_score_prompts(engine, next_calls, next_cache, prompts))
+    assert next_cache.reused == ['good']
+    assert len(next_calls.requests) == 2
+
+
+if __name__ == "__main__":
+    test_local_batch_success()
+    test_local_batch_line_errors_and_invalid_json()
+    test_empty_batch_submits_nothing()
+    test_batch_llm_calls_record_and_replay()
+    test_batch_replay_only_caches_valid_answers()
+    print("✅ All batch service tests passed")